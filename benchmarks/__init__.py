@@ -0,0 +1,7 @@
+"""
+Нагрузочные замеры загрузки, скачивания и удаления файлов.
+
+Приложение yafs.cmd.rest.app запускается в том же процессе и вызывается через httpx.ASGITransport,
+файлы хранятся в локальном хранилище во временной директории, поэтому сеть и S3 не нужны.
+Нужны только локальные Postgres и Redis из docker-compose.yaml с примененными миграциями.
+"""
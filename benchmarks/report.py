@@ -0,0 +1,124 @@
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Self
+
+MEGABYTE = 1024 * 1024
+
+
+@dataclass
+class LatencySchema:
+    """
+    Задержки операций сценария в миллисекундах.
+    """
+
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+    @classmethod
+    def from_samples(cls, samples: list[float]) -> Self:
+        if not samples:
+            return cls(p50=0.0, p95=0.0, p99=0.0, max=0.0)
+        ms = sorted(sample * 1000 for sample in samples)
+        if len(ms) == 1:
+            return cls(p50=ms[0], p95=ms[0], p99=ms[0], max=ms[0])
+        quantiles = statistics.quantiles(ms, n=100, method='inclusive')
+        return cls(p50=quantiles[49], p95=quantiles[94], p99=quantiles[98], max=ms[-1])
+
+
+@dataclass
+class ScenarioResultSchema:
+    """
+    Результат одного сценария: операция, размер файла и количество одновременных запросов.
+    """
+
+    operation: str
+    size: int
+    concurrency: int
+    operations: int
+    errors: int
+    bytes: int
+    seconds: float
+    mb_per_s: float
+    ops_per_s: float
+    latency_ms: LatencySchema
+    peak_rss_mb: float
+
+
+@dataclass
+class ReportSchema:
+    """
+    Машиночитаемый отчет, по которому сравниваются результаты между релизами.
+    """
+
+    version: str
+    started_at: str
+    python: str = field(default_factory=lambda: sys.version.split()[0])
+    platform: str = field(default_factory=platform.platform)
+    cpu_count: int = field(default_factory=lambda: os.cpu_count() or 1)
+    params: dict[str, object] = field(default_factory=dict)
+    scenarios: list[ScenarioResultSchema] = field(default_factory=list)
+
+    def to_dict(self: Self) -> dict[str, object]:
+        return asdict(self)
+
+
+class RssSampler:
+    """
+    Пиковый объем памяти процесса за время сценария.
+
+    ru_maxrss растет монотонно за все время процесса, поэтому на Linux память сценария
+    периодически читается из /proc/self/statm, на остальных системах берется ru_maxrss.
+    """
+
+    def __init__(self) -> None:
+        self.peak = 0
+        self.page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+    def sample(self: Self) -> None:
+        self.peak = max(self.peak, self.get_rss())
+
+    def get_rss(self: Self) -> int:
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * self.page_size
+        except OSError:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # macOS возвращает байты, Linux — килобайты.
+            return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+    @property
+    def peak_mb(self: Self) -> float:
+        return self.peak / MEGABYTE
+
+
+def make_result(
+    operation: str,
+    size: int,
+    concurrency: int,
+    latencies: list[float],
+    errors: int,
+    started: float,
+    rss_sampler: RssSampler,
+) -> ScenarioResultSchema:
+    seconds = time.perf_counter() - started
+    transferred = size * len(latencies) if operation != 'delete' else 0
+    return ScenarioResultSchema(
+        operation=operation,
+        size=size,
+        concurrency=concurrency,
+        operations=len(latencies),
+        errors=errors,
+        bytes=transferred,
+        seconds=round(seconds, 6),
+        mb_per_s=round(transferred / MEGABYTE / seconds, 3) if seconds else 0.0,
+        ops_per_s=round(len(latencies) / seconds, 3) if seconds else 0.0,
+        latency_ms=LatencySchema.from_samples(latencies),
+        peak_rss_mb=round(rss_sampler.peak_mb, 1),
+    )
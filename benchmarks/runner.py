@@ -0,0 +1,202 @@
+import asyncio
+import datetime as dt
+import json
+import random
+import tempfile
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Annotated, TypeVar
+
+import httpx
+import typer
+from fast_clean.utils import typer_async
+from rich import print
+
+from .report import MEGABYTE, ReportSchema, RssSampler, ScenarioResultSchema, make_result
+
+SIZE_UNITS = {'B': 1, 'KiB': 1024, 'MiB': MEGABYTE, 'GiB': 1024 * MEGABYTE}
+RSS_SAMPLE_INTERVAL = 0.02
+"""
+Интервал в секундах между замерами памяти процесса.
+"""
+
+T = TypeVar('T')
+
+app = typer.Typer()
+
+
+def parse_size(value: str) -> int:
+    """
+    Разбираем размер вида 4KiB, 16MiB или число байт.
+    """
+    for unit, multiplier in sorted(SIZE_UNITS.items(), key=lambda item: -len(item[0])):
+        if value.endswith(unit):
+            return int(float(value.removesuffix(unit)) * multiplier)
+    return int(value)
+
+
+async def run_scenario(
+    concurrency: int, items: list[T], operation: Callable[[T], Awaitable[bool]]
+) -> tuple[list[float], int, RssSampler]:
+    """
+    Выполняем операцию над всеми элементами, не больше concurrency одновременно.
+
+    Возвращаем задержки успешных операций, количество ошибок и пиковую память за сценарий.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+    rss_sampler = RssSampler()
+
+    async def run(item: T) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            if await operation(item):
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    async def sample() -> None:
+        while True:
+            rss_sampler.sample()
+            await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+    sampler = asyncio.create_task(sample())
+    try:
+        await asyncio.gather(*[run(item) for item in items])
+    finally:
+        sampler.cancel()
+        rss_sampler.sample()
+    return latencies, errors, rss_sampler
+
+
+async def create_storage(client: httpx.AsyncClient, storage_dir: Path, max_concurrency: int) -> uuid.UUID:
+    response = await client.post(
+        '/storage',
+        json={
+            'type': 'local',
+            'params': {'path': str(storage_dir), 'fsync': False},
+            'maxConcurrency': max_concurrency,
+        },
+    )
+    response.raise_for_status()
+    return uuid.UUID(response.json()['id'])
+
+
+async def run_size(
+    client: httpx.AsyncClient,
+    storage_id: uuid.UUID,
+    size: int,
+    concurrency: int,
+    operations: int,
+    payload: bytes,
+) -> list[ScenarioResultSchema]:
+    """
+    Загружаем, скачиваем и удаляем operations файлов размера size.
+
+    Начало каждого файла уникально, иначе дедупликация пропустила бы запись одинакового содержимого.
+    """
+    file_ids: list[uuid.UUID] = []
+
+    async def upload(i: int) -> bool:
+        content = (uuid.uuid4().bytes + payload[16:])[:size]
+        response = await client.post(
+            f'/storage/{storage_id}/files',
+            files=[('files', (f'benchmark-{i}.bin', content, 'application/octet-stream'))],
+        )
+        if response.status_code != httpx.codes.CREATED:
+            return False
+        file_ids.append(uuid.UUID(response.json()[0]['id']))
+        return True
+
+    async def download(file_id: uuid.UUID) -> bool:
+        received = 0
+        async with client.stream('GET', f'/storage/{storage_id}/files/{file_id}/download') as response:
+            async for chunk in response.aiter_raw():
+                received += len(chunk)
+        return response.status_code == httpx.codes.OK and received == size
+
+    async def delete(file_id: uuid.UUID) -> bool:
+        response = await client.request('DELETE', f'/storage/{storage_id}/files', params={'fileIds': str(file_id)})
+        return response.status_code == httpx.codes.OK and not response.json()['errors']
+
+    started = time.perf_counter()
+    latencies, errors, rss_sampler = await run_scenario(concurrency, list(range(operations)), upload)
+    results = [make_result('upload', size, concurrency, latencies, errors, started, rss_sampler)]
+    started = time.perf_counter()
+    latencies, errors, rss_sampler = await run_scenario(concurrency, file_ids, download)
+    results.append(make_result('download', size, concurrency, latencies, errors, started, rss_sampler))
+    started = time.perf_counter()
+    latencies, errors, rss_sampler = await run_scenario(concurrency, file_ids, delete)
+    results.append(make_result('delete', size, concurrency, latencies, errors, started, rss_sampler))
+    return results
+
+
+async def run_benchmarks(
+    sizes: list[int], concurrencies: list[int], operations: int, max_bytes: int, seed: int, storage_dir: Path
+) -> ReportSchema:
+    from fast_clean.utils.toml import use_toml_info
+    from yafs.cmd.rest import app as rest_app
+    from yafs.settings import settings
+
+    report = ReportSchema(
+        version=use_toml_info(settings.base_dir).version,
+        started_at=dt.datetime.now(dt.UTC).isoformat(),
+        params={
+            'sizes': sizes,
+            'concurrency': concurrencies,
+            'operations': operations,
+            'max_bytes': max_bytes,
+            'seed': seed,
+            'backend': 'local',
+        },
+    )
+    rng = random.Random(seed)
+    async with rest_app.router.lifespan_context(rest_app):
+        transport = httpx.ASGITransport(app=rest_app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://benchmark', timeout=None) as client:
+            storage_id = await create_storage(client, storage_dir, max(concurrencies))
+            for size in sizes:
+                payload = rng.randbytes(size)
+                for concurrency in concurrencies:
+                    count = max(min(operations, max_bytes // max(size, 1)), concurrency)
+                    for result in await run_size(client, storage_id, size, concurrency, count, payload):
+                        report.scenarios.append(result)
+                        print(
+                            f'{result.operation:>8} size={size:>10} concurrency={concurrency:>3} '
+                            f'{result.mb_per_s:>9.2f} MB/s p50={result.latency_ms.p50:.2f}ms '
+                            f'p99={result.latency_ms.p99:.2f}ms rss={result.peak_rss_mb}MB errors={result.errors}'
+                        )
+    return report
+
+
+@app.command()
+@typer_async
+async def run(
+    sizes: Annotated[str, typer.Option(help='Размеры файлов через запятую, например 4KiB,1MiB,16MiB')] = (
+        '4KiB,256KiB,1MiB,16MiB'
+    ),
+    concurrency: Annotated[str, typer.Option(help='Количество одновременных запросов через запятую')] = '1,8,32',
+    operations: Annotated[int, typer.Option(help='Количество файлов в сценарии')] = 64,
+    max_bytes: Annotated[str, typer.Option(help='Максимальный объем данных в сценарии')] = '512MiB',
+    seed: Annotated[int, typer.Option(help='Зерно генератора содержимого файлов')] = 0,
+    output: Annotated[Path, typer.Option(help='Файл JSON отчета')] = Path('benchmark.json'),
+    storage_dir: Annotated[Path | None, typer.Option(help='Директория локального хранилища')] = None,
+) -> None:
+    """
+    Запускаем сценарии для всех сочетаний размера файла и количества одновременных запросов.
+    """
+    with tempfile.TemporaryDirectory(prefix='yafs-benchmark-') as temp_dir:
+        report = await run_benchmarks(
+            [parse_size(size) for size in sizes.split(',')],
+            [int(value) for value in concurrency.split(',')],
+            operations,
+            parse_size(max_bytes),
+            seed,
+            (storage_dir or Path(temp_dir)).resolve(),
+        )
+    output.write_text(json.dumps(report.to_dict(), indent=2))
+    print(f'Отчет сохранен: {output}')
@@ -10,7 +10,7 @@ from yafs.settings import settings
 # Import models
 
 
-import_module('file_storage.apps.storages.models')
+import_module('yafs.apps.storages.models')
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -0,0 +1,60 @@
+"""blobs
+
+Revision ID: 7ccd95c1cd77
+Revises: 2b566fbe75ab
+Create Date: 2026-10-18 19:02:17.551830
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '7ccd95c1cd77'
+down_revision: Union[str, None] = '2b566fbe75ab'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'blobs',
+        sa.Column(
+            'id',
+            sqlalchemy_utils.types.UUIDType(binary=False),
+            server_default=sa.text('gen_random_uuid()'),
+            nullable=False,
+        ),
+        sa.Column('storage_id', sqlalchemy_utils.types.UUIDType(binary=False), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('path', sa.String(length=1024), nullable=False),
+        sa.Column('ref_count', sa.Integer(), server_default='1', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['storage_id'], ['storages.id'], name=op.f('blobs_storage_id_fkey'), ondelete='cascade'
+        ),
+        sa.PrimaryKeyConstraint('id', name=op.f('blobs_pkey')),
+        sa.UniqueConstraint('storage_id', 'sha256', name=op.f('blobs_storage_id_key')),
+    )
+    # Файлы, загруженные до дедупликации, остаются без содержимого и со своим путем.
+    op.add_column('files', sa.Column('path', sa.String(length=1024), nullable=True))
+    op.execute("UPDATE files SET path = '/files/' || id::text")
+    op.alter_column('files', 'path', nullable=False)
+    op.add_column('files', sa.Column('sha256', sa.String(length=64), nullable=True))
+    op.add_column('files', sa.Column('blob_id', sqlalchemy_utils.types.UUIDType(binary=False), nullable=True))
+    op.create_index(op.f('files_blob_id_idx'), 'files', ['blob_id'], unique=False)
+    op.create_foreign_key(op.f('files_blob_id_fkey'), 'files', 'blobs', ['blob_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint(op.f('files_blob_id_fkey'), 'files', type_='foreignkey')
+    op.drop_index(op.f('files_blob_id_idx'), table_name='files')
+    op.drop_column('files', 'blob_id')
+    op.drop_column('files', 'sha256')
+    op.drop_column('files', 'path')
+    op.drop_table('blobs')
@@ -0,0 +1,45 @@
+"""file status
+
+Revision ID: 2b566fbe75ab
+Revises: 5bc01013563b
+Create Date: 2026-10-18 17:31:06.904117
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '2b566fbe75ab'
+down_revision: Union[str, None] = '5bc01013563b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Существующие файлы уже загружены, поэтому заполняем их статусом READY,
+    # а для новых записей значение по умолчанию меняем на PENDING.
+    op.add_column(
+        'files',
+        sa.Column(
+            'status',
+            sa.Enum('PENDING', 'READY', name='filestatusenum', native_enum=False),
+            server_default='READY',
+            nullable=False,
+        ),
+    )
+    op.alter_column('files', 'status', server_default='PENDING')
+    op.create_index(
+        'files_pending_created_at_idx',
+        'files',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('files_pending_created_at_idx', table_name='files', postgresql_where=sa.text("status = 'PENDING'"))
+    op.drop_column('files', 'status')
@@ -0,0 +1,34 @@
+"""files storage listing index
+
+Revision ID: 9e7e35038abe
+Revises: 58f053ba8779
+Create Date: 2026-10-18 22:05:41.886512
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '9e7e35038abe'
+down_revision: Union[str, None] = '58f053ba8779'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Индекс строится без блокировки записи в таблицу файлов.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'files_storage_id_created_at_id_idx',
+            'files',
+            ['storage_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('files_storage_id_created_at_id_idx', table_name='files', postgresql_concurrently=True)
@@ -0,0 +1,41 @@
+"""local storage type
+
+Revision ID: 739083c42533
+Revises: ca0ffccd5069
+Create Date: 2026-10-18 21:03:40.662915
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '739083c42533'
+down_revision: Union[str, None] = 'ca0ffccd5069'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Тип хранилища хранится строкой длиной в самое длинное имя значения перечисления.
+    op.alter_column(
+        'storages',
+        'type',
+        existing_type=sa.Enum('S3', name='filestoragetypeenum', native_enum=False),
+        type_=sa.Enum('S3', 'LOCAL', name='filestoragetypeenum', native_enum=False),
+        existing_nullable=False,
+        existing_server_default='s3',
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'storages',
+        'type',
+        existing_type=sa.Enum('S3', 'LOCAL', name='filestoragetypeenum', native_enum=False),
+        type_=sa.Enum('S3', name='filestoragetypeenum', native_enum=False),
+        existing_nullable=False,
+        existing_server_default='s3',
+    )
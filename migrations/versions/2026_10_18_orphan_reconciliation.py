@@ -0,0 +1,89 @@
+"""orphan reconciliation
+
+Revision ID: 3a8c5e0f6d14
+Revises: b7e21c4d9a05
+Create Date: 2026-10-19 00:31:54.117402
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3a8c5e0f6d14'
+down_revision: Union[str, None] = 'b7e21c4d9a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'orphan_objects',
+        sa.Column(
+            'id',
+            sqlalchemy_utils.types.UUIDType(binary=False),
+            server_default=sa.text('gen_random_uuid()'),
+            nullable=False,
+        ),
+        sa.Column('storage_id', sqlalchemy_utils.types.UUIDType(binary=False), nullable=False),
+        sa.Column('path', sa.String(length=1024), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['storage_id'], ['storages.id'], name=op.f('orphan_objects_storage_id_fkey'), ondelete='cascade'
+        ),
+        sa.PrimaryKeyConstraint('id', name=op.f('orphan_objects_pkey')),
+        sa.UniqueConstraint('storage_id', 'path', name=op.f('orphan_objects_storage_id_key')),
+    )
+    op.create_index('orphan_objects_created_at_idx', 'orphan_objects', ['created_at'], unique=False)
+    op.create_table(
+        'reconciliation_checkpoints',
+        sa.Column(
+            'id',
+            sqlalchemy_utils.types.UUIDType(binary=False),
+            server_default=sa.text('gen_random_uuid()'),
+            nullable=False,
+        ),
+        sa.Column('storage_id', sqlalchemy_utils.types.UUIDType(binary=False), nullable=False),
+        sa.Column('last_path', sa.String(length=1024), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['storage_id'],
+            ['storages.id'],
+            name=op.f('reconciliation_checkpoints_storage_id_fkey'),
+            ondelete='cascade',
+        ),
+        sa.PrimaryKeyConstraint('id', name=op.f('reconciliation_checkpoints_pkey')),
+        sa.UniqueConstraint('storage_id', name=op.f('reconciliation_checkpoints_storage_id_key')),
+    )
+    # Индексы по пути в порядке байт, в котором хранилища отдают список объектов,
+    # строятся без блокировки записи в таблицы.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'files_storage_id_path_idx',
+            'files',
+            ['storage_id', sa.text('path COLLATE "C"')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'blobs_storage_id_path_idx',
+            'blobs',
+            ['storage_id', sa.text('path COLLATE "C"')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('blobs_storage_id_path_idx', table_name='blobs', postgresql_concurrently=True)
+        op.drop_index('files_storage_id_path_idx', table_name='files', postgresql_concurrently=True)
+    op.drop_table('reconciliation_checkpoints')
+    op.drop_index('orphan_objects_created_at_idx', table_name='orphan_objects')
+    op.drop_table('orphan_objects')
@@ -0,0 +1,78 @@
+"""upload sessions
+
+Revision ID: 4f6d2a9c1b83
+Revises: 9e7e35038abe
+Create Date: 2026-10-18 23:05:41.218306
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '4f6d2a9c1b83'
+down_revision: Union[str, None] = '9e7e35038abe'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Integer ограничивает размер файла 2 ГБ.
+    op.alter_column('files', 'size', type_=sa.BigInteger(), existing_type=sa.Integer(), existing_nullable=False)
+    op.alter_column('blobs', 'size', type_=sa.BigInteger(), existing_type=sa.Integer(), existing_nullable=False)
+    op.create_table(
+        'upload_sessions',
+        sa.Column(
+            'id',
+            sqlalchemy_utils.types.UUIDType(binary=False),
+            server_default=sa.text('gen_random_uuid()'),
+            nullable=False,
+        ),
+        sa.Column('storage_id', sqlalchemy_utils.types.UUIDType(binary=False), nullable=False),
+        sa.Column('file_id', sqlalchemy_utils.types.UUIDType(binary=False), nullable=False),
+        sa.Column('upload_id', sa.String(length=1024), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('part_size', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['storage_id'], ['storages.id'], name=op.f('upload_sessions_storage_id_fkey'), ondelete='cascade'
+        ),
+        sa.ForeignKeyConstraint(
+            ['file_id'], ['files.id'], name=op.f('upload_sessions_file_id_fkey'), ondelete='cascade'
+        ),
+        sa.PrimaryKeyConstraint('id', name=op.f('upload_sessions_pkey')),
+        sa.UniqueConstraint('file_id', name=op.f('upload_sessions_file_id_key')),
+    )
+    op.create_index('upload_sessions_updated_at_idx', 'upload_sessions', ['updated_at'], unique=False)
+    op.create_table(
+        'upload_parts',
+        sa.Column(
+            'id',
+            sqlalchemy_utils.types.UUIDType(binary=False),
+            server_default=sa.text('gen_random_uuid()'),
+            nullable=False,
+        ),
+        sa.Column('session_id', sqlalchemy_utils.types.UUIDType(binary=False), nullable=False),
+        sa.Column('part_number', sa.Integer(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('etag', sa.String(length=256), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['session_id'], ['upload_sessions.id'], name=op.f('upload_parts_session_id_fkey'), ondelete='cascade'
+        ),
+        sa.PrimaryKeyConstraint('id', name=op.f('upload_parts_pkey')),
+        sa.UniqueConstraint('session_id', 'part_number', name=op.f('upload_parts_session_id_key')),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('upload_parts')
+    op.drop_index('upload_sessions_updated_at_idx', table_name='upload_sessions')
+    op.drop_table('upload_sessions')
+    op.alter_column('blobs', 'size', type_=sa.Integer(), existing_type=sa.BigInteger(), existing_nullable=False)
+    op.alter_column('files', 'size', type_=sa.Integer(), existing_type=sa.BigInteger(), existing_nullable=False)
@@ -0,0 +1,30 @@
+"""file checksums
+
+Revision ID: e4b9c2d7a613
+Revises: 8d3f1a6b5c20
+Create Date: 2026-10-19 09:17:41.285307
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b9c2d7a613'
+down_revision: Union[str, None] = '8d3f1a6b5c20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('md5', sa.String(length=32), nullable=True))
+    op.add_column('files', sa.Column('crc32c', sa.String(length=8), nullable=True))
+    op.add_column('files', sa.Column('detected_content_type', sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('files', 'detected_content_type')
+    op.drop_column('files', 'crc32c')
+    op.drop_column('files', 'md5')
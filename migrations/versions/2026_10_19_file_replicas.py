@@ -0,0 +1,64 @@
+"""file replicas
+
+Revision ID: 6c0b9f3e2a71
+Revises: 3a8c5e0f6d14
+Create Date: 2026-10-19 02:14:08.530921
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '6c0b9f3e2a71'
+down_revision: Union[str, None] = '3a8c5e0f6d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'storages',
+        sa.Column(
+            'replica_ids',
+            postgresql.ARRAY(sqlalchemy_utils.types.UUIDType(binary=False)),
+            server_default='{}',
+            nullable=False,
+        ),
+    )
+    op.create_table(
+        'file_replicas',
+        sa.Column(
+            'id',
+            sqlalchemy_utils.types.UUIDType(binary=False),
+            server_default=sa.text('gen_random_uuid()'),
+            nullable=False,
+        ),
+        sa.Column('file_id', sqlalchemy_utils.types.UUIDType(binary=False), nullable=False),
+        sa.Column('storage_id', sqlalchemy_utils.types.UUIDType(binary=False), nullable=False),
+        sa.Column('path', sa.String(length=1024), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['file_id'], ['files.id'], name=op.f('file_replicas_file_id_fkey'), ondelete='cascade'),
+        sa.ForeignKeyConstraint(
+            ['storage_id'], ['storages.id'], name=op.f('file_replicas_storage_id_fkey'), ondelete='cascade'
+        ),
+        sa.PrimaryKeyConstraint('id', name=op.f('file_replicas_pkey')),
+        sa.UniqueConstraint('file_id', 'storage_id', name=op.f('file_replicas_file_id_key')),
+    )
+    op.create_index(
+        'file_replicas_storage_id_path_idx',
+        'file_replicas',
+        ['storage_id', sa.text('path COLLATE "C"')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('file_replicas_storage_id_path_idx', table_name='file_replicas')
+    op.drop_table('file_replicas')
+    op.drop_column('storages', 'replica_ids')
@@ -0,0 +1,57 @@
+"""file tiering
+
+Revision ID: 8d3f1a6b5c20
+Revises: 6c0b9f3e2a71
+Create Date: 2026-10-19 05:42:17.604183
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3f1a6b5c20'
+down_revision: Union[str, None] = '6c0b9f3e2a71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'storages',
+        sa.Column('tier_storage_id', sqlalchemy_utils.types.UUIDType(binary=False), nullable=True),
+    )
+    op.add_column(
+        'storages',
+        sa.Column('tier_after', sa.Interval(), server_default='30 days', nullable=False),
+    )
+    op.create_foreign_key(
+        op.f('storages_tier_storage_id_fkey'),
+        'storages',
+        'storages',
+        ['tier_storage_id'],
+        ['id'],
+        ondelete='set null',
+    )
+    op.add_column('files', sa.Column('accessed_at', sa.DateTime(timezone=True), nullable=True))
+    # Индекс для выбора давно не читавшихся файлов строится без блокировки записи в таблицу.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'files_storage_id_last_access_id_idx',
+            'files',
+            ['storage_id', sa.text('coalesce(accessed_at, created_at)'), 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('files_storage_id_last_access_id_idx', table_name='files', postgresql_concurrently=True)
+    op.drop_column('files', 'accessed_at')
+    op.drop_constraint(op.f('storages_tier_storage_id_fkey'), 'storages', type_='foreignkey')
+    op.drop_column('storages', 'tier_after')
+    op.drop_column('storages', 'tier_storage_id')
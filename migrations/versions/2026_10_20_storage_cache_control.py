@@ -0,0 +1,26 @@
+"""storage cache control
+
+Revision ID: 5a7e1f3c9b84
+Revises: e4b9c2d7a613
+Create Date: 2026-10-20 10:42:13.518964
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5a7e1f3c9b84'
+down_revision: Union[str, None] = 'e4b9c2d7a613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('storages', sa.Column('cache_control', sa.String(length=256), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('storages', 'cache_control')
@@ -0,0 +1,120 @@
+import datetime as dt
+import io
+import struct
+import tarfile
+import uuid
+import zipfile
+from collections.abc import AsyncIterator
+
+import pytest
+from yafs.apps.storages.archives import iter_archive, make_archive_writer
+from yafs.apps.storages.enums import ArchiveFormatEnum
+from yafs.apps.storages.repositories.reader import READ_CHUNK_SIZE
+from yafs.apps.storages.schemas import FileReadSchema
+
+CREATED_AT = dt.datetime(2026, 10, 18, 12, 30, 16, tzinfo=dt.UTC)
+ZIP64_EXTRA_ID = 0x0001
+
+
+def make_file(name: str, content: bytes) -> FileReadSchema:
+    return FileReadSchema(
+        id=uuid.uuid4(),
+        name=name,
+        size=len(content),
+        storage_id=uuid.uuid4(),
+        path=f'/files/{name}',
+        created_at=CREATED_AT,
+    )
+
+
+FILES = {
+    'report.txt': b'hello world\n' * 10,
+    'empty.bin': b'',
+    'Отчет за 2026 год с очень длинным названием, которое не помещается в заголовок tar.csv': 'данные'.encode() * 50,
+    'large.bin': bytes(range(256)) * (READ_CHUNK_SIZE // 128) + b'tail',
+    'REPORT.txt': b'other report',
+}
+NAMES = [*list(FILES)[:-1], 'REPORT (1).txt']
+
+
+async def build_archive(
+    archive_format: ArchiveFormatEnum, compress: bool, files: dict[str, bytes] = FILES, *, size_delta: int = 0
+) -> bytes:
+    contents = {}
+    schemas = []
+    for name, content in files.items():
+        file = make_file(name, content)
+        contents[file.id] = content
+        schemas.append(file.model_copy(update={'size': file.size + size_delta}))
+
+    async def stream_reader(file: FileReadSchema) -> AsyncIterator[bytes]:
+        content = contents[file.id]
+        for offset in range(0, len(content), READ_CHUNK_SIZE):
+            yield content[offset : offset + READ_CHUNK_SIZE]
+
+    writer = make_archive_writer(archive_format, compress)
+    return b''.join([chunk async for chunk in iter_archive(writer, schemas, stream_reader, compress=compress)])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('compress', [False, True])
+async def test_zip_round_trip(compress: bool) -> None:
+    data = await build_archive(ArchiveFormatEnum.ZIP, compress)
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.namelist() == NAMES
+        for info, content in zip(zip_file.infolist(), FILES.values(), strict=True):
+            assert zip_file.read(info) == content
+            assert info.file_size == len(content)
+            assert info.compress_type == (zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED)
+            assert info.date_time == (2026, 10, 18, 12, 30, 16)
+            # Размеры записываются в дескрипторе данных после содержимого.
+            assert info.flag_bits & 0x08
+
+
+@pytest.mark.asyncio
+async def test_zip64_sizes(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Порог ZIP64 уменьшен, чтобы не собирать в тесте файл больше 4 ГиБ.
+    monkeypatch.setattr(zipfile, 'ZIP64_LIMIT', READ_CHUNK_SIZE)
+    files = {'large.bin': FILES['large.bin'], 'small.txt': b'small'}
+
+    data = await build_archive(ArchiveFormatEnum.ZIP, False, files)
+    monkeypatch.undo()
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zip_file:
+        for info, content in zip(zip_file.infolist(), files.values(), strict=True):
+            assert zip_file.read(info) == content
+            (extra_id,) = struct.unpack('<H', info.extra[:2])
+            assert extra_id == ZIP64_EXTRA_ID
+        large_info = zip_file.getinfo('large.bin')
+        assert large_info.file_size == large_info.compress_size == len(files['large.bin'])
+        # Смещение второй записи больше порога, поэтому и оно хранится в ZIP64.
+        assert zip_file.getinfo('small.txt').header_offset > READ_CHUNK_SIZE
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('compress', [False, True])
+async def test_tar_round_trip(compress: bool) -> None:
+    data = await build_archive(ArchiveFormatEnum.TAR, compress)
+
+    with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz' if compress else 'r:') as tar_file:
+        members = tar_file.getmembers()
+        assert [member.name for member in members] == NAMES
+        for member, content in zip(members, FILES.values(), strict=True):
+            extracted = tar_file.extractfile(member)
+            assert extracted is not None
+            assert extracted.read() == content
+            assert member.size == len(content)
+            assert member.mtime == int(CREATED_AT.timestamp())
+            assert member.mode == 0o644
+    if not compress:
+        assert len(data) % tarfile.BLOCKSIZE == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('archive_format', list(ArchiveFormatEnum))
+@pytest.mark.parametrize('size_delta', [-1, 1])
+async def test_size_mismatch_aborts_archive(archive_format: ArchiveFormatEnum, size_delta: int) -> None:
+    with pytest.raises(ValueError, match='bytes instead of'):
+        await build_archive(archive_format, False, {'large.bin': FILES['large.bin']}, size_delta=size_delta)
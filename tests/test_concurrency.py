@@ -0,0 +1,161 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from yafs.apps.storages.repositories import concurrency
+from yafs.apps.storages.repositories.concurrency import (
+    CONCURRENCY_DECREASE_INTERVAL,
+    CONCURRENCY_INITIAL_LIMIT,
+    CONCURRENCY_LATENCY_TOLERANCE,
+    ConcurrencyLimiter,
+)
+from yafs.apps.storages.repositories.local import LocalFileStorageRepository
+from yafs.apps.storages.schemas import LocalFileStorageParamsSchema
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake_clock = FakeClock()
+    monkeypatch.setattr(concurrency, 'time', fake_clock)
+    return fake_clock
+
+
+async def run(limiter: ConcurrencyLimiter, clock: FakeClock, duration: float, cost: float = 1.0) -> None:
+    async with limiter.acquire(cost):
+        clock.now += duration
+
+
+@pytest.mark.asyncio
+async def test_success_increases_limit(clock: FakeClock) -> None:
+    limiter = ConcurrencyLimiter('storage', 100)
+
+    await run(limiter, clock, 1.0)
+
+    assert limiter.limit == pytest.approx(CONCURRENCY_INITIAL_LIMIT + 1 / CONCURRENCY_INITIAL_LIMIT)
+    assert limiter.latency == pytest.approx(1.0)
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limit_does_not_exceed_max_limit(clock: FakeClock) -> None:
+    limiter = ConcurrencyLimiter('storage', 5)
+
+    for _ in range(20):
+        await run(limiter, clock, 1.0)
+
+    assert limiter.limit == 5
+
+
+@pytest.mark.asyncio
+async def test_error_halves_limit_once_per_interval(clock: FakeClock) -> None:
+    limiter = ConcurrencyLimiter('storage', 100)
+
+    for _ in range(2):
+        with pytest.raises(OSError):
+            async with limiter.acquire():
+                raise OSError('storage is down')
+
+    assert limiter.limit == CONCURRENCY_INITIAL_LIMIT / 2
+    clock.now += CONCURRENCY_DECREASE_INTERVAL
+    async with limiter.acquire() as slot:
+        slot.failed = True
+    assert limiter.limit == CONCURRENCY_INITIAL_LIMIT / 4
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancellation_does_not_decrease_limit(clock: FakeClock) -> None:
+    limiter = ConcurrencyLimiter('storage', 100)
+
+    with pytest.raises(asyncio.CancelledError):
+        async with limiter.acquire():
+            raise asyncio.CancelledError
+
+    assert limiter.limit == CONCURRENCY_INITIAL_LIMIT
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_operation_decreases_limit(clock: FakeClock) -> None:
+    limiter = ConcurrencyLimiter('storage', 100)
+    await run(limiter, clock, 1.0)
+    limit = limiter.limit
+
+    await run(limiter, clock, CONCURRENCY_LATENCY_TOLERANCE * 2)
+
+    assert limiter.limit == limit / 2
+
+
+@pytest.mark.asyncio
+async def test_latency_is_normalized_by_cost(clock: FakeClock) -> None:
+    limiter = ConcurrencyLimiter('storage', 100)
+    await run(limiter, clock, 1.0)
+    limit = limiter.limit
+
+    # Операция в 10 раз больше по объему и в 10 раз дольше имеет обычную задержку.
+    await run(limiter, clock, 10.0, cost=10.0)
+    assert limiter.limit > limit
+    assert limiter.latency == pytest.approx(1.0)
+
+    # Стоимость меньше единицы не увеличивает задержку маленьких операций.
+    await run(limiter, clock, 1.0, cost=0.01)
+    assert limiter.latency == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_waiters_get_released_slots() -> None:
+    limiter = ConcurrencyLimiter('storage', 1)
+    release = asyncio.Event()
+    order: list[int] = []
+
+    async def operation(number: int) -> None:
+        async with limiter.acquire():
+            order.append(number)
+            await release.wait()
+
+    tasks = [asyncio.create_task(operation(number)) for number in range(3)]
+    await asyncio.sleep(0)
+    assert order == [0]
+    assert limiter.in_flight == 1
+    assert len(limiter.waiters) == 2
+
+    tasks[1].cancel()
+    release.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert order == [0, 2]
+    assert limiter.in_flight == 0
+    assert not limiter.waiters
+
+
+class SlowStream:
+    def __init__(self, chunks: list[bytes], limiter: ConcurrencyLimiter) -> None:
+        self.chunks = chunks
+        self.limiter = limiter
+        self.in_flight: list[int] = []
+
+    async def read(self, size: int | None = -1) -> bytes:
+        self.in_flight.append(self.limiter.in_flight)
+        await asyncio.sleep(0)
+        return self.chunks.pop(0) if self.chunks else b''
+
+
+@pytest.mark.asyncio
+async def test_reading_upload_stream_does_not_hold_slot(tmp_path: Path) -> None:
+    storage = LocalFileStorageRepository(LocalFileStorageParamsSchema(path=str(tmp_path)))
+    limiter = ConcurrencyLimiter('storage', 1)
+    stream = SlowStream([b'abc', b'def'], limiter)
+
+    written = await storage.multipart_write('/files/a', stream, limiter=limiter, part_size=3)
+
+    assert written.size == 6
+    assert (tmp_path / 'files' / 'a').read_bytes() == b'abcdef'
+    assert set(stream.in_flight) == {0}
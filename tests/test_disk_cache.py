@@ -0,0 +1,145 @@
+import asyncio
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import pytest
+from yafs.apps.storages.repositories.disk_cache import DiskCacheRepository
+
+
+class Loader:
+    def __init__(self, data: bytes, *, chunk_size: int = 4) -> None:
+        self.data = data
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    def __call__(self) -> AsyncIterator[bytes]:
+        self.calls += 1
+        return self.read()
+
+    async def read(self) -> AsyncIterator[bytes]:
+        for offset in range(0, len(self.data), self.chunk_size):
+            await self.release.wait()
+            yield self.data[offset : offset + self.chunk_size]
+
+
+async def make_cache(root: Path, *, max_size: int = 100, max_file_size: int = 100) -> DiskCacheRepository:
+    disk_cache_repository = DiskCacheRepository(root, max_size=max_size, max_file_size=max_file_size)
+    await disk_cache_repository.load()
+    return disk_cache_repository
+
+
+async def read(disk_cache_repository: DiskCacheRepository, key: str, loader: Loader) -> bytes:
+    return b''.join([chunk async for chunk in disk_cache_repository.read(key, len(loader.data), loader)])
+
+
+async def wait_filled(disk_cache_repository: DiskCacheRepository) -> None:
+    await asyncio.gather(*[fill.task for fill in disk_cache_repository.fills.values() if fill.task is not None])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_are_coalesced(tmp_path: Path) -> None:
+    disk_cache_repository = await make_cache(tmp_path)
+    loader = Loader(b'0123456789abcdef')
+    loader.release.clear()
+
+    readers = [asyncio.create_task(read(disk_cache_repository, 'a', loader)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    loader.release.set()
+
+    assert await asyncio.gather(*readers) == [loader.data] * 3
+    assert loader.calls == 1
+    await wait_filled(disk_cache_repository)
+    assert await read(disk_cache_repository, 'a', loader) == loader.data
+    assert loader.calls == 1
+    assert disk_cache_repository.used == len(loader.data)
+    assert not list((tmp_path / 'tmp').iterdir())
+
+
+@pytest.mark.asyncio
+async def test_fill_started_during_eviction_is_coalesced(tmp_path: Path) -> None:
+    disk_cache_repository = await make_cache(tmp_path, max_size=10)
+    await read(disk_cache_repository, 'old', Loader(b'old-data'))
+    loader = Loader(b'new-data')
+    evict = disk_cache_repository.evict
+
+    async def slow_evict(size: int) -> bool:
+        # Второй промах по тому же файлу успевает начать заполнение, пока первый освобождает место.
+        evicted = await evict(size)
+        await asyncio.sleep(0.01)
+        return evicted
+
+    disk_cache_repository.evict = slow_evict  # type: ignore[method-assign]
+    first = asyncio.create_task(read(disk_cache_repository, 'new', loader))
+    await asyncio.sleep(0)
+    disk_cache_repository.evict = evict  # type: ignore[method-assign]
+    second = asyncio.create_task(read(disk_cache_repository, 'new', loader))
+
+    assert await asyncio.gather(first, second) == [loader.data, loader.data]
+    assert loader.calls == 1
+    await wait_filled(disk_cache_repository)
+    assert list(disk_cache_repository.entries) == ['new']
+
+
+@pytest.mark.asyncio
+async def test_eviction_removes_least_recently_read(tmp_path: Path) -> None:
+    disk_cache_repository = await make_cache(tmp_path, max_size=20)
+    loaders = {key: Loader(key.encode() * 8) for key in ('a', 'b', 'c')}
+    for key in ('a', 'b'):
+        await read(disk_cache_repository, key, loaders[key])
+        await wait_filled(disk_cache_repository)
+
+    # Чтение из кеша делает файл недавно прочитанным, поэтому вытесняется b.
+    await read(disk_cache_repository, 'a', loaders['a'])
+    await read(disk_cache_repository, 'c', loaders['c'])
+    await wait_filled(disk_cache_repository)
+
+    assert list(disk_cache_repository.entries) == ['a', 'c']
+    assert disk_cache_repository.used == 16
+    assert not disk_cache_repository.get_entry_path('b').exists()
+    assert await read(disk_cache_repository, 'b', loaders['b']) == loaders['b'].data
+    assert [loader.calls for loader in loaders.values()] == [1, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_file_larger_than_cache_is_read_without_fill(tmp_path: Path) -> None:
+    disk_cache_repository = await make_cache(tmp_path, max_file_size=8)
+    loader = Loader(b'0123456789')
+
+    assert await read(disk_cache_repository, 'a', loader) == loader.data
+    assert not disk_cache_repository.fills
+    assert not disk_cache_repository.entries
+    assert disk_cache_repository.used == 0
+
+
+@pytest.mark.asyncio
+async def test_open_entry_evicted_while_opening(tmp_path: Path) -> None:
+    disk_cache_repository = await make_cache(tmp_path)
+    loader = Loader(b'0123456789')
+    await read(disk_cache_repository, 'a', loader)
+    await wait_filled(disk_cache_repository)
+    disk_cache_repository.get_entry_path('a').unlink()
+
+    assert await disk_cache_repository.open_entry('a') is None
+    assert not disk_cache_repository.entries
+    assert disk_cache_repository.used == 0
+    assert await read(disk_cache_repository, 'a', loader) == loader.data
+    assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_read_range_falls_back_to_loader(tmp_path: Path) -> None:
+    disk_cache_repository = await make_cache(tmp_path)
+    loader = Loader(b'0123456789')
+    range_loader = Loader(b'234')
+
+    async def read_range() -> bytes:
+        return b''.join([chunk async for chunk in disk_cache_repository.read_range('a', 2, 4, range_loader)])
+
+    assert await read_range() == b'234'
+    assert not disk_cache_repository.fills
+    await read(disk_cache_repository, 'a', loader)
+    await wait_filled(disk_cache_repository)
+    assert await read_range() == b'234'
+    assert range_loader.calls == 1
@@ -0,0 +1,132 @@
+import hashlib
+import io
+
+import pytest
+from yafs.apps.storages.inspection import (
+    DEFAULT_CONTENT_TYPE,
+    ContentInspection,
+    ETagInspector,
+    InspectingStreamReader,
+    sniff_content_type,
+)
+from yafs.apps.storages.repositories.reader import HASH_THREAD_MIN_SIZE
+
+PART_SIZE = 8
+
+
+class ChunkedStream:
+    def __init__(self, data: bytes, chunk_size: int) -> None:
+        self.stream = io.BytesIO(data)
+        self.chunk_size = chunk_size
+
+    async def read(self, size: int | None = -1) -> bytes:
+        size = self.chunk_size if size is None or size < 0 else min(size, self.chunk_size)
+        return self.stream.read(size)
+
+
+class RecordingInspector:
+    is_cpu_bound = True
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+
+    def update(self, chunk: bytes) -> None:
+        self.data += chunk
+
+
+def md5(data: bytes) -> bytes:
+    return hashlib.md5(data, usedforsecurity=False).digest()
+
+
+def multipart_etag(parts: list[bytes]) -> str:
+    return f'{hashlib.md5(b"".join(md5(part) for part in parts), usedforsecurity=False).hexdigest()}-{len(parts)}'
+
+
+def inspect_etag(data: bytes, chunk_sizes: list[int]) -> str:
+    inspector = ETagInspector(PART_SIZE)
+    offset = 0
+    for chunk_size in chunk_sizes:
+        inspector.update(data[offset : offset + chunk_size])
+        offset += chunk_size
+    inspector.update(data[offset:])
+    return inspector.etag
+
+
+@pytest.mark.parametrize('chunk_sizes', [[], [1, 2], [3, 10]])
+def test_etag_of_object_smaller_than_part(chunk_sizes: list[int]) -> None:
+    data = b'abcde'
+
+    assert inspect_etag(data, chunk_sizes) == md5(data).hex()
+    assert ETagInspector(PART_SIZE).etag == md5(b'').hex()
+
+
+@pytest.mark.parametrize('chunk_sizes', [[], [PART_SIZE], [3, 7, 5], [PART_SIZE * 2]])
+def test_etag_of_exact_multiple_of_part_size(chunk_sizes: list[int]) -> None:
+    data = bytes(range(PART_SIZE * 3))
+
+    assert inspect_etag(data, chunk_sizes) == multipart_etag(
+        [data[:PART_SIZE], data[PART_SIZE : PART_SIZE * 2], data[PART_SIZE * 2 :]]
+    )
+    # Объект ровно в одну часть уже записывается частями.
+    assert inspect_etag(data[:PART_SIZE], chunk_sizes) == multipart_etag([data[:PART_SIZE]])
+
+
+@pytest.mark.parametrize('chunk_sizes', [[], [1], [5, 6], [PART_SIZE * 2]])
+def test_etag_with_trailing_partial_part(chunk_sizes: list[int]) -> None:
+    data = bytes(range(PART_SIZE * 2 + 3))
+
+    assert inspect_etag(data, chunk_sizes) == multipart_etag(
+        [data[:PART_SIZE], data[PART_SIZE : PART_SIZE * 2], data[PART_SIZE * 2 :]]
+    )
+
+
+@pytest.mark.parametrize(
+    ('data', 'content_type'),
+    [
+        (b'RIFF\x24\x00\x00\x00WEBPVP8 ', 'image/webp'),
+        (b'RIFF\x24\x00\x00\x00WAVEfmt ', 'audio/wav'),
+        (b'RIFF\x24\x00\x00\x00AVI LIST', 'video/x-msvideo'),
+        # Сигнатура со смещением проверяется только внутри контейнера RIFF.
+        (b'XXXX\x24\x00\x00\x00WEBPVP8 ', DEFAULT_CONTENT_TYPE),
+        (b'12345678WAVE', 'text/plain'),
+    ],
+)
+def test_sniff_riff_content_type(data: bytes, content_type: str) -> None:
+    assert sniff_content_type(data) == content_type
+
+
+@pytest.mark.parametrize(
+    ('brand', 'content_type'),
+    [
+        (b'avif', 'image/avif'),
+        (b'heic', 'image/heic'),
+        (b'qt  ', 'video/quicktime'),
+        (b'M4A ', 'audio/mp4'),
+        (b'isom', 'video/mp4'),
+    ],
+)
+def test_sniff_iso_media_content_type(brand: bytes, content_type: str) -> None:
+    assert sniff_content_type(b'\x00\x00\x00\x18ftyp' + brand + b'\x00\x00\x02\x00') == content_type
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('prefetch_size', [0, 5, 1000, HASH_THREAD_MIN_SIZE])
+async def test_prefetch_then_read_inspects_every_byte_once(prefetch_size: int) -> None:
+    data = bytes(range(256)) * 4 + b'x' * HASH_THREAD_MIN_SIZE * 2
+    inspection = ContentInspection()
+    recording_inspector = RecordingInspector()
+    reader = InspectingStreamReader(ChunkedStream(data, 300), [*inspection.inspectors, recording_inspector])
+
+    prefetched = await reader.prefetch(prefetch_size)
+    chunks = []
+    for size in (3, 1000, -1, 7):
+        chunks.append(await reader.read(size))
+    while chunk := await reader.read(HASH_THREAD_MIN_SIZE):
+        chunks.append(chunk)
+
+    assert prefetched == min(prefetch_size, len(data))
+    assert b''.join(chunks) == data
+    assert bytes(recording_inspector.data) == data
+    assert reader.size == len(data)
+    assert inspection.sha256.hexdigest() == hashlib.sha256(data).hexdigest()
+    assert inspection.md5.hexdigest() == hashlib.md5(data, usedforsecurity=False).hexdigest()
@@ -0,0 +1,182 @@
+import datetime as dt
+import uuid
+from collections.abc import Awaitable, Callable
+
+import pytest
+from fast_clean.repositories import InMemoryCacheRepository
+from yafs.apps.storages.enums import FileStatusEnum
+from yafs.apps.storages.repositories.metadata_cache import LOADING_PREFIX, MISSING_VALUE, MetadataCacheRepository
+from yafs.apps.storages.schemas import FileReadSchema
+
+
+def make_file(status: FileStatusEnum = FileStatusEnum.READY) -> FileReadSchema:
+    return FileReadSchema(
+        id=uuid.uuid4(),
+        name='report.txt',
+        size=10,
+        storage_id=uuid.uuid4(),
+        path='/files/report.txt',
+        status=status,
+        created_at=dt.datetime.now(dt.UTC),
+    )
+
+
+class Loader:
+    def __init__(self, file: FileReadSchema | None, *, during: Callable[[], Awaitable[None]] | None = None) -> None:
+        self.file = file
+        self.during = during
+        self.calls = 0
+
+    async def __call__(self) -> FileReadSchema | None:
+        self.calls += 1
+        if self.during is not None:
+            await self.during()
+        return self.file
+
+
+@pytest.fixture
+def cache_repository() -> InMemoryCacheRepository:
+    return InMemoryCacheRepository()
+
+
+@pytest.fixture
+def metadata_cache_repository(cache_repository: InMemoryCacheRepository) -> MetadataCacheRepository:
+    return MetadataCacheRepository(cache_repository, 'test')
+
+
+@pytest.mark.asyncio
+async def test_ready_file_is_cached(
+    metadata_cache_repository: MetadataCacheRepository, cache_repository: InMemoryCacheRepository
+) -> None:
+    file = make_file()
+    loader = Loader(file)
+
+    assert await metadata_cache_repository.get_file(file.id, loader) == file
+    assert await metadata_cache_repository.get_file(file.id, loader) == file
+    assert loader.calls == 1
+    assert await cache_repository.get(metadata_cache_repository.get_file_key(file.id)) == file.model_dump_json()
+
+    await metadata_cache_repository.invalidate_files([file.id])
+    assert await metadata_cache_repository.get_file(file.id, loader) == file
+    assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_pending_file_is_not_cached(
+    metadata_cache_repository: MetadataCacheRepository, cache_repository: InMemoryCacheRepository
+) -> None:
+    file = make_file(FileStatusEnum.PENDING)
+    loader = Loader(file)
+
+    assert await metadata_cache_repository.get_file(file.id, loader) == file
+    assert await cache_repository.get(metadata_cache_repository.get_file_key(file.id)) is None
+
+    # После загрузки файл становится READY и кешируется без инвалидации.
+    loader.file = file.model_copy(update={'status': FileStatusEnum.READY})
+    assert await metadata_cache_repository.get_file(file.id, loader) == loader.file
+    assert await metadata_cache_repository.get_file(file.id, loader) == loader.file
+    assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_file_is_cached(
+    metadata_cache_repository: MetadataCacheRepository, cache_repository: InMemoryCacheRepository
+) -> None:
+    file_id = uuid.uuid4()
+    loader = Loader(None)
+
+    assert await metadata_cache_repository.get_file(file_id, loader) is None
+    assert await metadata_cache_repository.get_file(file_id, loader) is None
+    assert loader.calls == 1
+    assert await cache_repository.get(metadata_cache_repository.get_file_key(file_id)) == MISSING_VALUE
+
+    await metadata_cache_repository.invalidate_files([file_id])
+    loader.file = make_file().model_copy(update={'id': file_id})
+    assert await metadata_cache_repository.get_file(file_id, loader) == loader.file
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_load_is_not_overwritten(
+    metadata_cache_repository: MetadataCacheRepository, cache_repository: InMemoryCacheRepository
+) -> None:
+    file = make_file()
+    key = metadata_cache_repository.get_file_key(file.id)
+
+    async def invalidate() -> None:
+        assert (await cache_repository.get(key) or '').startswith(LOADING_PREFIX)
+        await metadata_cache_repository.invalidate_files([file.id])
+
+    # Загрузка прочитала файл до изменения, поэтому ее значение устарело и в кеш не попадает.
+    assert await metadata_cache_repository.get_file(file.id, Loader(file, during=invalidate)) == file
+    assert await cache_repository.get(key) is None
+
+    loader = Loader(None, during=invalidate)
+    assert await metadata_cache_repository.get_file(file.id, loader) is None
+    assert await cache_repository.get(key) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_load_is_not_cached(
+    metadata_cache_repository: MetadataCacheRepository, cache_repository: InMemoryCacheRepository
+) -> None:
+    file = make_file()
+    key = metadata_cache_repository.get_file_key(file.id)
+    concurrent_loader = Loader(file)
+
+    async def load_concurrently() -> None:
+        assert await metadata_cache_repository.get_file(file.id, concurrent_loader) == file
+        assert (await cache_repository.get(key) or '').startswith(LOADING_PREFIX)
+
+    assert await metadata_cache_repository.get_file(file.id, Loader(file, during=load_concurrently)) == file
+    assert concurrent_loader.calls == 1
+    assert await cache_repository.get(key) == file.model_dump_json()
+
+
+@pytest.mark.asyncio
+async def test_invalid_entry_is_reloaded(
+    metadata_cache_repository: MetadataCacheRepository, cache_repository: InMemoryCacheRepository
+) -> None:
+    file = make_file()
+    key = metadata_cache_repository.get_file_key(file.id)
+    await cache_repository.set(key, '{"id": "not a file"}')
+    loader = Loader(file)
+
+    assert await metadata_cache_repository.get_file(file.id, loader) == file
+    assert loader.calls == 1
+    assert await cache_repository.get(key) == file.model_dump_json()
+
+
+@pytest.mark.asyncio
+async def test_get_files(
+    metadata_cache_repository: MetadataCacheRepository, cache_repository: InMemoryCacheRepository
+) -> None:
+    cached, ready, pending, invalidated = make_file(), make_file(), make_file(FileStatusEnum.PENDING), make_file()
+    missing_id = uuid.uuid4()
+    await metadata_cache_repository.get_file(cached.id, Loader(cached))
+    loaded_ids: list[list[uuid.UUID]] = []
+
+    async def loader(file_ids: list[uuid.UUID]) -> list[FileReadSchema]:
+        loaded_ids.append(file_ids)
+        await metadata_cache_repository.invalidate_files([invalidated.id])
+        return [file for file in (ready, pending, invalidated) if file.id in file_ids]
+
+    file_ids = [cached.id, ready.id, pending.id, invalidated.id, missing_id, ready.id]
+    files = await metadata_cache_repository.get_files(file_ids, loader)
+
+    assert files == {file.id: file for file in (cached, ready, pending, invalidated)}
+    assert loaded_ids == [[ready.id, pending.id, invalidated.id, missing_id]]
+    values = {
+        file_id: await cache_repository.get(metadata_cache_repository.get_file_key(file_id))
+        for file_id in dict.fromkeys(file_ids)
+    }
+    assert values == {
+        cached.id: cached.model_dump_json(),
+        ready.id: ready.model_dump_json(),
+        pending.id: None,
+        invalidated.id: None,
+        missing_id: MISSING_VALUE,
+    }
+
+    files = await metadata_cache_repository.get_files(file_ids, loader)
+    assert files == {file.id: file for file in (cached, ready, pending, invalidated)}
+    assert loaded_ids[1] == [pending.id, invalidated.id]
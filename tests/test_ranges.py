@@ -0,0 +1,131 @@
+import datetime as dt
+
+import pytest
+from fast_clean.settings import CoreSettingsSchema
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from yafs.apps.storages.exceptions import RangeNotSatisfiableError, use_exceptions_handlers
+from yafs.apps.storages.ranges import (
+    MAX_RANGES,
+    check_not_modified,
+    format_http_date,
+    get_byte_ranges,
+)
+from yafs.apps.storages.schemas import ByteRangeSchema
+
+SIZE = 100
+ETAG = '"abc"'
+LAST_MODIFIED = dt.datetime(2026, 10, 18, 12, 30, 15, 123456, tzinfo=dt.UTC)
+
+
+def get_ranges(range_header: str | None, if_range: str | None = None, size: int = SIZE) -> list[tuple[int, int]]:
+    return [
+        (byte_range.start, byte_range.end)
+        for byte_range in get_byte_ranges(range_header, if_range, ETAG, size, LAST_MODIFIED)
+    ]
+
+
+@pytest.mark.parametrize(
+    ('range_header', 'ranges'),
+    [
+        ('bytes=0-9', [(0, 9)]),
+        ('bytes=-10', [(90, 99)]),
+        ('bytes=-1000', [(0, 99)]),
+        ('bytes=90-', [(90, 99)]),
+        ('bytes=0-', [(0, 99)]),
+        ('bytes=95-1000', [(95, 99)]),
+        ('bytes=99-99', [(99, 99)]),
+        (' Bytes = 1-2 , -3 ', [(1, 2), (97, 99)]),
+        # Диапазоны за пределами файла отбрасываются, если хотя бы один попадает в файл.
+        ('bytes=200-300,0-0', [(0, 0)]),
+    ],
+)
+def test_range(range_header: str, ranges: list[tuple[int, int]]) -> None:
+    assert get_ranges(range_header) == ranges
+
+
+@pytest.mark.parametrize(
+    'range_header',
+    ['items=0-1', 'bytes=', 'bytes=5', 'bytes=-', 'bytes=a-1', 'bytes=1-b', 'bytes=5-4', 'bytes=0-1,x'],
+)
+def test_invalid_range_is_ignored(range_header: str) -> None:
+    assert get_ranges(range_header) == []
+
+
+@pytest.mark.parametrize(('range_header', 'size'), [('bytes=100-', SIZE), ('bytes=-0', SIZE), ('bytes=-5', 0)])
+def test_unsatisfiable_range(range_header: str, size: int) -> None:
+    with pytest.raises(RangeNotSatisfiableError) as error:
+        get_ranges(range_header, size=size)
+
+    assert error.value.size == size
+
+
+def test_unsatisfiable_range_response() -> None:
+    app = FastAPI()
+    use_exceptions_handlers(app, CoreSettingsSchema(debug=False, base_url='http://testserver', secret_key='secret'))
+
+    @app.get('/file')
+    async def read_file() -> list[ByteRangeSchema]:
+        return get_byte_ranges('bytes=200-', None, ETAG, SIZE, LAST_MODIFIED)
+
+    response = TestClient(app).get('/file')
+
+    assert response.status_code == 416
+    assert response.headers['Content-Range'] == f'bytes */{SIZE}'
+
+
+def test_ranges_are_coalesced() -> None:
+    assert get_ranges('bytes=50-59,0-9,5-19,20-29,-5,97-') == [(0, 29), (50, 59), (95, 99)]
+
+
+def test_ranges_over_limit_return_whole_file() -> None:
+    ranges = 'bytes=' + ','.join(f'{start}-{start}' for start in range(0, (MAX_RANGES + 1) * 2, 2))
+
+    assert len(get_ranges(ranges)) == 0
+    assert len(get_ranges(ranges.rsplit(',', 1)[0])) == MAX_RANGES
+    # Ограничение применяется после объединения соседних диапазонов.
+    assert get_ranges('bytes=' + ','.join(f'{start}-{start}' for start in range(MAX_RANGES * 2))) == [
+        (0, MAX_RANGES * 2 - 1)
+    ]
+
+
+@pytest.mark.parametrize(
+    ('if_range', 'ranges'),
+    [
+        (None, [(0, 9)]),
+        (ETAG, [(0, 9)]),
+        ('W/"abc"', []),
+        ('"other"', []),
+        (format_http_date(LAST_MODIFIED), [(0, 9)]),
+        (format_http_date(LAST_MODIFIED + dt.timedelta(seconds=1)), []),
+        (format_http_date(LAST_MODIFIED - dt.timedelta(seconds=1)), []),
+        ('not a date', []),
+    ],
+)
+def test_if_range(if_range: str | None, ranges: list[tuple[int, int]]) -> None:
+    assert get_ranges('bytes=0-9', if_range) == ranges
+
+
+def test_if_range_mismatch_ignores_unsatisfiable_range() -> None:
+    assert get_ranges('bytes=200-', '"other"') == []
+
+
+@pytest.mark.parametrize(
+    ('if_none_match', 'if_modified_since', 'not_modified'),
+    [
+        (ETAG, None, True),
+        ('W/"abc"', None, True),
+        ('"other", "abc"', None, True),
+        ('*', None, True),
+        ('"other"', None, False),
+        # If-Modified-Since не учитывается вместе с If-None-Match.
+        ('"other"', format_http_date(LAST_MODIFIED), False),
+        (None, format_http_date(LAST_MODIFIED), True),
+        (None, format_http_date(LAST_MODIFIED - dt.timedelta(seconds=1)), False),
+        (None, 'Sun, 18 Oct 2026 12:30:15', True),
+        (None, 'not a date', False),
+        (None, None, False),
+    ],
+)
+def test_not_modified(if_none_match: str | None, if_modified_since: str | None, not_modified: bool) -> None:
+    assert check_not_modified(if_none_match, if_modified_since, ETAG, LAST_MODIFIED) is not_modified
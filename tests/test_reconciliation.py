@@ -0,0 +1,152 @@
+import datetime as dt
+import os
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+from yafs.apps.storages.repositories.local import LocalFileStorageRepository
+from yafs.apps.storages.schemas import (
+    LocalFileStorageParamsSchema,
+    OrphanObjectCreateSchema,
+    OrphanObjectReadSchema,
+    ReconciliationCheckpointReadSchema,
+)
+from yafs.apps.storages.services.reconciliation import FileReconciliationService
+from yafs.apps.storages.settings import OrphanReconciliationSettingsSchema
+
+STORAGE_ID = uuid.uuid4()
+OLD_TIME = time.time() - 7 * 24 * 60 * 60
+
+
+class FakeFileRepository:
+    def __init__(self, paths: list[str]) -> None:
+        self.paths = sorted(paths, key=str.encode)
+        self.ranges: list[tuple[str | None, str | None]] = []
+
+    async def get_known_paths(self, storage_id: uuid.UUID, *, after: str | None, until: str | None) -> list[str]:
+        self.ranges.append((after, until))
+        return [
+            path
+            for path in self.paths
+            if (after is None or path.encode() > after.encode()) and (until is None or path.encode() <= until.encode())
+        ]
+
+
+class FakeOrphanObjectRepository:
+    def __init__(self) -> None:
+        self.orphans: list[OrphanObjectCreateSchema] = []
+
+    async def quarantine(self, create_objects: list[OrphanObjectCreateSchema]) -> None:
+        self.orphans.extend(create_objects)
+
+
+class FakeCheckpointRepository:
+    def __init__(self, last_path: str | None = None) -> None:
+        self.last_path = last_path
+
+    async def get_by_storage(self, storage_id: uuid.UUID) -> ReconciliationCheckpointReadSchema | None:
+        if self.last_path is None:
+            return None
+        return ReconciliationCheckpointReadSchema(id=uuid.uuid4(), storage_id=storage_id, last_path=self.last_path)
+
+    async def save(self, storage_id: uuid.UUID, last_path: str | None) -> None:
+        self.last_path = last_path
+
+
+def make_storage(root: Path, paths: list[str], *, modified_at: float = OLD_TIME) -> LocalFileStorageRepository:
+    for path in paths:
+        local_path = root / path.lstrip('/')
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        local_path.write_bytes(b'data')
+        os.utime(local_path, (modified_at, modified_at))
+    return LocalFileStorageRepository(LocalFileStorageParamsSchema(path=str(root)))
+
+
+def make_service(
+    file_repository: FakeFileRepository,
+    orphan_object_repository: FakeOrphanObjectRepository,
+    checkpoint_repository: FakeCheckpointRepository,
+) -> FileReconciliationService:
+    return FileReconciliationService(
+        file_repository=file_repository,  # type: ignore[arg-type]
+        file_storage_repository_pool=None,  # type: ignore[arg-type]
+        upload_session_repository=None,  # type: ignore[arg-type]
+        storage_repository=None,  # type: ignore[arg-type]
+        orphan_object_repository=orphan_object_repository,  # type: ignore[arg-type]
+        reconciliation_checkpoint_repository=checkpoint_repository,  # type: ignore[arg-type]
+        blob_service=None,  # type: ignore[arg-type]
+    )
+
+
+@pytest.mark.asyncio
+async def test_list_objects_in_byte_order(tmp_path: Path) -> None:
+    paths = ['/files/a', '/files/a-b', '/files/a0', '/files/b/c', '/files/b/d/e', '/files/b-c', '/files/B']
+    storage = make_storage(tmp_path, paths)
+    (tmp_path / 'files' / '.a.tmp').write_bytes(b'temp')
+    (tmp_path / 'files' / '.b.parts').mkdir()
+    (tmp_path / 'files' / '.b.parts' / '1').write_bytes(b'part')
+    (tmp_path / 'other').mkdir()
+    (tmp_path / 'other' / 'a').write_bytes(b'other')
+    expected = sorted(paths, key=str.encode)
+
+    for limit in (1, 2, 3, len(paths) + 1):
+        listed: list[str] = []
+        after = None
+        while objects := await storage.list_objects('/files/', start_after=after, limit=limit):
+            listed.extend(storage_object.path for storage_object in objects)
+            after = objects[-1].path
+        assert listed == expected
+
+
+@pytest.mark.asyncio
+async def test_find_orphans_merges_pages(tmp_path: Path) -> None:
+    storage = make_storage(tmp_path, [f'/files/{name}' for name in 'abcdefg'])
+    file_repository = FakeFileRepository(['/files/a', '/files/bb', '/files/d', '/files/g', '/files/h'])
+    orphan_object_repository = FakeOrphanObjectRepository()
+    checkpoint_repository = FakeCheckpointRepository()
+    service = make_service(file_repository, orphan_object_repository, checkpoint_repository)
+
+    await service.find_orphans(
+        STORAGE_ID, storage, OrphanReconciliationSettingsSchema(batch_size=3), time.monotonic() + 60
+    )
+
+    assert [orphan.path for orphan in orphan_object_repository.orphans] == [
+        '/files/b',
+        '/files/c',
+        '/files/e',
+        '/files/f',
+    ]
+    assert file_repository.ranges == [(None, '/files/c'), ('/files/c', '/files/f'), ('/files/f', None)]
+    assert checkpoint_repository.last_path is None
+
+
+@pytest.mark.asyncio
+async def test_find_orphans_short_final_page(tmp_path: Path) -> None:
+    storage = make_storage(tmp_path, ['/files/a', '/files/b', '/files/c'])
+    make_storage(tmp_path, ['/files/d'], modified_at=time.time())
+    file_repository = FakeFileRepository(['/files/c', '/files/e'])
+    orphan_object_repository = FakeOrphanObjectRepository()
+    checkpoint_repository = FakeCheckpointRepository('/files/a')
+    service = make_service(file_repository, orphan_object_repository, checkpoint_repository)
+
+    await service.find_orphans(
+        STORAGE_ID, storage, OrphanReconciliationSettingsSchema(batch_size=10), time.monotonic() + 60
+    )
+
+    # Объект моложе min_age пропускается, а последняя страница не ограничивает пути файлов сверху.
+    assert [orphan.path for orphan in orphan_object_repository.orphans] == ['/files/b']
+    assert file_repository.ranges == [('/files/a', None)]
+    assert checkpoint_repository.last_path is None
+
+
+def test_split_by_size() -> None:
+    def make_orphan(size: int) -> OrphanObjectReadSchema:
+        return OrphanObjectReadSchema(
+            id=uuid.uuid4(), storage_id=STORAGE_ID, path='/files/a', size=size, created_at=dt.datetime.now(dt.UTC)
+        )
+
+    groups = FileReconciliationService.split_by_size([make_orphan(size) for size in (5, 3, 10, 1, 1, 20, 2)], 8)
+
+    assert [[orphan.size for orphan in group] for group in groups] == [[5, 3], [10], [1, 1], [20], [2]]
+    assert FileReconciliationService.split_by_size([], 8) == []
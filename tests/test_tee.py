@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+from yafs.apps.storages.repositories import reader
+from yafs.apps.storages.repositories.reader import TeeStreamReader
+
+CHUNK_SIZE = 4
+WINDOW = 10
+DATA = bytes(range(100))
+
+
+class Source:
+    def __init__(self, data: bytes, *, fail_at: int | None = None) -> None:
+        self.data = data
+        self.offset = 0
+        self.fail_at = fail_at
+        self.reads = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def read(self, size: int | None = -1) -> bytes:
+        await self.release.wait()
+        self.reads += 1
+        if self.fail_at is not None and self.offset >= self.fail_at:
+            raise OSError('connection reset')
+        size = len(self.data) if size is None or size < 0 else size
+        chunk = self.data[self.offset : self.offset + size]
+        self.offset += len(chunk)
+        return chunk
+
+
+@pytest.fixture(autouse=True)
+def chunk_size(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(reader, 'READ_CHUNK_SIZE', CHUNK_SIZE)
+
+
+async def read_all(branch: reader.TeeBranchReader, size: int = 3) -> bytes:
+    data = bytearray()
+    while chunk := await branch.read(size):
+        data.extend(chunk)
+    return bytes(data)
+
+
+async def settle() -> None:
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_fast_branch_waits_within_window() -> None:
+    tee = TeeStreamReader(Source(DATA), 2, window=WINDOW)
+    fast, slow = tee.branches
+    fast_task = asyncio.create_task(read_all(fast))
+    slow_data = bytearray()
+
+    while not fast_task.done():
+        await settle()
+        lag = tee.offsets[fast.index] - tee.offsets[slow.index]
+        assert lag <= WINDOW + CHUNK_SIZE
+        assert len(tee.buffer) <= WINDOW + CHUNK_SIZE
+        if not fast_task.done():
+            assert lag >= WINDOW
+        slow_data.extend(await slow.read(1))
+
+    slow_data.extend(await read_all(slow))
+    assert fast_task.result() == DATA
+    assert bytes(slow_data) == DATA
+    assert not tee.buffer
+
+
+@pytest.mark.asyncio
+async def test_closed_branch_does_not_block_others() -> None:
+    tee = TeeStreamReader(Source(DATA), 3, window=WINDOW)
+    first, second, closed = tee.branches
+
+    assert await closed.read(3) == DATA[:3]
+    closed.close()
+
+    assert await asyncio.wait_for(asyncio.gather(read_all(first), read_all(second)), 1) == [DATA, DATA]
+    assert not tee.buffer
+    closed.close()
+
+
+@pytest.mark.asyncio
+async def test_source_error_reaches_every_branch() -> None:
+    source = Source(DATA, fail_at=CHUNK_SIZE * 2)
+    tee = TeeStreamReader(source, 3, window=WINDOW)
+
+    results = await asyncio.gather(*[read_all(branch) for branch in tee.branches], return_exceptions=True)
+
+    assert all(isinstance(result, OSError) for result in results)
+    assert source.reads == 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_reader_does_not_lose_data() -> None:
+    source = Source(DATA)
+    source.release.clear()
+    tee = TeeStreamReader(source, 2, window=WINDOW)
+    cancelled, other = tee.branches
+    cancelled_task = asyncio.create_task(cancelled.read(CHUNK_SIZE))
+    other_task = asyncio.create_task(read_all(other))
+    await settle()
+
+    # Чтение источника уже идет, отмена читателя не должна прервать его.
+    cancelled_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled_task
+    source.release.set()
+
+    assert await asyncio.wait_for(read_all(cancelled), 1) == DATA
+    assert await other_task == DATA
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_pending_source_read() -> None:
+    source = Source(DATA)
+    source.release.clear()
+    tee = TeeStreamReader(source, 1, window=WINDOW)
+    read_task = asyncio.create_task(tee.branches[0].read(1))
+    await settle()
+
+    fill_task = tee.fill_task
+    read_task.cancel()
+    await asyncio.gather(read_task, return_exceptions=True)
+    await tee.close()
+
+    assert fill_task is not None and fill_task.cancelled()
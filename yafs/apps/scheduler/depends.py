@@ -0,0 +1,33 @@
+from collections.abc import AsyncIterator
+
+from dishka import Provider, Scope, provide
+from fast_clean.repositories import SettingsRepositoryProtocol
+from fast_clean.settings import CoreDbSettingsSchema
+
+from .repositories import SchedulerRepository
+from .settings import SchedulerSettingsSchema
+
+__all__ = ('provider',)
+
+
+class SchedulerProvider(Provider):
+    """
+    Собираем провайдер планировщика.
+    """
+
+    scope = Scope.APP
+
+    @provide
+    @staticmethod
+    async def provide_scheduler_repository(
+        settings_repository: SettingsRepositoryProtocol,
+    ) -> AsyncIterator[SchedulerRepository]:
+        db_settings = await settings_repository.get(CoreDbSettingsSchema)
+        scheduler_settings = await settings_repository.get(SchedulerSettingsSchema)
+        scheduler_repository = SchedulerRepository(db_settings, scheduler_settings)
+        yield scheduler_repository
+        if scheduler_repository.scheduler.running:
+            await scheduler_repository.shutdown(wait=False)
+
+
+provider = SchedulerProvider()
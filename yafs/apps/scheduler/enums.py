@@ -4,3 +4,8 @@ from enum import StrEnum, auto
 class TriggerTypeEnum(StrEnum):
     INTERVAL = auto()
     CRON = auto()
+
+
+class ExecutorTypeEnum(StrEnum):
+    DEFAULT = auto()
+    PROCESS_POOL = 'processpool'
@@ -0,0 +1,77 @@
+import datetime as dt
+import threading
+import time
+from typing import Self
+
+from aioprometheus import Counter, Gauge, Histogram
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+    JobEvent,
+    JobExecutionEvent,
+    JobSubmissionEvent,
+)
+
+JOB_DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 7200.0, 14400.0)
+"""
+Границы гистограммы длительности задач: от очистки до ночного переноса файлов.
+"""
+JOB_DELAY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0)
+"""
+Границы гистограммы опоздания запуска относительно расписания.
+"""
+JOB_EVENTS = EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES
+"""
+События планировщика, по которым считаются метрики задач.
+"""
+
+scheduler_job_seconds = Histogram(
+    'yafs_scheduler_job_seconds', 'Duration of scheduled job runs, by result.', buckets=JOB_DURATION_BUCKETS
+)
+scheduler_job_delay_seconds = Histogram(
+    'yafs_scheduler_job_delay_seconds',
+    'Delay between the scheduled and the actual start of a job run.',
+    buckets=JOB_DELAY_BUCKETS,
+)
+scheduler_job_misfires = Counter(
+    'yafs_scheduler_job_misfires_total', 'Number of job runs skipped because they started too late.'
+)
+scheduler_job_overlaps = Counter(
+    'yafs_scheduler_job_overlaps_total', 'Number of job runs skipped because the previous run was still running.'
+)
+scheduler_leader = Gauge('yafs_scheduler_leader', 'Whether this replica runs the scheduled jobs.')
+
+
+class JobMetricsListener:
+    """
+    Слушатель событий планировщика, записывающий метрики задач.
+
+    События приходят из потока выбора задач и из исполнителей, поэтому время запусков хранится под блокировкой.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.started: dict[tuple[str, dt.datetime], float] = {}
+
+    def __call__(self: Self, event: JobEvent) -> None:
+        labels = {'job_id': event.job_id}
+        if event.code == EVENT_JOB_MAX_INSTANCES:
+            scheduler_job_overlaps.inc(labels)
+        elif isinstance(event, JobSubmissionEvent):
+            now = time.monotonic()
+            with self.lock:
+                for run_time in event.scheduled_run_times:
+                    self.started[event.job_id, run_time] = now
+            delay = dt.datetime.now(dt.UTC) - event.scheduled_run_times[-1]
+            scheduler_job_delay_seconds.observe(labels, max(delay.total_seconds(), 0.0))
+        elif isinstance(event, JobExecutionEvent):
+            with self.lock:
+                started = self.started.pop((event.job_id, event.scheduled_run_time), None)
+            if event.code == EVENT_JOB_MISSED:
+                scheduler_job_misfires.inc(labels)
+            elif started is not None:
+                result = 'error' if event.code == EVENT_JOB_ERROR else 'ok'
+                scheduler_job_seconds.observe({**labels, 'result': result}, time.monotonic() - started)
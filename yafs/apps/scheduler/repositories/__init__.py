@@ -0,0 +1,2 @@
+from .leader import SchedulerLeaderRepository as SchedulerLeaderRepository
+from .scheduler import SchedulerRepository as SchedulerRepository
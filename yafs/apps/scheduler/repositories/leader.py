@@ -0,0 +1,72 @@
+import asyncio
+import hashlib
+import logging
+from collections.abc import Callable
+from typing import Self
+
+import psycopg
+
+from ..metrics import scheduler_leader
+
+SCHEDULER_LOCK_KEY = int.from_bytes(hashlib.sha256(b'yafs:scheduler').digest()[:8], 'big', signed=True)
+"""
+Ключ advisory блокировки Postgres, которую держит ведущая реплика планировщика.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerLeaderRepository:
+    """
+    Выбор ведущей реплики планировщика сессионной advisory блокировкой Postgres.
+
+    Блокировку держит отдельное соединение ведущей реплики. При остановке реплики или обрыве
+    соединения Postgres снимает блокировку сам, и ведущей становится одна из остальных реплик.
+    Реплика замечает потерю соединения в пределах двух check_interval и прерывает выполняющиеся задачи,
+    но Postgres может снять блокировку раньше. Поэтому задачи должны допускать короткое одновременное
+    выполнение на двух репликах.
+    """
+
+    def __init__(self, conninfo: str, *, check_interval: float) -> None:
+        self.conninfo = conninfo
+        self.check_interval = check_interval
+        self.is_leader = False
+
+    async def run(self: Self, on_elected: Callable[[], None], on_lost: Callable[[], None]) -> None:
+        """
+        Пытаемся стать ведущей репликой, пока задачу не отменят.
+        """
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True) as connection:
+                    await self.hold(connection, on_elected)
+            except (psycopg.Error, OSError, TimeoutError):
+                logger.warning('Scheduler leader connection failed', exc_info=True)
+            finally:
+                if self.is_leader:
+                    self.is_leader = False
+                    scheduler_leader.set({}, 0)
+                    on_lost()
+                    logger.info('Scheduler leadership lost')
+            await asyncio.sleep(self.check_interval)
+
+    async def hold(self: Self, connection: psycopg.AsyncConnection, on_elected: Callable[[], None]) -> None:
+        """
+        Захватываем блокировку и проверяем соединение, пока оно живо.
+
+        Блокировка повторно захватывается тем же соединением, поэтому после захвата проверяется только соединение.
+        """
+        while True:
+            if self.is_leader:
+                await asyncio.wait_for(connection.execute('SELECT 1'), self.check_interval)
+            else:
+                cursor = await asyncio.wait_for(
+                    connection.execute('SELECT pg_try_advisory_lock(%s)', (SCHEDULER_LOCK_KEY,)), self.check_interval
+                )
+                row = await cursor.fetchone()
+                if row is not None and row[0]:
+                    self.is_leader = True
+                    scheduler_leader.set({}, 1)
+                    on_elected()
+                    logger.info('Scheduler leadership acquired')
+            await asyncio.sleep(self.check_interval)
@@ -1,48 +1,202 @@
+import asyncio
+import concurrent.futures
 import contextlib
 from typing import Any, Awaitable, Callable, Self
 
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.executors.pool import ProcessPoolExecutor
 from apscheduler.job import Job as ApsJob
 from apscheduler.jobstores.base import JobLookupError
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler, run_in_event_loop
+from apscheduler.schedulers.base import STATE_STOPPED
 from fast_clean.settings import CoreDbSettingsSchema
+from psycopg.conninfo import make_conninfo
 from sqlalchemy import create_engine
 
-from ..enums import TriggerTypeEnum
+from .leader import SchedulerLeaderRepository
+from ..enums import ExecutorTypeEnum, TriggerTypeEnum
+from ..metrics import JOB_EVENTS, JobMetricsListener
+from ..settings import SchedulerSettingsSchema
+
+
+class ThreadSafeAsyncIOExecutor(AsyncIOExecutor):
+    """
+    Исполнитель корутин, принимающий задачи из потока выбора задач планировщика.
+    """
+
+    def _do_submit_job(self, job: ApsJob, run_times: list[Any]) -> None:
+        self._eventloop.call_soon_threadsafe(super()._do_submit_job, job, run_times)
+
+    def cancel_jobs(self: Self) -> None:
+        """
+        Отменяем выполняющиеся задачи.
+
+        Корутины прерываются на ближайшем ожидании, синхронные функции в потоках дорабатывают до конца.
+        """
+        for future in list(self._pending_futures):
+            future.cancel()
+
+
+class StoppableProcessPoolExecutor(ProcessPoolExecutor):
+    """
+    Исполнитель задач в пуле процессов, выполняющиеся задачи которого можно прервать.
+    """
+
+    def __init__(self, max_workers: int = 10) -> None:
+        super().__init__(max_workers)
+        self.max_workers = max_workers
+
+    def cancel_jobs(self: Self) -> None:
+        """
+        Заменяем пул новым, а процессы прежнего завершаем вместе с выполняющимися в них задачами.
+        """
+        pool: concurrent.futures.ProcessPoolExecutor = self._pool  # type: ignore[has-type]
+        self._pool = concurrent.futures.ProcessPoolExecutor(self.max_workers, **self.pool_kwargs)
+        processes = list((pool._processes or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+
+class ThreadedAsyncIOScheduler(AsyncIOScheduler):
+    """
+    Планировщик asyncio, выбирающий задачи из хранилища в отдельном потоке.
+
+    SQLAlchemyJobStore синхронный, а AsyncIOScheduler выбирает задачи прямо в цикле событий,
+    поэтому каждый запрос к хранилищу задач останавливал обработку запросов.
+    Одновременно задачи выбирает только один поток, пробуждение во время выбора повторяет его после.
+    """
+
+    _processing: 'asyncio.Future[float | None] | None' = None
+    _rewake = False
+
+    @run_in_event_loop
+    def wakeup(self: Self) -> None:
+        self._stop_timer()
+        if self._processing is not None:
+            self._rewake = True
+            return
+        self._processing = asyncio.ensure_future(asyncio.to_thread(self._process_jobs))
+        self._processing.add_done_callback(self._processed)
+
+    def _processed(self: Self, future: 'asyncio.Future[float | None]') -> None:
+        self._processing = None
+        if self.state == STATE_STOPPED or future.cancelled():
+            return
+        if self._rewake:
+            self._rewake = False
+            self.wakeup()
+        elif (error := future.exception()) is not None:
+            self._logger.error('Failed to process jobs', exc_info=error)
+            self._start_timer(self.jobstore_retry_interval)
+        else:
+            self._start_timer(future.result())
+
+    async def drain(self: Self) -> None:
+        """
+        Дожидаемся завершения выбора задач, чтобы не закрыть хранилище во время запроса.
+        """
+        if self._processing is not None:
+            await asyncio.gather(asyncio.shield(self._processing), return_exceptions=True)
 
 
 class SchedulerRepository:
-    def __init__(self, settings: CoreDbSettingsSchema) -> None:
+    """
+    Планировщик периодических задач.
+
+    - хранилище задач работает в отдельном потоке и не блокирует цикл событий;
+    - при выборе ведущей реплики задачи запускает только она, остальные держат планировщик на паузе,
+      а потерявшая ведущую роль реплика прерывает выполняющиеся задачи;
+    - задачи, нагружающие процессор, выполняются в пуле процессов.
+    """
+
+    def __init__(self, settings: CoreDbSettingsSchema, scheduler_settings: SchedulerSettingsSchema) -> None:
         dsn = (
             f'postgresql+psycopg://{settings.user}:{settings.password}@{settings.host}:{settings.port}/{settings.name}'
         )
         engine = create_engine(dsn)
-        self.scheduler = AsyncIOScheduler(jobstores={'default': SQLAlchemyJobStore(engine=engine)})
+        self.executors: dict[ExecutorTypeEnum, ThreadSafeAsyncIOExecutor | StoppableProcessPoolExecutor] = {
+            ExecutorTypeEnum.DEFAULT: ThreadSafeAsyncIOExecutor(),
+            ExecutorTypeEnum.PROCESS_POOL: StoppableProcessPoolExecutor(scheduler_settings.process_pool_size),
+        }
+        self.scheduler = ThreadedAsyncIOScheduler(
+            jobstores={'default': SQLAlchemyJobStore(engine=engine)},
+            executors=dict(self.executors),
+            job_defaults={'misfire_grace_time': int(scheduler_settings.misfire_grace_time.total_seconds())},
+        )
+        self.scheduler.add_listener(JobMetricsListener(), JOB_EVENTS)
+        self.leader: SchedulerLeaderRepository | None = None
+        if scheduler_settings.leader_election:
+            self.leader = SchedulerLeaderRepository(
+                make_conninfo(
+                    host=settings.host,
+                    port=settings.port,
+                    user=settings.user,
+                    password=settings.password,
+                    dbname=settings.name,
+                ),
+                check_interval=scheduler_settings.leader_check_interval.total_seconds(),
+            )
+        self.leader_task: asyncio.Task[None] | None = None
 
-    def start(self: Self) -> None:
+    async def start(self: Self) -> None:
         """
         Запускаем планировщик.
+
+        При выборе ведущей реплики планировщик запускается на паузе и продолжает работу, став ведущим.
+        """
+        self.scheduler.start(paused=self.leader is not None)
+        if self.leader is not None:
+            self.leader_task = asyncio.create_task(self.leader.run(self.scheduler.resume, self.stop_jobs))
+
+    def stop_jobs(self: Self) -> None:
+        """
+        Ставим планировщик на паузу и прерываем выполняющиеся задачи.
+
+        Ведущей может стать другая реплика, и продолжение задач привело бы к их параллельному выполнению.
         """
-        self.scheduler.start()
+        self.scheduler.pause()
+        for executor in self.executors.values():
+            executor.cancel_jobs()
 
-    def shutdown(self: Self, wait: bool = True) -> None:
+    async def shutdown(self: Self, wait: bool = True) -> None:
         """
         Останавливаем планировщик, ожидая завершения всех задач.
         """
+        if self.leader_task is not None:
+            self.leader_task.cancel()
+            await asyncio.gather(self.leader_task, return_exceptions=True)
+            self.leader_task = None
+        await self.scheduler.drain()
         self.scheduler.shutdown(wait)
 
     def add_job(
         self: Self,
         job_id: str,
-        func: Callable[..., Awaitable[None]],
+        func: Callable[..., Awaitable[None]] | Callable[..., None],
         trigger: TriggerTypeEnum,
         replace_existing: bool,
         args: tuple[Any, ...],
         /,
+        *,
+        executor: ExecutorTypeEnum = ExecutorTypeEnum.DEFAULT,
         **trigger_args,
     ) -> ApsJob:
+        """
+        Добавляем задачу.
+
+        В пуле процессов выполняются только синхронные функции уровня модуля: они запускаются в новом процессе
+        без контейнера зависимостей приложения.
+        """
         return self.scheduler.add_job(
-            func, trigger=trigger.lower(), id=job_id, replace_existing=replace_existing, args=args, **trigger_args
+            func,
+            trigger=trigger.lower(),
+            id=job_id,
+            replace_existing=replace_existing,
+            args=args,
+            executor=str(executor),
+            **trigger_args,
         )
 
     def remove_job(self: Self, job_id: str) -> None:
@@ -0,0 +1,26 @@
+import datetime as dt
+
+from pydantic import BaseModel
+
+
+class SchedulerSettingsSchema(BaseModel):
+    """
+    Схема настроек планировщика периодических задач.
+    """
+
+    leader_election: bool = True
+    """
+    Задачи выполняет только ведущая реплика, остальные ждут, пока она не остановится.
+    """
+    leader_check_interval: dt.timedelta = dt.timedelta(seconds=10)
+    """
+    Интервал проверки соединения ведущей реплики и попыток стать ведущей для остальных.
+    """
+    misfire_grace_time: dt.timedelta = dt.timedelta(minutes=10)
+    """
+    Опоздание, с которым запуск еще выполняется, например после смены ведущей реплики.
+    """
+    process_pool_size: int = 2
+    """
+    Количество процессов для задач, нагружающих процессор.
+    """
@@ -0,0 +1,235 @@
+"""
+Потоковая сборка ZIP и TAR архивов из файлов хранилища.
+"""
+
+import asyncio
+import io
+import tarfile
+import zipfile
+import zlib
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterable
+from pathlib import PurePosixPath
+from typing import IO, Protocol, Self, cast
+
+from .enums import ArchiveFormatEnum
+from .schemas import FileReadSchema
+
+ARCHIVE_PREFETCH_FILES = 4
+"""
+Количество следующих файлов архива, чтение которых из хранилища начинается заранее.
+"""
+ARCHIVE_PREFETCH_CHUNKS = 4
+"""
+Количество порций каждого файла, которые читаются заранее.
+
+Вместе с ARCHIVE_PREFETCH_FILES ограничивает память архива независимо от размера файлов.
+"""
+ZIP_MIN_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+class ArchiveBuffer(io.RawIOBase):
+    """
+    Поток без перемотки, в который пишет архиватор, записанное забирается по мере отдачи клиенту.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def writable(self: Self) -> bool:
+        return True
+
+    def write(self: Self, b: bytes) -> int:  # type: ignore[override]
+        self.chunks.append(bytes(b))
+        self.position += len(b)
+        return len(b)
+
+    def tell(self: Self) -> int:
+        return self.position
+
+    def drain(self: Self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class ArchiveWriterProtocol(Protocol):
+    """
+    Формат архива: каждый метод возвращает байты, готовые к отправке клиенту.
+    """
+
+    def start_member(self: Self, name: str, file: FileReadSchema) -> bytes: ...
+
+    def write(self: Self, chunk: bytes) -> bytes: ...
+
+    def end_member(self: Self) -> bytes: ...
+
+    def close(self: Self) -> bytes: ...
+
+
+class ZipArchiveWriter:
+    """
+    ZIP64 архив с дескрипторами данных: размеры и CRC записываются после содержимого файла.
+    """
+
+    def __init__(self, compress: bool) -> None:
+        self.buffer = ArchiveBuffer()
+        self.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        self.zip_file = zipfile.ZipFile(cast(IO[bytes], self.buffer), 'w', compression=self.compress_type)
+        self.member: IO[bytes] | None = None
+
+    def start_member(self: Self, name: str, file: FileReadSchema) -> bytes:
+        info = zipfile.ZipInfo(name, max(file.created_at.timetuple()[:6], ZIP_MIN_DATE_TIME))
+        info.compress_type = self.compress_type
+        info.file_size = file.size
+        info.external_attr = 0o644 << 16
+        self.member = self.zip_file.open(info, 'w', force_zip64=True)
+        return self.buffer.drain()
+
+    def write(self: Self, chunk: bytes) -> bytes:
+        assert self.member is not None
+        self.member.write(chunk)
+        return self.buffer.drain()
+
+    def end_member(self: Self) -> bytes:
+        assert self.member is not None
+        self.member.close()
+        self.member = None
+        return self.buffer.drain()
+
+    def close(self: Self) -> bytes:
+        self.zip_file.close()
+        return self.buffer.drain()
+
+
+class TarArchiveWriter:
+    """
+    TAR архив в формате PAX, длинные и не ASCII имена сохраняются без искажений.
+    """
+
+    def __init__(self, compress: bool) -> None:
+        self.compressor = zlib.compressobj(wbits=31) if compress else None
+        self.written = 0
+
+    def start_member(self: Self, name: str, file: FileReadSchema) -> bytes:
+        info = tarfile.TarInfo(name)
+        info.size = file.size
+        info.mtime = int(file.created_at.timestamp())
+        info.mode = 0o644
+        self.written = 0
+        return self.encode(info.tobuf(tarfile.PAX_FORMAT, 'utf-8', 'surrogateescape'))
+
+    def write(self: Self, chunk: bytes) -> bytes:
+        self.written += len(chunk)
+        return self.encode(chunk)
+
+    def end_member(self: Self) -> bytes:
+        return self.encode(b'\0' * (-self.written % tarfile.BLOCKSIZE))
+
+    def close(self: Self) -> bytes:
+        data = self.encode(b'\0' * tarfile.BLOCKSIZE * 2)
+        if self.compressor is not None:
+            data += self.compressor.flush()
+        return data
+
+    def encode(self: Self, data: bytes) -> bytes:
+        return self.compressor.compress(data) if self.compressor is not None else data
+
+
+def make_archive_writer(archive_format: ArchiveFormatEnum, compress: bool) -> ArchiveWriterProtocol:
+    match archive_format:
+        case ArchiveFormatEnum.ZIP:
+            return ZipArchiveWriter(compress)
+        case ArchiveFormatEnum.TAR:
+            return TarArchiveWriter(compress)
+    raise NotImplementedError
+
+
+def get_archive_names(files: Iterable[FileReadSchema]) -> list[str]:
+    """
+    Получаем имена файлов внутри архива.
+
+    Имя не может выходить за пределы архива, а совпадающие без учета регистра имена
+    получают суффикс вида name (1).ext.
+    """
+    names: list[str] = []
+    used: set[str] = set()
+    for file in files:
+        name = file.name.replace('\\', '/').split('/')[-1].strip().lstrip('.') or str(file.id)
+        path = PurePosixPath(name)
+        candidate, i = name, 0
+        while candidate.casefold() in used:
+            i += 1
+            candidate = f'{path.stem} ({i}){path.suffix}'
+        used.add(candidate.casefold())
+        names.append(candidate)
+    return names
+
+
+async def iter_archive(
+    writer: ArchiveWriterProtocol,
+    files: list[FileReadSchema],
+    stream_reader: Callable[[FileReadSchema], AsyncIterator[bytes]],
+    *,
+    compress: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Собираем архив, читая следующие файлы заранее, но не больше ARCHIVE_PREFETCH_CHUNKS порций каждого.
+
+    Файл, содержимое которого не совпало по размеру с записью в базе, прерывает архив,
+    иначе клиент получил бы архив с испорченным файлом.
+    """
+    pending = deque(zip(get_archive_names(files), files, strict=True))
+    prefetches: deque[tuple[str, FileReadSchema, ArchivePrefetch]] = deque()
+    try:
+        while pending or prefetches:
+            while pending and len(prefetches) < ARCHIVE_PREFETCH_FILES:
+                name, file = pending.popleft()
+                prefetches.append((name, file, ArchivePrefetch(stream_reader(file))))
+            name, file, prefetch = prefetches[0]
+            yield writer.start_member(name, file)
+            size = 0
+            async for chunk in prefetch:
+                size += len(chunk)
+                # Сжатие выполняется в отдельном потоке, чтобы не блокировать цикл событий.
+                if data := (await asyncio.to_thread(writer.write, chunk) if compress else writer.write(chunk)):
+                    yield data
+            if size != file.size:
+                raise ValueError(f'File {file.id} has {size} bytes instead of {file.size}')
+            yield writer.end_member()
+            prefetches.popleft()
+        yield writer.close()
+    finally:
+        for _, _, prefetch in prefetches:
+            await prefetch.cancel()
+
+
+class ArchivePrefetch:
+    """
+    Фоновое чтение файла в очередь ограниченного размера.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes]) -> None:
+        self.queue: asyncio.Queue[bytes | BaseException | None] = asyncio.Queue(ARCHIVE_PREFETCH_CHUNKS)
+        self.task = asyncio.create_task(self.run(chunks))
+
+    async def run(self: Self, chunks: AsyncIterator[bytes]) -> None:
+        try:
+            async for chunk in chunks:
+                await self.queue.put(chunk)
+        except Exception as error:
+            await self.queue.put(error)
+        else:
+            await self.queue.put(None)
+
+    async def __aiter__(self: Self) -> AsyncIterator[bytes]:
+        while (chunk := await self.queue.get()) is not None:
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield chunk
+
+    async def cancel(self: Self) -> None:
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
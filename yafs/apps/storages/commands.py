@@ -1,3 +1,4 @@
+from pathlib import Path
 from typing import Annotated
 
 import typer
@@ -7,7 +8,7 @@ from fast_clean.utils import typer_async
 from rich import print
 
 from .enums import FileStorageTypeEnum
-from .schemas import StorageCreateRequestSchema
+from .schemas import LocalFileStorageParamsSchema, StorageCreateRequestSchema
 from .use_cases import AddStorageUseCase
 
 
@@ -39,3 +40,22 @@ async def add_s3_storage(
             )
         )
         print(f'Хранилище успешно добавлено: {storage.id}')
+
+
+@typer_async
+async def add_local_storage(
+    path: Annotated[Path, typer.Option(prompt=True)],
+    fsync: Annotated[bool, typer.Option(prompt=True)] = True,
+) -> None:
+    """
+    Добавляем новое локальное хранилище в директории path.
+    """
+    async with get_container() as container:
+        add_storage_use_case = await container.get(AddStorageUseCase)
+        storage = await add_storage_use_case(
+            StorageCreateRequestSchema(
+                type=FileStorageTypeEnum.LOCAL,
+                params=LocalFileStorageParamsSchema(path=path.resolve(), fsync=fsync).model_dump(mode='json'),
+            )
+        )
+        print(f'Хранилище успешно добавлено: {storage.id}')
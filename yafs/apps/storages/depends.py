@@ -1,17 +1,62 @@
+import time
+import uuid
 from collections.abc import AsyncIterator
 
 from dishka import Provider, Scope, provide
+from fast_clean.repositories import CacheRepositoryProtocol, SettingsRepositoryProtocol
+from fast_clean.settings import CoreCacheSettingsSchema
 from fastapi import Request
 
 from .exceptions import StoragePathNotFoundError
+from .metrics import observe_stage_duration
 from .repositories import (
+    BlobDbRepository,
+    DiskCacheRepository,
+    FileAccessTracker,
     FileDbRepository,
+    FileReplicaDbRepository,
     FileStorageProviderRepositoryFactory,
+    FileStorageRepositoryPool,
     FileStorageRepositoryProtocol,
+    MetadataCacheRepository,
+    OrphanObjectDbRepository,
+    ReconciliationCheckpointDbRepository,
     StorageDbRepository,
+    UploadPartDbRepository,
+    UploadSessionDbRepository,
+)
+from .services import (
+    BlobService,
+    FileCopyService,
+    FileReconciliationService,
+    FileService,
+    FileTieringService,
+    ReplicaService,
+    StorageService,
+    UploadSessionService,
+)
+from .settings import DiskCacheSettingsSchema
+from .use_cases import (
+    AbortUploadSessionUseCase,
+    AddStorageUseCase,
+    ArchiveFilesUseCase,
+    CompleteUploadSessionUseCase,
+    CompleteUploadUseCase,
+    CopyFilesUseCase,
+    CreateUploadSessionUseCase,
+    DeleteFilesUseCase,
+    FileInfoUseCase,
+    ListFilesUseCase,
+    LookupFilesUseCase,
+    MoveFilesUseCase,
+    PresignedDownloadUseCase,
+    PresignedUploadUseCase,
+    ReadFileUseCase,
+    UpdateStorageUseCase,
+    UploadFilesUseCase,
+    UploadPartUseCase,
+    UploadSessionInfoUseCase,
 )
-from .services import FileService, StorageService
-from .use_cases import AddStorageUseCase, DeleteFilesUseCase, ReadFileUseCase, UploadFilesUseCase
 
 __all__ = ('provider',)
 
@@ -24,29 +69,103 @@ class FileProvider(Provider):
     scope = Scope.APP
 
     file_db_repository = provide(FileDbRepository)
+    blob_db_repository = provide(BlobDbRepository)
     storage_db_repository = provide(StorageDbRepository)
+    upload_session_db_repository = provide(UploadSessionDbRepository)
+    upload_part_db_repository = provide(UploadPartDbRepository)
+    file_replica_db_repository = provide(FileReplicaDbRepository)
+    orphan_object_db_repository = provide(OrphanObjectDbRepository)
+    reconciliation_checkpoint_db_repository = provide(ReconciliationCheckpointDbRepository)
     file_storage_repository_factory = provide(FileStorageProviderRepositoryFactory)
 
     storage_service = provide(StorageService)
+    blob_service = provide(BlobService)
+    replica_service = provide(ReplicaService)
     file_service = provide(FileService, scope=Scope.REQUEST)
+    file_copy_service = provide(FileCopyService, scope=Scope.REQUEST)
+    file_reconciliation_service = provide(FileReconciliationService, scope=Scope.REQUEST)
+    file_tiering_service = provide(FileTieringService, scope=Scope.REQUEST)
+    upload_session_service = provide(UploadSessionService, scope=Scope.REQUEST)
+
+    @provide
+    @staticmethod
+    async def provide_metadata_cache_repository(
+        cache_repository: CacheRepositoryProtocol,
+        settings_repository: SettingsRepositoryProtocol,
+    ) -> MetadataCacheRepository:
+        cache_settings = await settings_repository.get(CoreCacheSettingsSchema)
+        return MetadataCacheRepository(cache_repository, cache_settings.prefix)
+
+    @provide
+    @staticmethod
+    async def provide_file_storage_repository_pool(
+        file_storage_repository_factory: FileStorageProviderRepositoryFactory,
+    ) -> AsyncIterator[FileStorageRepositoryPool]:
+        file_storage_repository_pool = FileStorageRepositoryPool(file_storage_repository_factory)
+        yield file_storage_repository_pool
+        await file_storage_repository_pool.close()
+
+    @provide
+    @staticmethod
+    async def provide_disk_cache_repository(
+        settings_repository: SettingsRepositoryProtocol,
+    ) -> AsyncIterator[DiskCacheRepository]:
+        disk_cache_settings = await settings_repository.get(DiskCacheSettingsSchema)
+        disk_cache_repository = DiskCacheRepository(
+            disk_cache_settings.path,
+            max_size=disk_cache_settings.max_size,
+            max_file_size=disk_cache_settings.max_file_size,
+            enabled=disk_cache_settings.enabled,
+        )
+        if disk_cache_repository.enabled:
+            await disk_cache_repository.load()
+        yield disk_cache_repository
+        await disk_cache_repository.close()
+
+    @provide
+    @staticmethod
+    async def provide_file_access_tracker(file_repository: FileDbRepository) -> AsyncIterator[FileAccessTracker]:
+        file_access_tracker = FileAccessTracker(file_repository)
+        yield file_access_tracker
+        await file_access_tracker.close()
 
     @provide(scope=Scope.REQUEST)
     @staticmethod
     async def provide_file_storage_repository(
-        file_storage_repository_factory: FileStorageProviderRepositoryFactory,
+        file_storage_repository_pool: FileStorageRepositoryPool,
         request: Request,
     ) -> AsyncIterator[FileStorageRepositoryProtocol]:
         storage_id = request.path_params.get('storageId', None)
         if storage_id is None:
             raise StoragePathNotFoundError()
-        file_storage_repository = await file_storage_repository_factory.make(storage_id)
-        async with file_storage_repository:
+        try:
+            storage_uuid = uuid.UUID(storage_id)
+        except ValueError as value_error:
+            raise StoragePathNotFoundError() from value_error
+        started = time.perf_counter()
+        async with file_storage_repository_pool.lease(storage_uuid) as file_storage_repository:
+            observe_stage_duration('lease', storage_uuid, started)
             yield file_storage_repository
 
     add_storage_use_case = provide(AddStorageUseCase, scope=Scope.REQUEST)
+    update_storage_use_case = provide(UpdateStorageUseCase, scope=Scope.REQUEST)
+    file_info_use_case = provide(FileInfoUseCase, scope=Scope.REQUEST)
+    list_files_use_case = provide(ListFilesUseCase, scope=Scope.REQUEST)
+    lookup_files_use_case = provide(LookupFilesUseCase, scope=Scope.REQUEST)
+    archive_files_use_case = provide(ArchiveFilesUseCase, scope=Scope.REQUEST)
+    copy_files_use_case = provide(CopyFilesUseCase, scope=Scope.REQUEST)
+    move_files_use_case = provide(MoveFilesUseCase, scope=Scope.REQUEST)
     read_file_use_case = provide(ReadFileUseCase, scope=Scope.REQUEST)
     delete_files_use_case = provide(DeleteFilesUseCase, scope=Scope.REQUEST)
     upload_files_use_case = provide(UploadFilesUseCase, scope=Scope.REQUEST)
+    presigned_upload_use_case = provide(PresignedUploadUseCase, scope=Scope.REQUEST)
+    complete_upload_use_case = provide(CompleteUploadUseCase, scope=Scope.REQUEST)
+    presigned_download_use_case = provide(PresignedDownloadUseCase, scope=Scope.REQUEST)
+    create_upload_session_use_case = provide(CreateUploadSessionUseCase, scope=Scope.REQUEST)
+    upload_session_info_use_case = provide(UploadSessionInfoUseCase, scope=Scope.REQUEST)
+    upload_part_use_case = provide(UploadPartUseCase, scope=Scope.REQUEST)
+    complete_upload_session_use_case = provide(CompleteUploadSessionUseCase, scope=Scope.REQUEST)
+    abort_upload_session_use_case = provide(AbortUploadSessionUseCase, scope=Scope.REQUEST)
 
 
 provider = FileProvider()
@@ -0,0 +1,144 @@
+"""
+Сжатие содержимого файлов при хранении и согласование Content-Encoding при отдаче.
+"""
+
+import asyncio
+import zlib
+from collections.abc import AsyncIterator
+from typing import Self
+
+from fast_clean.repositories.storage.reader import StreamReadProtocol
+
+from .enums import FileEncodingEnum
+from .repositories.reader import HASH_THREAD_MIN_SIZE, READ_CHUNK_SIZE, read_chunk
+
+COMPRESSIBLE_CONTENT_TYPES = frozenset(
+    {
+        'application/json',
+        'application/x-ndjson',
+        'application/xml',
+        'application/javascript',
+        'application/x-yaml',
+        'application/yaml',
+        'application/sql',
+        'image/svg+xml',
+    }
+)
+"""
+Типы содержимого, которые хорошо сжимаются, помимо всех text/*.
+"""
+GZIP_WBITS = 31
+"""
+Размер окна zlib с заголовком и контрольной суммой gzip.
+"""
+GZIP_LEVEL = 6
+
+
+def is_compressible(content_type: str | None) -> bool:
+    """
+    Проверяем, стоит ли сжимать содержимое такого типа.
+    """
+    if content_type is None:
+        return False
+    media_type = content_type.partition(';')[0].strip().lower()
+    return (
+        media_type.startswith('text/')
+        or media_type in COMPRESSIBLE_CONTENT_TYPES
+        or media_type.endswith(('+json', '+xml'))
+    )
+
+
+def accepts_encoding(accept_encoding: str | None, encoding: FileEncodingEnum) -> bool:
+    """
+    Проверяем, что клиент принимает содержимое в кодировке encoding по заголовку Accept-Encoding.
+    """
+    if accept_encoding is None:
+        return False
+    accepted = False
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if coding not in (encoding.value, '*'):
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        # Явно указанная кодировка важнее *.
+        if coding == encoding.value:
+            return quality > 0
+        accepted = quality > 0
+    return accepted
+
+
+class EncodingStreamReader:
+    """
+    Поток, сжимающий содержимое другого потока по мере чтения.
+
+    Большие порции сжимаются в отдельном потоке, чтобы не блокировать цикл событий.
+    """
+
+    def __init__(self, stream: StreamReadProtocol, encoding: FileEncodingEnum) -> None:
+        self.stream = stream
+        self.encoding = encoding
+        self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+        self.buffer = bytearray()
+        self.finished = False
+
+    async def read(self: Self, size: int | None = -1) -> bytes:
+        size = -1 if size is None else size
+        while not self.finished and (size < 0 or len(self.buffer) < size):
+            chunk = await read_chunk(self.stream, max(size, READ_CHUNK_SIZE))
+            if chunk:
+                self.buffer.extend(await self.compress(chunk))
+            else:
+                self.buffer.extend(self.compressor.flush())
+                self.finished = True
+        if size < 0 or size >= len(self.buffer):
+            data = bytes(self.buffer)
+            self.buffer.clear()
+        else:
+            data = bytes(self.buffer[:size])
+            del self.buffer[:size]
+        return data
+
+    async def compress(self: Self, chunk: bytes) -> bytes:
+        if len(chunk) >= HASH_THREAD_MIN_SIZE:
+            return await asyncio.to_thread(self.compressor.compress, chunk)
+        return self.compressor.compress(chunk)
+
+
+async def decode_stream(chunks: AsyncIterator[bytes], encoding: FileEncodingEnum) -> AsyncIterator[bytes]:
+    """
+    Распаковываем содержимое по мере чтения.
+    """
+    decompressor = zlib.decompressobj(GZIP_WBITS)
+    async for chunk in chunks:
+        if len(chunk) >= HASH_THREAD_MIN_SIZE:
+            data = await asyncio.to_thread(decompressor.decompress, chunk)
+        else:
+            data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    if data := decompressor.flush():
+        yield data
+    if not decompressor.eof:
+        raise ValueError('Compressed stream is truncated')
+
+
+async def slice_stream(chunks: AsyncIterator[bytes], start: int, end: int) -> AsyncIterator[bytes]:
+    """
+    Отдаем из потока только байты с start по end включительно.
+    """
+    offset = 0
+    async for chunk in chunks:
+        chunk_start, offset = offset, offset + len(chunk)
+        if offset <= start:
+            continue
+        yield chunk[max(start - chunk_start, 0) : end - chunk_start + 1]
+        if offset > end:
+            return
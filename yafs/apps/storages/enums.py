@@ -7,3 +7,36 @@ class FileStorageTypeEnum(StrEnum):
     """
 
     S3 = auto()
+    LOCAL = auto()
+
+
+class FileStatusEnum(StrEnum):
+    """
+    Статусы загрузки файла.
+    """
+
+    PENDING = auto()
+    """
+    Запись создана, содержимое еще загружается в хранилище.
+    """
+    READY = auto()
+    """
+    Содержимое загружено, файл доступен для чтения.
+    """
+
+
+class ArchiveFormatEnum(StrEnum):
+    """
+    Форматы архива для скачивания нескольких файлов.
+    """
+
+    ZIP = auto()
+    TAR = auto()
+
+
+class FileEncodingEnum(StrEnum):
+    """
+    Кодировки сжатия содержимого файлов при хранении, значения совпадают с Content-Encoding.
+    """
+
+    GZIP = auto()
@@ -20,6 +20,39 @@ class StorageTypeNotFoundError(BusinessLogicException):
         return 'Передан не поддерживаемый тип репозитория'
 
 
+class PresignedUrlNotSupportedError(BusinessLogicException):
+    @property
+    def msg(self: Self) -> str:
+        return 'Хранилище не поддерживает загрузку и скачивание файлов по подписанным ссылкам'
+
+
+class StorageNotActiveError(BusinessLogicException):
+    def __init__(self, storage_id: uuid.UUID) -> None:
+        self.storage_id = storage_id
+
+    @property
+    def msg(self: Self) -> str:
+        return f'Хранилище {self.storage_id} отключено'
+
+
+class InvalidReplicaStorageError(BusinessLogicException):
+    def __init__(self, storage_id: uuid.UUID) -> None:
+        self.storage_id = storage_id
+
+    @property
+    def msg(self: Self) -> str:
+        return f'Хранилище {self.storage_id} не может хранить копии файлов этого хранилища'
+
+
+class InvalidTierStorageError(BusinessLogicException):
+    def __init__(self, storage_id: uuid.UUID) -> None:
+        self.storage_id = storage_id
+
+    @property
+    def msg(self: Self) -> str:
+        return f'Хранилище {self.storage_id} не может принимать перенесенные файлы этого хранилища'
+
+
 class FileNotFoundError(BusinessLogicException):
     def __init__(self, file_id: uuid.UUID) -> None:
         self.file_id = file_id
@@ -29,14 +62,89 @@ class FileNotFoundError(BusinessLogicException):
         return f'Файл {self.file_id} не найден'
 
 
+class FileNotReadyError(BusinessLogicException):
+    def __init__(self, file_id: uuid.UUID) -> None:
+        self.file_id = file_id
+
+    @property
+    def msg(self: Self) -> str:
+        return f'Файл {self.file_id} еще загружается'
+
+
 class BadUploadFileError(BusinessLogicException):
     @property
     def msg(self: Self) -> str:
         return 'Файл должен содержать название и размер'
 
 
+class InvalidCursorError(BusinessLogicException):
+    @property
+    def msg(self: Self) -> str:
+        return 'Передан некорректный курсор списка файлов'
+
+
+class UploadSessionNotFoundError(BusinessLogicException):
+    def __init__(self, session_id: uuid.UUID) -> None:
+        self.session_id = session_id
+
+    @property
+    def msg(self: Self) -> str:
+        return f'Загрузка {self.session_id} не найдена'
+
+
+class InvalidUploadPartError(BusinessLogicException):
+    def __init__(self, part_number: int, detail: str) -> None:
+        self.part_number = part_number
+        self.detail = detail
+
+    @property
+    def msg(self: Self) -> str:
+        return f'Некорректная часть {self.part_number}: {self.detail}'
+
+
+class UploadTooLargeError(BusinessLogicException):
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+
+    @property
+    def msg(self: Self) -> str:
+        return f'Размер файла превышает {self.max_size} байт'
+
+
+class UploadIncompleteError(BusinessLogicException):
+    def __init__(self, session_id: uuid.UUID, missing_parts: list[int]) -> None:
+        self.session_id = session_id
+        self.missing_parts = missing_parts
+
+    @property
+    def msg(self: Self) -> str:
+        return f'Загрузка {self.session_id} не завершена, отсутствуют части {self.missing_parts}'
+
+
+class RangeNotSatisfiableError(BusinessLogicException):
+    def __init__(self, size: int) -> None:
+        self.size = size
+
+    @property
+    def msg(self: Self) -> str:
+        return f'Запрошенный диапазон выходит за пределы файла размером {self.size} байт'
+
+
+class FileIntegrityError(BusinessLogicException):
+    def __init__(self, file_id: uuid.UUID, expected: str, actual: str) -> None:
+        self.file_id = file_id
+        self.expected = expected
+        self.actual = actual
+
+    @property
+    def msg(self: Self) -> str:
+        return f'Хранилище сохранило файл {self.file_id} с ETag {self.actual} вместо {self.expected}'
+
+
 async def storage_found_exception_handler(
-    settings: CoreSettingsSchema, request: Request, error: StoragePathNotFoundError | StorageTypeNotFoundError
+    settings: CoreSettingsSchema,
+    request: Request,
+    error: StoragePathNotFoundError | StorageTypeNotFoundError | StorageNotActiveError,
 ) -> Response:
     """
     Обработчик ошибок, связанный с тем, что идентификатор хранилища не найден
@@ -51,7 +159,13 @@ async def storage_found_exception_handler(
 
 
 async def bad_upload_file_exception_handler(
-    settings: CoreSettingsSchema, request: Request, error: BadUploadFileError
+    settings: CoreSettingsSchema,
+    request: Request,
+    error: BadUploadFileError
+    | PresignedUrlNotSupportedError
+    | InvalidCursorError
+    | InvalidUploadPartError
+    | UploadTooLargeError,
 ) -> Response:
     """
     Обработчик ошибок, связанный с тем, что идентификатор хранилища не найден
@@ -66,7 +180,7 @@ async def bad_upload_file_exception_handler(
 
 
 async def file_not_found_exception_handler(
-    settings: CoreSettingsSchema, request: Request, error: FileNotFoundError
+    settings: CoreSettingsSchema, request: Request, error: FileNotFoundError | UploadSessionNotFoundError
 ) -> Response:
     """
     Обработчик ошибок, связанный с тем, что идентификатор хранилища не найден
@@ -80,8 +194,66 @@ async def file_not_found_exception_handler(
     )
 
 
+async def file_not_ready_exception_handler(
+    settings: CoreSettingsSchema, request: Request, error: FileNotReadyError | UploadIncompleteError
+) -> Response:
+    """
+    Обработчик ошибок, связанный с тем, что содержимое файла еще не загружено в хранилище.
+    """
+    return await http_exception_handler(
+        request,
+        HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=[error.get_schema(settings.debug).model_dump()],
+        ),
+    )
+
+
+async def file_integrity_exception_handler(
+    settings: CoreSettingsSchema, request: Request, error: FileIntegrityError
+) -> Response:
+    """
+    Обработчик ошибок, связанный с тем, что хранилище сохранило не то содержимое, которое ему передали.
+    """
+    return await http_exception_handler(
+        request,
+        HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=[error.get_schema(settings.debug).model_dump()],
+        ),
+    )
+
+
+async def range_not_satisfiable_exception_handler(
+    settings: CoreSettingsSchema, request: Request, error: RangeNotSatisfiableError
+) -> Response:
+    """
+    Обработчик ошибок, связанный с тем, что запрошенный диапазон не пересекается с файлом.
+    """
+    return await http_exception_handler(
+        request,
+        HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail=[error.get_schema(settings.debug).model_dump()],
+            headers={'Content-Range': f'bytes */{error.size}'},
+        ),
+    )
+
+
 def use_exceptions_handlers(app: FastAPI, settings: CoreSettingsSchema) -> None:
     app.exception_handler(StoragePathNotFoundError)(partial(storage_found_exception_handler, settings))
     app.exception_handler(StorageTypeNotFoundError)(partial(storage_found_exception_handler, settings))
+    app.exception_handler(StorageNotActiveError)(partial(storage_found_exception_handler, settings))
+    app.exception_handler(InvalidReplicaStorageError)(partial(bad_upload_file_exception_handler, settings))
+    app.exception_handler(InvalidTierStorageError)(partial(bad_upload_file_exception_handler, settings))
     app.exception_handler(BadUploadFileError)(partial(bad_upload_file_exception_handler, settings))
+    app.exception_handler(PresignedUrlNotSupportedError)(partial(bad_upload_file_exception_handler, settings))
+    app.exception_handler(InvalidCursorError)(partial(bad_upload_file_exception_handler, settings))
     app.exception_handler(FileNotFoundError)(partial(file_not_found_exception_handler, settings))
+    app.exception_handler(FileNotReadyError)(partial(file_not_ready_exception_handler, settings))
+    app.exception_handler(InvalidUploadPartError)(partial(bad_upload_file_exception_handler, settings))
+    app.exception_handler(UploadTooLargeError)(partial(bad_upload_file_exception_handler, settings))
+    app.exception_handler(UploadSessionNotFoundError)(partial(file_not_found_exception_handler, settings))
+    app.exception_handler(UploadIncompleteError)(partial(file_not_ready_exception_handler, settings))
+    app.exception_handler(FileIntegrityError)(partial(file_integrity_exception_handler, settings))
+    app.exception_handler(RangeNotSatisfiableError)(partial(range_not_satisfiable_exception_handler, settings))
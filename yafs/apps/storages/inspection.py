@@ -0,0 +1,275 @@
+"""
+Проверка содержимого файлов по мере загрузки: контрольные суммы, ETag хранилища и тип содержимого.
+"""
+
+import asyncio
+import codecs
+import hashlib
+from typing import Protocol, Self
+
+import google_crc32c
+from fast_clean.repositories.storage.reader import StreamReadProtocol
+
+from .repositories.reader import HASH_THREAD_MIN_SIZE, read_chunk
+from .schemas import FileInspectionSchema
+
+SNIFF_SIZE = 1024
+"""
+Количество первых байт, по которым определяется тип содержимого.
+"""
+DEFAULT_CONTENT_TYPE = 'application/octet-stream'
+MAGIC_NUMBERS: tuple[tuple[int, bytes, str], ...] = (
+    (0, b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (0, b'\xff\xd8\xff', 'image/jpeg'),
+    (0, b'GIF87a', 'image/gif'),
+    (0, b'GIF89a', 'image/gif'),
+    (0, b'II*\x00', 'image/tiff'),
+    (0, b'MM\x00*', 'image/tiff'),
+    (0, b'\x00\x00\x01\x00', 'image/vnd.microsoft.icon'),
+    (0, b'BM', 'image/bmp'),
+    (0, b'%PDF-', 'application/pdf'),
+    (0, b'%!PS', 'application/postscript'),
+    (0, b'PK\x03\x04', 'application/zip'),
+    (0, b'PK\x05\x06', 'application/zip'),
+    (0, b'\x1f\x8b', 'application/gzip'),
+    (0, b'BZh', 'application/x-bzip2'),
+    (0, b'\xfd7zXZ\x00', 'application/x-xz'),
+    (0, b"7z\xbc\xaf'\x1c", 'application/x-7z-compressed'),
+    (0, b'(\xb5/\xfd', 'application/zstd'),
+    (0, b'Rar!\x1a\x07', 'application/vnd.rar'),
+    (0, b'OggS', 'application/ogg'),
+    (0, b'fLaC', 'audio/flac'),
+    (0, b'ID3', 'audio/mpeg'),
+    (0, b'\x1aE\xdf\xa3', 'video/x-matroska'),
+    (0, b'\x00asm', 'application/wasm'),
+    (0, b'\x7fELF', 'application/x-executable'),
+    (0, b'MZ', 'application/vnd.microsoft.portable-executable'),
+    (0, b'SQLite format 3\x00', 'application/vnd.sqlite3'),
+    (8, b'WEBP', 'image/webp'),
+    (8, b'WAVE', 'audio/wav'),
+    (8, b'AVI ', 'video/x-msvideo'),
+)
+"""
+Сигнатуры форматов: смещение, байты сигнатуры и тип содержимого.
+"""
+ISO_MEDIA_BRANDS = {
+    b'avif': 'image/avif',
+    b'heic': 'image/heic',
+    b'heix': 'image/heic',
+    b'mif1': 'image/heif',
+    b'qt  ': 'video/quicktime',
+    b'M4A ': 'audio/mp4',
+}
+"""
+Типы содержимого контейнеров ISO BMFF по основному бренду, остальные считаются video/mp4.
+"""
+TEXT_SIGNATURES = (
+    (b'<!doctype html', 'text/html'),
+    (b'<html', 'text/html'),
+    (b'<?xml', 'application/xml'),
+    (b'<svg', 'image/svg+xml'),
+)
+"""
+Начала текстовых форматов, сравниваются без учета регистра после пробелов.
+"""
+
+
+def sniff_content_type(data: bytes) -> str:
+    """
+    Определяем тип содержимого по первым байтам: сначала по сигнатурам форматов, затем текст в UTF-8.
+    """
+    for offset, magic, content_type in MAGIC_NUMBERS:
+        if data.startswith(magic, offset) and (offset == 0 or data.startswith(b'RIFF')):
+            return content_type
+    if data[4:8] == b'ftyp':
+        return ISO_MEDIA_BRANDS.get(data[8:12], 'video/mp4')
+    if data.startswith(b'\xef\xbb\xbf'):
+        data = data[3:]
+    if b'\x00' in data:
+        return DEFAULT_CONTENT_TYPE
+    try:
+        # Начало файла может обрывать многобайтовый символ, поэтому декодируем незавершенным.
+        codecs.getincrementaldecoder('utf-8')().decode(data, final=False)
+    except UnicodeDecodeError:
+        return DEFAULT_CONTENT_TYPE
+    head = data.lstrip().lower()
+    for signature, content_type in TEXT_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return 'text/plain'
+
+
+class ContentInspectorProtocol(Protocol):
+    """
+    Этап проверки содержимого, получающий порции потока по порядку.
+    """
+
+    is_cpu_bound: bool
+    """
+    Большие порции этап обрабатывает в пуле потоков, чтобы не блокировать цикл событий.
+    """
+
+    def update(self: Self, chunk: bytes) -> None: ...
+
+
+class HashInspector:
+    """
+    Хеш содержимого из hashlib.
+    """
+
+    is_cpu_bound = True
+
+    def __init__(self, name: str) -> None:
+        self.hash = hashlib.new(name, usedforsecurity=False)
+
+    def update(self: Self, chunk: bytes) -> None:
+        self.hash.update(chunk)
+
+    def hexdigest(self: Self) -> str:
+        return self.hash.hexdigest()
+
+
+class Crc32cInspector:
+    """
+    CRC32C содержимого, как его считают S3 и GCS.
+    """
+
+    is_cpu_bound = True
+
+    def __init__(self) -> None:
+        self.checksum = google_crc32c.Checksum()
+
+    def update(self: Self, chunk: bytes) -> None:
+        self.checksum.update(chunk)
+
+    def hexdigest(self: Self) -> str:
+        return self.checksum.hexdigest().decode()
+
+
+class ContentTypeInspector:
+    """
+    Тип содержимого по первым SNIFF_SIZE байтам.
+    """
+
+    is_cpu_bound = False
+
+    def __init__(self) -> None:
+        self.head = b''
+
+    def update(self: Self, chunk: bytes) -> None:
+        if len(self.head) < SNIFF_SIZE:
+            self.head += chunk[: SNIFF_SIZE - len(self.head)]
+
+    @property
+    def content_type(self: Self) -> str:
+        return sniff_content_type(self.head)
+
+
+class ETagInspector:
+    """
+    Ожидаемый ETag объекта S3, записанного частями part_size.
+
+    Объект меньше одной части записывается одним запросом, и его ETag — MD5 содержимого,
+    иначе ETag — MD5 склеенных MD5 частей с количеством частей через дефис.
+    """
+
+    is_cpu_bound = True
+
+    def __init__(self, part_size: int) -> None:
+        self.part_size = part_size
+        self.parts: list[bytes] = []
+        self.part = hashlib.md5(usedforsecurity=False)
+        self.filled = 0
+
+    def update(self: Self, chunk: bytes) -> None:
+        view = memoryview(chunk)
+        while view:
+            size = min(len(view), self.part_size - self.filled)
+            self.part.update(view[:size])
+            self.filled += size
+            view = view[size:]
+            if self.filled == self.part_size:
+                self.parts.append(self.part.digest())
+                self.part = hashlib.md5(usedforsecurity=False)
+                self.filled = 0
+
+    @property
+    def etag(self: Self) -> str:
+        if not self.parts:
+            return self.part.hexdigest()
+        parts = [*self.parts, self.part.digest()] if self.filled else self.parts
+        return f'{hashlib.md5(b"".join(parts), usedforsecurity=False).hexdigest()}-{len(parts)}'
+
+
+class InspectingStreamReader:
+    """
+    Поток, передающий прочитанные порции этапам проверки содержимого.
+
+    Содержимое читается один раз: этапы получают те же порции, которые уходят в хранилище.
+    Большие порции этапы обрабатывают одновременно в пуле потоков: hashlib и crc32c отпускают GIL.
+    Позволяет заранее прочитать начало потока: если файл в него уместился, результаты проверки
+    известны до записи в хранилище.
+    """
+
+    def __init__(self, stream: StreamReadProtocol, inspectors: list[ContentInspectorProtocol]) -> None:
+        self.stream = stream
+        self.inspectors = inspectors
+        self.size = 0
+        self.buffer = b''
+
+    async def prefetch(self: Self, size: int) -> int:
+        """
+        Читаем начало потока в буфер и возвращаем количество прочитанных байт.
+        """
+        self.buffer = await read_chunk(self.stream, size)
+        await self.update(self.buffer)
+        return len(self.buffer)
+
+    async def read(self: Self, size: int | None = -1) -> bytes:
+        size = -1 if size is None else size
+        if self.buffer:
+            if 0 <= size < len(self.buffer):
+                chunk, self.buffer = self.buffer[:size], self.buffer[size:]
+            else:
+                chunk, self.buffer = self.buffer, b''
+            return chunk
+        chunk = await read_chunk(self.stream, size)
+        await self.update(chunk)
+        return chunk
+
+    async def update(self: Self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if len(chunk) < HASH_THREAD_MIN_SIZE:
+            for inspector in self.inspectors:
+                inspector.update(chunk)
+            return
+        for inspector in self.inspectors:
+            if not inspector.is_cpu_bound:
+                inspector.update(chunk)
+        await asyncio.gather(
+            *[asyncio.to_thread(inspector.update, chunk) for inspector in self.inspectors if inspector.is_cpu_bound]
+        )
+
+
+class ContentInspection:
+    """
+    Этапы проверки исходного содержимого файла: SHA-256 для дедупликации, MD5, CRC32C и тип содержимого.
+    """
+
+    def __init__(self) -> None:
+        self.sha256 = HashInspector('sha256')
+        self.md5 = HashInspector('md5')
+        self.crc32c = Crc32cInspector()
+        self.content_type = ContentTypeInspector()
+
+    @property
+    def inspectors(self: Self) -> list[ContentInspectorProtocol]:
+        return [self.sha256, self.md5, self.crc32c, self.content_type]
+
+    def get_result(self: Self, *, etag: str | None = None) -> FileInspectionSchema:
+        return FileInspectionSchema(
+            md5=self.md5.hexdigest(),
+            crc32c=self.crc32c.hexdigest(),
+            detected_content_type=self.content_type.content_type,
+            etag=etag,
+        )
@@ -0,0 +1,110 @@
+import datetime as dt
+
+from fast_clean.container import get_container
+from fast_clean.repositories import SettingsRepositoryProtocol
+
+from yafs.apps.scheduler.enums import TriggerTypeEnum
+from yafs.apps.scheduler.repositories import SchedulerRepository
+
+from .services import FileReconciliationService, FileTieringService
+from .services.upload import UPLOAD_SESSION_TTL
+from .settings import OrphanReconciliationSettingsSchema, TieringSettingsSchema
+
+CLEANUP_PENDING_FILES_JOB_ID = 'storages:cleanup_pending_files'
+CLEANUP_PENDING_FILES_INTERVAL = dt.timedelta(minutes=30)
+CLEANUP_UPLOAD_SESSIONS_JOB_ID = 'storages:cleanup_upload_sessions'
+CLEANUP_UPLOAD_SESSIONS_INTERVAL = dt.timedelta(hours=1)
+RECONCILE_ORPHANS_JOB_ID = 'storages:reconcile_orphans'
+TIER_FILES_JOB_ID = 'storages:tier_files'
+PENDING_FILES_TTL = dt.timedelta(hours=12)
+"""
+Время, после которого незавершенная загрузка считается прерванной.
+
+Должно с запасом превышать время загрузки самого большого файла.
+"""
+
+
+async def cleanup_pending_files() -> None:
+    """
+    Удаляем файлы, зависшие в статусе PENDING.
+    """
+    async with get_container() as container:
+        file_reconciliation_service = await container.get(FileReconciliationService)
+        await file_reconciliation_service.cleanup_pending_files(PENDING_FILES_TTL)
+
+
+async def cleanup_upload_sessions() -> None:
+    """
+    Прерываем брошенные загрузки частями.
+    """
+    async with get_container() as container:
+        file_reconciliation_service = await container.get(FileReconciliationService)
+        await file_reconciliation_service.cleanup_upload_sessions(UPLOAD_SESSION_TTL)
+
+
+async def reconcile_orphans() -> None:
+    """
+    Сверяем объекты хранилищ с файлами и удаляем потерянные объекты.
+    """
+    async with get_container() as container:
+        settings_repository = await container.get(SettingsRepositoryProtocol)
+        settings = await settings_repository.get(OrphanReconciliationSettingsSchema)
+        if not settings.enabled:
+            return
+        file_reconciliation_service = await container.get(FileReconciliationService)
+        await file_reconciliation_service.reconcile_orphans(settings)
+
+
+async def tier_files() -> None:
+    """
+    Переносим давно не читавшиеся файлы в более дешевые хранилища.
+    """
+    async with get_container() as container:
+        settings_repository = await container.get(SettingsRepositoryProtocol)
+        settings = await settings_repository.get(TieringSettingsSchema)
+        if not settings.enabled:
+            return
+        file_tiering_service = await container.get(FileTieringService)
+        await file_tiering_service.tier_files(settings)
+
+
+def use_jobs(scheduler_repository: SchedulerRepository) -> None:
+    """
+    Регистрируем периодические задачи хранилищ.
+    """
+    scheduler_repository.add_job(
+        CLEANUP_PENDING_FILES_JOB_ID,
+        cleanup_pending_files,
+        TriggerTypeEnum.INTERVAL,
+        True,
+        (),
+        seconds=int(CLEANUP_PENDING_FILES_INTERVAL.total_seconds()),
+    )
+    scheduler_repository.add_job(
+        CLEANUP_UPLOAD_SESSIONS_JOB_ID,
+        cleanup_upload_sessions,
+        TriggerTypeEnum.INTERVAL,
+        True,
+        (),
+        seconds=int(CLEANUP_UPLOAD_SESSIONS_INTERVAL.total_seconds()),
+    )
+    # Сверка читает весь список объектов хранилища, поэтому выполняется ночью.
+    scheduler_repository.add_job(
+        RECONCILE_ORPHANS_JOB_ID,
+        reconcile_orphans,
+        TriggerTypeEnum.CRON,
+        True,
+        (),
+        hour=3,
+        minute=0,
+    )
+    # Перенос копирует содержимое файлов, поэтому тоже выполняется ночью, до сверки хранилищ.
+    scheduler_repository.add_job(
+        TIER_FILES_JOB_ID,
+        tier_files,
+        TriggerTypeEnum.CRON,
+        True,
+        (),
+        hour=1,
+        minute=0,
+    )
@@ -0,0 +1,114 @@
+import time
+import uuid
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+
+from aioprometheus import Counter, Gauge, Histogram
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+"""
+Границы гистограммы длительности этапов: от обращения к кешу до передачи больших файлов.
+"""
+TRANSFER_RATE_BUCKETS = tuple(float(64 * 1024 * 4**i) for i in range(10))
+"""
+Границы гистограммы скорости передачи: от 64 КБ/с до 16 ГБ/с.
+"""
+
+disk_cache_hits = Counter('yafs_disk_cache_hits_total', 'Number of reads served from the disk cache.')
+disk_cache_misses = Counter('yafs_disk_cache_misses_total', 'Number of reads that fetched the file from the storage.')
+disk_cache_coalesced = Counter(
+    'yafs_disk_cache_coalesced_total', 'Number of reads attached to a cache fill already in progress.'
+)
+disk_cache_evictions = Counter('yafs_disk_cache_evictions_total', 'Number of files evicted from the disk cache.')
+disk_cache_size = Gauge('yafs_disk_cache_size_bytes', 'Bytes occupied and reserved in the disk cache.')
+
+storage_in_flight = Gauge('yafs_storage_in_flight', 'Number of operations currently running against the storage.')
+storage_queue_depth = Gauge('yafs_storage_queue_depth', 'Number of operations waiting for a storage concurrency slot.')
+storage_concurrency_limit = Gauge(
+    'yafs_storage_concurrency_limit', 'Current adaptive concurrency limit of the storage.'
+)
+
+storage_stage_seconds = Histogram(
+    'yafs_storage_stage_seconds', 'Duration of file operation stages.', buckets=STAGE_BUCKETS
+)
+storage_transferred_bytes = Counter(
+    'yafs_storage_transferred_bytes_total', 'Bytes transferred to and from the storage.'
+)
+storage_transfer_rate = Histogram(
+    'yafs_storage_transfer_rate_bytes_per_second',
+    'Transfer rate of file contents to and from the storage.',
+    buckets=TRANSFER_RATE_BUCKETS,
+)
+
+storage_hedged_reads = Counter(
+    'yafs_storage_hedged_reads_total', 'Number of reads that requested another replica after a late first byte.'
+)
+storage_replica_failures = Counter('yafs_storage_replica_failures_total', 'Number of failed replica reads and writes.')
+
+orphan_objects_quarantined = Counter(
+    'yafs_orphan_objects_quarantined_total', 'Number of storage objects without files put into quarantine.'
+)
+orphan_objects_deleted = Counter('yafs_orphan_objects_deleted_total', 'Number of orphan objects deleted from storage.')
+orphan_bytes_deleted = Counter('yafs_orphan_bytes_deleted_total', 'Bytes of orphan objects deleted from storage.')
+
+tiered_files = Counter('yafs_tiered_files_total', 'Number of cold files moved to the tier storage.')
+tiered_bytes = Counter('yafs_tiered_bytes_total', 'Bytes of cold objects copied to the tier storage.')
+tiering_failures = Counter('yafs_tiering_failures_total', 'Number of cold objects that failed to move.')
+
+copied_files = Counter(
+    'yafs_copied_files_total', 'Number of copied and moved files, by whether the object was copied or deduplicated.'
+)
+copied_bytes = Counter('yafs_copied_bytes_total', 'Bytes of objects copied for copied and moved files, by copy method.')
+
+upload_integrity_failures = Counter(
+    'yafs_upload_integrity_failures_total', 'Number of uploads whose stored object ETag did not match the content.'
+)
+
+
+def observe_stage_duration(stage: str, storage_id: uuid.UUID | str, started: float) -> None:
+    storage_stage_seconds.observe({'storage_id': str(storage_id), 'stage': stage}, time.perf_counter() - started)
+
+
+@contextmanager
+def observe_stage(stage: str, storage_id: uuid.UUID | str) -> Iterator[None]:
+    """
+    Замеряем длительность этапа, в том числе завершившегося ошибкой.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage_duration(stage, storage_id, started)
+
+
+def observe_transfer(storage_id: uuid.UUID | str, direction: str, size: int, seconds: float) -> None:
+    """
+    Учитываем переданные байты и скорость передачи.
+    """
+    labels = {'storage_id': str(storage_id), 'direction': direction}
+    storage_transferred_bytes.add(labels, size)
+    if size and seconds > 0:
+        storage_transfer_rate.observe(labels, size / seconds)
+
+
+async def observe_download(chunks: AsyncIterator[bytes], storage_id: uuid.UUID | str) -> AsyncIterator[bytes]:
+    """
+    Замеряем время до первого байта и передачу содержимого.
+
+    Метрики обновляются один раз на поток, а не на каждую порцию, поэтому накладные расходы
+    не зависят от размера файла. Прерванная клиентом передача тоже учитывается.
+    """
+    started = time.perf_counter()
+    first_byte: float | None = None
+    size = 0
+    try:
+        async for chunk in chunks:
+            if first_byte is None:
+                first_byte = time.perf_counter()
+                observe_stage_duration('download_first_byte', storage_id, started)
+            size += len(chunk)
+            yield chunk
+    finally:
+        if first_byte is not None:
+            observe_stage_duration('download_transfer', storage_id, first_byte)
+            observe_transfer(storage_id, 'download', size, time.perf_counter() - first_byte)
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
+import datetime as dt
 import uuid
 
 import sqlalchemy as sa
 from fast_clean.db import BaseUUID
 from fast_clean.models import TimestampMixin
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from sqlalchemy_utils.types import UUIDType
 
-from .enums import FileStorageTypeEnum
+from .enums import FileEncodingEnum, FileStatusEnum, FileStorageTypeEnum
 
 
 class Storage(BaseUUID, TimestampMixin):
@@ -36,10 +38,90 @@ class Storage(BaseUUID, TimestampMixin):
     Зашифрованная строка с параметрами подключения к хранилищу.
     """
     is_active: Mapped[bool] = mapped_column(sa.Boolean, default=True, server_default=sa.sql.true())
+    max_concurrency: Mapped[int] = mapped_column(sa.Integer, default=16, server_default='16', nullable=False)
+    """
+    Максимальное количество одновременных операций с хранилищем, фактический лимит подбирается адаптивно.
+    """
+    compression: Mapped[FileEncodingEnum | None] = mapped_column(
+        sa.Enum(FileEncodingEnum, native_enum=False, create_type=False),
+        nullable=True,
+    )
+    """
+    Кодировка, которой сжимаются хорошо сжимаемые файлы при загрузке, без нее файлы хранятся как есть.
+    """
+    replica_ids: Mapped[list[uuid.UUID]] = mapped_column(
+        postgresql.ARRAY(UUIDType(binary=False)),
+        default=list,
+        server_default='{}',
+        nullable=False,
+    )
+    """
+    Хранилища, в которые при загрузке одновременно записываются копии файлов.
+    """
+    tier_storage_id: Mapped[uuid.UUID | None] = mapped_column(
+        sa.ForeignKey('storages.id', ondelete='set null'),
+        nullable=True,
+    )
+    """
+    Более дешевое хранилище, в которое переносятся файлы, не читавшиеся дольше tier_after.
+    """
+    tier_after: Mapped[dt.timedelta] = mapped_column(
+        sa.Interval,
+        default=dt.timedelta(days=30),
+        server_default='30 days',
+        nullable=False,
+    )
+    cache_control: Mapped[str | None] = mapped_column(sa.String(length=256), nullable=True)
+    """
+    Заголовок Cache-Control ответов со скачиваемыми файлами, без него ответы не содержат указаний по кешированию.
+    """
 
     files: Mapped[list[File]] = relationship('File', back_populates='storage', passive_deletes=True)
 
 
+class Blob(BaseUUID, TimestampMixin):
+    """
+    Содержимое файлов, общее для всех файлов хранилища с одинаковым SHA-256.
+    """
+
+    __tablename__ = 'blobs'
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUIDType(binary=False),
+        primary_key=True,
+        default=uuid.uuid4,
+        server_default=func.gen_random_uuid(),
+    )
+
+    storage_id: Mapped[uuid.UUID] = mapped_column(
+        sa.ForeignKey(f'{Storage.__tablename__}.id', ondelete='cascade'),
+        nullable=False,
+    )
+    sha256: Mapped[str] = mapped_column(sa.String(length=64), nullable=False)
+    size: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    path: Mapped[str] = mapped_column(sa.String(length=1024), nullable=False)
+    """
+    Путь к объекту в хранилище, совпадает с путем файла, который загрузил содержимое первым.
+    """
+    ref_count: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=1, server_default='1')
+    """
+    Количество файлов, ссылающихся на содержимое, объект удаляется вместе с последней ссылкой.
+    """
+    encoding: Mapped[FileEncodingEnum | None] = mapped_column(
+        sa.Enum(FileEncodingEnum, native_enum=False, create_type=False),
+        nullable=True,
+    )
+    """
+    Кодировка сжатия объекта, size всегда содержит исходный размер.
+    """
+    encoded_size: Mapped[int | None] = mapped_column(sa.BigInteger, nullable=True)
+
+    __table_args__ = (
+        sa.UniqueConstraint('storage_id', 'sha256'),
+        sa.Index('blobs_storage_id_path_idx', 'storage_id', sa.text('path COLLATE "C"')),
+    )
+
+
 class File(BaseUUID, TimestampMixin):
     """
     Модель для хранения списка файлов.
@@ -55,11 +137,229 @@ class File(BaseUUID, TimestampMixin):
     )
 
     name: Mapped[str] = mapped_column(sa.String(length=1024), nullable=False)
-    size: Mapped[int] = mapped_column(sa.Integer, nullable=False, default=0, server_default='0')
+    size: Mapped[int] = mapped_column(sa.BigInteger, nullable=False, default=0, server_default='0')
     content_type: Mapped[str] = mapped_column(sa.String(length=1024), nullable=True)
+    path: Mapped[str] = mapped_column(sa.String(length=1024), nullable=False)
+    """
+    Путь к объекту в хранилище, для дубликатов указывает на объект общего содержимого.
+    """
+    sha256: Mapped[str | None] = mapped_column(sa.String(length=64), nullable=True)
+    md5: Mapped[str | None] = mapped_column(sa.String(length=32), nullable=True)
+    crc32c: Mapped[str | None] = mapped_column(sa.String(length=8), nullable=True)
+    """
+    Контрольные суммы исходного содержимого, вычисленные при загрузке через сервис.
+    """
+    detected_content_type: Mapped[str | None] = mapped_column(sa.String(length=255), nullable=True)
+    """
+    Тип содержимого, определенный по первым байтам файла, content_type сообщает клиент.
+    """
+    etag: Mapped[str | None] = mapped_column(sa.String(length=256), nullable=True)
+    """
+    ETag объекта, который сообщило хранилище.
+    """
+    encoding: Mapped[FileEncodingEnum | None] = mapped_column(
+        sa.Enum(FileEncodingEnum, native_enum=False, create_type=False),
+        nullable=True,
+    )
+    """
+    Кодировка сжатия объекта в хранилище, size всегда содержит исходный размер.
+    """
+    encoded_size: Mapped[int | None] = mapped_column(sa.BigInteger, nullable=True)
+    """
+    Размер сжатого объекта в хранилище.
+    """
+    blob_id: Mapped[uuid.UUID | None] = mapped_column(
+        sa.ForeignKey(f'{Blob.__tablename__}.id'),
+        nullable=True,
+        index=True,
+    )
+    """
+    Общее содержимое, у файлов, загруженных до дедупликации, отсутствует.
+    """
+    status: Mapped[FileStatusEnum] = mapped_column(
+        sa.Enum(FileStatusEnum, native_enum=False, create_type=False),
+        default=FileStatusEnum.PENDING,
+        server_default=FileStatusEnum.PENDING.name,
+        nullable=False,
+    )
+    """
+    Статус загрузки, читать можно только файлы в статусе READY.
+    """
+    accessed_at: Mapped[dt.datetime | None] = mapped_column(sa.DateTime(timezone=True), nullable=True)
+    """
+    Время последнего чтения с точностью до часа, у непрочитанных файлов отсутствует.
+    """
 
     storage_id: Mapped[uuid.UUID] = mapped_column(
         sa.ForeignKey(f'{Storage.__tablename__}.id', ondelete='cascade'),
         nullable=False,
     )
     storage: Mapped[Storage] = relationship('Storage', back_populates='files')
+
+    __table_args__ = (
+        sa.Index('files_storage_id_created_at_id_idx', 'storage_id', 'created_at', 'id'),
+        sa.Index('files_storage_id_path_idx', 'storage_id', sa.text('path COLLATE "C"')),
+        sa.Index(
+            'files_storage_id_last_access_id_idx',
+            'storage_id',
+            sa.text('coalesce(accessed_at, created_at)'),
+            'id',
+        ),
+        sa.Index(
+            'files_pending_created_at_idx',
+            'created_at',
+            postgresql_where=sa.text(f"status = '{FileStatusEnum.PENDING.name}'"),
+        ),
+    )
+
+
+class UploadSession(BaseUUID, TimestampMixin):
+    """
+    Загрузка файла частями, которая может продолжаться после обрыва соединения или на другом экземпляре.
+    """
+
+    __tablename__ = 'upload_sessions'
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUIDType(binary=False),
+        primary_key=True,
+        default=uuid.uuid4,
+        server_default=func.gen_random_uuid(),
+    )
+
+    storage_id: Mapped[uuid.UUID] = mapped_column(
+        sa.ForeignKey(f'{Storage.__tablename__}.id', ondelete='cascade'),
+        nullable=False,
+    )
+    file_id: Mapped[uuid.UUID] = mapped_column(
+        sa.ForeignKey(f'{File.__tablename__}.id', ondelete='cascade'),
+        nullable=False,
+        unique=True,
+    )
+    """
+    Файл в статусе PENDING, который станет готовым после завершения загрузки.
+    """
+    upload_id: Mapped[str] = mapped_column(sa.String(length=1024), nullable=False)
+    """
+    Идентификатор multipart загрузки в хранилище.
+    """
+    size: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    part_size: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    """
+    Размер каждой части, кроме последней.
+    """
+
+    parts: Mapped[list[UploadPart]] = relationship('UploadPart', back_populates='session', passive_deletes=True)
+
+    __table_args__ = (sa.Index('upload_sessions_updated_at_idx', 'updated_at'),)
+
+
+class UploadPart(BaseUUID, TimestampMixin):
+    """
+    Часть загрузки, уже записанная в хранилище.
+    """
+
+    __tablename__ = 'upload_parts'
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUIDType(binary=False),
+        primary_key=True,
+        default=uuid.uuid4,
+        server_default=func.gen_random_uuid(),
+    )
+
+    session_id: Mapped[uuid.UUID] = mapped_column(
+        sa.ForeignKey(f'{UploadSession.__tablename__}.id', ondelete='cascade'),
+        nullable=False,
+    )
+    part_number: Mapped[int] = mapped_column(sa.Integer, nullable=False)
+    size: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+    etag: Mapped[str] = mapped_column(sa.String(length=256), nullable=False)
+
+    session: Mapped[UploadSession] = relationship('UploadSession', back_populates='parts')
+
+    __table_args__ = (sa.UniqueConstraint('session_id', 'part_number'),)
+
+
+class OrphanObject(BaseUUID, TimestampMixin):
+    """
+    Объект хранилища без файла, помещенный в карантин.
+
+    Объект удаляется, только если по окончании карантина на него по-прежнему никто не ссылается.
+    """
+
+    __tablename__ = 'orphan_objects'
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUIDType(binary=False),
+        primary_key=True,
+        default=uuid.uuid4,
+        server_default=func.gen_random_uuid(),
+    )
+
+    storage_id: Mapped[uuid.UUID] = mapped_column(
+        sa.ForeignKey(f'{Storage.__tablename__}.id', ondelete='cascade'),
+        nullable=False,
+    )
+    path: Mapped[str] = mapped_column(sa.String(length=1024), nullable=False)
+    size: Mapped[int] = mapped_column(sa.BigInteger, nullable=False)
+
+    __table_args__ = (
+        sa.UniqueConstraint('storage_id', 'path'),
+        sa.Index('orphan_objects_created_at_idx', 'created_at'),
+    )
+
+
+class ReconciliationCheckpoint(BaseUUID, TimestampMixin):
+    """
+    Позиция сверки объектов хранилища с файлами, с которой продолжится следующий запуск.
+    """
+
+    __tablename__ = 'reconciliation_checkpoints'
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUIDType(binary=False),
+        primary_key=True,
+        default=uuid.uuid4,
+        server_default=func.gen_random_uuid(),
+    )
+
+    storage_id: Mapped[uuid.UUID] = mapped_column(
+        sa.ForeignKey(f'{Storage.__tablename__}.id', ondelete='cascade'),
+        nullable=False,
+        unique=True,
+    )
+    last_path: Mapped[str | None] = mapped_column(sa.String(length=1024), nullable=True)
+    """
+    Последний проверенный объект, отсутствует, если проход по хранилищу начинается сначала.
+    """
+
+
+class FileReplica(BaseUUID, TimestampMixin):
+    """
+    Копия объекта файла в другом хранилище, из которой файл можно прочитать при недоступности основного.
+    """
+
+    __tablename__ = 'file_replicas'
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUIDType(binary=False),
+        primary_key=True,
+        default=uuid.uuid4,
+        server_default=func.gen_random_uuid(),
+    )
+
+    file_id: Mapped[uuid.UUID] = mapped_column(
+        sa.ForeignKey(f'{File.__tablename__}.id', ondelete='cascade'),
+        nullable=False,
+    )
+    storage_id: Mapped[uuid.UUID] = mapped_column(
+        sa.ForeignKey(f'{Storage.__tablename__}.id', ondelete='cascade'),
+        nullable=False,
+    )
+    path: Mapped[str] = mapped_column(sa.String(length=1024), nullable=False)
+
+    __table_args__ = (
+        sa.UniqueConstraint('file_id', 'storage_id'),
+        sa.Index('file_replicas_storage_id_path_idx', 'storage_id', sa.text('path COLLATE "C"')),
+    )
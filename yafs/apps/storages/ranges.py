@@ -0,0 +1,144 @@
+"""
+Разбор заголовков Range, If-Range и условных запросов для отдачи файлов.
+"""
+
+import datetime as dt
+from email.utils import format_datetime, parsedate_to_datetime
+
+from .enums import FileEncodingEnum
+from .exceptions import RangeNotSatisfiableError
+from .schemas import ByteRangeSchema, FileReadSchema
+
+MAX_RANGES = 16
+"""
+Максимальное количество диапазонов после объединения, при превышении отдаем файл целиком.
+"""
+
+
+def parse_range_header(header: str, size: int) -> list[ByteRangeSchema] | None:
+    """
+    Разбираем заголовок Range.
+
+    - None означает, что заголовок некорректен и должен быть проигнорирован;
+    - пересекающиеся и соседние диапазоны объединяются;
+    - если ни один диапазон не попадает в файл, выбрасываем RangeNotSatisfiableError.
+    """
+    unit, _, value = header.partition('=')
+    if unit.strip().lower() != 'bytes' or not value.strip():
+        return None
+    ranges: list[ByteRangeSchema] = []
+    for spec in value.split(','):
+        first, separator, last = (part.strip() for part in spec.partition('-'))
+        if not separator or (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        if not first:
+            if not last:
+                return None
+            suffix = int(last)
+            if suffix > 0 and size > 0:
+                ranges.append(ByteRangeSchema(max(size - suffix, 0), size - 1))
+            continue
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start < size:
+            ranges.append(ByteRangeSchema(start, min(int(last), size - 1) if last else size - 1))
+    if not ranges:
+        raise RangeNotSatisfiableError(size)
+    ranges = coalesce_ranges(ranges)
+    if len(ranges) > MAX_RANGES:
+        return None
+    return ranges
+
+
+def coalesce_ranges(ranges: list[ByteRangeSchema]) -> list[ByteRangeSchema]:
+    """
+    Объединяем пересекающиеся и соседние диапазоны, чтобы не читать одни и те же байты дважды.
+    """
+    coalesced: list[ByteRangeSchema] = []
+    for byte_range in sorted(ranges, key=lambda r: r.start):
+        if coalesced and byte_range.start <= coalesced[-1].end + 1:
+            last = coalesced.pop()
+            byte_range = ByteRangeSchema(last.start, max(last.end, byte_range.end))
+        coalesced.append(byte_range)
+    return coalesced
+
+
+def check_if_range(if_range: str | None, etag: str, last_modified: dt.datetime) -> bool:
+    """
+    Проверяем условие If-Range: при несовпадении диапазоны игнорируются и файл отдается целиком.
+
+    ETag сравнивается строго, поэтому слабый ETag никогда не совпадает.
+    """
+    if if_range is None:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    try:
+        date = parsedate_to_datetime(if_range)
+    except (TypeError, ValueError):
+        return False
+    return date == last_modified.replace(microsecond=0)
+
+
+def get_byte_ranges(
+    range_header: str | None, if_range: str | None, etag: str, size: int, last_modified: dt.datetime
+) -> list[ByteRangeSchema]:
+    """
+    Получаем диапазоны для отдачи, пустой список означает весь файл.
+    """
+    if range_header is None or not check_if_range(if_range, etag, last_modified):
+        return []
+    return parse_range_header(range_header, size) or []
+
+
+def get_etag(file: FileReadSchema, content_encoding: FileEncodingEnum | None = None) -> str:
+    """
+    Получаем сильный ETag представления файла.
+
+    Файлы не изменяются после загрузки, поэтому ETag строится по SHA-256 содержимого, а для файлов без него —
+    по ETag объекта в хранилище или идентификатору файла. Сжатое представление отличается от исходного
+    побайтно и получает собственный ETag.
+    """
+    tag = file.sha256 or (file.etag.strip('"') if file.etag else None) or file.id.hex
+    if content_encoding is not None:
+        tag = f'{tag}-{content_encoding.value}'
+    return f'"{tag}"'
+
+
+def check_if_none_match(if_none_match: str, etag: str) -> bool:
+    """
+    Проверяем, совпадает ли ETag с одним из ETag заголовка If-None-Match.
+
+    ETag сравниваются слабо: признак W/ не учитывается.
+    """
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+
+def check_not_modified(
+    if_none_match: str | None, if_modified_since: str | None, etag: str, last_modified: dt.datetime
+) -> bool:
+    """
+    Проверяем условия If-None-Match и If-Modified-Since: при выполнении клиенту отвечаем 304 без содержимого.
+
+    If-Modified-Since учитывается, только если If-None-Match не передан, некорректная дата игнорируется.
+    """
+    if if_none_match is not None:
+        return check_if_none_match(if_none_match, etag)
+    if if_modified_since is None:
+        return False
+    try:
+        date = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=dt.UTC)
+    return last_modified.replace(microsecond=0) <= date
+
+
+def format_http_date(value: dt.datetime) -> str:
+    """
+    Форматируем дату для заголовков Last-Modified, If-Range и If-Modified-Since.
+    """
+    return format_datetime(value.astimezone(dt.UTC), usegmt=True)
@@ -1,4 +1,16 @@
+from .access import FileAccessTracker as FileAccessTracker
+from .blob import BlobDbRepository as BlobDbRepository
+from .concurrency import ConcurrencyLimiter as ConcurrencyLimiter
+from .disk_cache import DiskCacheRepository as DiskCacheRepository
 from .file import FileDbRepository as FileDbRepository
+from .file_storage_pool import FileStorageRepositoryPool as FileStorageRepositoryPool
 from .file_storage_provider import FileStorageProviderRepositoryFactory as FileStorageProviderRepositoryFactory
 from .file_storage_provider import FileStorageRepositoryProtocol as FileStorageRepositoryProtocol
+from .health import StorageHealth as StorageHealth
+from .metadata_cache import MetadataCacheRepository as MetadataCacheRepository
+from .orphan import OrphanObjectDbRepository as OrphanObjectDbRepository
+from .orphan import ReconciliationCheckpointDbRepository as ReconciliationCheckpointDbRepository
+from .replica import FileReplicaDbRepository as FileReplicaDbRepository
 from .storage import StorageDbRepository as StorageDbRepository
+from .upload import UploadPartDbRepository as UploadPartDbRepository
+from .upload import UploadSessionDbRepository as UploadSessionDbRepository
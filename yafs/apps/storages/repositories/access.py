@@ -0,0 +1,92 @@
+import asyncio
+import datetime as dt
+import logging
+import uuid
+from typing import Self
+
+from .file import FileDbRepository
+
+FILE_ACCESS_FLUSH_INTERVAL = 60.0
+"""
+Время в секундах, в течение которого чтения файлов копятся в памяти перед записью в базу.
+"""
+FILE_ACCESS_RESOLUTION = dt.timedelta(hours=1)
+"""
+Точность времени последнего чтения: файл, прочитанный позже, не перезаписывается.
+"""
+FILE_ACCESS_MAX_PENDING = 10_000
+"""
+Количество накопленных файлов, при котором чтения записываются, не дожидаясь интервала.
+"""
+FILE_ACCESS_BATCH_SIZE = 1000
+"""
+Количество файлов, обновляемых одним запросом.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class FileAccessTracker:
+    """
+    Учет времени последнего чтения файлов уровня приложения.
+
+    Чтения копятся в памяти и записываются пакетами в фоне, поэтому скачивание не ждет базу
+    и не пишет в нее на каждый запрос. Потеря накопленного при аварийной остановке допустима:
+    время чтения нужно только для выбора давно не читавшихся файлов.
+    """
+
+    def __init__(
+        self,
+        file_repository: FileDbRepository,
+        *,
+        flush_interval: float = FILE_ACCESS_FLUSH_INTERVAL,
+        max_pending: int = FILE_ACCESS_MAX_PENDING,
+    ) -> None:
+        self.file_repository = file_repository
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending: set[uuid.UUID] = set()
+        self.full = asyncio.Event()
+        self.task: asyncio.Task[None] | None = None
+
+    def touch(self: Self, file_id: uuid.UUID) -> None:
+        """
+        Отмечаем чтение файла.
+        """
+        self.pending.add(file_id)
+        if len(self.pending) >= self.max_pending:
+            self.full.set()
+        if self.task is None:
+            self.task = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self: Self) -> None:
+        try:
+            await asyncio.wait_for(self.full.wait(), self.flush_interval)
+        except TimeoutError:
+            pass
+        self.task = None
+        await self.flush()
+
+    async def flush(self: Self) -> None:
+        """
+        Записываем накопленные чтения, ошибки только логируем.
+        """
+        file_ids, self.pending = list(self.pending), set()
+        self.full.clear()
+        accessed_before = dt.datetime.now(dt.UTC) - FILE_ACCESS_RESOLUTION
+        for i in range(0, len(file_ids), FILE_ACCESS_BATCH_SIZE):
+            try:
+                await self.file_repository.mark_accessed(file_ids[i : i + FILE_ACCESS_BATCH_SIZE], accessed_before)
+            except Exception:
+                logger.warning('Failed to save access time of %s files', len(file_ids), exc_info=True)
+                return
+
+    async def close(self: Self) -> None:
+        """
+        Записываем накопленные чтения при остановке приложения.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        await self.flush()
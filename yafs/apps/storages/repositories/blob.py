@@ -0,0 +1,174 @@
+import uuid
+from collections import Counter
+from collections.abc import Sequence
+from typing import Self
+
+import sqlalchemy as sa
+from fast_clean.repositories import DbCrudRepository
+from sqlalchemy.dialects import postgresql
+
+from ..models import Blob
+from ..schemas import BlobCreateSchema, BlobReadSchema, BlobUpdateSchema
+
+
+class BlobDbRepository(DbCrudRepository[Blob, BlobReadSchema, BlobCreateSchema, BlobUpdateSchema]):
+    """
+    Репозиторий для работы с общим содержимым файлов.
+
+    Счетчик ссылок меняется только атомарными запросами, чтобы параллельные загрузки
+    и удаления одного содержимого не теряли ссылки.
+    """
+
+    async def acquire(self: Self, create_object: BlobCreateSchema) -> BlobReadSchema:
+        """
+        Добавляем ссылку на содержимое с таким же хешем или создаем новое.
+        """
+        async with self.session_manager.get_session() as s:
+            statement = (
+                postgresql.insert(Blob)
+                .values(self.dump_create_object(create_object))
+                .on_conflict_do_update(
+                    index_elements=[Blob.storage_id, Blob.sha256],
+                    set_={'ref_count': Blob.ref_count + 1, 'updated_at': sa.func.now()},
+                )
+                .returning(*Blob.__table__.columns.values())
+            )
+            return BlobReadSchema.model_validate((await s.execute(statement)).mappings().one())
+
+    async def acquire_existing(self: Self, storage_id: uuid.UUID, sha256: str) -> BlobReadSchema | None:
+        """
+        Добавляем ссылку на уже загруженное содержимое, если оно есть.
+        """
+        async with self.session_manager.get_session() as s:
+            statement = (
+                sa.update(Blob)
+                .where(Blob.storage_id == storage_id, Blob.sha256 == sha256)
+                .values(ref_count=Blob.ref_count + 1, updated_at=sa.func.now())
+                .returning(*Blob.__table__.columns.values())
+                .execution_options(synchronize_session=False)
+            )
+            blob = (await s.execute(statement)).mappings().one_or_none()
+            return BlobReadSchema.model_validate(blob) if blob is not None else None
+
+    async def acquire_existing_many(
+        self: Self, keys: Sequence[tuple[uuid.UUID, str]]
+    ) -> dict[tuple[uuid.UUID, str], BlobReadSchema]:
+        """
+        Добавляем ссылки на уже загруженное содержимое по парам (хранилище, хеш) и возвращаем найденное.
+
+        Пара повторяется столько раз, сколько ссылок нужно добавить. Содержимое блокируется в порядке
+        идентификаторов, чтобы параллельные запросы не блокировали друг друга взаимно.
+        """
+        counts = Counter(keys)
+        if not counts:
+            return {}
+        async with self.session_manager.get_session() as s:
+            rows = (
+                await s.execute(
+                    sa.select(Blob.id, Blob.storage_id, Blob.sha256)
+                    .where(sa.tuple_(Blob.storage_id, Blob.sha256).in_(list(counts)))
+                    .order_by(Blob.id)
+                    .with_for_update()
+                )
+            ).all()
+            if not rows:
+                return {}
+            statement = (
+                sa.update(Blob)
+                .where(Blob.id.in_([row.id for row in rows]))
+                .values(
+                    ref_count=Blob.ref_count
+                    + sa.case({row.id: counts[row.storage_id, row.sha256] for row in rows}, value=Blob.id),
+                    updated_at=sa.func.now(),
+                )
+                .returning(*Blob.__table__.columns.values())
+                .execution_options(synchronize_session=False)
+            )
+            blobs = [BlobReadSchema.model_validate(blob) for blob in (await s.execute(statement)).mappings().all()]
+            return {(blob.storage_id, blob.sha256): blob for blob in blobs}
+
+    async def find_many(
+        self: Self, keys: Sequence[tuple[uuid.UUID, str]]
+    ) -> dict[tuple[uuid.UUID, str], BlobReadSchema]:
+        """
+        Получаем содержимое по парам (хранилище, хеш).
+        """
+        if not keys:
+            return {}
+        async with self.session_manager.get_session() as s:
+            statement = self.select().where(sa.tuple_(Blob.storage_id, Blob.sha256).in_(list(set(keys))))
+            blobs = [self.model_validate(model) for model in (await s.execute(statement)).scalars().all()]
+            return {(blob.storage_id, blob.sha256): blob for blob in blobs}
+
+    async def release(self: Self, blob_ids: Sequence[uuid.UUID]) -> list[BlobReadSchema]:
+        """
+        Убираем ссылки на содержимое и возвращаем содержимое, на которое больше никто не ссылается.
+
+        Идентификатор повторяется столько раз, сколько ссылок нужно убрать.
+        """
+        counts = Counter(blob_ids)
+        if not counts:
+            return []
+        async with self.session_manager.get_session() as s:
+            await s.execute(
+                sa.update(Blob)
+                .where(Blob.id.in_(counts))
+                .values(ref_count=Blob.ref_count - sa.case(counts, value=Blob.id), updated_at=sa.func.now())
+                .execution_options(synchronize_session=False)
+            )
+            statement = (
+                sa.delete(Blob)
+                .where(Blob.id.in_(counts), Blob.ref_count <= 0)
+                .returning(*Blob.__table__.columns.values())
+                .execution_options(synchronize_session=False)
+            )
+            return [BlobReadSchema.model_validate(blob) for blob in (await s.execute(statement)).mappings().all()]
+
+    async def find(
+        self: Self,
+        storage_id: uuid.UUID,
+        *,
+        path: str | None = None,
+        sha256: str | None = None,
+        for_update: bool = False,
+    ) -> BlobReadSchema | None:
+        """
+        Получаем содержимое хранилища по пути объекта или хешу, при for_update блокируя его до конца транзакции.
+        """
+        async with self.session_manager.get_session() as s:
+            statement = self.select().where(Blob.storage_id == storage_id)
+            if path is not None:
+                statement = statement.where(Blob.path.collate('C') == path)
+            if sha256 is not None:
+                statement = statement.where(Blob.sha256 == sha256)
+            if for_update:
+                statement = statement.with_for_update()
+            model = (await s.execute(statement.limit(1))).scalar_one_or_none()
+            return self.model_validate(model) if model is not None else None
+
+    async def move(self: Self, blob_id: uuid.UUID, storage_id: uuid.UUID) -> None:
+        """
+        Переносим содержимое в другое хранилище вместе с его объектом.
+        """
+        async with self.session_manager.get_session() as s:
+            await s.execute(
+                sa.update(Blob)
+                .where(Blob.id == blob_id)
+                .values(storage_id=storage_id, updated_at=sa.func.now())
+                .execution_options(synchronize_session=False)
+            )
+
+    async def merge(self: Self, blob: BlobReadSchema, target: BlobReadSchema) -> None:
+        """
+        Передаем ссылки на содержимое такому же содержимому другого хранилища и удаляем его.
+
+        Файлы к этому моменту уже должны ссылаться на target.
+        """
+        async with self.session_manager.get_session() as s:
+            await s.execute(
+                sa.update(Blob)
+                .where(Blob.id == target.id)
+                .values(ref_count=Blob.ref_count + blob.ref_count, updated_at=sa.func.now())
+                .execution_options(synchronize_session=False)
+            )
+            await s.execute(sa.delete(Blob).where(Blob.id == blob.id).execution_options(synchronize_session=False))
@@ -0,0 +1,164 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Self
+
+from ..metrics import storage_concurrency_limit, storage_in_flight, storage_queue_depth
+
+CONCURRENCY_INITIAL_LIMIT = 4
+"""
+Начальное количество одновременных операций с хранилищем.
+"""
+CONCURRENCY_MIN_LIMIT = 1
+"""
+Минимальное количество одновременных операций, до которого лимит снижается при ошибках.
+"""
+CONCURRENCY_DECREASE_FACTOR = 0.5
+"""
+Множитель, с которым лимит снижается при ошибке или росте задержки.
+"""
+CONCURRENCY_DECREASE_INTERVAL = 1.0
+"""
+Минимальный интервал в секундах между снижениями лимита.
+
+Одновременные операции одной перегрузки не должны снижать лимит каждая по отдельности.
+"""
+CONCURRENCY_LATENCY_TOLERANCE = 2.0
+"""
+Во сколько раз задержка операции может превысить обычную, прежде чем лимит будет снижен.
+"""
+CONCURRENCY_LATENCY_ALPHA = 0.05
+"""
+Вес новой задержки в скользящем среднем обычной задержки.
+"""
+UPLOAD_COST_UNIT = 1024 * 1024
+"""
+Единица стоимости записи для адаптивного лимита: задержка записи нормируется на мегабайт.
+"""
+
+
+@dataclass
+class ConcurrencySlot:
+    """
+    Разрешение на выполнение операции.
+
+    Операция может пометить себя неуспешной, не выбрасывая исключение, например при частичных ошибках.
+    """
+
+    failed: bool = False
+
+
+class ConcurrencyLimiter:
+    """
+    Адаптивный лимит одновременных операций с хранилищем (AIMD).
+
+    - успешная операция с обычной задержкой увеличивает лимит на 1 / limit, то есть примерно на 1 за окно;
+    - ошибка или задержка выше обычной в CONCURRENCY_LATENCY_TOLERANCE раз уменьшают лимит вдвое;
+    - лимит не превышает max_limit, заданный в настройках хранилища.
+
+    Задержка нормируется на стоимость операции (например, размер файла),
+    чтобы операции разного объема были сравнимы.
+    """
+
+    def __init__(self, name: str, max_limit: int) -> None:
+        self.name = name
+        self.max_limit = max(max_limit, CONCURRENCY_MIN_LIMIT)
+        self.limit = float(min(CONCURRENCY_INITIAL_LIMIT, self.max_limit))
+        self.in_flight = 0
+        self.waiters: deque[asyncio.Future[None]] = deque()
+        self.latency: float | None = None
+        self.last_decrease = 0.0
+        self.update_metrics()
+
+    def configure(self: Self, max_limit: int) -> None:
+        """
+        Применяем изменившийся максимальный лимит хранилища.
+        """
+        self.max_limit = max(max_limit, CONCURRENCY_MIN_LIMIT)
+        self.limit = min(self.limit, float(self.max_limit))
+        self.wake()
+
+    @asynccontextmanager
+    async def acquire(self: Self, cost: float = 1.0) -> AsyncIterator[ConcurrencySlot]:
+        """
+        Ждем свободного места и выполняем операцию, учитывая ее результат и задержку в лимите.
+        """
+        await self.wait()
+        slot = ConcurrencySlot()
+        started = time.monotonic()
+        try:
+            yield slot
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.decrease()
+            raise
+        else:
+            if slot.failed:
+                self.decrease()
+            else:
+                self.observe((time.monotonic() - started) / max(cost, 1.0))
+        finally:
+            self.release()
+
+    async def wait(self: Self) -> None:
+        if not self.waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            self.update_metrics()
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self.update_metrics()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Место уже было передано нам, возвращаем его следующему.
+                self.release()
+            elif waiter in self.waiters:
+                self.waiters.remove(waiter)
+                self.update_metrics()
+            raise
+
+    def release(self: Self) -> None:
+        self.in_flight -= 1
+        self.wake()
+
+    def wake(self: Self) -> None:
+        while self.waiters and self.in_flight < int(self.limit):
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+        self.update_metrics()
+
+    def observe(self: Self, latency: float) -> None:
+        """
+        Учитываем задержку успешной операции.
+        """
+        if self.latency is not None and latency > self.latency * CONCURRENCY_LATENCY_TOLERANCE:
+            self.decrease()
+        else:
+            self.limit = min(self.limit + 1 / self.limit, float(self.max_limit))
+            self.wake()
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += CONCURRENCY_LATENCY_ALPHA * (latency - self.latency)
+
+    def decrease(self: Self) -> None:
+        now = time.monotonic()
+        if now - self.last_decrease < CONCURRENCY_DECREASE_INTERVAL:
+            return
+        self.last_decrease = now
+        self.limit = max(self.limit * CONCURRENCY_DECREASE_FACTOR, float(CONCURRENCY_MIN_LIMIT))
+        self.update_metrics()
+
+    def update_metrics(self: Self) -> None:
+        labels = {'storage_id': self.name}
+        storage_in_flight.set(labels, self.in_flight)
+        storage_queue_depth.set(labels, len(self.waiters))
+        storage_concurrency_limit.set(labels, int(self.limit))
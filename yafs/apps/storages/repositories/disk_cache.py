@@ -0,0 +1,341 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Self
+
+from .reader import READ_CHUNK_SIZE
+from ..metrics import disk_cache_coalesced, disk_cache_evictions, disk_cache_hits, disk_cache_misses, disk_cache_size
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DiskCacheEntry:
+    """
+    Файл, полностью записанный в кеш.
+    """
+
+    path: Path
+    size: int
+
+
+@dataclass
+class DiskCacheFill:
+    """
+    Заполнение кеша, которое выполняется в данный момент.
+
+    Читатели следят за счетчиком written и читают временный файл, не дожидаясь окончания записи.
+    """
+
+    temp_path: Path
+    size: int
+    created: bool = False
+    written: int = 0
+    done: bool = False
+    discarded: bool = False
+    error: BaseException | None = None
+    condition: asyncio.Condition = field(default_factory=asyncio.Condition)
+    task: asyncio.Task[None] | None = None
+
+
+class DiskCacheRepository:
+    """
+    Сквозной кеш содержимого файлов удаленных хранилищ на локальном диске.
+
+    - объем кеша ограничен max_size байт, при нехватке места вытесняются давно прочитанные файлы;
+    - одновременные промахи по одному файлу приводят к одному чтению из хранилища,
+      которое раздается всем читателям по мере записи;
+    - файл записывается во временный файл и переименовывается после проверки размера,
+      поэтому в кеше не бывает частично записанных файлов.
+    """
+
+    def __init__(self, root: Path, *, max_size: int, max_file_size: int, enabled: bool = True) -> None:
+        self.root = root
+        self.enabled = enabled
+        self.max_size = max_size
+        self.max_file_size = max_file_size
+        self.entries: OrderedDict[str, DiskCacheEntry] = OrderedDict()
+        self.fills: dict[str, DiskCacheFill] = {}
+        self.used = 0
+
+    async def load(self: Self) -> None:
+        """
+        Восстанавливаем кеш после перезапуска: удаляем незавершенные записи и загружаем файлы по времени доступа.
+        """
+        entries = await asyncio.to_thread(self.scan)
+        for key, entry in entries:
+            self.entries[key] = entry
+            self.used += entry.size
+        await self.evict(0)
+        disk_cache_size.set({}, self.used)
+
+    def scan(self: Self) -> list[tuple[str, DiskCacheEntry]]:
+        shutil.rmtree(self.root / 'tmp', ignore_errors=True)
+        (self.root / 'tmp').mkdir(parents=True, exist_ok=True)
+        (self.root / 'data').mkdir(parents=True, exist_ok=True)
+        entries: list[tuple[float, str, DiskCacheEntry]] = []
+        for path in (self.root / 'data').glob('*/*'):
+            stat = path.stat()
+            entries.append((stat.st_atime, path.name, DiskCacheEntry(path, stat.st_size)))
+        return [(key, entry) for _, key, entry in sorted(entries, key=lambda item: item[0])]
+
+    def get_key(self: Self, storage_id: uuid.UUID, path: str) -> str:
+        return hashlib.sha256(f'{storage_id}:{path}'.encode()).hexdigest()
+
+    def get_entry_path(self: Self, key: str) -> Path:
+        return self.root / 'data' / key[:2] / key
+
+    async def read(self: Self, key: str, size: int, loader: Callable[[], AsyncIterator[bytes]]) -> AsyncIterator[bytes]:
+        """
+        Читаем файл из кеша, при промахе заполняем кеш из loader.
+
+        loader не должен зависеть от запроса: заполнение продолжается, даже если читатель отключился.
+        Если файл не помещается в кеш, он читается из loader без заполнения.
+        """
+        f = await self.open_entry(key)
+        if f is not None:
+            disk_cache_hits.inc({})
+            async for chunk in self.read_entry(f, 0, size - 1):
+                yield chunk
+            return
+        fill = self.fills.get(key)
+        if fill is not None:
+            disk_cache_coalesced.inc({})
+        else:
+            disk_cache_misses.inc({})
+            fill = await self.start_fill(key, size, loader)
+        if fill is None:
+            # Файл не помещается в кеш, или его успело записать другое заполнение.
+            f = await self.open_entry(key)
+            chunks = self.read_entry(f, 0, size - 1) if f is not None else loader()
+        else:
+            f = await self.open_fill(key, fill)
+            chunks = self.read_fill(f, fill) if f is not None else loader()
+        async for chunk in chunks:
+            yield chunk
+
+    async def read_range(
+        self: Self, key: str, start: int, end: int, loader: Callable[[], AsyncIterator[bytes]]
+    ) -> AsyncIterator[bytes]:
+        """
+        Читаем диапазон байт файла, end включительно, из кеша, а если файла в кеше нет, из loader.
+
+        Промах по диапазону кеш не заполняет.
+        """
+        f = await self.open_entry(key)
+        if f is None:
+            async for chunk in loader():
+                yield chunk
+            return
+        disk_cache_hits.inc({})
+        async for chunk in self.read_entry(f, start, end):
+            yield chunk
+
+    async def open_entry(self: Self, key: str) -> BinaryIO | None:
+        """
+        Открываем файл кеша и отмечаем его недавно прочитанным.
+
+        Файл открывается в пуле потоков, и вытеснение может успеть удалить его раньше: это считается промахом.
+        Открытый файл остается доступным для чтения и после удаления.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        try:
+            return await asyncio.to_thread(open, entry.path, 'rb')
+        except FileNotFoundError:
+            if self.entries.get(key) is entry:
+                self.entries.pop(key)
+                self.used -= entry.size
+                disk_cache_size.set({}, self.used)
+            return None
+
+    async def open_fill(self: Self, key: str, fill: DiskCacheFill) -> BinaryIO | None:
+        """
+        Открываем временный файл заполнения, а если заполнение успело завершиться, файл кеша.
+
+        Возвращаем None, если заполнение не удалось или было отменено: тогда файл читается из хранилища.
+        """
+        async with fill.condition:
+            await fill.condition.wait_for(lambda: fill.created or fill.done)
+        if fill.created:
+            try:
+                return await asyncio.to_thread(open, fill.temp_path, 'rb')
+            except FileNotFoundError:
+                # Временный файл уже переименован в файл кеша или удален.
+                pass
+        async with fill.condition:
+            await fill.condition.wait_for(lambda: fill.done)
+        if fill.error is not None or fill.discarded:
+            return None
+        return await self.open_entry(key)
+
+    async def read_entry(self: Self, f: BinaryIO, start: int, end: int) -> AsyncIterator[bytes]:
+        try:
+            await asyncio.to_thread(f.seek, start)
+            remaining = end - start + 1
+            while remaining > 0 and (chunk := await asyncio.to_thread(f.read, min(READ_CHUNK_SIZE, remaining))):
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            f.close()
+
+    async def read_fill(self: Self, f: BinaryIO, fill: DiskCacheFill) -> AsyncIterator[bytes]:
+        """
+        Читаем временный файл вслед за заполнением.
+        """
+        try:
+            offset = 0
+            while True:
+                async with fill.condition:
+                    while fill.written <= offset and not fill.done:
+                        await fill.condition.wait()
+                if fill.error is not None:
+                    raise fill.error
+                if fill.written <= offset:
+                    break
+                chunk = await asyncio.to_thread(f.read, min(READ_CHUNK_SIZE, fill.written - offset))
+                offset += len(chunk)
+                yield chunk
+        finally:
+            f.close()
+
+    async def start_fill(
+        self: Self, key: str, size: int, loader: Callable[[], AsyncIterator[bytes]]
+    ) -> DiskCacheFill | None:
+        """
+        Резервируем место и запускаем заполнение, если файл помещается в кеш.
+
+        Если пока освобождалось место, файл начало записывать другое заполнение, возвращаем его.
+        """
+        if size > self.max_file_size or not await self.evict(size):
+            return None
+        if (fill := self.fills.get(key)) is not None:
+            disk_cache_coalesced.inc({})
+            return fill
+        if key in self.entries:
+            return None
+        fill = DiskCacheFill(self.root / 'tmp' / f'{uuid.uuid4().hex}.tmp', size)
+        self.used += size
+        disk_cache_size.set({}, self.used)
+        self.fills[key] = fill
+        fill.task = asyncio.create_task(self.fill(key, fill, loader))
+        return fill
+
+    async def fill(self: Self, key: str, fill: DiskCacheFill, loader: Callable[[], AsyncIterator[bytes]]) -> None:
+        try:
+            f = await asyncio.to_thread(open, fill.temp_path, 'wb')
+            async with fill.condition:
+                fill.created = True
+                fill.condition.notify_all()
+            try:
+                async for chunk in loader():
+                    await asyncio.to_thread(self.write_chunk, f, chunk)
+                    async with fill.condition:
+                        fill.written += len(chunk)
+                        fill.condition.notify_all()
+            finally:
+                f.close()
+            if fill.written != fill.size:
+                raise ValueError(f'Storage returned {fill.written} bytes instead of {fill.size}')
+            if not fill.discarded:
+                # Переименование и публикация записи выполняются без переключения контекста:
+                # читатель, не заставший временный файл, находит файл в кеше.
+                entry_path = self.get_entry_path(key)
+                entry_path.parent.mkdir(exist_ok=True)
+                os.replace(fill.temp_path, entry_path)
+                del self.fills[key]
+                self.entries[key] = DiskCacheEntry(entry_path, fill.size)
+                return
+            await self.release_fill(key, fill)
+        except asyncio.CancelledError:
+            fill.error = RuntimeError(f'Disk cache fill for key {key} was cancelled')
+            await asyncio.shield(self.release_fill(key, fill))
+            raise
+        except Exception as error:
+            logger.warning('Failed to fill disk cache for key %s', key, exc_info=True)
+            fill.error = error
+            await self.release_fill(key, fill)
+        finally:
+            async with fill.condition:
+                fill.done = True
+                fill.condition.notify_all()
+
+    @staticmethod
+    def write_chunk(f: BinaryIO, chunk: bytes) -> None:
+        """
+        Записываем порцию целиком и сбрасываем буфер, чтобы читатели заполнения видели записанные байты.
+        """
+        f.write(chunk)
+        f.flush()
+
+    async def release_fill(self: Self, key: str, fill: DiskCacheFill) -> None:
+        """
+        Освобождаем место, зарезервированное незавершенным заполнением.
+        """
+        if self.fills.get(key) is fill:
+            self.fills.pop(key)
+        self.used -= fill.size
+        disk_cache_size.set({}, self.used)
+        await asyncio.to_thread(self.remove, fill.temp_path)
+
+    async def evict(self: Self, size: int) -> bool:
+        """
+        Вытесняем давно прочитанные файлы, пока не освободится size байт.
+
+        Возвращаем False, если места не хватает даже после вытеснения: его занимают текущие заполнения.
+        """
+        paths: list[Path] = []
+        while self.entries and self.used + size > self.max_size:
+            _, entry = self.entries.popitem(last=False)
+            self.used -= entry.size
+            paths.append(entry.path)
+        if paths:
+            disk_cache_evictions.add({}, len(paths))
+            disk_cache_size.set({}, self.used)
+            await asyncio.to_thread(self.remove_many, paths)
+        return self.used + size <= self.max_size
+
+    async def discard(self: Self, keys: list[str]) -> None:
+        """
+        Удаляем файлы из кеша, незавершенные заполнения не попадут в кеш.
+        """
+        paths: list[Path] = []
+        for key in keys:
+            if (fill := self.fills.pop(key, None)) is not None:
+                fill.discarded = True
+            if (entry := self.entries.pop(key, None)) is not None:
+                self.used -= entry.size
+                paths.append(entry.path)
+        if paths:
+            disk_cache_size.set({}, self.used)
+            await asyncio.to_thread(self.remove_many, paths)
+
+    async def close(self: Self) -> None:
+        """
+        Прерываем незавершенные заполнения при остановке приложения.
+        """
+        tasks = [fill.task for fill in self.fills.values() if fill.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @classmethod
+    def remove_many(cls, paths: list[Path]) -> None:
+        for path in paths:
+            cls.remove(path)
+
+    @staticmethod
+    def remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
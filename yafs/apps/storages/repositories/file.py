@@ -1,7 +1,23 @@
+import datetime as dt
+import uuid
+from collections.abc import Collection, Mapping, Sequence
+from typing import Any, Self
+
+import sqlalchemy as sa
 from fast_clean.repositories import DbCrudRepository
+from sqlalchemy.orm import aliased
 
-from ..models import File
-from ..schemas import FileCreateSchema, FileReadSchema, FileUpdateSchema
+from ..enums import FileStatusEnum
+from ..models import Blob, File, FileReplica, UploadSession
+from ..schemas import (
+    BlobReadSchema,
+    FileAccessSchema,
+    FileCreateSchema,
+    FileListCursorSchema,
+    FileListFilterSchema,
+    FileReadSchema,
+    FileUpdateSchema,
+)
 
 
 class FileDbRepository(DbCrudRepository[File, FileReadSchema, FileCreateSchema, FileUpdateSchema]):
@@ -9,4 +25,292 @@ class FileDbRepository(DbCrudRepository[File, FileReadSchema, FileCreateSchema,
     Репозиторий для работы с файлами.
     """
 
-    ...
+    async def mark_ready(self: Self, sizes: Mapping[uuid.UUID, int]) -> None:
+        """
+        Переводим загруженные файлы в статус READY и сохраняем фактические размеры одним запросом.
+        """
+        if not sizes:
+            return
+        async with self.session_manager.get_session() as s:
+            await s.execute(
+                sa.update(File),
+                [{'id': file_id, 'size': size, 'status': FileStatusEnum.READY} for file_id, size in sizes.items()],
+            )
+
+    async def mark_uploaded(self: Self, files: Sequence[FileReadSchema]) -> None:
+        """
+        Переводим загруженные через сервис файлы в статус READY одним запросом,
+        сохраняя фактические размеры и результаты проверки содержимого.
+        """
+        if not files:
+            return
+        async with self.session_manager.get_session() as s:
+            await s.execute(
+                sa.update(File),
+                [
+                    {
+                        'id': file.id,
+                        'size': file.size,
+                        'content_type': file.content_type,
+                        'md5': file.md5,
+                        'crc32c': file.crc32c,
+                        'detected_content_type': file.detected_content_type,
+                        'etag': file.etag,
+                        'status': FileStatusEnum.READY,
+                    }
+                    for file in files
+                ],
+            )
+
+    async def attach_blobs(self: Self, blobs: Mapping[uuid.UUID, BlobReadSchema]) -> None:
+        """
+        Привязываем файлы к содержимому одним запросом, кодировка файлов берется у содержимого.
+        """
+        if not blobs:
+            return
+        async with self.session_manager.get_session() as s:
+            await s.execute(
+                sa.update(File),
+                [
+                    {
+                        'id': file_id,
+                        'size': blob.size,
+                        'path': blob.path,
+                        'sha256': blob.sha256,
+                        'blob_id': blob.id,
+                        'encoding': blob.encoding,
+                        'encoded_size': blob.encoded_size,
+                    }
+                    for file_id, blob in blobs.items()
+                ],
+            )
+
+    async def get_page(
+        self: Self,
+        storage_id: uuid.UUID,
+        filter_schema: FileListFilterSchema,
+        *,
+        after: FileListCursorSchema | None,
+        limit: int,
+    ) -> list[FileReadSchema]:
+        """
+        Получаем страницу файлов хранилища в порядке (created_at, id) после позиции after.
+
+        Страница выбирается по индексу (storage_id, created_at, id) без OFFSET,
+        поэтому время запроса не зависит от глубины листания.
+        """
+        async with self.session_manager.get_session() as s:
+            statement = self.select().where(File.storage_id == storage_id)
+            if after is not None:
+                statement = statement.where(sa.tuple_(File.created_at, File.id) > (after.created_at, after.id))
+            if filter_schema.content_type is not None:
+                statement = statement.where(File.content_type == filter_schema.content_type)
+            if filter_schema.min_size is not None:
+                statement = statement.where(File.size >= filter_schema.min_size)
+            if filter_schema.max_size is not None:
+                statement = statement.where(File.size <= filter_schema.max_size)
+            if filter_schema.status is not None:
+                statement = statement.where(File.status == filter_schema.status)
+            statement = statement.order_by(File.created_at, File.id).limit(limit)
+            models = (await s.execute(statement)).scalars().all()
+            return [self.model_validate(model) for model in models]
+
+    async def get_stale_pending(self: Self, created_before: dt.datetime, limit: int) -> list[FileReadSchema]:
+        """
+        Получаем файлы, застрявшие в статусе PENDING дольше допустимого.
+
+        Файлы загрузок частями не учитываются: они прерываются по отсутствию активности, а не по возрасту.
+        """
+        async with self.session_manager.get_session() as s:
+            statement = (
+                self.select()
+                .where(
+                    File.status == FileStatusEnum.PENDING,
+                    File.created_at < created_before,
+                    ~sa.exists().where(UploadSession.file_id == File.id),
+                )
+                .order_by(File.created_at)
+                .limit(limit)
+            )
+            models = (await s.execute(statement)).scalars().all()
+            return [self.model_validate(model) for model in models]
+
+    async def get_pending_for_update(self: Self, file_id: uuid.UUID) -> FileReadSchema | None:
+        """
+        Получаем файл в статусе PENDING, блокируя его до конца транзакции.
+        """
+        async with self.session_manager.get_session() as s:
+            statement = self.select().where(File.id == file_id, File.status == FileStatusEnum.PENDING).with_for_update()
+            model = (await s.execute(statement)).scalar_one_or_none()
+            return self.model_validate(model) if model is not None else None
+
+    async def get_ready_for_update(self: Self, file_id: uuid.UUID) -> FileReadSchema | None:
+        """
+        Получаем файл в статусе READY, блокируя его до конца транзакции.
+        """
+        async with self.session_manager.get_session() as s:
+            statement = self.select().where(File.id == file_id, File.status == FileStatusEnum.READY).with_for_update()
+            model = (await s.execute(statement)).scalar_one_or_none()
+            return self.model_validate(model) if model is not None else None
+
+    async def delete_files(
+        self: Self,
+        ids: Sequence[uuid.UUID],
+        *,
+        storage_id: uuid.UUID | None = None,
+        status: FileStatusEnum | None = None,
+    ) -> list[FileReadSchema]:
+        """
+        Удаляем файлы и возвращаем только действительно удаленные этим запросом.
+
+        По возвращенным записям освобождается содержимое, поэтому параллельное удаление
+        одного файла не уменьшит счетчик ссылок дважды.
+        """
+        if not ids:
+            return []
+        async with self.session_manager.get_session() as s:
+            statement = sa.delete(File).where(File.id.in_(ids))
+            if storage_id is not None:
+                statement = statement.where(File.storage_id == storage_id)
+            if status is not None:
+                statement = statement.where(File.status == status)
+            returning = statement.returning(*File.__table__.columns.values()).execution_options(
+                synchronize_session=False
+            )
+            return [FileReadSchema.model_validate(file) for file in (await s.execute(returning)).mappings().all()]
+
+    async def get_known_paths(self: Self, storage_id: uuid.UUID, *, after: str | None, until: str | None) -> list[str]:
+        """
+        Получаем пути объектов хранилища, на которые ссылаются файлы, содержимое и копии, в диапазоне (after, until].
+
+        Пустая граница диапазона означает, что он с этой стороны не ограничен.
+
+        Пути сравниваются в порядке байт, как их отдает хранилище, по индексам (storage_id, path COLLATE "C").
+        """
+        async with self.session_manager.get_session() as s:
+            statements = []
+            for model in (File, Blob, FileReplica):
+                path = model.path.collate('C')
+                statement = sa.select(path.label('path')).where(model.storage_id == storage_id)
+                if after is not None:
+                    statement = statement.where(path > after)
+                if until is not None:
+                    statement = statement.where(path <= until)
+                statements.append(statement)
+            union = sa.union(*statements).subquery()
+            path = union.c.path.collate('C')
+            return list((await s.execute(sa.select(union.c.path).order_by(path))).scalars().all())
+
+    async def get_referenced_paths(self: Self, storage_id: uuid.UUID, paths: Collection[str]) -> set[str]:
+        """
+        Выбираем из paths пути объектов хранилища, на которые ссылаются файлы, содержимое или копии.
+        """
+        if not paths:
+            return set()
+        async with self.session_manager.get_session() as s:
+            statement = sa.union(
+                *[
+                    sa.select(model.path).where(model.storage_id == storage_id, model.path.in_(paths))
+                    for model in (File, Blob, FileReplica)
+                ]
+            )
+            return set((await s.execute(statement)).scalars().all())
+
+    async def mark_accessed(self: Self, file_ids: Sequence[uuid.UUID], accessed_before: dt.datetime) -> None:
+        """
+        Отмечаем чтение файлов, время которых не обновлялось с accessed_before.
+
+        Часто читаемые файлы не перезаписываются на каждое чтение, а строки обновляются в порядке id,
+        чтобы параллельные запросы не блокировали друг друга взаимно.
+        """
+        if not file_ids:
+            return
+        async with self.session_manager.get_session() as s:
+            await s.execute(
+                sa.update(File)
+                .where(
+                    File.id.in_(sorted(file_ids)),
+                    sa.or_(File.accessed_at.is_(None), File.accessed_at < accessed_before),
+                )
+                .values(accessed_at=sa.func.now())
+                .execution_options(synchronize_session=False)
+            )
+
+    async def get_cold(
+        self: Self,
+        storage_id: uuid.UUID,
+        accessed_before: dt.datetime,
+        *,
+        after: FileAccessSchema | None,
+        limit: int,
+    ) -> list[FileAccessSchema]:
+        """
+        Получаем готовые файлы хранилища, которые не читались с accessed_before, начиная с самых старых.
+
+        Файл пропускается, если его объект читают другие файлы, ссылающиеся на то же содержимое.
+        Страница выбирается по индексу (storage_id, coalesce(accessed_at, created_at), id) после позиции after.
+        """
+        last_access = sa.func.coalesce(File.accessed_at, File.created_at)
+        sibling = aliased(File)
+        async with self.session_manager.get_session() as s:
+            statement = sa.select(File.id, File.path, last_access).where(
+                File.storage_id == storage_id,
+                File.status == FileStatusEnum.READY,
+                last_access < accessed_before,
+                ~sa.exists().where(
+                    sibling.storage_id == File.storage_id,
+                    sibling.path.collate('C') == File.path.collate('C'),
+                    sa.func.coalesce(sibling.accessed_at, sibling.created_at) >= accessed_before,
+                ),
+            )
+            if after is not None:
+                statement = statement.where(sa.tuple_(last_access, File.id) > (after.accessed_at, after.id))
+            statement = statement.order_by(last_access, File.id).limit(limit)
+            return [FileAccessSchema(*row) for row in (await s.execute(statement)).all()]
+
+    async def lock_cold_path(
+        self: Self, storage_id: uuid.UUID, path: str, accessed_before: dt.datetime
+    ) -> list[FileReadSchema] | None:
+        """
+        Блокируем файлы, ссылающиеся на объект хранилища, до конца транзакции.
+
+        Возвращаем None, если таких файлов нет, какой-то из них еще загружается или читался с accessed_before.
+        """
+        async with self.session_manager.get_session() as s:
+            statement = (
+                sa.select(File, sa.func.coalesce(File.accessed_at, File.created_at))
+                .where(File.storage_id == storage_id, File.path.collate('C') == path)
+                .order_by(File.id)
+                .with_for_update(of=File)
+            )
+            rows = (await s.execute(statement)).all()
+            if not rows or any(
+                model.status != FileStatusEnum.READY or last_access >= accessed_before for model, last_access in rows
+            ):
+                return None
+            return [self.model_validate(model) for model, _ in rows]
+
+    async def move(
+        self: Self,
+        file_ids: Sequence[uuid.UUID],
+        storage_id: uuid.UUID,
+        *,
+        path: str,
+        blob: BlobReadSchema | None,
+        etag: str | None,
+    ) -> None:
+        """
+        Переводим файлы на объект в другом хранилище.
+
+        Если объект принадлежит содержимому, кодировка файлов берется у него.
+        """
+        values: dict[str, Any] = {'storage_id': storage_id, 'path': path, 'etag': etag}
+        if blob is not None:
+            values.update(blob_id=blob.id, encoding=blob.encoding, encoded_size=blob.encoded_size)
+        async with self.session_manager.get_session() as s:
+            await s.execute(
+                sa.update(File)
+                .where(File.id.in_(file_ids))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
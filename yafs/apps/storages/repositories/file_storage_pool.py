@@ -0,0 +1,229 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Self
+
+from .concurrency import ConcurrencyLimiter
+from .file_storage_provider import FileStorageProviderRepositoryFactory, FileStorageRepositoryProtocol
+from .health import StorageHealth
+from ..metrics import observe_stage
+from ..schemas import StorageReadSchema
+
+STORAGE_POOL_MAX_SIZE = 64
+"""
+Максимальное количество одновременно открытых клиентов хранилищ.
+"""
+STORAGE_POOL_IDLE_TTL = 300.0
+"""
+Время в секундах, после которого неиспользуемый клиент закрывается.
+"""
+STORAGE_POOL_REVALIDATE_INTERVAL = 30.0
+"""
+Время в секундах, после которого параметры хранилища открытого клиента сверяются с кешем метаданных.
+
+Изменение хранилища сбрасывает общий кеш метаданных, поэтому другие реплики приложения используют
+устаревшие параметры и активность хранилища не дольше этого времени, даже если клиент занят постоянно.
+"""
+STORAGE_DEFAULT_MAX_CONCURRENCY = 16
+"""
+Максимальное количество одновременных операций для хранилища, клиент которого еще не создавался.
+"""
+
+
+@dataclass
+class FileStorageRepositoryPoolEntry:
+    """
+    Открытый репозиторий хранилища и счетчик его текущих пользователей.
+    """
+
+    repository: FileStorageRepositoryProtocol
+    storage: StorageReadSchema
+    last_used: float = field(default_factory=time.monotonic)
+    checked_at: float = field(default_factory=time.monotonic)
+    leases: int = 0
+    retired: bool = False
+
+
+class FileStorageRepositoryPool:
+    """
+    Пул открытых репозиториев хранилищ уровня приложения.
+
+    На каждый storage_id держим один клиент вместе с его пулом HTTP соединений,
+    чтобы не загружать хранилище из базы, не расшифровывать параметры и не поднимать клиент на каждый запрос.
+    Закрытие вытесненного или инвалидированного клиента откладывается до освобождения всеми запросами.
+
+    Здесь же хранятся лимиты одновременных операций и состояние доступности хранилищ:
+    они общие для всех запросов и переживают пересоздание клиента.
+    """
+
+    def __init__(
+        self,
+        file_storage_repository_factory: FileStorageProviderRepositoryFactory,
+        *,
+        max_size: int = STORAGE_POOL_MAX_SIZE,
+        idle_ttl: float = STORAGE_POOL_IDLE_TTL,
+        revalidate_interval: float = STORAGE_POOL_REVALIDATE_INTERVAL,
+    ) -> None:
+        self.file_storage_repository_factory = file_storage_repository_factory
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.revalidate_interval = revalidate_interval
+        self.entries: OrderedDict[uuid.UUID, FileStorageRepositoryPoolEntry] = OrderedDict()
+        # Блокировки не удаляются вместе с клиентами: их могут ждать запросы, а хранилищ немного.
+        self.locks: dict[uuid.UUID, asyncio.Lock] = {}
+        self.limiters: dict[uuid.UUID, ConcurrencyLimiter] = {}
+        self.health: dict[uuid.UUID, StorageHealth] = {}
+
+    @asynccontextmanager
+    async def lease(self: Self, storage_id: uuid.UUID) -> AsyncIterator[FileStorageRepositoryProtocol]:
+        """
+        Берем репозиторий хранилища на время выполнения запроса.
+        """
+        entry = await self.acquire(storage_id)
+        try:
+            yield entry.repository
+        finally:
+            await self.release(entry)
+
+    async def acquire(self: Self, storage_id: uuid.UUID) -> FileStorageRepositoryPoolEntry:
+        """
+        Получаем открытый репозиторий из пула или создаем новый.
+
+        Одновременные промахи по одному хранилищу создают только один клиент.
+        Клиент, параметры которого давно не сверялись, сбрасывается, если хранилище изменилось.
+        """
+        await self.evict_idle()
+        entry = self.entries.get(storage_id)
+        if entry is not None and time.monotonic() - entry.checked_at >= self.revalidate_interval:
+            await self.revalidate(storage_id, entry)
+            entry = self.entries.get(storage_id)
+        if entry is None:
+            async with self.locks.setdefault(storage_id, asyncio.Lock()):
+                entry = self.entries.get(storage_id)
+                if entry is None:
+                    storage = await self.file_storage_repository_factory.get_storage(storage_id)
+                    repository = self.file_storage_repository_factory.make_repository(storage)
+                    with observe_stage('client_setup', storage_id):
+                        await repository.__aenter__()
+                    entry = FileStorageRepositoryPoolEntry(repository, storage)
+                    self.configure_limiter(storage_id, storage.max_concurrency)
+                    self.entries[storage_id] = entry
+                    await self.evict_overflow()
+        self.entries.move_to_end(storage_id)
+        entry.leases += 1
+        entry.last_used = time.monotonic()
+        return entry
+
+    async def revalidate(self: Self, storage_id: uuid.UUID, entry: FileStorageRepositoryPoolEntry) -> None:
+        """
+        Сверяем параметры открытого клиента с хранилищем из кеша метаданных и сбрасываем клиент при расхождении.
+
+        Новый клиент создается при получении репозитория, и если хранилище удалили или отключили,
+        запрос получает ту же ошибку, что и без открытого клиента.
+        """
+        entry.checked_at = time.monotonic()
+        storage = await self.file_storage_repository_factory.find_storage(storage_id)
+        if storage != entry.storage and self.entries.get(storage_id) is entry:
+            await self.invalidate(storage_id)
+
+    async def get_storage(self: Self, storage_id: uuid.UUID) -> StorageReadSchema | None:
+        """
+        Получаем хранилище открытого клиента без обращения к кешу, а если клиента нет, загружаем его.
+        """
+        entry = self.entries.get(storage_id)
+        if entry is not None:
+            return entry.storage
+        return await self.file_storage_repository_factory.find_storage(storage_id)
+
+    def holds(self: Self, storage_id: uuid.UUID, repository: FileStorageRepositoryProtocol) -> bool:
+        """
+        Проверяем, что репозиторий является открытым клиентом хранилища storage_id.
+        """
+        entry = self.entries.get(storage_id)
+        return entry is not None and entry.repository is repository
+
+    def get_limiter(self: Self, storage_id: uuid.UUID) -> ConcurrencyLimiter:
+        """
+        Получаем лимит одновременных операций хранилища.
+
+        Лимит настраивается при создании клиента, поэтому вызывается после получения репозитория из пула.
+        """
+        limiter = self.limiters.get(storage_id)
+        if limiter is None:
+            limiter = self.limiters[storage_id] = ConcurrencyLimiter(str(storage_id), STORAGE_DEFAULT_MAX_CONCURRENCY)
+        return limiter
+
+    def get_health(self: Self, storage_id: uuid.UUID) -> StorageHealth:
+        """
+        Получаем состояние доступности хранилища.
+        """
+        health = self.health.get(storage_id)
+        if health is None:
+            health = self.health[storage_id] = StorageHealth()
+        return health
+
+    def configure_limiter(self: Self, storage_id: uuid.UUID, max_concurrency: int) -> None:
+        limiter = self.limiters.get(storage_id)
+        if limiter is None:
+            self.limiters[storage_id] = ConcurrencyLimiter(str(storage_id), max_concurrency)
+        else:
+            limiter.configure(max_concurrency)
+
+    async def release(self: Self, entry: FileStorageRepositoryPoolEntry) -> None:
+        """
+        Возвращаем репозиторий в пул.
+        """
+        entry.leases -= 1
+        entry.last_used = time.monotonic()
+        if entry.retired and entry.leases == 0:
+            await self.close_entry(entry)
+
+    async def invalidate(self: Self, storage_id: uuid.UUID) -> None:
+        """
+        Сбрасываем клиент хранилища после изменения его параметров или активности.
+        """
+        entry = self.entries.pop(storage_id, None)
+        if entry is not None:
+            await self.retire(entry)
+
+    async def evict_idle(self: Self) -> None:
+        """
+        Закрываем клиенты, которые не использовались дольше idle_ttl.
+        """
+        deadline = time.monotonic() - self.idle_ttl
+        expired = [
+            storage_id for storage_id, entry in self.entries.items() if entry.leases == 0 and entry.last_used < deadline
+        ]
+        for storage_id in expired:
+            await self.invalidate(storage_id)
+
+    async def evict_overflow(self: Self) -> None:
+        """
+        Вытесняем давно использованные клиенты при превышении размера пула.
+        """
+        while len(self.entries) > self.max_size:
+            storage_id = next(iter(self.entries))
+            await self.invalidate(storage_id)
+
+    async def retire(self: Self, entry: FileStorageRepositoryPoolEntry) -> None:
+        """
+        Помечаем клиент на закрытие, закрываем сразу, если он никем не используется.
+        """
+        entry.retired = True
+        if entry.leases == 0:
+            await self.close_entry(entry)
+
+    async def close(self: Self) -> None:
+        """
+        Закрываем все клиенты пула при остановке приложения.
+        """
+        for storage_id in list(self.entries):
+            await self.invalidate(storage_id)
+
+    @staticmethod
+    async def close_entry(entry: FileStorageRepositoryPoolEntry) -> None:
+        await entry.repository.__aexit__(None, None, None)
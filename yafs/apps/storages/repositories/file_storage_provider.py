@@ -1,22 +1,161 @@
 import uuid
+from collections.abc import AsyncIterator, Sequence
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Protocol, Self
 
-from fast_clean.repositories.storage import StorageRepositoryFactoryProtocol, StorageRepositoryProtocol
-from fast_clean.repositories.storage.enums import StorageTypeEnum
+from fast_clean.exceptions import ModelNotFoundError
+from fast_clean.repositories.storage import StorageRepositoryProtocol
+from fast_clean.repositories.storage.reader import StreamReadProtocol
 from fast_clean.repositories.storage.schemas import S3StorageParamsSchema
 from fast_clean.services.cryptography import CryptographyServiceProtocol
 
+from .concurrency import ConcurrencyLimiter
+from .local import LocalFileStorageRepository
+from .metadata_cache import MetadataCacheRepository
+from .reader import UPLOAD_CONCURRENCY, UPLOAD_PART_SIZE
+from .s3 import S3FileStorageRepository
 from .storage import StorageDbRepository
 from ..enums import FileStorageTypeEnum
+from ..exceptions import StorageNotActiveError
+from ..metrics import observe_stage
+from ..models import Storage
+from ..schemas import (
+    LocalFileStorageParamsSchema,
+    PresignedUrlSchema,
+    StorageListObjectSchema,
+    StorageObjectSchema,
+    StorageReadSchema,
+)
 
 
 class FileStorageRepositoryProtocol(StorageRepositoryProtocol, Protocol):
     """
-    Является алиасом для StorageRepositoryProtocol.
+    Расширение StorageRepositoryProtocol операциями, необходимыми файловому сервису.
     """
 
-    ...
+    async def multipart_write(
+        self: Self,
+        path: str | Path,
+        stream: StreamReadProtocol,
+        *,
+        limiter: ConcurrencyLimiter,
+        part_size: int = UPLOAD_PART_SIZE,
+        concurrency: int = UPLOAD_CONCURRENCY,
+    ) -> StorageObjectSchema:
+        """
+        Загружаем поток частями ограниченного размера и возвращаем количество записанных байт и ETag объекта.
+
+        Место в limiter занимает каждый запрос к хранилищу, а не вся загрузка: медленное чтение потока
+        не держит место и не учитывается в задержке хранилища.
+        """
+        ...
+
+    async def copy_object(
+        self: Self, path: str | Path, source: 'FileStorageRepositoryProtocol', source_path: str | Path, *, size: int
+    ) -> bool:
+        """
+        Копируем объект source на стороне хранилища, не передавая содержимое через приложение.
+
+        Возвращаем False, если хранилища так скопировать объект не могут, тогда его нужно копировать потоком.
+        """
+        ...
+
+    async def multipart_create(self: Self, path: str | Path) -> str:
+        """
+        Начинаем загрузку частями и возвращаем ее идентификатор в хранилище.
+        """
+        ...
+
+    async def multipart_write_part(
+        self: Self,
+        path: str | Path,
+        upload_id: str,
+        part_number: int,
+        stream: StreamReadProtocol,
+        *,
+        limiter: ConcurrencyLimiter,
+    ) -> str:
+        """
+        Записываем часть загрузки из потока и возвращаем ее ETag, повторная запись части заменяет предыдущую.
+
+        Место в limiter, как и при multipart_write, занимают только запросы к хранилищу.
+        """
+        ...
+
+    async def multipart_complete(
+        self: Self, path: str | Path, upload_id: str, parts: Sequence[tuple[int, str]]
+    ) -> None:
+        """
+        Собираем файл из частей, переданных парами (номер, ETag) по порядку номеров.
+        """
+        ...
+
+    async def multipart_abort(self: Self, path: str | Path, upload_id: str) -> None:
+        """
+        Прерываем загрузку частями и удаляем записанные части.
+        """
+        ...
+
+    def get_local_path(self: Self, path: str | Path) -> Path | None:
+        """
+        Получаем путь к файлу в локальной файловой системе, если хранилище локальное.
+        """
+        ...
+
+    def stream_read_range(self: Self, path: str | Path, start: int, end: int) -> AsyncIterator[bytes]:
+        """
+        Возвращаем асинхронный итератор диапазона байт файла, end включительно.
+        """
+        ...
+
+    async def delete_many(self: Self, paths: Sequence[str | Path]) -> dict[str, str]:
+        """
+        Удаляем файлы пакетами и возвращаем ошибки по путям, которые удалить не удалось.
+        """
+        ...
+
+    async def presign_write(
+        self: Self,
+        path: str | Path,
+        *,
+        expires_in: int,
+        size: int | None = None,
+        content_type: str | None = None,
+        sha256: str | None = None,
+    ) -> PresignedUrlSchema:
+        """
+        Подписываем ссылку на загрузку файла напрямую в хранилище.
+        """
+        ...
+
+    async def presign_read(
+        self: Self,
+        path: str | Path,
+        *,
+        expires_in: int,
+        filename: str | None = None,
+        content_type: str | None = None,
+        content_encoding: str | None = None,
+    ) -> str:
+        """
+        Подписываем ссылку на скачивание файла напрямую из хранилища.
+        """
+        ...
+
+    async def head(self: Self, path: str | Path) -> StorageObjectSchema | None:
+        """
+        Получаем метаданные объекта или None, если его нет.
+        """
+        ...
+
+    async def list_objects(
+        self: Self, prefix: str | Path, *, start_after: str | None = None, limit: int
+    ) -> list[StorageListObjectSchema]:
+        """
+        Получаем до limit объектов с путем, начинающимся с prefix, после start_after в порядке байт пути.
+        """
+        ...
 
 
 @dataclass
@@ -26,21 +165,48 @@ class FileStorageProviderRepositoryFactory:
     """
 
     storage_repository: StorageDbRepository
-    storage_repository_factory: StorageRepositoryFactoryProtocol
     crypto_service: CryptographyServiceProtocol
     """
     Несмотря на то, что это сервис, он находится в репозитоии, потому что сервис
     предоставляет функционал по шифрованию и дешифрованию параметров подключения.
     """
+    metadata_cache_repository: MetadataCacheRepository
 
     async def make(self: Self, storage_id: uuid.UUID) -> FileStorageRepositoryProtocol:
         """
         Инициализуем для репозитория ин
         """
-        storage = await self.storage_repository.get(storage_id)
-        d_params = self.crypto_service.decrypt(storage.params)
-        if storage.type == FileStorageTypeEnum.S3:
-            return await self.storage_repository_factory.make(
-                StorageTypeEnum.S3, S3StorageParamsSchema.model_validate_json(d_params)
+        return self.make_repository(await self.get_storage(storage_id))
+
+    async def get_storage(self: Self, storage_id: uuid.UUID) -> StorageReadSchema:
+        """
+        Получаем активное хранилище.
+        """
+        storage = await self.find_storage(storage_id)
+        if storage is None:
+            raise ModelNotFoundError(Storage, model_id=storage_id)
+        if not storage.is_active:
+            raise StorageNotActiveError(storage_id)
+        return storage
+
+    async def find_storage(self: Self, storage_id: uuid.UUID) -> StorageReadSchema | None:
+        """
+        Получаем хранилище независимо от его активности.
+        """
+        with observe_stage('storage_lookup', storage_id):
+            return await self.metadata_cache_repository.get_storage(
+                storage_id, lambda: self.storage_repository.get_or_none(storage_id)
             )
+
+    def make_repository(self: Self, storage: StorageReadSchema) -> FileStorageRepositoryProtocol:
+        """
+        Создаем репозиторий по типу хранилища с расшифрованными параметрами.
+        """
+        with observe_stage('decrypt', storage.id):
+            d_params = self.crypto_service.decrypt(storage.params)
+        match storage.type:
+            case FileStorageTypeEnum.S3:
+                return S3FileStorageRepository(S3StorageParamsSchema.model_validate_json(d_params))
+            case FileStorageTypeEnum.LOCAL:
+                return LocalFileStorageRepository(LocalFileStorageParamsSchema.model_validate_json(d_params))
         raise NotImplementedError
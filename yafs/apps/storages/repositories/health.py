@@ -0,0 +1,79 @@
+import time
+from typing import Self
+
+HEALTH_LATENCY_ALPHA = 0.2
+"""
+Вес новой задержки первого байта в скользящем среднем.
+"""
+HEALTH_FAILURE_BACKOFF = 1.0
+"""
+Время в секундах, на которое хранилище считается недоступным после первой ошибки, удваивается с каждой следующей.
+"""
+HEALTH_MAX_FAILURE_BACKOFF = 60.0
+HEDGE_DEFAULT_DELAY = 0.2
+"""
+Время ожидания первого байта до запроса к следующей копии, пока задержка хранилища неизвестна.
+"""
+HEDGE_DELAY_FACTOR = 3.0
+"""
+Во сколько раз ожидание первого байта может превысить обычную задержку хранилища до запроса к следующей копии.
+"""
+HEDGE_MIN_DELAY = 0.02
+HEDGE_MAX_DELAY = 2.0
+
+
+class StorageHealth:
+    """
+    Задержка первого байта и доступность хранилища, по которым выбирается копия файла для чтения.
+
+    Состояние общее для всех запросов экземпляра приложения.
+    """
+
+    def __init__(self) -> None:
+        self.first_byte: float | None = None
+        self.failures = 0
+        self.failed_until = 0.0
+
+    @property
+    def is_healthy(self: Self) -> bool:
+        return time.monotonic() >= self.failed_until
+
+    @property
+    def hedge_delay(self: Self) -> float:
+        """
+        Время ожидания первого байта, после которого стоит запросить следующую копию.
+        """
+        if self.first_byte is None:
+            return HEDGE_DEFAULT_DELAY
+        return min(max(self.first_byte * HEDGE_DELAY_FACTOR, HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+    def get_rank(self: Self) -> tuple[bool, float]:
+        """
+        Ключ сортировки: сначала доступные хранилища, затем по задержке первого байта.
+        """
+        return not self.is_healthy, self.first_byte or 0.0
+
+    def observe(self: Self, first_byte: float) -> None:
+        """
+        Учитываем задержку первого байта успешного чтения.
+        """
+        self.failures = 0
+        self.failed_until = 0.0
+        self.observe_latency(first_byte)
+
+    def observe_latency(self: Self, first_byte: float) -> None:
+        """
+        Учитываем задержку, не влияя на доступность, например нижнюю границу задержки прерванного чтения.
+        """
+        if self.first_byte is None:
+            self.first_byte = first_byte
+        else:
+            self.first_byte += HEALTH_LATENCY_ALPHA * (first_byte - self.first_byte)
+
+    def fail(self: Self) -> None:
+        """
+        Учитываем ошибку чтения: хранилище временно опускается в конец списка копий.
+        """
+        self.failures += 1
+        backoff = min(HEALTH_FAILURE_BACKOFF * 2 ** (self.failures - 1), HEALTH_MAX_FAILURE_BACKOFF)
+        self.failed_until = time.monotonic() + backoff
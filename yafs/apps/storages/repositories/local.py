@@ -0,0 +1,341 @@
+import asyncio
+import datetime as dt
+import errno
+import hashlib
+import os
+import shutil
+import uuid
+from collections.abc import AsyncIterator, Iterator, Sequence
+from pathlib import Path
+from typing import Self
+
+import aiofiles
+from aiofiles import os as aos
+from fast_clean.repositories.storage import LocalStorageRepository
+from fast_clean.repositories.storage.reader import StreamReadProtocol
+
+from .concurrency import UPLOAD_COST_UNIT, ConcurrencyLimiter
+from .reader import READ_CHUNK_SIZE, UPLOAD_CONCURRENCY, UPLOAD_PART_SIZE, read_chunk
+from ..exceptions import PresignedUrlNotSupportedError
+from ..schemas import LocalFileStorageParamsSchema, PresignedUrlSchema, StorageListObjectSchema, StorageObjectSchema
+
+LINK_FALLBACK_ERRNOS = frozenset({errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP})
+"""
+Ошибки создания жесткой ссылки, при которых файл копируется целиком: разные диски,
+файловая система без жестких ссылок или превышено их количество.
+"""
+
+
+class LocalFileStorageRepository(LocalStorageRepository):
+    """
+    Репозиторий хранилища в директории локальной файловой системы.
+
+    Файлы записываются во временный файл рядом с целевым и переименовываются после записи,
+    поэтому читатели никогда не видят частично записанный файл.
+    """
+
+    def __init__(self: Self, params: LocalFileStorageParamsSchema) -> None:
+        super().__init__(params)
+        self.root = self.work_dir.resolve()
+        self.fsync = params.fsync
+
+    def get_local_path(self: Self, path: str | Path) -> Path:
+        """
+        Получаем путь к файлу в файловой системе.
+
+        Пути файлов начинаются с /, поэтому отсчитываем их от корня хранилища, не выходя за его пределы.
+        """
+        local_path = (self.root / str(path).lstrip('/')).resolve()
+        if not local_path.is_relative_to(self.root):
+            raise ValueError(f'Path {path} is outside of the storage directory')
+        return local_path
+
+    async def exists(self: Self, path: str | Path) -> bool:
+        return await aos.path.exists(self.get_local_path(path))
+
+    async def straming_read(self: Self, path: str | Path) -> AsyncIterator[bytes]:
+        async with aiofiles.open(self.get_local_path(path), 'rb') as f:
+            while chunk := await f.read(READ_CHUNK_SIZE):
+                yield chunk
+
+    async def stream_read_range(self: Self, path: str | Path, start: int, end: int) -> AsyncIterator[bytes]:
+        """
+        Читаем диапазон байт файла, end включительно.
+        """
+        remaining = end - start + 1
+        async with aiofiles.open(self.get_local_path(path), 'rb') as f:
+            await f.seek(start)
+            while remaining > 0 and (chunk := await f.read(min(READ_CHUNK_SIZE, remaining))):
+                remaining -= len(chunk)
+                yield chunk
+
+    async def multipart_write(
+        self: Self,
+        path: str | Path,
+        stream: StreamReadProtocol,
+        *,
+        limiter: ConcurrencyLimiter,
+        part_size: int = UPLOAD_PART_SIZE,
+        concurrency: int = UPLOAD_CONCURRENCY,
+    ) -> StorageObjectSchema:
+        """
+        Записываем поток порциями part_size и возвращаем количество записанных байт и ETag файла.
+
+        concurrency не используется: порции записываются в файл последовательно.
+        """
+        local_path = self.get_local_path(path)
+        await aos.makedirs(local_path.parent, exist_ok=True)
+        temp_path = local_path.with_name(f'.{local_path.name}.{uuid.uuid4().hex}.tmp')
+        size = 0
+        try:
+            async with aiofiles.open(temp_path, 'wb') as f:
+                while chunk := await read_chunk(stream, part_size):
+                    async with limiter.acquire(len(chunk) / UPLOAD_COST_UNIT):
+                        await f.write(chunk)
+                    size += len(chunk)
+                if self.fsync:
+                    async with limiter.acquire():
+                        await f.flush()
+                        await asyncio.to_thread(os.fsync, f.fileno())
+            stat = await aos.stat(temp_path)
+            await aos.replace(temp_path, local_path)
+        except BaseException:
+            await asyncio.shield(self.remove(temp_path))
+            raise
+        if self.fsync:
+            await asyncio.to_thread(self.fsync_dir, local_path.parent)
+        return StorageObjectSchema(size=size, etag=self.get_etag(stat))
+
+    async def copy_object(self: Self, path: str | Path, source: object, source_path: str | Path, *, size: int) -> bool:
+        """
+        Копируем файл другого локального хранилища жесткой ссылкой, а если это невозможно — копированием файла
+        в отдельном потоке.
+
+        Файлы не изменяются после записи, поэтому общая жесткая ссылка безопасна: удаление убирает только одно имя.
+        """
+        if not isinstance(source, LocalFileStorageRepository):
+            return False
+        local_path = self.get_local_path(path)
+        await aos.makedirs(local_path.parent, exist_ok=True)
+        temp_path = local_path.with_name(f'.{local_path.name}.{uuid.uuid4().hex}.tmp')
+        try:
+            await asyncio.to_thread(self.link_file, source.get_local_path(source_path), temp_path)
+            await aos.replace(temp_path, local_path)
+        except BaseException:
+            await asyncio.shield(self.remove(temp_path))
+            raise
+        if self.fsync:
+            await asyncio.to_thread(self.fsync_dir, local_path.parent)
+        return True
+
+    async def multipart_create(self: Self, path: str | Path) -> str:
+        """
+        Части записываются в отдельную директорию рядом с файлом, загрузка идентифицируется ее именем.
+        """
+        upload_id = uuid.uuid4().hex
+        await aos.makedirs(self.get_parts_path(path, upload_id), exist_ok=True)
+        return upload_id
+
+    async def multipart_write_part(
+        self: Self,
+        path: str | Path,
+        upload_id: str,
+        part_number: int,
+        stream: StreamReadProtocol,
+        *,
+        limiter: ConcurrencyLimiter,
+    ) -> str:
+        """
+        Записываем часть во временный файл порциями, не загружая ее в память целиком.
+        """
+        parts_path = self.get_parts_path(path, upload_id)
+        part_path = parts_path / str(part_number)
+        temp_path = parts_path / f'.{part_number}.{uuid.uuid4().hex}.tmp'
+        md5 = hashlib.md5(usedforsecurity=False)
+        try:
+            async with aiofiles.open(temp_path, 'wb') as f:
+                while chunk := await read_chunk(stream, READ_CHUNK_SIZE):
+                    async with limiter.acquire(len(chunk) / UPLOAD_COST_UNIT):
+                        await f.write(chunk)
+                    md5.update(chunk)
+                if self.fsync:
+                    async with limiter.acquire():
+                        await f.flush()
+                        await asyncio.to_thread(os.fsync, f.fileno())
+            await aos.replace(temp_path, part_path)
+        except BaseException:
+            await asyncio.shield(self.remove(temp_path))
+            raise
+        return md5.hexdigest()
+
+    async def multipart_complete(
+        self: Self, path: str | Path, upload_id: str, parts: Sequence[tuple[int, str]]
+    ) -> None:
+        """
+        Склеиваем части во временный файл и переименовываем его, как и при обычной записи.
+        """
+        local_path = self.get_local_path(path)
+        parts_path = self.get_parts_path(path, upload_id)
+        temp_path = local_path.with_name(f'.{local_path.name}.{uuid.uuid4().hex}.tmp')
+        try:
+            await asyncio.to_thread(self.concatenate_files, temp_path, [parts_path / str(n) for n, _ in parts])
+            await aos.replace(temp_path, local_path)
+        except BaseException:
+            await asyncio.shield(self.remove(temp_path))
+            raise
+        if self.fsync:
+            await asyncio.to_thread(self.fsync_dir, local_path.parent)
+        await asyncio.to_thread(shutil.rmtree, parts_path, ignore_errors=True)
+
+    async def multipart_abort(self: Self, path: str | Path, upload_id: str) -> None:
+        await asyncio.to_thread(shutil.rmtree, self.get_parts_path(path, upload_id), ignore_errors=True)
+
+    def get_parts_path(self: Self, path: str | Path, upload_id: str) -> Path:
+        local_path = self.get_local_path(path)
+        return local_path.with_name(f'.{local_path.name}.{upload_id}.parts')
+
+    def link_file(self: Self, source_path: Path, local_path: Path) -> None:
+        try:
+            os.link(source_path, local_path)
+        except OSError as error:
+            if error.errno not in LINK_FALLBACK_ERRNOS:
+                raise
+            shutil.copyfile(source_path, local_path)
+            if self.fsync:
+                with open(local_path, 'rb') as f:
+                    os.fsync(f.fileno())
+
+    def concatenate_files(self: Self, local_path: Path, paths: list[Path]) -> None:
+        with open(local_path, 'wb') as f:
+            for path in paths:
+                with open(path, 'rb') as part:
+                    shutil.copyfileobj(part, f, READ_CHUNK_SIZE)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    async def delete(self: Self, path: str | Path) -> None:
+        """
+        Удаляем файл, отсутствие файла не считается ошибкой, как и в S3.
+        """
+        await self.remove(self.get_local_path(path))
+
+    async def delete_many(self: Self, paths: Sequence[str | Path]) -> dict[str, str]:
+        errors: dict[str, str] = {}
+        for path in paths:
+            try:
+                await self.delete(path)
+            except OSError as error:
+                errors[str(path)] = str(error)
+        return errors
+
+    async def presign_write(
+        self: Self,
+        path: str | Path,
+        *,
+        expires_in: int,
+        size: int | None = None,
+        content_type: str | None = None,
+        sha256: str | None = None,
+    ) -> PresignedUrlSchema:
+        raise PresignedUrlNotSupportedError()
+
+    async def presign_read(
+        self: Self,
+        path: str | Path,
+        *,
+        expires_in: int,
+        filename: str | None = None,
+        content_type: str | None = None,
+        content_encoding: str | None = None,
+    ) -> str:
+        raise PresignedUrlNotSupportedError()
+
+    async def head(self: Self, path: str | Path) -> StorageObjectSchema | None:
+        try:
+            stat = await aos.stat(self.get_local_path(path))
+        except FileNotFoundError:
+            return None
+        return StorageObjectSchema(size=stat.st_size, etag=self.get_etag(stat))
+
+    @staticmethod
+    def get_etag(stat: os.stat_result) -> str:
+        """
+        ETag файла по времени изменения и размеру: файлы не изменяются после записи.
+        """
+        return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+    async def list_objects(
+        self: Self, prefix: str | Path, *, start_after: str | None = None, limit: int
+    ) -> list[StorageListObjectSchema]:
+        return await asyncio.to_thread(self.scan_objects, str(prefix), start_after, limit)
+
+    def scan_objects(self: Self, prefix: str, start_after: str | None, limit: int) -> list[StorageListObjectSchema]:
+        """
+        Обходим директорию префикса в порядке байт путей и выбираем limit первых путей после start_after.
+
+        Скрытые временные файлы и части незавершенных загрузок в список не попадают.
+        """
+        local_path = self.get_local_path(prefix)
+        relative_path = local_path.relative_to(self.root).as_posix()
+        key = b'' if relative_path == '.' else ('/' + relative_path).encode()
+        after = start_after.encode() if start_after is not None else None
+        objects: list[StorageListObjectSchema] = []
+        for object_key, stat in self.walk_sorted(local_path, key, after):
+            objects.append(
+                StorageListObjectSchema(
+                    path=object_key.decode(),
+                    size=stat.st_size,
+                    modified_at=dt.datetime.fromtimestamp(stat.st_mtime, dt.UTC),
+                )
+            )
+            if len(objects) >= limit:
+                break
+        return objects
+
+    def walk_sorted(
+        self: Self, local_path: Path, key: bytes, after: bytes | None
+    ) -> Iterator[tuple[bytes, os.stat_result]]:
+        """
+        Обходим директорию, выдавая файлы с путями больше after в порядке байт путей.
+
+        Поддиректория сортируется по своему пути с завершающим /, так как с него начинаются пути всех ее файлов,
+        и пропускается целиком, если все эти пути не больше after.
+        """
+        try:
+            with os.scandir(local_path) as it:
+                entries = [
+                    (key + b'/' + entry.name.encode() + (b'/' if entry.is_dir(follow_symlinks=False) else b''), entry)
+                    for entry in it
+                    if not entry.name.startswith('.')
+                ]
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        for entry_key, entry in sorted(entries, key=lambda item: item[0]):
+            if entry_key.endswith(b'/'):
+                if after is None or entry_key > after or after.startswith(entry_key):
+                    yield from self.walk_sorted(Path(entry.path), entry_key[:-1], after)
+            elif after is None or entry_key > after:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield entry_key, stat
+
+    @staticmethod
+    async def remove(local_path: Path) -> None:
+        try:
+            await aos.remove(local_path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def fsync_dir(local_path: Path) -> None:
+        """
+        Сбрасываем на диск запись директории, чтобы переименование пережило сбой питания.
+        """
+        fd = os.open(local_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
@@ -0,0 +1,304 @@
+import logging
+import uuid
+from collections.abc import Awaitable, Callable, Iterable, Mapping, Sequence
+from typing import Self, TypeVar
+
+from fast_clean.repositories import CacheRepositoryProtocol, RedisCacheRepository
+from pydantic import BaseModel, ValidationError
+from redis.exceptions import RedisError
+
+from ..enums import FileStatusEnum
+from ..schemas import FileReadSchema, FileReplicaListSchema, FileReplicaReadSchema, StorageReadSchema
+
+FILE_CACHE_TTL = 24 * 60 * 60
+"""
+Время жизни метаданных файла в кеше, изменения файлов сбрасывают их записи.
+"""
+STORAGE_CACHE_TTL = 5 * 60
+"""
+Время жизни хранилища в кеше, ограничивает устаревание на репликах, не получивших инвалидацию.
+"""
+MISSING_CACHE_TTL = 30
+"""
+Время жизни отрицательной записи для несуществующих идентификаторов.
+"""
+LOADING_CACHE_TTL = 30
+"""
+Время жизни метки загрузки: значение, загруженное дольше, в кеш не записывается.
+"""
+MISSING_VALUE = '-'
+LOADING_PREFIX = '~'
+FILL_SCRIPT = """
+for index, key in ipairs(KEYS) do
+    local offset = (index - 1) * 3
+    if redis.call('GET', key) == ARGV[offset + 1] then
+        if ARGV[offset + 2] == '' then
+            redis.call('DEL', key)
+        else
+            redis.call('SET', key, ARGV[offset + 2], 'EX', ARGV[offset + 3])
+        end
+    end
+end
+"""
+"""
+Записываем значения только в ключи, которые по-прежнему содержат метку загрузки этого запроса.
+"""
+
+SchemaType = TypeVar('SchemaType', bound=BaseModel)
+
+logger = logging.getLogger(__name__)
+
+
+class MetadataCacheRepository:
+    """
+    Сквозной кеш метаданных файлов, их копий и хранилищ по идентификатору.
+
+    Недоступность кеша не ломает запросы: при ошибке данные читаются из базы.
+
+    Перед загрузкой промаха в ключ записывается метка загрузки, а загруженное значение заменяет только ее.
+    Инвалидация удаляет метку, поэтому загрузка, начатая до изменения записи, не вернет в кеш старое значение.
+    """
+
+    def __init__(self, cache_repository: CacheRepositoryProtocol, prefix: str) -> None:
+        self.cache_repository = cache_repository
+        self.prefix = prefix
+        self.fill_script = (
+            cache_repository.redis.register_script(FILL_SCRIPT)
+            if isinstance(cache_repository, RedisCacheRepository)
+            else None
+        )
+
+    async def get_file(
+        self: Self, file_id: uuid.UUID, loader: Callable[[], Awaitable[FileReadSchema | None]]
+    ) -> FileReadSchema | None:
+        """
+        Получаем файл из кеша или загружаем его из базы.
+
+        Файлы в процессе загрузки не кешируются, иначе смена статуса потребовала бы инвалидации.
+        """
+        return await self.get_or_load(
+            self.get_file_key(file_id),
+            FileReadSchema,
+            loader,
+            FILE_CACHE_TTL,
+            is_cacheable=lambda file: file.status == FileStatusEnum.READY,
+        )
+
+    async def get_files(
+        self: Self,
+        file_ids: Sequence[uuid.UUID],
+        loader: Callable[[list[uuid.UUID]], Awaitable[list[FileReadSchema]]],
+    ) -> dict[uuid.UUID, FileReadSchema]:
+        """
+        Получаем файлы из кеша одним запросом, а промахи загружаем из базы одним вызовом loader.
+
+        Отсутствующих файлов в результате нет, они кешируются так же, как при чтении по одному.
+        """
+        file_ids = list(dict.fromkeys(file_ids))
+        keys = [self.get_file_key(file_id) for file_id in file_ids]
+        try:
+            values = await self.get_many(keys)
+        except RedisError:
+            logger.warning('Metadata cache is unavailable, %s file keys', len(keys), exc_info=True)
+            return {file.id: file for file in await loader(file_ids)}
+        files: dict[uuid.UUID, FileReadSchema] = {}
+        missing_ids: list[uuid.UUID] = []
+        invalid_keys: list[str] = []
+        for file_id, key, value in zip(file_ids, keys, values, strict=True):
+            if value == MISSING_VALUE:
+                continue
+            if value is not None and not value.startswith(LOADING_PREFIX):
+                try:
+                    files[file_id] = FileReadSchema.model_validate_json(value)
+                    continue
+                except ValidationError:
+                    logger.info('Metadata cache entry %s does not match schema, reloading', key)
+                    invalid_keys.append(key)
+            missing_ids.append(file_id)
+        if not missing_ids:
+            return files
+        await self.clear_many(invalid_keys)
+        tokens = await self.claim_many([self.get_file_key(file_id) for file_id in missing_ids])
+        loaded_files = {file.id: file for file in await loader(missing_ids)}
+        files.update(loaded_files)
+        entries: dict[str, tuple[str, str, int]] = {}
+        for file_id in missing_ids:
+            key = self.get_file_key(file_id)
+            if key not in tokens:
+                continue
+            file = loaded_files.get(file_id)
+            if file is None:
+                entries[key] = (tokens[key], MISSING_VALUE, MISSING_CACHE_TTL)
+            elif file.status == FileStatusEnum.READY:
+                entries[key] = (tokens[key], file.model_dump_json(), FILE_CACHE_TTL)
+            else:
+                entries[key] = (tokens[key], '', 0)
+        await self.fill_many(entries)
+        return files
+
+    async def get_replicas(
+        self: Self, file_id: uuid.UUID, loader: Callable[[], Awaitable[list[FileReplicaReadSchema]]]
+    ) -> list[FileReplicaReadSchema]:
+        """
+        Получаем копии файла из кеша или загружаем их из базы.
+
+        Копии сбрасываются вместе с метаданными файла, а при записи копий — отдельно.
+        """
+
+        async def load() -> FileReplicaListSchema:
+            return FileReplicaListSchema(await loader())
+
+        replicas = await self.get_or_load(self.get_replicas_key(file_id), FileReplicaListSchema, load, FILE_CACHE_TTL)
+        return replicas.root if replicas is not None else []
+
+    async def get_storage(
+        self: Self, storage_id: uuid.UUID, loader: Callable[[], Awaitable[StorageReadSchema | None]]
+    ) -> StorageReadSchema | None:
+        """
+        Получаем хранилище из кеша или загружаем его из базы.
+        """
+        return await self.get_or_load(self.get_storage_key(storage_id), StorageReadSchema, loader, STORAGE_CACHE_TTL)
+
+    async def invalidate_files(self: Self, file_ids: Iterable[uuid.UUID]) -> None:
+        """
+        Удаляем файлы из кеша вместе с их копиями.
+        """
+        await self.clear_many(
+            [key for file_id in file_ids for key in (self.get_file_key(file_id), self.get_replicas_key(file_id))]
+        )
+
+    async def invalidate_replicas(self: Self, file_ids: Iterable[uuid.UUID]) -> None:
+        """
+        Удаляем из кеша копии файлов.
+        """
+        await self.clear_many([self.get_replicas_key(file_id) for file_id in file_ids])
+
+    async def invalidate_storage(self: Self, storage_id: uuid.UUID) -> None:
+        """
+        Удаляем хранилище из кеша.
+        """
+        await self.clear_many([self.get_storage_key(storage_id)])
+
+    async def get_or_load(
+        self: Self,
+        key: str,
+        schema_type: type[SchemaType],
+        loader: Callable[[], Awaitable[SchemaType | None]],
+        expire: int,
+        *,
+        is_cacheable: Callable[[SchemaType], bool] | None = None,
+    ) -> SchemaType | None:
+        """
+        Читаем значение из кеша, при промахе загружаем и сохраняем, включая отсутствие значения.
+
+        Если значение уже загружает другой запрос, загружаем его без записи в кеш.
+        """
+        try:
+            value = await self.cache_repository.get(key)
+        except RedisError:
+            logger.warning('Metadata cache is unavailable, key %s', key, exc_info=True)
+            return await loader()
+        if value == MISSING_VALUE:
+            return None
+        if value is not None and not value.startswith(LOADING_PREFIX):
+            try:
+                return schema_type.model_validate_json(value)
+            except ValidationError:
+                logger.info('Metadata cache entry %s does not match schema, reloading', key)
+                await self.clear_many([key])
+        token = (await self.claim_many([key])).get(key)
+        model = await loader()
+        if token is None:
+            return model
+        if model is None:
+            await self.fill_many({key: (token, MISSING_VALUE, MISSING_CACHE_TTL)})
+        elif is_cacheable is None or is_cacheable(model):
+            await self.fill_many({key: (token, model.model_dump_json(), expire)})
+        else:
+            await self.fill_many({key: (token, '', 0)})
+        return model
+
+    async def get_many(self: Self, keys: list[str]) -> list[str | None]:
+        """
+        Читаем ключи, для Redis одной командой MGET.
+        """
+        if isinstance(self.cache_repository, RedisCacheRepository):
+            return await self.cache_repository.redis.mget(keys)
+        return [await self.cache_repository.get(key) for key in keys]
+
+    async def claim_many(self: Self, keys: list[str]) -> dict[str, str]:
+        """
+        Записываем метки загрузки в отсутствующие ключи и возвращаем метки по ключам, которые удалось занять.
+
+        Для Redis метки записываются одним конвейером команд.
+        """
+        if not keys:
+            return {}
+        tokens = {key: f'{LOADING_PREFIX}{uuid.uuid4().hex}' for key in keys}
+        try:
+            if isinstance(self.cache_repository, RedisCacheRepository):
+                async with self.cache_repository.redis.pipeline(transaction=False) as pipeline:
+                    for key, token in tokens.items():
+                        pipeline.set(key, token, ex=LOADING_CACHE_TTL, nx=True)
+                    claimed = await pipeline.execute()
+                return {
+                    key: token for (key, token), is_claimed in zip(tokens.items(), claimed, strict=True) if is_claimed
+                }
+            for key, token in tokens.items():
+                await self.cache_repository.set(key, token, expire=LOADING_CACHE_TTL, nx=True)
+            return {key: token for key, token in tokens.items() if await self.cache_repository.get(key) == token}
+        except RedisError:
+            logger.warning('Metadata cache is unavailable, %s keys', len(keys), exc_info=True)
+            return {}
+
+    async def fill_many(self: Self, entries: Mapping[str, tuple[str, str, int]]) -> None:
+        """
+        Заменяем метки загрузки значениями со временем жизни, пустое значение удаляет метку.
+
+        Ключ, метку в котором удалила инвалидация или заменил другой запрос, не изменяется.
+        Для Redis проверка и запись выполняются атомарно одним скриптом.
+        """
+        if not entries:
+            return
+        try:
+            if self.fill_script is not None:
+                await self.fill_script(
+                    keys=list(entries),
+                    args=[arg for token, value, expire in entries.values() for arg in (token, value, expire)],
+                )
+                return
+            for key, (token, value, expire) in entries.items():
+                if await self.cache_repository.get(key) != token:
+                    continue
+                if value:
+                    await self.cache_repository.set(key, value, expire=expire)
+                else:
+                    await self.cache_repository.clear(key=key)
+        except RedisError:
+            logger.warning('Metadata cache is unavailable, %s keys', len(entries), exc_info=True)
+
+    async def clear_many(self: Self, keys: list[str]) -> None:
+        """
+        Удаляем ключи, для Redis одной командой.
+        """
+        if not keys:
+            return
+        try:
+            if isinstance(self.cache_repository, RedisCacheRepository):
+                await self.cache_repository.redis.delete(*keys)
+                return
+            for key in keys:
+                # Кеш в памяти не удаляет отсутствующий ключ, а завершается ошибкой.
+                if await self.cache_repository.get(key) is not None:
+                    await self.cache_repository.clear(key=key)
+        except RedisError:
+            logger.warning('Metadata cache is unavailable, keys %s', keys, exc_info=True)
+
+    def get_file_key(self: Self, file_id: uuid.UUID) -> str:
+        return f'{self.prefix}:files:{file_id}'
+
+    def get_replicas_key(self: Self, file_id: uuid.UUID) -> str:
+        return f'{self.prefix}:replicas:{file_id}'
+
+    def get_storage_key(self: Self, storage_id: uuid.UUID) -> str:
+        return f'{self.prefix}:storages:{storage_id}'
@@ -0,0 +1,88 @@
+import datetime as dt
+import uuid
+from collections.abc import Sequence
+from typing import Self
+
+import sqlalchemy as sa
+from fast_clean.repositories import DbCrudRepository
+from sqlalchemy.dialects import postgresql
+
+from ..models import OrphanObject, ReconciliationCheckpoint
+from ..schemas import (
+    OrphanObjectCreateSchema,
+    OrphanObjectReadSchema,
+    OrphanObjectUpdateSchema,
+    ReconciliationCheckpointCreateSchema,
+    ReconciliationCheckpointReadSchema,
+    ReconciliationCheckpointUpdateSchema,
+)
+
+
+class OrphanObjectDbRepository(
+    DbCrudRepository[OrphanObject, OrphanObjectReadSchema, OrphanObjectCreateSchema, OrphanObjectUpdateSchema]
+):
+    """
+    Репозиторий для работы с объектами в карантине.
+    """
+
+    async def quarantine(self: Self, create_objects: Sequence[OrphanObjectCreateSchema]) -> None:
+        """
+        Помещаем объекты в карантин, объекты, уже находящиеся в карантине, сохраняют время помещения.
+        """
+        if not create_objects:
+            return
+        async with self.session_manager.get_session() as s:
+            await s.execute(
+                postgresql.insert(OrphanObject)
+                .values([self.dump_create_object(create_object) for create_object in create_objects])
+                .on_conflict_do_nothing(index_elements=[OrphanObject.storage_id, OrphanObject.path])
+            )
+
+    async def get_expired(
+        self: Self, storage_id: uuid.UUID, created_before: dt.datetime, limit: int
+    ) -> list[OrphanObjectReadSchema]:
+        """
+        Получаем объекты хранилища, карантин которых закончился.
+        """
+        async with self.session_manager.get_session() as s:
+            statement = (
+                self.select()
+                .where(OrphanObject.storage_id == storage_id, OrphanObject.created_at < created_before)
+                .order_by(OrphanObject.created_at)
+                .limit(limit)
+            )
+            models = (await s.execute(statement)).scalars().all()
+            return [self.model_validate(model) for model in models]
+
+
+class ReconciliationCheckpointDbRepository(
+    DbCrudRepository[
+        ReconciliationCheckpoint,
+        ReconciliationCheckpointReadSchema,
+        ReconciliationCheckpointCreateSchema,
+        ReconciliationCheckpointUpdateSchema,
+    ]
+):
+    """
+    Репозиторий для работы с позициями сверки хранилищ.
+    """
+
+    async def get_by_storage(self: Self, storage_id: uuid.UUID) -> ReconciliationCheckpointReadSchema | None:
+        async with self.session_manager.get_session() as s:
+            statement = self.select().where(ReconciliationCheckpoint.storage_id == storage_id)
+            model = (await s.execute(statement)).scalar_one_or_none()
+            return self.model_validate(model) if model is not None else None
+
+    async def save(self: Self, storage_id: uuid.UUID, last_path: str | None) -> None:
+        """
+        Сохраняем позицию сверки хранилища.
+        """
+        async with self.session_manager.get_session() as s:
+            await s.execute(
+                postgresql.insert(ReconciliationCheckpoint)
+                .values(storage_id=storage_id, last_path=last_path)
+                .on_conflict_do_update(
+                    index_elements=[ReconciliationCheckpoint.storage_id],
+                    set_={'last_path': last_path, 'updated_at': sa.func.now()},
+                )
+            )
@@ -0,0 +1,219 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Self, cast
+
+from fast_clean.repositories.storage.reader import StreamReadProtocol
+
+READ_CHUNK_SIZE = 256 * 1024
+"""
+Размер порции при потоковом чтении файла из хранилища.
+"""
+UPLOAD_PART_SIZE = 8 * 1024 * 1024
+"""
+Размер части при загрузке файла, S3 требует не менее 5 МБ для всех частей, кроме последней.
+"""
+UPLOAD_MAX_PARTS = 10_000
+"""
+Максимальное количество частей в одной multipart загрузке S3.
+"""
+UPLOAD_MIN_PART_SIZE = 5 * 1024 * 1024
+"""
+Минимальный размер части загрузки частями, кроме последней.
+"""
+UPLOAD_MAX_PART_SIZE = 64 * 1024 * 1024
+"""
+Максимальный размер части загрузки частями.
+"""
+UPLOAD_CONCURRENCY = 2
+"""
+Количество частей одного файла, которые одновременно отправляются в хранилище.
+"""
+HASH_THREAD_MIN_SIZE = 1024 * 1024
+"""
+Порции от этого размера хешируются в отдельном потоке, чтобы не блокировать цикл событий.
+"""
+
+
+def get_part_size(size: int | None = None) -> int:
+    """
+    Подбираем размер части так, чтобы файл заявленного размера уложился в лимит частей.
+    """
+    if not size:
+        return UPLOAD_PART_SIZE
+    return max(UPLOAD_PART_SIZE, -(-size // UPLOAD_MAX_PARTS))
+
+
+async def read_chunk(stream: StreamReadProtocol, size: int) -> bytes:
+    """
+    Читаем из потока ровно size байт или меньше, если поток закончился.
+
+    Поток может вернуть меньше запрошенного (например, сокет), поэтому дочитываем до нужного размера.
+    """
+    is_co_function = asyncio.iscoroutinefunction(stream.read)
+
+    async def read(n: int) -> bytes:
+        if is_co_function:
+            return await cast(Callable[[int], Awaitable[bytes]], stream.read)(n)
+        return cast(Callable[[int], bytes], stream.read)(n)
+
+    chunk = await read(size)
+    if not chunk or len(chunk) >= size:
+        return chunk
+    buffer = bytearray(chunk)
+    while len(buffer) < size and (chunk := await read(size - len(buffer))):
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+class IteratorStreamReader:
+    """
+    Поток поверх асинхронного итератора порций, например чтения из другого хранилища.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes]) -> None:
+        self.chunks = chunks
+        self.buffer = b''
+
+    async def read(self: Self, size: int | None = -1) -> bytes:
+        size = -1 if size is None else size
+        while not self.buffer:
+            chunk = await anext(self.chunks, None)
+            if chunk is None:
+                return b''
+            self.buffer = chunk
+        if 0 <= size < len(self.buffer):
+            chunk, self.buffer = self.buffer[:size], self.buffer[size:]
+        else:
+            chunk, self.buffer = self.buffer, b''
+        return chunk
+
+
+class SizedStreamReader(IteratorStreamReader):
+    """
+    Поток поверх итератора порций, который должен содержать ровно size байт.
+
+    ValueError при чтении означает поток другого размера, лишние данные дальше не читаются.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], size: int) -> None:
+        super().__init__(chunks)
+        self.remaining = size
+        self.is_invalid = False
+
+    async def read(self: Self, size: int | None = -1) -> bytes:
+        chunk = await super().read(size)
+        self.remaining -= len(chunk)
+        if self.remaining < 0 or (not chunk and self.remaining > 0):
+            self.is_invalid = True
+            raise ValueError('Stream size does not match the expected size')
+        return chunk
+
+
+class TeeStreamReader:
+    """
+    Поток, который читается один раз и раздается нескольким читателям.
+
+    Буфер хранит данные от самого отстающего читателя до самого быстрого, и быстрый читатель
+    ждет, пока отставание не станет меньше window, поэтому память не зависит от размера файла.
+    Закрытый читатель больше не задерживает остальных.
+    """
+
+    def __init__(self, stream: StreamReadProtocol, count: int, *, window: int = UPLOAD_PART_SIZE) -> None:
+        self.stream = stream
+        self.window = window
+        self.buffer = bytearray()
+        self.start = 0
+        self.offsets = dict.fromkeys(range(count), 0)
+        self.finished = False
+        self.error: Exception | None = None
+        self.fill_task: asyncio.Task[None] | None = None
+        self.changed = asyncio.Event()
+        self.branches = [TeeBranchReader(self, index) for index in range(count)]
+
+    async def read_branch(self: Self, index: int, size: int) -> bytes:
+        while True:
+            if self.error is not None:
+                raise self.error
+            offset = self.offsets[index]
+            available = self.start + len(self.buffer) - offset
+            if available > 0:
+                size = available if size < 0 else min(size, available)
+                chunk = bytes(self.buffer[offset - self.start : offset - self.start + size])
+                self.offsets[index] = offset + size
+                self.trim()
+                return chunk
+            if self.finished:
+                return b''
+            if self.fill_task is None and offset - self.start < self.window:
+                # Источник читается отдельной задачей: отмена одного читателя не должна терять данные остальных.
+                self.fill_task = asyncio.ensure_future(self.fill())
+            if self.fill_task is not None:
+                await asyncio.shield(self.fill_task)
+            else:
+                await self.wait()
+
+    async def fill(self: Self) -> None:
+        try:
+            chunk = await read_chunk(self.stream, READ_CHUNK_SIZE)
+        except Exception as error:
+            self.error = error
+        else:
+            if chunk:
+                self.buffer.extend(chunk)
+            else:
+                self.finished = True
+        finally:
+            self.fill_task = None
+            self.notify()
+
+    def close_branch(self: Self, index: int) -> None:
+        if self.offsets.pop(index, None) is not None:
+            self.trim()
+
+    def trim(self: Self) -> None:
+        """
+        Удаляем из буфера данные, прочитанные всеми читателями.
+        """
+        end = self.start + len(self.buffer)
+        offset = min(self.offsets.values(), default=end)
+        if offset > self.start:
+            del self.buffer[: offset - self.start]
+            self.start = offset
+            self.notify()
+
+    async def wait(self: Self) -> None:
+        await self.changed.wait()
+
+    def notify(self: Self) -> None:
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    async def close(self: Self) -> None:
+        """
+        Прекращаем чтение источника, если все читатели завершились.
+        """
+        if self.fill_task is not None:
+            self.fill_task.cancel()
+            await asyncio.gather(self.fill_task, return_exceptions=True)
+
+
+class TeeBranchReader:
+    """
+    Читатель одной копии потока TeeStreamReader.
+    """
+
+    def __init__(self, tee: TeeStreamReader, index: int) -> None:
+        self.tee = tee
+        self.index = index
+
+    async def read(self: Self, size: int | None = -1) -> bytes:
+        size = -1 if size is None else size
+        if size < 0:
+            buffer = bytearray()
+            while chunk := await self.tee.read_branch(self.index, -1):
+                buffer.extend(chunk)
+            return bytes(buffer)
+        return await self.tee.read_branch(self.index, size)
+
+    def close(self: Self) -> None:
+        self.tee.close_branch(self.index)
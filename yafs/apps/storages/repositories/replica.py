@@ -0,0 +1,58 @@
+import uuid
+from collections.abc import Sequence
+from typing import Self
+
+import sqlalchemy as sa
+from fast_clean.repositories import DbCrudRepository
+
+from ..models import FileReplica
+from ..schemas import FileReplicaCreateSchema, FileReplicaReadSchema, FileReplicaUpdateSchema
+
+
+class FileReplicaDbRepository(
+    DbCrudRepository[FileReplica, FileReplicaReadSchema, FileReplicaCreateSchema, FileReplicaUpdateSchema]
+):
+    """
+    Репозиторий для работы с копиями файлов в других хранилищах.
+    """
+
+    async def get_by_files(self: Self, file_ids: Sequence[uuid.UUID]) -> list[FileReplicaReadSchema]:
+        """
+        Получаем копии файлов.
+        """
+        if not file_ids:
+            return []
+        async with self.session_manager.get_session() as s:
+            statement = self.select().where(FileReplica.file_id.in_(file_ids))
+            models = (await s.execute(statement)).scalars().all()
+            return [self.model_validate(model) for model in models]
+
+    async def delete_by_storage(self: Self, file_ids: Sequence[uuid.UUID], storage_id: uuid.UUID) -> None:
+        """
+        Удаляем записи о копиях файлов в хранилище, сами объекты остаются.
+        """
+        if not file_ids:
+            return
+        async with self.session_manager.get_session() as s:
+            await s.execute(
+                sa.delete(FileReplica)
+                .where(FileReplica.file_id.in_(file_ids), FileReplica.storage_id == storage_id)
+                .execution_options(synchronize_session=False)
+            )
+
+    async def delete_by_files(self: Self, file_ids: Sequence[uuid.UUID]) -> list[FileReplicaReadSchema]:
+        """
+        Удаляем записи о копиях файлов и возвращаем их, сами объекты остаются.
+        """
+        if not file_ids:
+            return []
+        async with self.session_manager.get_session() as s:
+            statement = (
+                sa.delete(FileReplica)
+                .where(FileReplica.file_id.in_(file_ids))
+                .returning(*FileReplica.__table__.columns.values())
+                .execution_options(synchronize_session=False)
+            )
+            return [
+                FileReplicaReadSchema.model_validate(replica) for replica in (await s.execute(statement)).mappings()
+            ]
@@ -0,0 +1,437 @@
+import asyncio
+import base64
+import tempfile
+from collections.abc import AsyncIterator, Sequence
+from pathlib import Path
+from typing import Any, Self
+from urllib.parse import quote
+
+import aiobotocore.session
+from aiobotocore.config import AioConfig
+from botocore.exceptions import BotoCoreError, ClientError
+from fast_clean.repositories.storage import S3StorageRepository
+from fast_clean.repositories.storage.reader import StreamReadProtocol
+
+from .concurrency import UPLOAD_COST_UNIT, ConcurrencyLimiter
+from .reader import READ_CHUNK_SIZE, UPLOAD_CONCURRENCY, UPLOAD_MAX_PARTS, UPLOAD_PART_SIZE, read_chunk
+from ..schemas import PresignedUrlSchema, StorageListObjectSchema, StorageObjectSchema
+
+S3_MAX_POOL_CONNECTIONS = 64
+"""
+Размер пула HTTP соединений клиента, который разделяется между всеми запросами к хранилищу.
+"""
+S3_NOT_FOUND_CODES = frozenset({'404', 'NoSuchKey', 'NotFound'})
+S3_PART_SPOOL_SIZE = 8 * 1024 * 1024
+"""
+Размер части загрузки, до которого она накапливается в памяти, большие части переносятся во временный файл.
+"""
+S3_DELETE_BATCH_SIZE = 1000
+"""
+Максимальное количество ключей в одном запросе DeleteObjects.
+"""
+S3_DELETE_CONCURRENCY = 4
+"""
+Количество одновременно выполняемых запросов DeleteObjects.
+"""
+S3_COPY_MAX_SIZE = 5 * 1024 * 1024 * 1024
+"""
+Максимальный размер объекта, который S3 копирует одним запросом CopyObject.
+"""
+S3_COPY_PART_SIZE = 512 * 1024 * 1024
+"""
+Размер части при копировании больших объектов запросами UploadPartCopy.
+"""
+S3_COPY_CONCURRENCY = 4
+"""
+Количество одновременно копируемых частей одного объекта.
+"""
+S3_NON_MD5_ENCRYPTION = frozenset({'aws:kms', 'aws:kms:dsse'})
+"""
+Шифрование на стороне сервера, при котором ETag объекта не является MD5 содержимого.
+"""
+S3_COPY_DENIED_CODES = frozenset({'AccessDenied'})
+"""
+Коды ошибок, при которых ключ доступа хранилища не может читать бакет источника.
+"""
+
+
+class S3FileStorageRepository(S3StorageRepository):
+    """
+    Репозиторий S3, дополненный потоковой multipart загрузкой.
+    """
+
+    async def __aenter__(self: Self) -> Self:
+        """
+        Создаем клиент с пулом соединений, рассчитанным на общее использование из пула репозиториев.
+        """
+        self.session = aiobotocore.session.get_session()
+        self.client = await self.session.create_client(
+            's3',
+            endpoint_url=self.endpoint_url,
+            aws_access_key_id=self.params.aws_access_key_id,
+            aws_secret_access_key=self.params.aws_secret_access_key,
+            region_name=self.params.region_name,
+            config=AioConfig(max_pool_connections=S3_MAX_POOL_CONNECTIONS, signature_version='s3v4'),
+        ).__aenter__()
+        return self
+
+    def get_local_path(self: Self, path: str | Path) -> Path | None:
+        """
+        Объекты S3 недоступны в локальной файловой системе.
+        """
+        return None
+
+    async def straming_read(self: Self, path: str | Path) -> AsyncIterator[bytes]:
+        """
+        Читаем файл порциями READ_CHUNK_SIZE вместо килобайтных порций по умолчанию.
+        """
+        async for chunk in self.read_object(self.get_str_path(path)):
+            yield chunk
+
+    async def stream_read_range(self: Self, path: str | Path, start: int, end: int) -> AsyncIterator[bytes]:
+        """
+        Читаем диапазон байт файла, end включительно.
+        """
+        async for chunk in self.read_object(self.get_str_path(path), Range=f'bytes={start}-{end}'):
+            yield chunk
+
+    async def read_object(self: Self, key: str, **kwargs: str) -> AsyncIterator[bytes]:
+        assert self.client
+        response = await self.client.get_object(Bucket=self.bucket, Key=key, **kwargs)  # type: ignore[arg-type]
+        async with response['Body'] as body:
+            async for chunk in body.iter_chunks(READ_CHUNK_SIZE):
+                yield chunk
+
+    async def multipart_write(
+        self: Self,
+        path: str | Path,
+        stream: StreamReadProtocol,
+        *,
+        limiter: ConcurrencyLimiter,
+        part_size: int = UPLOAD_PART_SIZE,
+        concurrency: int = UPLOAD_CONCURRENCY,
+    ) -> StorageObjectSchema:
+        """
+        Загружаем поток частями и возвращаем количество записанных байт и ETag объекта.
+
+        В памяти одновременно находится не больше concurrency + 1 частей, независимо от размера файла.
+        Файлы меньше одной части отправляются одним запросом.
+        """
+        assert self.client
+        key = self.get_str_path(path)
+        chunk = await read_chunk(stream, part_size)
+        if len(chunk) < part_size:
+            async with limiter.acquire(len(chunk) / UPLOAD_COST_UNIT):
+                response: dict[str, Any] = await self.client.put_object(Bucket=self.bucket, Key=key, Body=chunk)  # type: ignore[assignment]
+            return self.make_written_object(len(chunk), response)
+
+        async with limiter.acquire():
+            upload = await self.client.create_multipart_upload(Bucket=self.bucket, Key=key)
+        upload_id = upload['UploadId']
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks: list[asyncio.Task[dict[str, str | int]]] = []
+        size = 0
+        try:
+            async with asyncio.TaskGroup() as tg:
+                while chunk:
+                    await semaphore.acquire()
+                    tasks.append(
+                        tg.create_task(
+                            self.upload_part(
+                                key, upload_id, len(tasks) + 1, chunk, limiter=limiter, semaphore=semaphore
+                            )
+                        )
+                    )
+                    size += len(chunk)
+                    chunk = await read_chunk(stream, part_size)
+            async with limiter.acquire():
+                response = await self.client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={'Parts': [task.result() for task in tasks]},  # type: ignore[typeddict-item]
+                )
+        except BaseException:
+            await self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+        return self.make_written_object(size, response)
+
+    @staticmethod
+    def make_written_object(size: int, response: dict[str, Any]) -> StorageObjectSchema:
+        """
+        Собираем метаданные записанного объекта из ответа PutObject или CompleteMultipartUpload.
+        """
+        return StorageObjectSchema(
+            size=size,
+            etag=response.get('ETag', '').strip('"') or None,
+            etag_is_md5=response.get('ServerSideEncryption') not in S3_NON_MD5_ENCRYPTION
+            and 'SSECustomerAlgorithm' not in response,
+        )
+
+    async def copy_object(self: Self, path: str | Path, source: object, source_path: str | Path, *, size: int) -> bool:
+        """
+        Копируем объект на стороне S3 запросом CopyObject, а объекты больше S3_COPY_MAX_SIZE — частями UploadPartCopy.
+
+        Так можно скопировать только объект хранилища на том же сервере S3, бакет которого доступен ключу
+        этого хранилища, иначе возвращаем False.
+        """
+        if not isinstance(source, S3FileStorageRepository) or source.endpoint_url != self.endpoint_url:
+            return False
+        assert self.client
+        key = self.get_str_path(path)
+        copy_source = {'Bucket': source.bucket, 'Key': source.get_str_path(source_path)}
+        try:
+            if size <= S3_COPY_MAX_SIZE:
+                await self.client.copy_object(Bucket=self.bucket, Key=key, CopySource=copy_source)  # type: ignore[arg-type]
+            else:
+                await self.copy_multipart(key, copy_source, size)
+        except ClientError as error:
+            if error.response.get('Error', {}).get('Code') in S3_COPY_DENIED_CODES:
+                return False
+            raise
+        return True
+
+    async def copy_multipart(self: Self, key: str, copy_source: dict[str, str], size: int) -> None:
+        """
+        Копируем объект частями, не больше S3_COPY_CONCURRENCY частей одновременно.
+        """
+        assert self.client
+        client = self.client
+        part_size = max(S3_COPY_PART_SIZE, -(-size // UPLOAD_MAX_PARTS))
+        upload = await client.create_multipart_upload(Bucket=self.bucket, Key=key)
+        upload_id = upload['UploadId']
+        semaphore = asyncio.Semaphore(S3_COPY_CONCURRENCY)
+
+        async def copy_part(part_number: int, start: int) -> dict[str, str | int]:
+            async with semaphore:
+                response = await client.upload_part_copy(
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    CopySource=copy_source,  # type: ignore[arg-type]
+                    CopySourceRange=f'bytes={start}-{min(start + part_size, size) - 1}',
+                )
+            return {'ETag': response['CopyPartResult']['ETag'], 'PartNumber': part_number}
+
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [
+                    tg.create_task(copy_part(part_number, start))
+                    for part_number, start in enumerate(range(0, size, part_size), start=1)
+                ]
+            await client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': [task.result() for task in tasks]},  # type: ignore[typeddict-item]
+            )
+        except BaseException:
+            await client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
+    async def multipart_create(self: Self, path: str | Path) -> str:
+        assert self.client
+        upload = await self.client.create_multipart_upload(Bucket=self.bucket, Key=self.get_str_path(path))
+        return upload['UploadId']
+
+    async def multipart_write_part(
+        self: Self,
+        path: str | Path,
+        upload_id: str,
+        part_number: int,
+        stream: StreamReadProtocol,
+        *,
+        limiter: ConcurrencyLimiter,
+    ) -> str:
+        """
+        Накапливаем часть во временном файле и отправляем ее одним запросом UploadPart.
+
+        S3 требует заранее известной длины тела, а в памяти остается не больше S3_PART_SPOOL_SIZE байт части.
+        """
+        assert self.client
+        with tempfile.SpooledTemporaryFile(max_size=S3_PART_SPOOL_SIZE) as spool:
+            size = 0
+            while chunk := await read_chunk(stream, READ_CHUNK_SIZE):
+                if spool.tell() + len(chunk) > S3_PART_SPOOL_SIZE:
+                    await asyncio.to_thread(spool.write, chunk)
+                else:
+                    spool.write(chunk)
+                size += len(chunk)
+            spool.seek(0)
+            async with limiter.acquire(size / UPLOAD_COST_UNIT):
+                response = await self.client.upload_part(
+                    Bucket=self.bucket,
+                    Key=self.get_str_path(path),
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=spool,
+                    ContentLength=size,
+                )
+        return response['ETag']
+
+    async def multipart_complete(
+        self: Self, path: str | Path, upload_id: str, parts: Sequence[tuple[int, str]]
+    ) -> None:
+        assert self.client
+        await self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.get_str_path(path),
+            UploadId=upload_id,
+            MultipartUpload={'Parts': [{'ETag': etag, 'PartNumber': part_number} for part_number, etag in parts]},
+        )
+
+    async def multipart_abort(self: Self, path: str | Path, upload_id: str) -> None:
+        """
+        Прерываем загрузку, уже завершенная или прерванная загрузка ошибкой не считается.
+        """
+        assert self.client
+        try:
+            await self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.get_str_path(path), UploadId=upload_id
+            )
+        except ClientError as error:
+            if error.response.get('Error', {}).get('Code') != 'NoSuchUpload':
+                raise
+
+    async def delete_many(self: Self, paths: Sequence[str | Path]) -> dict[str, str]:
+        """
+        Удаляем объекты запросами DeleteObjects по S3_DELETE_BATCH_SIZE ключей.
+
+        Возвращаем ошибки по исходным путям, в том числе для пакетов, запрос которых не удался целиком.
+        """
+        keys = {self.get_str_path(path): str(path) for path in paths}
+        batches = [list(keys)[i : i + S3_DELETE_BATCH_SIZE] for i in range(0, len(keys), S3_DELETE_BATCH_SIZE)]
+        semaphore = asyncio.Semaphore(S3_DELETE_CONCURRENCY)
+        errors: dict[str, str] = {}
+        for batch_errors in await asyncio.gather(*[self.delete_batch(batch, semaphore=semaphore) for batch in batches]):
+            errors.update({keys[key]: message for key, message in batch_errors.items()})
+        return errors
+
+    async def delete_batch(self: Self, keys: list[str], *, semaphore: asyncio.Semaphore) -> dict[str, str]:
+        assert self.client
+        async with semaphore:
+            try:
+                response = await self.client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True},
+                )
+            except (BotoCoreError, ClientError) as error:
+                return dict.fromkeys(keys, str(error))
+        return {
+            error['Key']: f'{error.get("Code", "")}: {error.get("Message", "")}'
+            for error in response.get('Errors', [])
+            if 'Key' in error
+        }
+
+    async def presign_write(
+        self: Self,
+        path: str | Path,
+        *,
+        expires_in: int,
+        size: int | None = None,
+        content_type: str | None = None,
+        sha256: str | None = None,
+    ) -> PresignedUrlSchema:
+        """
+        Подписываем ссылку на загрузку объекта одним запросом PUT.
+
+        Размер, тип и SHA-256 входят в подпись, поэтому хранилище отклонит загрузку с другими значениями.
+        """
+        assert self.client
+        params: dict[str, Any] = {'Bucket': self.bucket, 'Key': self.get_str_path(path)}
+        headers: dict[str, str] = {}
+        if size is not None:
+            params['ContentLength'] = size
+            headers['Content-Length'] = str(size)
+        if content_type is not None:
+            params['ContentType'] = content_type
+            headers['Content-Type'] = content_type
+        if sha256 is not None:
+            checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+            params['ChecksumSHA256'] = checksum
+            headers['x-amz-checksum-sha256'] = checksum
+        url = await self.client.generate_presigned_url('put_object', Params=params, ExpiresIn=expires_in)
+        return PresignedUrlSchema(url=url, headers=headers)
+
+    async def presign_read(
+        self: Self,
+        path: str | Path,
+        *,
+        expires_in: int,
+        filename: str | None = None,
+        content_type: str | None = None,
+        content_encoding: str | None = None,
+    ) -> str:
+        """
+        Подписываем ссылку на скачивание объекта, имя, тип и кодировку файла хранилище подставит в ответ.
+        """
+        assert self.client
+        params: dict[str, Any] = {'Bucket': self.bucket, 'Key': self.get_str_path(path)}
+        if filename is not None:
+            params['ResponseContentDisposition'] = f"attachment; filename*=UTF-8''{quote(filename)}"
+        if content_type is not None:
+            params['ResponseContentType'] = content_type
+        if content_encoding is not None:
+            params['ResponseContentEncoding'] = content_encoding
+        return await self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=expires_in)
+
+    async def head(self: Self, path: str | Path) -> StorageObjectSchema | None:
+        """
+        Получаем размер, ETag и SHA-256 объекта, если он был загружен с контрольной суммой.
+        """
+        assert self.client
+        try:
+            response = await self.client.head_object(
+                Bucket=self.bucket, Key=self.get_str_path(path), ChecksumMode='ENABLED'
+            )
+        except ClientError as error:
+            if error.response.get('Error', {}).get('Code') in S3_NOT_FOUND_CODES:
+                return None
+            raise
+        checksum = response.get('ChecksumSHA256')
+        return StorageObjectSchema(
+            size=response['ContentLength'],
+            etag=response.get('ETag', '').strip('"') or None,
+            # Составные контрольные суммы multipart загрузок вида <base64>-<parts> не являются SHA-256 объекта.
+            sha256=base64.b64decode(checksum).hex() if checksum and '-' not in checksum else None,
+        )
+
+    async def list_objects(
+        self: Self, prefix: str | Path, *, start_after: str | None = None, limit: int
+    ) -> list[StorageListObjectSchema]:
+        """
+        Получаем страницу списка объектов, S3 отдает ключи в порядке байт UTF-8.
+        """
+        assert self.client
+        params: dict[str, Any] = {'Bucket': self.bucket, 'Prefix': self.get_str_path(prefix), 'MaxKeys': limit}
+        if start_after is not None:
+            params['StartAfter'] = start_after
+        response = await self.client.list_objects_v2(**params)
+        return [
+            StorageListObjectSchema(path=item['Key'], size=item['Size'], modified_at=item['LastModified'])
+            for item in response.get('Contents', [])
+        ]
+
+    async def upload_part(
+        self: Self,
+        key: str,
+        upload_id: str,
+        part_number: int,
+        chunk: bytes,
+        *,
+        limiter: ConcurrencyLimiter,
+        semaphore: asyncio.Semaphore,
+    ) -> dict[str, str | int]:
+        """
+        Отправляем часть multipart загрузки и освобождаем слот под следующую.
+        """
+        assert self.client
+        try:
+            async with limiter.acquire(len(chunk) / UPLOAD_COST_UNIT):
+                response = await self.client.upload_part(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=chunk
+                )
+            return {'ETag': response['ETag'], 'PartNumber': part_number}
+        finally:
+            semaphore.release()
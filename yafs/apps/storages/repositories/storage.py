@@ -19,6 +19,17 @@ class StorageDbRepository(DbCrudRepository[Storage, StorageReadSchema, StorageCr
         async with self.session_manager.get_session() as s:
             statement = self.select()
             if is_active is not None:
-                statement.where(self.model_type.is_active == is_active)
+                statement = statement.where(self.model_type.is_active == is_active)
+            models = (await s.execute(statement)).scalars()
+            return [self.model_validate(model) for model in models]
+
+    async def get_tiered(self: Self) -> list[StorageReadSchema]:
+        """
+        Выбираем активные хранилища, из которых давно не читавшиеся файлы переносятся в другие.
+        """
+        async with self.session_manager.get_session() as s:
+            statement = self.select().where(
+                self.model_type.is_active.is_(True), self.model_type.tier_storage_id.is_not(None)
+            )
             models = (await s.execute(statement)).scalars()
             return [self.model_validate(model) for model in models]
@@ -0,0 +1,84 @@
+import datetime as dt
+import uuid
+from typing import Self
+
+import sqlalchemy as sa
+from fast_clean.repositories import DbCrudRepository
+from sqlalchemy.dialects import postgresql
+
+from ..models import UploadPart, UploadSession
+from ..schemas import (
+    UploadPartCreateSchema,
+    UploadPartReadSchema,
+    UploadPartUpdateSchema,
+    UploadSessionCreateSchema,
+    UploadSessionReadSchema,
+    UploadSessionUpdateSchema,
+)
+
+
+class UploadSessionDbRepository(
+    DbCrudRepository[UploadSession, UploadSessionReadSchema, UploadSessionCreateSchema, UploadSessionUpdateSchema]
+):
+    """
+    Репозиторий для работы с загрузками частями.
+    """
+
+    async def touch(self: Self, session_id: uuid.UUID) -> None:
+        """
+        Отмечаем активность загрузки, чтобы она не была прервана как брошенная.
+        """
+        async with self.session_manager.get_session() as s:
+            await s.execute(
+                sa.update(UploadSession)
+                .where(UploadSession.id == session_id)
+                .values(updated_at=sa.func.now())
+                .execution_options(synchronize_session=False)
+            )
+
+    async def get_stale(self: Self, updated_before: dt.datetime, limit: int) -> list[UploadSessionReadSchema]:
+        """
+        Получаем загрузки без активности дольше допустимого.
+        """
+        async with self.session_manager.get_session() as s:
+            statement = (
+                self.select()
+                .where(UploadSession.updated_at < updated_before)
+                .order_by(UploadSession.updated_at)
+                .limit(limit)
+            )
+            models = (await s.execute(statement)).scalars().all()
+            return [self.model_validate(model) for model in models]
+
+
+class UploadPartDbRepository(
+    DbCrudRepository[UploadPart, UploadPartReadSchema, UploadPartCreateSchema, UploadPartUpdateSchema]
+):
+    """
+    Репозиторий для работы с записанными частями загрузок.
+    """
+
+    async def save(self: Self, create_object: UploadPartCreateSchema) -> UploadPartReadSchema:
+        """
+        Сохраняем часть, повторная загрузка части заменяет предыдущую, как и в хранилище.
+        """
+        async with self.session_manager.get_session() as s:
+            statement = (
+                postgresql.insert(UploadPart)
+                .values(self.dump_create_object(create_object))
+                .on_conflict_do_update(
+                    index_elements=[UploadPart.session_id, UploadPart.part_number],
+                    set_={'size': create_object.size, 'etag': create_object.etag, 'updated_at': sa.func.now()},
+                )
+                .returning(*UploadPart.__table__.columns.values())
+            )
+            return UploadPartReadSchema.model_validate((await s.execute(statement)).mappings().one())
+
+    async def get_by_session(self: Self, session_id: uuid.UUID) -> list[UploadPartReadSchema]:
+        """
+        Получаем записанные части загрузки по порядку номеров.
+        """
+        async with self.session_manager.get_session() as s:
+            statement = self.select().where(UploadPart.session_id == session_id).order_by(UploadPart.part_number)
+            models = (await s.execute(statement)).scalars().all()
+            return [self.model_validate(model) for model in models]
@@ -0,0 +1,201 @@
+"""
+HTTP ответы для отдачи файлов.
+"""
+
+import json
+import uuid
+from collections.abc import AsyncIterator
+
+from fastapi import status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from .enums import ArchiveFormatEnum
+from .inspection import DEFAULT_CONTENT_TYPE
+from .ranges import format_http_date
+from .schemas import FileListCursorSchema, FileLookupItemSchema, FileReadSchema, FileStreamSchema
+
+LIST_FLUSH_SIZE = 64 * 1024
+"""
+Размер буфера, после заполнения которого часть списка файлов отправляется клиенту.
+"""
+
+
+def get_cache_headers(file_stream: FileStreamSchema) -> dict[str, str]:
+    """
+    Получаем заголовки проверки актуальности и кеширования, общие для всех ответов с файлом.
+    """
+    headers = {'Last-Modified': format_http_date(file_stream.file.created_at)}
+    if file_stream.etag is not None:
+        headers['ETag'] = file_stream.etag
+    if file_stream.cache_control is not None:
+        headers['Cache-Control'] = file_stream.cache_control
+    if file_stream.file.encoding is not None:
+        headers['Vary'] = 'Accept-Encoding'
+    return headers
+
+
+class FileNotModifiedResponse(Response):
+    """
+    Ответ 304 на условный запрос: копия клиента актуальна, содержимое не передается.
+    """
+
+    def __init__(self, file_stream: FileStreamSchema) -> None:
+        super().__init__(status_code=status.HTTP_304_NOT_MODIFIED, headers=get_cache_headers(file_stream))
+
+
+class FileStreamingResponse(StreamingResponse):
+    """
+    Потоковый ответ с файлом целиком, одним диапазоном или набором диапазонов multipart/byteranges.
+    """
+
+    def __init__(self, file_stream: FileStreamSchema) -> None:
+        file = file_stream.file
+        content_type = file.content_type or DEFAULT_CONTENT_TYPE
+        headers = {'Accept-Ranges': 'bytes', **get_cache_headers(file_stream)}
+        match file_stream.ranges:
+            case [] if file_stream.content_encoding is not None:
+                headers['Content-Encoding'] = file_stream.content_encoding.value
+                headers['Content-Length'] = str(file.stored_size)
+                super().__init__(file_stream.parts[0], headers=headers, media_type=content_type)
+            case []:
+                headers['Content-Length'] = str(file.size)
+                super().__init__(file_stream.parts[0], headers=headers, media_type=content_type)
+            case [byte_range]:
+                headers['Content-Range'] = byte_range.get_content_range(file.size)
+                headers['Content-Length'] = str(byte_range.length)
+                super().__init__(
+                    file_stream.parts[0],
+                    status_code=status.HTTP_206_PARTIAL_CONTENT,
+                    headers=headers,
+                    media_type=content_type,
+                )
+            case _:
+                boundary = uuid.uuid4().hex
+                part_headers = [
+                    (
+                        ('\r\n' if i else '')
+                        + f'--{boundary}\r\n'
+                        + f'Content-Type: {content_type}\r\n'
+                        + f'Content-Range: {byte_range.get_content_range(file.size)}\r\n\r\n'
+                    ).encode()
+                    for i, byte_range in enumerate(file_stream.ranges)
+                ]
+                closing = f'\r\n--{boundary}--\r\n'.encode()
+                headers['Content-Length'] = str(
+                    sum(map(len, part_headers)) + sum(r.length for r in file_stream.ranges) + len(closing)
+                )
+                super().__init__(
+                    self.iter_multipart(part_headers, file_stream.parts, closing),
+                    status_code=status.HTTP_206_PARTIAL_CONTENT,
+                    headers=headers,
+                    media_type=f'multipart/byteranges; boundary={boundary}',
+                )
+
+    @staticmethod
+    async def iter_multipart(
+        part_headers: list[bytes], parts: list[AsyncIterator[bytes]], closing: bytes
+    ) -> AsyncIterator[bytes]:
+        """
+        Последовательно отдаем диапазоны, каждый со своими заголовками.
+        """
+        for part_header, part in zip(part_headers, parts, strict=True):
+            yield part_header
+            async for chunk in part:
+                yield chunk
+        yield closing
+
+
+class FileLocalResponse(FileResponse):
+    """
+    Ответ с файлом локального хранилища.
+
+    Диапазоны и If-Range по переданному ETag обрабатывает FileResponse, а файл целиком сервер с поддержкой
+    http.response.pathsend (например, granian) отдает с диска без копирования через приложение.
+    """
+
+    def __init__(self, file_stream: FileStreamSchema) -> None:
+        assert file_stream.local_path is not None
+        file = file_stream.file
+        super().__init__(
+            file_stream.local_path,
+            headers=get_cache_headers(file_stream),
+            media_type=file.content_type or DEFAULT_CONTENT_TYPE,
+        )
+
+
+class FileListStreamingResponse(StreamingResponse):
+    """
+    Потоковый ответ со страницей списка файлов в формате FileListResponseSchema.
+
+    Файлы сериализуются по мере чтения из базы, поэтому память не зависит от размера страницы,
+    а курсор следующей страницы дописывается в конце ответа.
+    """
+
+    def __init__(self, files: AsyncIterator[FileReadSchema], limit: int) -> None:
+        super().__init__(self.iter_json(files, limit), media_type='application/json')
+
+    @staticmethod
+    async def iter_json(files: AsyncIterator[FileReadSchema], limit: int) -> AsyncIterator[bytes]:
+        buffer = bytearray(b'{"items":[')
+        count = 0
+        last_file: FileReadSchema | None = None
+        async for file in files:
+            if count:
+                buffer.extend(b',')
+            buffer.extend(file.model_dump_json(by_alias=True).encode())
+            count += 1
+            last_file = file
+            if len(buffer) >= LIST_FLUSH_SIZE:
+                yield bytes(buffer)
+                buffer.clear()
+        next_cursor = (
+            FileListCursorSchema(created_at=last_file.created_at, id=last_file.id).encode()
+            if last_file is not None and count == limit
+            else None
+        )
+        buffer.extend(b'],"nextCursor":' + json.dumps(next_cursor).encode() + b'}')
+        yield bytes(buffer)
+
+
+class FileLookupStreamingResponse(StreamingResponse):
+    """
+    Потоковый ответ с метаданными файлов в формате FileLookupResponseSchema.
+
+    Записи сериализуются частями по LIST_FLUSH_SIZE, а не одной строкой на весь ответ.
+    """
+
+    def __init__(self, items: list[FileLookupItemSchema]) -> None:
+        super().__init__(self.iter_json(items), media_type='application/json')
+
+    @staticmethod
+    async def iter_json(items: list[FileLookupItemSchema]) -> AsyncIterator[bytes]:
+        buffer = bytearray(b'{"items":[')
+        for index, item in enumerate(items):
+            if index:
+                buffer.extend(b',')
+            buffer.extend(item.model_dump_json(by_alias=True).encode())
+            if len(buffer) >= LIST_FLUSH_SIZE:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer.extend(b']}')
+        yield bytes(buffer)
+
+
+class FileArchiveStreamingResponse(StreamingResponse):
+    """
+    Потоковый ответ с архивом файлов, размер архива заранее неизвестен.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], archive_format: ArchiveFormatEnum, compress: bool) -> None:
+        match archive_format, compress:
+            case ArchiveFormatEnum.ZIP, _:
+                filename, media_type = 'files.zip', 'application/zip'
+            case ArchiveFormatEnum.TAR, False:
+                filename, media_type = 'files.tar', 'application/x-tar'
+            case _:
+                filename, media_type = 'files.tar.gz', 'application/gzip'
+        super().__init__(
+            chunks,
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+            media_type=media_type,
+        )
@@ -3,11 +3,67 @@ from typing import Annotated
 
 from dishka import FromDishka
 from dishka.integrations.fastapi import inject
-from fastapi import APIRouter, Path, Query, UploadFile, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Body, Header, Path, Query, Request, Response, UploadFile, status
 
-from .schemas import FileReadSchema, StorageCreateRequestSchema, StorageResponseSchema
-from .use_cases import AddStorageUseCase, DeleteFilesUseCase, FileInfoUseCase, ReadFileUseCase, UploadFilesUseCase
+from .enums import FileStatusEnum
+from .exceptions import FileNotFoundError
+from .responses import (
+    FileArchiveStreamingResponse,
+    FileListStreamingResponse,
+    FileLocalResponse,
+    FileLookupStreamingResponse,
+    FileNotModifiedResponse,
+    FileStreamingResponse,
+)
+from .schemas import (
+    FileArchiveRequestSchema,
+    FileCopyBatchRequestSchema,
+    FileCopyRequestSchema,
+    FileCopySchema,
+    FileDeleteRequestSchema,
+    FileDeleteResponseSchema,
+    FileListFilterSchema,
+    FileListResponseSchema,
+    FileLookupRequestSchema,
+    FileLookupResponseSchema,
+    FileMoveBatchRequestSchema,
+    FileMoveRequestSchema,
+    FileMoveSchema,
+    FilePresignedDownloadResponseSchema,
+    FilePresignedUploadRequestSchema,
+    FilePresignedUploadResponseSchema,
+    FileReadSchema,
+    StorageCreateRequestSchema,
+    StorageResponseSchema,
+    StorageUpdateRequestSchema,
+    UploadPartResponseSchema,
+    UploadSessionCreateRequestSchema,
+    UploadSessionResponseSchema,
+)
+from .use_cases import (
+    AbortUploadSessionUseCase,
+    AddStorageUseCase,
+    ArchiveFilesUseCase,
+    CompleteUploadSessionUseCase,
+    CompleteUploadUseCase,
+    CopyFilesUseCase,
+    CreateUploadSessionUseCase,
+    DeleteFilesUseCase,
+    FileInfoUseCase,
+    ListFilesUseCase,
+    LookupFilesUseCase,
+    MoveFilesUseCase,
+    PresignedDownloadUseCase,
+    PresignedUploadUseCase,
+    ReadFileUseCase,
+    UpdateStorageUseCase,
+    UploadFilesUseCase,
+    UploadPartUseCase,
+    UploadSessionInfoUseCase,
+)
+
+LIST_DEFAULT_LIMIT = 1000
+LIST_MAX_LIMIT = 100_000
 
 router = APIRouter(prefix='/storage', tags=['Storages'])
 
@@ -21,6 +77,16 @@ async def add_storage(
     return await add_storage_use_case(storage_schema)
 
 
+@router.patch('/{storageId}')
+@inject
+async def update_storage(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    storage_schema: StorageUpdateRequestSchema,
+    update_storage_use_case: FromDishka[UpdateStorageUseCase],
+) -> StorageResponseSchema:
+    return await update_storage_use_case(storage_id, storage_schema)
+
+
 @router.post('/{storageId}/files', status_code=status.HTTP_201_CREATED)
 @inject
 async def upload_file(
@@ -31,6 +97,218 @@ async def upload_file(
     return await upload_files_use_case(storage_id, files)
 
 
+@router.get('/{storageId}/files', response_model=FileListResponseSchema)
+@inject
+async def list_files(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    list_files_use_case: FromDishka[ListFilesUseCase],
+    cursor: Annotated[str | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=LIST_MAX_LIMIT)] = LIST_DEFAULT_LIMIT,
+    content_type: Annotated[str | None, Query(alias='contentType')] = None,
+    min_size: Annotated[int | None, Query(alias='minSize', ge=0)] = None,
+    max_size: Annotated[int | None, Query(alias='maxSize', ge=0)] = None,
+    file_status: Annotated[FileStatusEnum | None, Query(alias='status')] = None,
+) -> Response:
+    """
+    Получаем файлы хранилища в порядке создания, следующая страница запрашивается по nextCursor.
+    """
+    files = await list_files_use_case(
+        storage_id,
+        FileListFilterSchema(content_type=content_type, min_size=min_size, max_size=max_size, status=file_status),
+        cursor,
+        limit,
+    )
+    return FileListStreamingResponse(files, limit)
+
+
+@router.post('/{storageId}/files/lookup', response_model=FileLookupResponseSchema)
+@inject
+async def lookup_files(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    lookup_request: FileLookupRequestSchema,
+    lookup_files_use_case: FromDishka[LookupFilesUseCase],
+) -> Response:
+    """
+    Получаем метаданные нескольких файлов в порядке запроса, для отсутствующего файла поле file пустое.
+    """
+    return FileLookupStreamingResponse(await lookup_files_use_case(storage_id, lookup_request.file_ids))
+
+
+@router.post('/{storageId}/files/archive')
+@inject
+async def download_archive(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    archive_request: FileArchiveRequestSchema,
+    archive_files_use_case: FromDishka[ArchiveFilesUseCase],
+) -> Response:
+    """
+    Скачиваем несколько файлов одним ZIP или TAR архивом, который собирается по мере отдачи.
+    """
+    chunks = await archive_files_use_case(storage_id, archive_request)
+    return FileArchiveStreamingResponse(chunks, archive_request.format, archive_request.compress)
+
+
+@router.post('/{storageId}/files/copy', status_code=status.HTTP_201_CREATED)
+@inject
+async def copy_files(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    copy_request: FileCopyBatchRequestSchema,
+    copy_files_use_case: FromDishka[CopyFilesUseCase],
+) -> list[FileReadSchema]:
+    """
+    Копируем несколько файлов, в том числе в другие хранилища, копии возвращаются в порядке запроса.
+    """
+    return await copy_files_use_case(
+        storage_id,
+        [
+            FileCopySchema(file_id=item.file_id, storage_id=item.storage_id, name=item.name)
+            for item in copy_request.files
+        ],
+    )
+
+
+@router.post('/{storageId}/files/move')
+@inject
+async def move_files(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    move_request: FileMoveBatchRequestSchema,
+    move_files_use_case: FromDishka[MoveFilesUseCase],
+) -> list[FileReadSchema]:
+    """
+    Переносим несколько файлов в другие хранилища, идентификаторы файлов не меняются.
+    """
+    return await move_files_use_case(
+        storage_id, [FileMoveSchema(file_id=item.file_id, storage_id=item.storage_id) for item in move_request.files]
+    )
+
+
+@router.post('/{storageId}/files/presigned', status_code=status.HTTP_201_CREATED)
+@inject
+async def create_presigned_upload(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    upload_request: FilePresignedUploadRequestSchema,
+    presigned_upload_use_case: FromDishka[PresignedUploadUseCase],
+) -> FilePresignedUploadResponseSchema:
+    """
+    Создаем файл и выдаем ссылку на загрузку содержимого напрямую в хранилище.
+    """
+    return await presigned_upload_use_case(storage_id, upload_request)
+
+
+@router.post('/{storageId}/files/{fileId}/complete')
+@inject
+async def complete_upload(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    file_id: Annotated[uuid.UUID, Path(alias='fileId')],
+    complete_upload_use_case: FromDishka[CompleteUploadUseCase],
+) -> FileReadSchema:
+    """
+    Завершаем загрузку напрямую в хранилище после успешного запроса по выданной ссылке.
+    """
+    return await complete_upload_use_case(file_id)
+
+
+@router.post('/{storageId}/files/{fileId}/copy', status_code=status.HTTP_201_CREATED)
+@inject
+async def copy_file(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    file_id: Annotated[uuid.UUID, Path(alias='fileId')],
+    copy_request: FileCopyRequestSchema,
+    copy_files_use_case: FromDishka[CopyFilesUseCase],
+) -> FileReadSchema:
+    """
+    Копируем файл в это или другое хранилище на стороне хранилища, если это возможно.
+    """
+    files = await copy_files_use_case(
+        storage_id, [FileCopySchema(file_id=file_id, storage_id=copy_request.storage_id, name=copy_request.name)]
+    )
+    return files[0]
+
+
+@router.post('/{storageId}/files/{fileId}/move')
+@inject
+async def move_file(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    file_id: Annotated[uuid.UUID, Path(alias='fileId')],
+    move_request: FileMoveRequestSchema,
+    move_files_use_case: FromDishka[MoveFilesUseCase],
+) -> FileReadSchema:
+    """
+    Переносим файл в другое хранилище, ссылки на файл продолжают работать.
+    """
+    files = await move_files_use_case(storage_id, [FileMoveSchema(file_id=file_id, storage_id=move_request.storage_id)])
+    if not files:
+        raise FileNotFoundError(file_id)
+    return files[0]
+
+
+@router.post('/{storageId}/uploads', status_code=status.HTTP_201_CREATED)
+@inject
+async def create_upload_session(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    upload_request: UploadSessionCreateRequestSchema,
+    create_upload_session_use_case: FromDishka[CreateUploadSessionUseCase],
+) -> UploadSessionResponseSchema:
+    """
+    Начинаем загрузку файла частями, размер части и их количество возвращаются в ответе.
+    """
+    return await create_upload_session_use_case(storage_id, upload_request)
+
+
+@router.get('/{storageId}/uploads/{uploadId}')
+@inject
+async def get_upload_session(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    upload_id: Annotated[uuid.UUID, Path(alias='uploadId')],
+    upload_session_info_use_case: FromDishka[UploadSessionInfoUseCase],
+) -> UploadSessionResponseSchema:
+    """
+    Получаем записанные части, чтобы продолжить прерванную загрузку.
+    """
+    return await upload_session_info_use_case(storage_id, upload_id)
+
+
+@router.put('/{storageId}/uploads/{uploadId}/parts/{partNumber}')
+@inject
+async def upload_part(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    upload_id: Annotated[uuid.UUID, Path(alias='uploadId')],
+    part_number: Annotated[int, Path(alias='partNumber', ge=1)],
+    request: Request,
+    upload_part_use_case: FromDishka[UploadPartUseCase],
+) -> UploadPartResponseSchema:
+    """
+    Записываем часть, содержимое передается телом запроса, части можно отправлять параллельно и повторно.
+    """
+    return await upload_part_use_case(storage_id, upload_id, part_number, request.stream())
+
+
+@router.post('/{storageId}/uploads/{uploadId}/complete')
+@inject
+async def complete_upload_session(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    upload_id: Annotated[uuid.UUID, Path(alias='uploadId')],
+    complete_upload_session_use_case: FromDishka[CompleteUploadSessionUseCase],
+) -> FileReadSchema:
+    """
+    Собираем файл из записанных частей.
+    """
+    return await complete_upload_session_use_case(storage_id, upload_id)
+
+
+@router.delete('/{storageId}/uploads/{uploadId}', status_code=status.HTTP_204_NO_CONTENT)
+@inject
+async def abort_upload_session(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    upload_id: Annotated[uuid.UUID, Path(alias='uploadId')],
+    abort_upload_session_use_case: FromDishka[AbortUploadSessionUseCase],
+) -> None:
+    """
+    Прерываем загрузку и удаляем записанные части.
+    """
+    await abort_upload_session_use_case(storage_id, upload_id)
+
+
 @router.get('/{storageId}/files/{fileId}')
 @inject
 async def get_file_info(
@@ -47,15 +325,57 @@ async def get_file_streaming_response(
     storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
     file_id: Annotated[uuid.UUID, Path(alias='fileId')],
     read_file_use_case: FromDishka[ReadFileUseCase],
-) -> StreamingResponse:
-    return StreamingResponse(await read_file_use_case(file_id))
+    range_header: Annotated[str | None, Header(alias='Range')] = None,
+    if_range: Annotated[str | None, Header(alias='If-Range')] = None,
+    accept_encoding: Annotated[str | None, Header(alias='Accept-Encoding')] = None,
+    if_none_match: Annotated[str | None, Header(alias='If-None-Match')] = None,
+    if_modified_since: Annotated[str | None, Header(alias='If-Modified-Since')] = None,
+) -> Response:
+    """
+    Скачиваем файл целиком или диапазонами.
+
+    Ответ содержит ETag и Last-Modified, а на условный запрос с актуальной копией отвечаем 304 без чтения хранилища.
+    """
+    file_stream = await read_file_use_case(
+        storage_id,
+        file_id,
+        range_header=range_header,
+        if_range=if_range,
+        accept_encoding=accept_encoding,
+        if_none_match=if_none_match,
+        if_modified_since=if_modified_since,
+    )
+    if file_stream.not_modified:
+        return FileNotModifiedResponse(file_stream)
+    if file_stream.local_path is not None:
+        return FileLocalResponse(file_stream)
+    return FileStreamingResponse(file_stream)
 
 
-@router.delete('/{storageId}/files', status_code=status.HTTP_204_NO_CONTENT)
+@router.get('/{storageId}/files/{fileId}/presigned')
+@inject
+async def get_presigned_download(
+    storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
+    file_id: Annotated[uuid.UUID, Path(alias='fileId')],
+    presigned_download_use_case: FromDishka[PresignedDownloadUseCase],
+) -> FilePresignedDownloadResponseSchema:
+    """
+    Выдаем ссылку на скачивание файла напрямую из хранилища.
+    """
+    return await presigned_download_use_case(file_id)
+
+
+@router.delete('/{storageId}/files')
 @inject
 async def delete_file(
     storage_id: Annotated[uuid.UUID, Path(alias='storageId')],
-    file_ids: Annotated[list[uuid.UUID], Query(alias='fileIds')],
     delete_files_use_case: FromDishka[DeleteFilesUseCase],
-) -> None:
-    await delete_files_use_case(file_ids)
+    file_ids: Annotated[list[uuid.UUID] | None, Query(alias='fileIds')] = None,
+    delete_request: Annotated[FileDeleteRequestSchema | None, Body()] = None,
+) -> FileDeleteResponseSchema:
+    """
+    Удаляем файлы, идентификаторы передаются в параметре fileIds или, для больших списков, в теле запроса.
+    """
+    return await delete_files_use_case(
+        storage_id, [*(file_ids or []), *(delete_request.file_ids if delete_request is not None else [])]
+    )
@@ -1,9 +1,61 @@
+from .blobs import BlobCreateSchema as BlobCreateSchema
+from .blobs import BlobReadSchema as BlobReadSchema
+from .blobs import BlobUpdateSchema as BlobUpdateSchema
+from .files import ByteRangeSchema as ByteRangeSchema
+from .files import FileAccessSchema as FileAccessSchema
+from .files import FileArchiveRequestSchema as FileArchiveRequestSchema
+from .files import FileCopyBatchRequestSchema as FileCopyBatchRequestSchema
+from .files import FileCopyItemRequestSchema as FileCopyItemRequestSchema
+from .files import FileCopyRequestSchema as FileCopyRequestSchema
+from .files import FileCopySchema as FileCopySchema
 from .files import FileCreateSchema as FileCreateSchema
+from .files import FileDeleteErrorSchema as FileDeleteErrorSchema
+from .files import FileDeleteRequestSchema as FileDeleteRequestSchema
+from .files import FileDeleteResponseSchema as FileDeleteResponseSchema
+from .files import FileInspectionSchema as FileInspectionSchema
+from .files import FileListCursorSchema as FileListCursorSchema
+from .files import FileListFilterSchema as FileListFilterSchema
+from .files import FileListResponseSchema as FileListResponseSchema
+from .files import FileLookupItemSchema as FileLookupItemSchema
+from .files import FileLookupRequestSchema as FileLookupRequestSchema
+from .files import FileLookupResponseSchema as FileLookupResponseSchema
+from .files import FileMoveBatchRequestSchema as FileMoveBatchRequestSchema
+from .files import FileMoveItemRequestSchema as FileMoveItemRequestSchema
+from .files import FileMoveRequestSchema as FileMoveRequestSchema
+from .files import FileMoveSchema as FileMoveSchema
+from .files import FilePresignedDownloadResponseSchema as FilePresignedDownloadResponseSchema
+from .files import FilePresignedUploadRequestSchema as FilePresignedUploadRequestSchema
+from .files import FilePresignedUploadResponseSchema as FilePresignedUploadResponseSchema
 from .files import FileReadSchema as FileReadSchema
+from .files import FileStreamSchema as FileStreamSchema
 from .files import FileUpdateSchema as FileUpdateSchema
 from .files import FileUploadSchema as FileUploadSchema
+from .files import PresignedUrlSchema as PresignedUrlSchema
+from .files import StorageListObjectSchema as StorageListObjectSchema
+from .files import StorageObjectSchema as StorageObjectSchema
+from .orphans import OrphanObjectCreateSchema as OrphanObjectCreateSchema
+from .orphans import OrphanObjectReadSchema as OrphanObjectReadSchema
+from .orphans import OrphanObjectUpdateSchema as OrphanObjectUpdateSchema
+from .orphans import ReconciliationCheckpointCreateSchema as ReconciliationCheckpointCreateSchema
+from .orphans import ReconciliationCheckpointReadSchema as ReconciliationCheckpointReadSchema
+from .orphans import ReconciliationCheckpointUpdateSchema as ReconciliationCheckpointUpdateSchema
+from .replicas import FileReplicaCreateSchema as FileReplicaCreateSchema
+from .replicas import FileReplicaListSchema as FileReplicaListSchema
+from .replicas import FileReplicaReadSchema as FileReplicaReadSchema
+from .replicas import FileReplicaUpdateSchema as FileReplicaUpdateSchema
+from .storages import LocalFileStorageParamsSchema as LocalFileStorageParamsSchema
 from .storages import StorageCreateRequestSchema as StorageCreateRequestSchema
 from .storages import StorageCreateSchema as StorageCreateSchema
 from .storages import StorageReadSchema as StorageReadSchema
 from .storages import StorageResponseSchema as StorageResponseSchema
+from .storages import StorageUpdateRequestSchema as StorageUpdateRequestSchema
 from .storages import StorageUpdateSchema as StorageUpdateSchema
+from .uploads import UploadPartCreateSchema as UploadPartCreateSchema
+from .uploads import UploadPartReadSchema as UploadPartReadSchema
+from .uploads import UploadPartResponseSchema as UploadPartResponseSchema
+from .uploads import UploadPartUpdateSchema as UploadPartUpdateSchema
+from .uploads import UploadSessionCreateRequestSchema as UploadSessionCreateRequestSchema
+from .uploads import UploadSessionCreateSchema as UploadSessionCreateSchema
+from .uploads import UploadSessionReadSchema as UploadSessionReadSchema
+from .uploads import UploadSessionResponseSchema as UploadSessionResponseSchema
+from .uploads import UploadSessionUpdateSchema as UploadSessionUpdateSchema
@@ -0,0 +1,48 @@
+import uuid
+
+from fast_clean.schemas import CreateSchema, ReadSchema, UpdateSchema
+from pydantic import ConfigDict
+
+from ..enums import FileEncodingEnum
+
+
+class BlobReadSchema(ReadSchema):
+    """
+    Схема для чтения общего содержимого файлов.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    storage_id: uuid.UUID
+    sha256: str
+    size: int
+    path: str
+    ref_count: int
+    encoding: FileEncodingEnum | None = None
+    encoded_size: int | None = None
+
+
+class BlobCreateSchema(CreateSchema):
+    """
+    Схема для создания общего содержимого файлов.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    storage_id: uuid.UUID
+    sha256: str
+    size: int
+    path: str
+    ref_count: int = 1
+    encoding: FileEncodingEnum | None = None
+    encoded_size: int | None = None
+
+
+class BlobUpdateSchema(UpdateSchema):
+    """
+    Схема для обновления общего содержимого файлов.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    ref_count: int | None = None
@@ -1,9 +1,17 @@
+import base64
+import binascii
+import datetime as dt
 import uuid
-from dataclasses import dataclass
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Self
 
 from fast_clean.repositories.storage.reader import StreamReadAsyncProtocol
-from fast_clean.schemas import CreateSchema, ReadSchema, UpdateSchema
-from pydantic import ConfigDict
+from fast_clean.schemas import CreateSchema, ReadSchema, RequestSchema, ResponseSchema, UpdateSchema
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+from ..enums import ArchiveFormatEnum, FileEncodingEnum, FileStatusEnum
 
 
 class FileReadSchema(ReadSchema):
@@ -13,6 +21,24 @@ class FileReadSchema(ReadSchema):
     size: int
     content_type: str | None = None
     storage_id: uuid.UUID
+    path: str
+    sha256: str | None = None
+    md5: str | None = None
+    crc32c: str | None = None
+    detected_content_type: str | None = None
+    blob_id: uuid.UUID | None = None
+    etag: str | None = None
+    encoding: FileEncodingEnum | None = None
+    encoded_size: int | None = None
+    status: FileStatusEnum = FileStatusEnum.READY
+    created_at: dt.datetime
+
+    @property
+    def stored_size(self) -> int:
+        """
+        Размер объекта в хранилище, для сжатых файлов отличается от size.
+        """
+        return self.encoded_size if self.encoding is not None and self.encoded_size is not None else self.size
 
 
 class FileCreateSchema(CreateSchema):
@@ -22,6 +48,8 @@ class FileCreateSchema(CreateSchema):
     size: int
     content_type: str | None = None
     storage_id: uuid.UUID
+    path: str
+    status: FileStatusEnum = FileStatusEnum.PENDING
 
 
 class FileUpdateSchema(UpdateSchema):
@@ -31,6 +59,310 @@ class FileUpdateSchema(UpdateSchema):
     size: int | None = None
     content_type: str | None = None
     storage_id: uuid.UUID | None = None
+    path: str | None = None
+    sha256: str | None = None
+    md5: str | None = None
+    crc32c: str | None = None
+    detected_content_type: str | None = None
+    blob_id: uuid.UUID | None = None
+    etag: str | None = None
+    encoding: FileEncodingEnum | None = None
+    encoded_size: int | None = None
+    status: FileStatusEnum | None = None
+
+
+class FileDeleteRequestSchema(RequestSchema):
+    """
+    Схема запроса на удаление большого количества файлов.
+    """
+
+    file_ids: list[uuid.UUID]
+
+
+class FileArchiveRequestSchema(RequestSchema):
+    """
+    Схема запроса на скачивание нескольких файлов одним архивом.
+    """
+
+    file_ids: list[uuid.UUID] = Field(min_length=1, max_length=1000)
+    format: ArchiveFormatEnum = ArchiveFormatEnum.ZIP
+    compress: bool = False
+    """
+    Сжимать ли содержимое, без сжатия файлы копируются в архив как есть и почти не нагружают процессор.
+    """
+
+
+class FileLookupRequestSchema(RequestSchema):
+    """
+    Схема запроса метаданных нескольких файлов.
+    """
+
+    file_ids: list[uuid.UUID] = Field(min_length=1, max_length=5000)
+
+
+class FileLookupItemSchema(ResponseSchema):
+    """
+    Метаданные файла из запроса, file отсутствует, если файла нет.
+    """
+
+    id: uuid.UUID
+    file: FileReadSchema | None = None
+
+
+class FileLookupResponseSchema(ResponseSchema):
+    """
+    Метаданные файлов в порядке запроса, по одной записи на каждый запрошенный идентификатор.
+    """
+
+    items: list[FileLookupItemSchema]
+
+
+class FileCopyRequestSchema(RequestSchema):
+    """
+    Схема запроса на копирование файла.
+    """
+
+    storage_id: uuid.UUID | None = None
+    """
+    Хранилище копии, по умолчанию хранилище файла.
+    """
+    name: str | None = None
+    """
+    Имя копии, по умолчанию имя файла.
+    """
+
+
+class FileCopyItemRequestSchema(FileCopyRequestSchema):
+    file_id: uuid.UUID
+
+
+class FileCopyBatchRequestSchema(RequestSchema):
+    """
+    Схема запроса на копирование нескольких файлов, копии возвращаются в порядке запроса.
+    """
+
+    files: list[FileCopyItemRequestSchema] = Field(min_length=1, max_length=1000)
+
+
+class FileMoveRequestSchema(RequestSchema):
+    """
+    Схема запроса на перенос файла в другое хранилище.
+    """
+
+    storage_id: uuid.UUID
+
+
+class FileMoveItemRequestSchema(FileMoveRequestSchema):
+    file_id: uuid.UUID
+
+
+class FileMoveBatchRequestSchema(RequestSchema):
+    """
+    Схема запроса на перенос нескольких файлов.
+    """
+
+    files: list[FileMoveItemRequestSchema] = Field(min_length=1, max_length=1000)
+
+
+class FileDeleteErrorSchema(ResponseSchema):
+    """
+    Ошибка удаления объекта файла из хранилища.
+    """
+
+    file_id: uuid.UUID
+    message: str
+
+
+class FileDeleteResponseSchema(ResponseSchema):
+    """
+    Результат удаления файлов.
+    """
+
+    deleted: list[uuid.UUID]
+    not_found: list[uuid.UUID]
+    """
+    Файлы, которых нет в хранилище.
+    """
+    errors: list[FileDeleteErrorSchema]
+    """
+    Файлы удалены, но их объекты остались в хранилище и будут удалены при сверке.
+    """
+
+
+@dataclass(frozen=True)
+class FileListFilterSchema:
+    """
+    Фильтры списка файлов хранилища.
+    """
+
+    content_type: str | None = None
+    min_size: int | None = None
+    max_size: int | None = None
+    status: FileStatusEnum | None = None
+
+
+@dataclass(frozen=True)
+class FileCopySchema:
+    """
+    Копия файла: хранилище и имя копии, если они отличаются от исходного файла.
+    """
+
+    file_id: uuid.UUID
+    storage_id: uuid.UUID | None = None
+    name: str | None = None
+
+
+@dataclass(frozen=True)
+class FileMoveSchema:
+    """
+    Перенос файла в хранилище storage_id.
+    """
+
+    file_id: uuid.UUID
+    storage_id: uuid.UUID
+
+
+class FileListCursorSchema(BaseModel):
+    """
+    Позиция в списке файлов: последний отданный файл в порядке (created_at, id).
+    """
+
+    created_at: dt.datetime
+    id: uuid.UUID
+
+    def encode(self: Self) -> str:
+        return base64.urlsafe_b64encode(self.model_dump_json().encode()).decode().rstrip('=')
+
+    @classmethod
+    def decode(cls, cursor: str) -> Self:
+        """
+        Разбираем курсор, полученный от клиента, ValueError означает некорректный курсор.
+        """
+        try:
+            return cls.model_validate_json(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        except (binascii.Error, ValidationError) as error:
+            raise ValueError(f'Invalid cursor {cursor}') from error
+
+
+class FileListResponseSchema(ResponseSchema):
+    """
+    Страница списка файлов хранилища.
+    """
+
+    items: list[FileReadSchema]
+    next_cursor: str | None = None
+    """
+    Курсор следующей страницы, отсутствует на последней странице.
+    """
+
+
+class FilePresignedUploadRequestSchema(RequestSchema):
+    """
+    Схема запроса на загрузку файла напрямую в хранилище.
+    """
+
+    name: str
+    size: int | None = Field(default=None, ge=0)
+    """
+    Размер файла, если передан, хранилище не примет содержимое другого размера.
+    """
+    content_type: str | None = None
+    sha256: str | None = Field(default=None, pattern=r'^[0-9a-f]{64}$')
+    """
+    SHA-256 содержимого, если передан, хранилище проверит его при загрузке.
+    """
+
+
+class FilePresignedUploadResponseSchema(ResponseSchema):
+    """
+    Подписанная ссылка на загрузку файла напрямую в хранилище.
+    """
+
+    file: FileReadSchema
+    url: str | None = None
+    """
+    Отсутствует, если такое содержимое уже загружено и файл сразу готов.
+    """
+    method: str = 'PUT'
+    headers: dict[str, str] = Field(default_factory=dict)
+    """
+    Заголовки, которые нужно передать вместе с запросом на загрузку.
+    """
+    expires_at: dt.datetime | None = None
+
+
+class FilePresignedDownloadResponseSchema(ResponseSchema):
+    """
+    Подписанная ссылка на скачивание файла напрямую из хранилища.
+    """
+
+    url: str
+    expires_at: dt.datetime
+
+
+@dataclass(frozen=True)
+class StorageObjectSchema:
+    """
+    Метаданные объекта, которые сообщает хранилище.
+    """
+
+    size: int
+    etag: str | None = None
+    sha256: str | None = None
+    etag_is_md5: bool = False
+    """
+    ETag вычислен по MD5 содержимого, как у S3 без шифрования ключами KMS и ключами клиента.
+    """
+
+
+@dataclass(frozen=True)
+class FileInspectionSchema:
+    """
+    Результат проверки содержимого файла при загрузке.
+    """
+
+    md5: str
+    crc32c: str
+    detected_content_type: str
+    """
+    Тип содержимого, определенный по первым байтам файла.
+    """
+    etag: str | None = None
+    """
+    ETag записанного объекта, отсутствует, если файл привязан к уже загруженному содержимому.
+    """
+
+
+@dataclass(frozen=True)
+class StorageListObjectSchema:
+    """
+    Объект из списка объектов хранилища.
+    """
+
+    path: str
+    size: int
+    modified_at: dt.datetime
+
+
+@dataclass(frozen=True)
+class FileAccessSchema:
+    """
+    Файл и время его последнего чтения или создания, если файл не читали.
+    """
+
+    id: uuid.UUID
+    path: str
+    accessed_at: dt.datetime
+
+
+@dataclass(frozen=True)
+class PresignedUrlSchema:
+    """
+    Подписанная ссылка на запрос к хранилищу и заголовки, вошедшие в подпись.
+    """
+
+    url: str
+    headers: dict[str, str] = field(default_factory=dict)
 
 
 @dataclass
@@ -41,3 +373,60 @@ class FileUploadSchema:
     reader: StreamReadAsyncProtocol
 
     content_type: str | None = None
+
+
+@dataclass(frozen=True)
+class ByteRangeSchema:
+    """
+    Диапазон байт файла, end включительно.
+    """
+
+    start: int
+    end: int
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+    def get_content_range(self, size: int) -> str:
+        """
+        Значение заголовка Content-Range для диапазона.
+        """
+        return f'bytes {self.start}-{self.end}/{size}'
+
+
+@dataclass
+class FileStreamSchema:
+    """
+    Файл, подготовленный к отдаче: весь целиком или набором диапазонов.
+    """
+
+    file: FileReadSchema
+    ranges: list[ByteRangeSchema] = field(default_factory=list)
+    """
+    Запрошенные диапазоны, пустой список означает весь файл.
+    """
+    parts: list[AsyncIterator[bytes]] = field(default_factory=list)
+    """
+    Потоки содержимого, по одному на каждый диапазон или один на весь файл.
+    """
+    local_path: Path | None = None
+    """
+    Путь к файлу локального хранилища, такой файл отдается сервером напрямую с диска вместо потоков.
+    """
+    content_encoding: FileEncodingEnum | None = None
+    """
+    Кодировка, в которой сжатый файл отдается клиенту как есть, без распаковки.
+    """
+    etag: str | None = None
+    """
+    Сильный ETag отдаваемого представления файла.
+    """
+    cache_control: str | None = None
+    """
+    Заголовок Cache-Control хранилища, без него ответ не содержит указаний по кешированию.
+    """
+    not_modified: bool = False
+    """
+    Представление клиента актуально, отвечаем 304 без содержимого и без чтения хранилища.
+    """
@@ -0,0 +1,70 @@
+import datetime as dt
+import uuid
+
+from fast_clean.schemas import CreateSchema, ReadSchema, UpdateSchema
+from pydantic import ConfigDict
+
+
+class OrphanObjectReadSchema(ReadSchema):
+    """
+    Схема для чтения объекта в карантине.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    storage_id: uuid.UUID
+    path: str
+    size: int
+    created_at: dt.datetime
+
+
+class OrphanObjectCreateSchema(CreateSchema):
+    """
+    Схема для помещения объекта в карантин.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    storage_id: uuid.UUID
+    path: str
+    size: int
+
+
+class OrphanObjectUpdateSchema(UpdateSchema):
+    """
+    Схема для обновления объекта в карантине.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ReconciliationCheckpointReadSchema(ReadSchema):
+    """
+    Схема для чтения позиции сверки хранилища.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    storage_id: uuid.UUID
+    last_path: str | None
+
+
+class ReconciliationCheckpointCreateSchema(CreateSchema):
+    """
+    Схема для создания позиции сверки хранилища.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    storage_id: uuid.UUID
+    last_path: str | None = None
+
+
+class ReconciliationCheckpointUpdateSchema(UpdateSchema):
+    """
+    Схема для обновления позиции сверки хранилища.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    last_path: str | None = None
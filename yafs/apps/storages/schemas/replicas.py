@@ -0,0 +1,42 @@
+import uuid
+
+from fast_clean.schemas import CreateSchema, ReadSchema, UpdateSchema
+from pydantic import ConfigDict, RootModel
+
+
+class FileReplicaReadSchema(ReadSchema):
+    """
+    Схема для чтения копии файла.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    file_id: uuid.UUID
+    storage_id: uuid.UUID
+    path: str
+
+
+class FileReplicaListSchema(RootModel[list[FileReplicaReadSchema]]):
+    """
+    Схема списка копий файла для хранения в кеше.
+    """
+
+
+class FileReplicaCreateSchema(CreateSchema):
+    """
+    Схема для создания копии файла.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    file_id: uuid.UUID
+    storage_id: uuid.UUID
+    path: str
+
+
+class FileReplicaUpdateSchema(UpdateSchema):
+    """
+    Схема для обновления копии файла.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
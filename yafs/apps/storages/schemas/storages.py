@@ -1,9 +1,11 @@
+import datetime as dt
 import uuid
 
+from fast_clean.repositories.storage.schemas import LocalStorageParamsSchema
 from fast_clean.schemas import CreateSchema, ReadSchema, RequestSchema, ResponseSchema, UpdateSchema
-from pydantic import ConfigDict
+from pydantic import ConfigDict, Field
 
-from ..enums import FileStorageTypeEnum
+from ..enums import FileEncodingEnum, FileStorageTypeEnum
 
 
 class StorageReadSchema(ReadSchema):
@@ -17,6 +19,12 @@ class StorageReadSchema(ReadSchema):
     type: FileStorageTypeEnum
     params: str
     is_active: bool
+    max_concurrency: int = 16
+    compression: FileEncodingEnum | None = None
+    replica_ids: list[uuid.UUID] = Field(default_factory=list)
+    tier_storage_id: uuid.UUID | None = None
+    tier_after: dt.timedelta = dt.timedelta(days=30)
+    cache_control: str | None = None
 
 
 class StorageCreateSchema(CreateSchema):
@@ -29,6 +37,12 @@ class StorageCreateSchema(CreateSchema):
     type: FileStorageTypeEnum
     params: str
     is_active: bool = True
+    max_concurrency: int = 16
+    compression: FileEncodingEnum | None = None
+    replica_ids: list[uuid.UUID] = Field(default_factory=list)
+    tier_storage_id: uuid.UUID | None = None
+    tier_after: dt.timedelta = dt.timedelta(days=30)
+    cache_control: str | None = None
 
 
 class StorageUpdateSchema(UpdateSchema):
@@ -41,6 +55,12 @@ class StorageUpdateSchema(UpdateSchema):
     type: FileStorageTypeEnum | None = None
     params: str | None = None
     is_active: bool | None = None
+    max_concurrency: int | None = None
+    compression: FileEncodingEnum | None = None
+    replica_ids: list[uuid.UUID] | None = None
+    tier_storage_id: uuid.UUID | None = None
+    tier_after: dt.timedelta | None = None
+    cache_control: str | None = None
 
 
 class StorageCreateRequestSchema(RequestSchema):
@@ -52,11 +72,87 @@ class StorageCreateRequestSchema(RequestSchema):
     """
     Тип хранилища.
     """
-    params: dict[str, str | int]
+    params: dict[str, str | int | bool]
     """
     Параметры строки подключения.
     """
+    max_concurrency: int = Field(default=16, ge=1, le=1024)
+    """
+    Максимальное количество одновременных операций с хранилищем.
+    """
+    compression: FileEncodingEnum | None = None
+    """
+    Сжимать ли хорошо сжимаемые файлы (JSON, CSV, текст) при загрузке.
+    """
+    replica_ids: list[uuid.UUID] = Field(default_factory=list)
+    """
+    Хранилища, в которые при загрузке записываются копии файлов для чтения при недоступности этого хранилища.
+    """
+    tier_storage_id: uuid.UUID | None = None
+    """
+    Более дешевое хранилище, в которое фоново переносятся давно не читавшиеся файлы.
+    """
+    tier_after: dt.timedelta = Field(default=dt.timedelta(days=30), gt=dt.timedelta(0))
+    """
+    Время без чтения, после которого файл переносится в tier_storage_id.
+    """
+    cache_control: str | None = Field(default=None, max_length=256)
+    """
+    Заголовок Cache-Control при скачивании файлов, например public, max-age=31536000, immutable.
+    """
+
+
+class StorageUpdateRequestSchema(RequestSchema):
+    """
+    Схема для изменения внешнего хранилища.
+    """
+
+    params: dict[str, str | int | bool] | None = None
+    """
+    Параметры строки подключения.
+    """
+    is_active: bool | None = None
+    """
+    Доступно ли хранилище для работы с файлами.
+    """
+    max_concurrency: int | None = Field(default=None, ge=1, le=1024)
+    """
+    Максимальное количество одновременных операций с хранилищем.
+    """
+    compression: FileEncodingEnum | None = None
+    """
+    Сжимать ли новые файлы при загрузке, null отключает сжатие, уже загруженные файлы не меняются.
+    """
+    replica_ids: list[uuid.UUID] | None = None
+    """
+    Хранилища для копий новых файлов, пустой список отключает репликацию, уже записанные копии сохраняются.
+    """
+    tier_storage_id: uuid.UUID | None = None
+    """
+    Хранилище для давно не читавшихся файлов, null отключает перенос, уже перенесенные файлы не возвращаются.
+    """
+    tier_after: dt.timedelta | None = Field(default=None, gt=dt.timedelta(0))
+    """
+    Время без чтения, после которого файл переносится в tier_storage_id.
+    """
+    cache_control: str | None = Field(default=None, max_length=256)
+    """
+    Заголовок Cache-Control при скачивании файлов, null отключает заголовок.
+    """
 
 
 class StorageResponseSchema(ResponseSchema):
     id: uuid.UUID
+
+
+class LocalFileStorageParamsSchema(LocalStorageParamsSchema):
+    """
+    Параметры локального хранилища.
+    """
+
+    fsync: bool = True
+    """
+    Сбрасываем ли записанные файлы на диск до подтверждения загрузки.
+
+    Без fsync запись быстрее, но файлы, загруженные перед сбоем питания, могут потеряться.
+    """
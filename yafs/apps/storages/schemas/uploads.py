@@ -0,0 +1,136 @@
+import datetime as dt
+import uuid
+
+from fast_clean.schemas import CreateSchema, ReadSchema, RequestSchema, ResponseSchema, UpdateSchema
+from pydantic import ConfigDict, Field
+
+from .files import FileReadSchema
+
+
+class UploadSessionReadSchema(ReadSchema):
+    """
+    Схема для чтения загрузки частями.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    storage_id: uuid.UUID
+    file_id: uuid.UUID
+    upload_id: str
+    size: int
+    part_size: int
+    updated_at: dt.datetime
+
+    @property
+    def parts_count(self) -> int:
+        return -(-self.size // self.part_size)
+
+    def get_part_size(self, part_number: int) -> int:
+        """
+        Ожидаемый размер части, последняя часть может быть меньше остальных.
+        """
+        return min(self.part_size, self.size - (part_number - 1) * self.part_size)
+
+
+class UploadSessionCreateSchema(CreateSchema):
+    """
+    Схема для создания загрузки частями.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    storage_id: uuid.UUID
+    file_id: uuid.UUID
+    upload_id: str
+    size: int
+    part_size: int
+
+
+class UploadSessionUpdateSchema(UpdateSchema):
+    """
+    Схема для обновления загрузки частями.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UploadPartReadSchema(ReadSchema):
+    """
+    Схема для чтения записанной части.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    session_id: uuid.UUID
+    part_number: int
+    size: int
+    etag: str
+
+
+class UploadPartCreateSchema(CreateSchema):
+    """
+    Схема для создания записанной части.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    session_id: uuid.UUID
+    part_number: int
+    size: int
+    etag: str
+
+
+class UploadPartUpdateSchema(UpdateSchema):
+    """
+    Схема для обновления записанной части.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    size: int | None = None
+    etag: str | None = None
+
+
+class UploadSessionCreateRequestSchema(RequestSchema):
+    """
+    Схема запроса на создание загрузки частями.
+    """
+
+    name: str
+    size: int = Field(ge=1)
+    content_type: str | None = None
+    part_size: int | None = Field(default=None, ge=1)
+    """
+    Желаемый размер части, приводится к ограничениям хранилища.
+    """
+
+
+class UploadPartResponseSchema(ResponseSchema):
+    """
+    Записанная часть загрузки.
+    """
+
+    part_number: int
+    size: int
+    etag: str
+
+
+class UploadSessionResponseSchema(ResponseSchema):
+    """
+    Состояние загрузки частями.
+    """
+
+    id: uuid.UUID
+    file: FileReadSchema
+    size: int
+    part_size: int
+    parts_count: int
+    offset: int
+    """
+    Количество байт, записанных подряд от начала файла.
+    """
+    parts: list[UploadPartResponseSchema]
+    expires_at: dt.datetime
+    """
+    Время, после которого загрузка без активности будет прервана.
+    """
@@ -1,2 +1,8 @@
+from .blob import BlobService as BlobService
+from .copy import FileCopyService as FileCopyService
 from .file import FileService as FileService
+from .reconciliation import FileReconciliationService as FileReconciliationService
+from .replica import ReplicaService as ReplicaService
 from .storage import StorageService as StorageService
+from .tiering import FileTieringService as FileTieringService
+from .upload import UploadSessionService as UploadSessionService
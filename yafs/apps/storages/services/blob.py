@@ -0,0 +1,255 @@
+import uuid
+from collections import defaultdict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Self
+
+from fast_clean.services.transaction import TransactionService
+
+from ..enums import FileEncodingEnum, FileStatusEnum
+from ..repositories import BlobDbRepository, FileDbRepository, FileReplicaDbRepository
+from ..schemas import (
+    BlobCreateSchema,
+    BlobReadSchema,
+    FileInspectionSchema,
+    FileReadSchema,
+    FileReplicaReadSchema,
+    FileUpdateSchema,
+    StorageObjectSchema,
+)
+
+REMOVE_FILES_BATCH_SIZE = 1000
+"""
+Количество файлов, удаляемых одним запросом, ограничивает число параметров запроса.
+"""
+
+
+@dataclass
+class BlobService:
+    """
+    Сервис дедупликации содержимого файлов по SHA-256.
+
+    Файл и ссылка на содержимое меняются в одной транзакции,
+    поэтому счетчик ссылок всегда совпадает с количеством файлов.
+    """
+
+    blob_repository: BlobDbRepository
+    file_repository: FileDbRepository
+    file_replica_repository: FileReplicaDbRepository
+    transaction_service: TransactionService
+
+    async def attach(
+        self: Self,
+        file: FileReadSchema,
+        sha256: str,
+        size: int,
+        *,
+        encoding: FileEncodingEnum | None = None,
+        encoded_size: int | None = None,
+    ) -> FileReadSchema:
+        """
+        Привязываем загруженный файл к содержимому.
+
+        Если такое содержимое уже есть, файл начинает ссылаться на его объект,
+        а свой объект файла больше не нужен. Кодировка файла берется у содержимого,
+        на которое он ссылается.
+        """
+        async with self.transaction_service.begin():
+            blob = await self.blob_repository.acquire(
+                BlobCreateSchema(
+                    storage_id=file.storage_id,
+                    sha256=sha256,
+                    size=size,
+                    path=file.path,
+                    encoding=encoding,
+                    encoded_size=encoded_size,
+                )
+            )
+            return await self.file_repository.update(self.make_file_update(file, blob))
+
+    async def attach_existing(self: Self, file: FileReadSchema, sha256: str) -> FileReadSchema | None:
+        """
+        Привязываем файл к уже загруженному содержимому, не записывая его повторно.
+        """
+        async with self.transaction_service.begin():
+            blob = await self.blob_repository.acquire_existing(file.storage_id, sha256)
+            if blob is None:
+                return None
+            return await self.file_repository.update(self.make_file_update(file, blob))
+
+    async def attach_existing_many(
+        self: Self, files: Sequence[tuple[FileReadSchema, str]]
+    ) -> dict[uuid.UUID, FileReadSchema]:
+        """
+        Привязываем файлы к уже загруженному содержимому одной транзакцией и возвращаем привязанные.
+
+        Файлы, такого содержимого для которых в их хранилище нет, остаются без изменений.
+        """
+        if not files:
+            return {}
+        async with self.transaction_service.begin():
+            blobs = await self.blob_repository.acquire_existing_many(
+                [(file.storage_id, sha256) for file, sha256 in files]
+            )
+            file_blobs = {
+                file.id: blobs[file.storage_id, sha256] for file, sha256 in files if (file.storage_id, sha256) in blobs
+            }
+            await self.file_repository.attach_blobs(file_blobs)
+        return {
+            file.id: file.model_copy(
+                update=self.make_file_update(file, file_blobs[file.id]).model_dump(exclude={'id'}, exclude_unset=True)
+            )
+            for file, _ in files
+            if file.id in file_blobs
+        }
+
+    async def complete(
+        self: Self,
+        file: FileReadSchema,
+        storage_object: StorageObjectSchema,
+        *,
+        content_type: str | None = None,
+        inspection: FileInspectionSchema | None = None,
+    ) -> FileReadSchema | None:
+        """
+        Завершаем загрузку файла напрямую в хранилище по метаданным объекта.
+
+        Если известен SHA-256, файл привязывается к содержимому так же, как при обычной загрузке.
+        Результат проверки содержимого, если он есть, сохраняется тем же запросом, что и статус READY.
+        Возвращаем None, если файл уже завершен или удален параллельным запросом.
+        """
+        async with self.transaction_service.begin():
+            if await self.file_repository.get_pending_for_update(file.id) is None:
+                return None
+            update_values: dict[str, Any] = {
+                'size': storage_object.size,
+                'etag': storage_object.etag,
+                'status': FileStatusEnum.READY,
+            }
+            if inspection is not None:
+                update_values.update(
+                    content_type=content_type,
+                    md5=inspection.md5,
+                    crc32c=inspection.crc32c,
+                    detected_content_type=inspection.detected_content_type,
+                )
+            if storage_object.sha256 is not None:
+                blob = await self.blob_repository.acquire(
+                    BlobCreateSchema(
+                        storage_id=file.storage_id,
+                        sha256=storage_object.sha256,
+                        size=storage_object.size,
+                        path=file.path,
+                    )
+                )
+                update_values.update(
+                    path=blob.path,
+                    sha256=blob.sha256,
+                    blob_id=blob.id,
+                    encoding=blob.encoding,
+                    encoded_size=blob.encoded_size,
+                )
+                if blob.path != file.path:
+                    # ETag относится к записанному объекту, а файл привязан к уже загруженному содержимому.
+                    update_values['etag'] = None
+            update_schema = FileUpdateSchema(id=file.id, **update_values)
+            return await self.file_repository.update(update_schema)
+
+    async def relocate(
+        self: Self, file: FileReadSchema, storage_id: uuid.UUID, path: str | None
+    ) -> tuple[FileReadSchema, dict[uuid.UUID, list[str]]] | None:
+        """
+        Переводим готовый файл в другое хранилище одной транзакцией.
+
+        path — объект файла, скопированный в новое хранилище, или None, если такое содержимое там уже есть.
+        Возвращаем перенесенный файл и пути объектов по хранилищам, на которые больше никто не ссылается,
+        включая копии файла в хранилищах репликации старого хранилища. Возвращаем None, если файл
+        удален или перенесен параллельным запросом либо содержимое нового хранилища уже удалено.
+        """
+        async with self.transaction_service.begin():
+            locked_file = await self.file_repository.get_ready_for_update(file.id)
+            if locked_file is None or locked_file.storage_id != file.storage_id or locked_file.path != file.path:
+                return None
+            blobs: list[BlobReadSchema] = []
+            if locked_file.sha256 is not None:
+                blob: BlobReadSchema | None
+                if path is not None:
+                    blob = await self.blob_repository.acquire(
+                        BlobCreateSchema(
+                            storage_id=storage_id,
+                            sha256=locked_file.sha256,
+                            size=locked_file.size,
+                            path=path,
+                            encoding=locked_file.encoding,
+                            encoded_size=locked_file.encoded_size,
+                        )
+                    )
+                else:
+                    blob = await self.blob_repository.acquire_existing(storage_id, locked_file.sha256)
+                    if blob is None:
+                        return None
+                await self.file_repository.move([file.id], storage_id, path=blob.path, blob=blob, etag=None)
+                if locked_file.blob_id is not None:
+                    blobs = await self.blob_repository.release([locked_file.blob_id])
+            elif path is not None:
+                await self.file_repository.move([file.id], storage_id, path=path, blob=None, etag=None)
+            else:
+                return None
+            replicas = await self.file_replica_repository.delete_by_files([file.id])
+            moved_file = await self.file_repository.get(file.id)
+        paths: defaultdict[uuid.UUID, list[str]] = defaultdict(list)
+        for blob in blobs:
+            paths[blob.storage_id].append(blob.path)
+        if locked_file.blob_id is None:
+            paths[locked_file.storage_id].append(locked_file.path)
+        for replica in replicas:
+            paths[replica.storage_id].append(replica.path)
+        return moved_file, paths
+
+    @staticmethod
+    def make_file_update(file: FileReadSchema, blob: BlobReadSchema) -> FileUpdateSchema:
+        return FileUpdateSchema(
+            id=file.id,
+            size=blob.size,
+            path=blob.path,
+            sha256=blob.sha256,
+            blob_id=blob.id,
+            encoding=blob.encoding,
+            encoded_size=blob.encoded_size,
+        )
+
+    async def remove_files(
+        self: Self,
+        file_ids: Sequence[uuid.UUID],
+        *,
+        storage_id: uuid.UUID | None = None,
+        status: FileStatusEnum | None = None,
+    ) -> tuple[list[FileReadSchema], dict[uuid.UUID, list[str]]]:
+        """
+        Удаляем файлы вместе со ссылками на содержимое.
+
+        Возвращаем удаленные файлы и пути объектов по хранилищам, на которые больше никто не ссылается,
+        включая копии файлов в других хранилищах. Сами объекты удаляются после фиксации транзакции.
+        """
+        files: list[FileReadSchema] = []
+        blobs: list[BlobReadSchema] = []
+        replicas: list[FileReplicaReadSchema] = []
+        async with self.transaction_service.begin():
+            for i in range(0, len(file_ids), REMOVE_FILES_BATCH_SIZE):
+                batch_ids = file_ids[i : i + REMOVE_FILES_BATCH_SIZE]
+                # Копии удаляются каскадно вместе с файлами, поэтому их пути читаем заранее.
+                batch_replicas = await self.file_replica_repository.get_by_files(batch_ids)
+                batch_files = await self.file_repository.delete_files(batch_ids, storage_id=storage_id, status=status)
+                blobs.extend(await self.blob_repository.release([file.blob_id for file in batch_files if file.blob_id]))
+                deleted_ids = {file.id for file in batch_files}
+                replicas.extend(replica for replica in batch_replicas if replica.file_id in deleted_ids)
+                files.extend(batch_files)
+        paths: defaultdict[uuid.UUID, list[str]] = defaultdict(list)
+        for blob in blobs:
+            paths[blob.storage_id].append(blob.path)
+        for file in files:
+            if file.blob_id is None:
+                paths[file.storage_id].append(file.path)
+        for replica in replicas:
+            paths[replica.storage_id].append(replica.path)
+        return files, paths
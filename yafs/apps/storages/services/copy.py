@@ -0,0 +1,324 @@
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import AsyncIterator, Sequence
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from typing import Self
+
+from .blob import BlobService
+from .file import FileService
+from .replica import ReplicaService
+from ..enums import FileStatusEnum
+from ..exceptions import FileNotFoundError, FileNotReadyError
+from ..inspection import HashInspector, InspectingStreamReader
+from ..metrics import copied_bytes, copied_files, observe_stage
+from ..repositories import (
+    BlobDbRepository,
+    DiskCacheRepository,
+    FileDbRepository,
+    FileStorageRepositoryPool,
+    FileStorageRepositoryProtocol,
+    MetadataCacheRepository,
+)
+from ..repositories.concurrency import UPLOAD_COST_UNIT
+from ..repositories.reader import IteratorStreamReader, get_part_size
+from ..schemas import FileCopySchema, FileCreateSchema, FileMoveSchema, FileReadSchema, FileUpdateSchema
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FileCopyService:
+    """
+    Сервис копирования и переноса файлов между хранилищами.
+
+    - если такое содержимое уже есть в хранилище назначения, файл ссылается на него и объект не копируется;
+    - иначе объект копируется на стороне хранилища, например CopyObject в пределах одного сервера S3;
+    - только если хранилища так не умеют, объект копируется потоком через приложение частями
+      ограниченного размера в пределах лимита одновременных операций хранилища назначения;
+    - копии в хранилищах репликации для скопированных и перенесенных файлов не создаются.
+    """
+
+    file_repository: FileDbRepository
+    blob_repository: BlobDbRepository
+    blob_service: BlobService
+    replica_service: ReplicaService
+    file_storage_repository_pool: FileStorageRepositoryPool
+    metadata_cache_repository: MetadataCacheRepository
+    disk_cache_repository: DiskCacheRepository
+
+    async def copy_files(self: Self, storage_id: uuid.UUID, copies: Sequence[FileCopySchema]) -> list[FileReadSchema]:
+        """
+        Копируем готовые файлы хранилища и возвращаем копии в порядке запроса.
+
+        Копии создаются в статусе PENDING одной вставкой, объекты копируются параллельно,
+        и копии становятся готовыми одним запросом. При ошибке созданные копии и их объекты удаляются.
+        """
+        files = await self.get_ready_files(storage_id, [copy.file_id for copy in copies])
+        copy_ids = [uuid.uuid4() for _ in copies]
+        async with self.lease_storages([storage_id, *(copy.storage_id or storage_id for copy in copies)]) as storages:
+            with observe_stage('copy_create', storage_id):
+                created_files = await self.file_repository.bulk_create(
+                    [
+                        FileCreateSchema(
+                            id=copy_id,
+                            name=copy.name or files[copy.file_id].name,
+                            size=files[copy.file_id].size,
+                            content_type=files[copy.file_id].content_type,
+                            storage_id=copy.storage_id or storage_id,
+                            path=FileService.get_path(copy_id),
+                            status=FileStatusEnum.PENDING,
+                        )
+                        for copy, copy_id in zip(copies, copy_ids, strict=True)
+                    ]
+                )
+            pairs = [
+                (created_file, files[copy.file_id]) for copy, created_file in zip(copies, created_files, strict=True)
+            ]
+            try:
+                attached_files = await self.copy_objects(pairs, storages)
+            except BaseException:
+                await asyncio.shield(self.discard_files(created_files, storages))
+                raise
+        with observe_stage('copy_ready', storage_id):
+            await self.file_repository.mark_ready({file.id: file.size for file in attached_files})
+        return [file.model_copy(update={'status': FileStatusEnum.READY}) for file in attached_files]
+
+    async def copy_objects(
+        self: Self,
+        pairs: list[tuple[FileReadSchema, FileReadSchema]],
+        storages: dict[uuid.UUID, FileStorageRepositoryProtocol],
+    ) -> list[FileReadSchema]:
+        """
+        Привязываем копии к содержимому файлов, копируя объекты только при необходимости.
+
+        Копии, содержимое которых уже есть в их хранилище, привязываются к нему одной транзакцией,
+        остальные объекты копируются параллельно, а записи обновляются по одной после копирования.
+        """
+        attached_files = await self.blob_service.attach_existing_many(
+            [(created_file, file.sha256) for created_file, file in pairs if file.sha256 is not None]
+        )
+        for attached_file in attached_files.values():
+            copied_files.inc({'storage_id': str(attached_file.storage_id), 'method': 'dedup'})
+        pending = [(created_file, file) for created_file, file in pairs if created_file.id not in attached_files]
+        tasks = [
+            asyncio.ensure_future(
+                self.copy_object(file, storages[file.storage_id], created_file, storages[created_file.storage_id])
+            )
+            for created_file, file in pending
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        for created_file, file in pending:
+            attached_files[created_file.id] = await self.attach_copy(
+                created_file, file, storages[created_file.storage_id]
+            )
+            copied_files.inc({'storage_id': str(created_file.storage_id), 'method': 'copy'})
+        return [attached_files[created_file.id] for created_file, _ in pairs]
+
+    async def attach_copy(
+        self: Self, created_file: FileReadSchema, file: FileReadSchema, target: FileStorageRepositoryProtocol
+    ) -> FileReadSchema:
+        """
+        Привязываем копию со скопированным объектом к содержимому, как и загруженный файл.
+
+        Файлы без SHA-256, загруженные до дедупликации, получают только кодировку исходного объекта.
+        """
+        if file.sha256 is None:
+            if file.encoding is None:
+                return created_file
+            return await self.file_repository.update(
+                FileUpdateSchema(id=created_file.id, encoding=file.encoding, encoded_size=file.encoded_size)
+            )
+        attached_file = await self.blob_service.attach(
+            created_file, file.sha256, file.size, encoding=file.encoding, encoded_size=file.encoded_size
+        )
+        if attached_file.path != created_file.path:
+            await target.delete(created_file.path)
+        return attached_file
+
+    async def move_files(self: Self, storage_id: uuid.UUID, moves: Sequence[FileMoveSchema]) -> list[FileReadSchema]:
+        """
+        Переносим готовые файлы хранилища в другие хранилища, идентификаторы файлов не меняются.
+
+        Объекты копируются параллельно, затем каждый файл переводится на новый объект отдельной
+        транзакцией, после чего освободившиеся объекты старого хранилища и копии файла удаляются.
+        Файлы возвращаются в порядке запроса в том состоянии, в котором остались: файл, измененный
+        параллельным запросом, не переносится, а удаленный в ответ не попадает.
+        """
+        targets: dict[uuid.UUID, uuid.UUID] = {}
+        for move in moves:
+            targets.setdefault(move.file_id, move.storage_id)
+        files = await self.get_ready_files(storage_id, list(targets))
+        async with self.lease_storages([storage_id, *targets.values()]) as storages:
+            pending = [file for file in files.values() if targets[file.id] != file.storage_id]
+            blobs = await self.blob_repository.find_many(
+                [(targets[file.id], file.sha256) for file in pending if file.sha256 is not None]
+            )
+            # Объект копируется по новому пути, чтобы не перезаписать объект, на который ссылаются другие файлы.
+            paths = {
+                file.id: FileService.get_path(uuid.uuid4())
+                for file in pending
+                if file.sha256 is None or (targets[file.id], file.sha256) not in blobs
+            }
+            tasks = [
+                asyncio.ensure_future(
+                    self.copy_object(
+                        file,
+                        storages[file.storage_id],
+                        file.model_copy(update={'storage_id': targets[file.id], 'path': paths[file.id]}),
+                        storages[targets[file.id]],
+                    )
+                )
+                for file in pending
+                if file.id in paths
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                copies: defaultdict[uuid.UUID, list[str]] = defaultdict(list)
+                for file_id, path in paths.items():
+                    copies[targets[file_id]].append(path)
+                await asyncio.shield(self.delete_objects(copies, storages))
+                raise
+            for file in pending:
+                await self.move_file(file, targets[file.id], paths.get(file.id), storages)
+        files = {file.id: file for file in await self.file_repository.get_by_ids(list(targets))}
+        return [files[file_id] for file_id in targets if file_id in files]
+
+    async def move_file(
+        self: Self,
+        file: FileReadSchema,
+        storage_id: uuid.UUID,
+        path: str | None,
+        storages: dict[uuid.UUID, FileStorageRepositoryProtocol],
+    ) -> None:
+        """
+        Переводим файл на объект нового хранилища и удаляем то, на что больше никто не ссылается.
+
+        Ненужная копия объекта, например если такое содержимое появилось параллельно, удаляется сразу,
+        а оставшиеся после ошибок объекты удалит сверка хранилищ с файлами.
+        """
+        relocated = await self.blob_service.relocate(file, storage_id, path)
+        if relocated is None:
+            if path is not None:
+                await self.delete_objects({storage_id: [path]}, storages)
+            return
+        moved_file, paths = relocated
+        if path is not None and moved_file.path != path:
+            paths.setdefault(storage_id, []).append(path)
+        copied_files.inc({'storage_id': str(storage_id), 'method': 'copy' if path is not None else 'dedup'})
+        await self.metadata_cache_repository.invalidate_files([file.id])
+        await self.disk_cache_repository.discard(
+            [
+                self.disk_cache_repository.get_key(file.storage_id, released_path)
+                for released_path in paths.get(file.storage_id, [])
+            ]
+        )
+        await self.delete_objects(paths, storages)
+
+    async def copy_object(
+        self: Self,
+        file: FileReadSchema,
+        source: FileStorageRepositoryProtocol,
+        target_file: FileReadSchema,
+        target: FileStorageRepositoryProtocol,
+    ) -> None:
+        """
+        Копируем объект файла в объект target_file.
+
+        При копировании потоком объект проверяется по размеру и по SHA-256 файла, если он хранится без сжатия.
+        """
+        size = file.stored_size
+        target_id = target_file.storage_id
+        limiter = self.file_storage_repository_pool.get_limiter(target_id)
+        with observe_stage('copy_object', target_id):
+            async with limiter.acquire(size / UPLOAD_COST_UNIT):
+                is_copied = await target.copy_object(target_file.path, source, file.path, size=size)
+            if is_copied:
+                copied_bytes.add({'storage_id': str(target_id), 'method': 'server'}, size)
+                return
+            sha256 = HashInspector('sha256')
+            reader = InspectingStreamReader(IteratorStreamReader(source.straming_read(file.path)), [sha256])
+            written_object = await target.multipart_write(
+                target_file.path, reader, limiter=limiter, part_size=get_part_size(size)
+            )
+            written = written_object.size
+        if written != size or (file.encoding is None and file.sha256 is not None and sha256.hexdigest() != file.sha256):
+            raise ValueError(f'Object {file.path} does not match file {file.id}')
+        copied_bytes.add({'storage_id': str(target_id), 'method': 'stream'}, size)
+
+    async def get_ready_files(
+        self: Self, storage_id: uuid.UUID, file_ids: list[uuid.UUID]
+    ) -> dict[uuid.UUID, FileReadSchema]:
+        """
+        Получаем готовые файлы хранилища, все файлы проверяются до начала копирования.
+        """
+        file_ids = list(dict.fromkeys(file_ids))
+        files = {file.id: file for file in await self.file_repository.get_by_ids(file_ids)}
+        for file_id in file_ids:
+            file = files.get(file_id)
+            if file is None or file.storage_id != storage_id:
+                raise FileNotFoundError(file_id)
+            if file.status != FileStatusEnum.READY:
+                raise FileNotReadyError(file_id)
+        return files
+
+    @asynccontextmanager
+    async def lease_storages(
+        self: Self, storage_ids: Sequence[uuid.UUID]
+    ) -> AsyncIterator[dict[uuid.UUID, FileStorageRepositoryProtocol]]:
+        """
+        Берем репозитории всех хранилищ запроса, отключенное или отсутствующее хранилище прерывает запрос.
+        """
+        async with AsyncExitStack() as stack:
+            yield {
+                storage_id: await stack.enter_async_context(self.file_storage_repository_pool.lease(storage_id))
+                for storage_id in dict.fromkeys(storage_ids)
+            }
+
+    async def discard_files(
+        self: Self, files: list[FileReadSchema], storages: dict[uuid.UUID, FileStorageRepositoryProtocol]
+    ) -> None:
+        """
+        Удаляем копии незавершенного копирования вместе с объектами.
+
+        Ошибки только логируем: оставшееся удалит задача очистки зависших загрузок.
+        """
+        try:
+            _, paths = await self.blob_service.remove_files([file.id for file in files])
+        except Exception:
+            logger.warning('Failed to discard pending copies %s', [file.id for file in files], exc_info=True)
+            return
+        await self.delete_objects(paths, storages)
+
+    async def delete_objects(
+        self: Self, paths: dict[uuid.UUID, list[str]], storages: dict[uuid.UUID, FileStorageRepositoryProtocol]
+    ) -> None:
+        """
+        Удаляем объекты хранилищ, ошибки только логируем: объекты удалит сверка хранилищ с файлами.
+        """
+        for storage_id, storage_paths in paths.items():
+            if not storage_paths:
+                continue
+            repository = storages.get(storage_id)
+            if repository is None:
+                await self.replica_service.delete_objects(storage_id, storage_paths)
+                continue
+            try:
+                errors = await repository.delete_many(storage_paths)
+            except Exception:
+                logger.warning('Failed to delete objects %s from storage %s', storage_paths, storage_id, exc_info=True)
+                continue
+            if errors:
+                logger.warning('Failed to delete objects from storage %s: %s', storage_id, errors)
@@ -1,24 +1,91 @@
 import asyncio
-import io
+import datetime as dt
+import logging
+import time
 import uuid
 from collections.abc import AsyncIterator
-from dataclasses import dataclass
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Self, cast
 
 from fast_clean.repositories.storage import AsyncStreamReaderProtocol
 from fast_clean.repositories.storage.reader import StreamReadAsyncProtocol
-from fast_clean.services.transaction import TransactionService
 
-from ..repositories import FileDbRepository, FileStorageRepositoryProtocol
-from ..schemas import FileCreateSchema, FileReadSchema, FileUploadSchema
+from .blob import BlobService
+from .replica import ReplicaService
+from ..encodings import EncodingStreamReader, decode_stream, is_compressible, slice_stream
+from ..enums import FileEncodingEnum, FileStatusEnum
+from ..exceptions import FileIntegrityError, FileNotFoundError, FileNotReadyError, InvalidCursorError
+from ..inspection import DEFAULT_CONTENT_TYPE, ContentInspection, ETagInspector, InspectingStreamReader
+from ..metrics import (
+    observe_download,
+    observe_stage,
+    observe_stage_duration,
+    observe_transfer,
+    upload_integrity_failures,
+)
+from ..repositories import (
+    ConcurrencyLimiter,
+    DiskCacheRepository,
+    FileAccessTracker,
+    FileDbRepository,
+    FileStorageProviderRepositoryFactory,
+    FileStorageRepositoryPool,
+    FileStorageRepositoryProtocol,
+    MetadataCacheRepository,
+)
+from ..repositories.reader import get_part_size
+from ..schemas import (
+    ByteRangeSchema,
+    FileCreateSchema,
+    FileDeleteErrorSchema,
+    FileDeleteResponseSchema,
+    FileListCursorSchema,
+    FileListFilterSchema,
+    FileLookupItemSchema,
+    FilePresignedDownloadResponseSchema,
+    FilePresignedUploadRequestSchema,
+    FilePresignedUploadResponseSchema,
+    FileReadSchema,
+    FileUploadSchema,
+)
+
+FILES_PREFIX = '/files/'
+"""
+Префикс путей объектов файлов в хранилище.
+"""
+PRESIGNED_UPLOAD_EXPIRES_IN = 15 * 60
+"""
+Время жизни ссылки на загрузку файла напрямую в хранилище.
+"""
+PRESIGNED_DOWNLOAD_EXPIRES_IN = 5 * 60
+"""
+Время жизни ссылки на скачивание файла напрямую из хранилища.
+"""
+DELETE_BATCH_SIZE = 1000
+"""
+Количество объектов, удаляемых из хранилища одной операцией.
+"""
+LIST_BATCH_SIZE = 1000
+"""
+Количество файлов, которое список читает из базы одним запросом.
+"""
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
 class FileService:
     file_repository: FileDbRepository
     file_storage_repository: FileStorageRepositoryProtocol
-    transaction_service: TransactionService
+    metadata_cache_repository: MetadataCacheRepository
+    file_storage_repository_pool: FileStorageRepositoryPool
+    file_storage_repository_factory: FileStorageProviderRepositoryFactory
+    disk_cache_repository: DiskCacheRepository
+    blob_service: BlobService
+    replica_service: ReplicaService
+    file_access_tracker: FileAccessTracker
 
     async def upload_file(
         self: Self,
@@ -33,101 +100,518 @@ class FileService:
 
         - не проверяем storage_id, потому что если дошли сюда, значит FileStorageRepository инициализирован.
         """
-        async with self.transaction_service.begin():
-            file = await self.file_repository.create(
-                FileCreateSchema(
+        files = await self.upload_files(
+            storage_id,
+            [
+                FileUploadSchema(
                     name=name,
                     size=size,
                     content_type=content_type,
-                    storage_id=storage_id,
+                    reader=cast(StreamReadAsyncProtocol, reader),
                 )
-            )
-            await self.upload_file_storage(
-                self.get_path(file.id),
-                cast(StreamReadAsyncProtocol, reader),
-                semaphore=asyncio.BoundedSemaphore(1),
-            )
-            return file
+            ],
+        )
+        return files[0]
 
     async def upload_files(
         self: Self,
         storage_id: uuid.UUID,
         files: list[FileUploadSchema],
     ) -> list[FileReadSchema]:
-        async with self.transaction_service.begin():
+        """
+        Загружаем файлы в два этапа, не удерживая транзакцию на время передачи в хранилище.
+
+        - записи создаются в статусе PENDING отдельной короткой транзакцией;
+        - содержимое загружается в хранилище без открытого соединения с базой;
+        - второй короткой транзакцией файлы переводятся в статус READY с фактическими размерами.
+
+        При ошибке загрузки созданные записи и уже записанные объекты удаляются,
+        остальное подчищает задача очистки зависших загрузок.
+
+        Если у хранилища задано сжатие, хорошо сжимаемые файлы сжимаются по мере загрузки,
+        а если задана репликация, содержимое одновременно записывается в хранилища копий.
+        Вместе с файлами сохраняются контрольные суммы и тип содержимого, определенные при загрузке.
+        """
+        storage = await self.file_storage_repository_factory.get_storage(storage_id)
+        file_ids = [uuid.uuid4() for _ in files]
+        with observe_stage('upload_create', storage_id):
             created_files = await self.file_repository.bulk_create(
                 [
                     FileCreateSchema(
+                        id=file_id,
                         name=file.name,
                         size=file.size,
                         content_type=file.content_type,
                         storage_id=storage_id,
+                        path=self.get_path(file_id),
+                        status=FileStatusEnum.PENDING,
                     )
-                    for file in files
+                    for file, file_id in zip(files, file_ids, strict=True)
                 ]
             )
 
-            semaphore = asyncio.BoundedSemaphore(4)
-            await asyncio.gather(
-                *[
+        limiter = self.file_storage_repository_pool.get_limiter(storage_id)
+        async with self.replica_service.lease_replicas(storage) as replicas:
+            tasks = [
+                asyncio.ensure_future(
                     self.upload_file_storage(
-                        self.get_path(created_file.id),
+                        created_file,
                         file.reader,
-                        semaphore=semaphore,
+                        limiter=limiter,
+                        size=file.size,
+                        compression=storage.compression,
+                        replicas=replicas,
                     )
-                    for file, created_file in zip(files, created_files, strict=True)
-                ]
+                )
+                for file, created_file in zip(files, created_files, strict=True)
+            ]
+            try:
+                uploaded_files = await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await asyncio.shield(self.discard_files(created_files))
+                raise
+
+        with observe_stage('upload_ready', storage_id):
+            await self.file_repository.mark_uploaded(uploaded_files)
+        return uploaded_files
+
+    async def discard_files(self: Self, files: list[FileReadSchema]) -> None:
+        """
+        Удаляем записи и объекты незавершенной загрузки.
+
+        Ошибки только логируем: оставшееся удалит задача очистки зависших загрузок.
+        """
+        try:
+            _, paths = await self.blob_service.remove_files([file.id for file in files])
+            for storage_id, storage_paths in paths.items():
+                if storage_id == files[0].storage_id:
+                    await self.file_storage_repository.delete_many(storage_paths)
+                else:
+                    await self.replica_service.delete_objects(storage_id, storage_paths)
+        except Exception:
+            logger.warning('Failed to discard pending files %s', [file.id for file in files], exc_info=True)
+
+    async def create_upload_url(
+        self: Self, storage_id: uuid.UUID, upload_request: FilePresignedUploadRequestSchema
+    ) -> FilePresignedUploadResponseSchema:
+        """
+        Создаем файл в статусе PENDING и подписываем ссылку на загрузку его содержимого напрямую в хранилище.
+
+        Если клиент сообщил SHA-256 уже загруженного содержимого, файл сразу привязывается к нему
+        и становится готовым без загрузки.
+        """
+        file_id = uuid.uuid4()
+        file = await self.file_repository.create(
+            FileCreateSchema(
+                id=file_id,
+                name=upload_request.name,
+                size=upload_request.size or 0,
+                content_type=upload_request.content_type,
+                storage_id=storage_id,
+                path=self.get_path(file_id),
+                status=FileStatusEnum.PENDING,
             )
-            return created_files
+        )
+        if upload_request.sha256 is not None:
+            attached_file = await self.blob_service.attach_existing(file, upload_request.sha256)
+            if attached_file is not None:
+                await self.file_repository.mark_ready({attached_file.id: attached_file.size})
+                return FilePresignedUploadResponseSchema(
+                    file=attached_file.model_copy(update={'status': FileStatusEnum.READY})
+                )
+        presigned_url = await self.file_storage_repository.presign_write(
+            file.path,
+            expires_in=PRESIGNED_UPLOAD_EXPIRES_IN,
+            size=upload_request.size,
+            content_type=upload_request.content_type,
+            sha256=upload_request.sha256,
+        )
+        return FilePresignedUploadResponseSchema(
+            file=file,
+            url=presigned_url.url,
+            headers=presigned_url.headers,
+            expires_at=dt.datetime.now(dt.UTC) + dt.timedelta(seconds=PRESIGNED_UPLOAD_EXPIRES_IN),
+        )
 
-    async def get(self: Self, file_id: uuid.UUID) -> FileReadSchema:
+    async def complete_upload(self: Self, file_id: uuid.UUID) -> FileReadSchema:
+        """
+        Завершаем загрузку напрямую в хранилище: размер, ETag и SHA-256 берем из метаданных объекта.
+
+        Повторный вызов для готового файла возвращает его без изменений.
+        """
         file = await self.file_repository.get_or_none(file_id)
         if file is None:
             raise FileNotFoundError(file_id)
+        if file.status == FileStatusEnum.READY:
+            return file
+        storage_object = await self.file_storage_repository.head(file.path)
+        if storage_object is None:
+            raise FileNotReadyError(file_id)
+        completed_file = await self.blob_service.complete(file, storage_object)
+        if completed_file is None:
+            return await self.get(file_id)
+        if completed_file.path != file.path:
+            await self.file_storage_repository.delete(file.path)
+        return completed_file
+
+    async def create_download_url(self: Self, file_id: uuid.UUID) -> FilePresignedDownloadResponseSchema:
+        """
+        Подписываем ссылку на скачивание файла напрямую из хранилища.
+        """
+        file = await self.get_ready(file_id)
+        self.file_access_tracker.touch(file.id)
+        async with self.lease_storage(file) as file_storage_repository:
+            url = await file_storage_repository.presign_read(
+                file.path,
+                expires_in=PRESIGNED_DOWNLOAD_EXPIRES_IN,
+                filename=file.name,
+                content_type=file.content_type,
+                content_encoding=file.encoding,
+            )
+        return FilePresignedDownloadResponseSchema(
+            url=url,
+            expires_at=dt.datetime.now(dt.UTC) + dt.timedelta(seconds=PRESIGNED_DOWNLOAD_EXPIRES_IN),
+        )
+
+    async def get(self: Self, file_id: uuid.UUID) -> FileReadSchema:
+        """
+        Получаем файл, метаданные читаются через кеш.
+        """
+        started = time.perf_counter()
+        file = await self.metadata_cache_repository.get_file(file_id, lambda: self.file_repository.get_or_none(file_id))
+        if file is None:
+            raise FileNotFoundError(file_id)
+        observe_stage_duration('metadata', file.storage_id, started)
         return file
 
-    async def stream_reader(self: Self, file_schema: FileReadSchema) -> AsyncIterator[bytes]:
+    async def lookup(self: Self, storage_id: uuid.UUID, file_ids: list[uuid.UUID]) -> list[FileLookupItemSchema]:
+        """
+        Получаем метаданные нескольких файлов в порядке запроса, отсутствующие файлы отмечаем пустой записью.
+
+        Файлы читаются из кеша одним запросом, а промахи — из базы тоже одним запросом.
+        """
+        with observe_stage('metadata_lookup', storage_id):
+            files = await self.metadata_cache_repository.get_files(file_ids, self.file_repository.get_by_ids)
+        return [FileLookupItemSchema(id=file_id, file=files.get(file_id)) for file_id in file_ids]
+
+    async def get_ready(self: Self, file_id: uuid.UUID) -> FileReadSchema:
         """
-        Возвраащем для него поток на чтение.
+        Получаем файл, содержимое которого полностью загружено в хранилище.
         """
-        async for chunk in self.file_storage_repository.straming_read(self.get_path(file_schema.id)):
-            yield chunk
+        file = await self.get(file_id)
+        if file.status != FileStatusEnum.READY:
+            raise FileNotReadyError(file_id)
+        return file
 
-    async def delete(self: Self, files_id: list[uuid.UUID]) -> bool:
+    def list_files(
+        self: Self, storage_id: uuid.UUID, filter_schema: FileListFilterSchema, cursor: str | None, limit: int
+    ) -> AsyncIterator[FileReadSchema]:
         """
-        Удаление файла, который привязан к customer_code.
+        Получаем поток файлов хранилища после позиции cursor, не больше limit.
+
+        Курсор проверяется сразу, а файлы читаются из базы страницами по LIST_BATCH_SIZE по мере отдачи.
         """
-        files = await self.file_repository.get_by_ids(files_id)
+        try:
+            after = FileListCursorSchema.decode(cursor) if cursor is not None else None
+        except ValueError as value_error:
+            raise InvalidCursorError() from value_error
+        return self.iter_files(storage_id, filter_schema, after, limit)
 
-        async with self.transaction_service.begin():
-            await self.file_repository.delete([file.id for file in files])
-            semaphore = asyncio.BoundedSemaphore(4)
-            await asyncio.gather(
-                *[self.file_storage_delete(self.get_path(file.id), semaphore=semaphore) for file in files]
+    async def iter_files(
+        self: Self,
+        storage_id: uuid.UUID,
+        filter_schema: FileListFilterSchema,
+        after: FileListCursorSchema | None,
+        limit: int,
+    ) -> AsyncIterator[FileReadSchema]:
+        while limit > 0:
+            files = await self.file_repository.get_page(
+                storage_id, filter_schema, after=after, limit=min(limit, LIST_BATCH_SIZE)
             )
-            return True
+            for file in files:
+                yield file
+            if len(files) < min(limit, LIST_BATCH_SIZE):
+                return
+            limit -= len(files)
+            after = FileListCursorSchema(created_at=files[-1].created_at, id=files[-1].id)
+
+    async def get_archive_files(self: Self, storage_id: uuid.UUID, file_ids: list[uuid.UUID]) -> list[FileReadSchema]:
+        """
+        Получаем готовые файлы хранилища для архива в порядке запроса, повторы отбрасываем.
 
-    async def file_storage_delete(self: Self, path: str, *, semaphore: asyncio.BoundedSemaphore) -> None:
-        async with semaphore:
-            await self.file_storage_repository.delete(path)
+        Все файлы проверяются до начала отдачи архива, пока еще можно вернуть ошибку.
+        """
+        file_ids = list(dict.fromkeys(file_ids))
+        files = {file.id: file for file in await self.file_repository.get_by_ids(file_ids)}
+        for file_id in file_ids:
+            file = files.get(file_id)
+            if file is None or file.storage_id != storage_id:
+                raise FileNotFoundError(file_id)
+            if file.status != FileStatusEnum.READY:
+                raise FileNotReadyError(file_id)
+        return [files[file_id] for file_id in file_ids]
+
+    async def stream_reader(
+        self: Self, file_schema: FileReadSchema, byte_range: ByteRangeSchema | None = None, *, decode: bool = True
+    ) -> AsyncIterator[bytes]:
+        """
+        Возвраащем для него поток на чтение всего файла или диапазона байт.
+
+        Сжатый файл распаковывается на лету, а диапазон отсчитывается от начала исходного содержимого.
+        Без decode файл отдается так, как хранится.
+        """
+        self.file_access_tracker.touch(file_schema.id)
+        if file_schema.encoding is not None and decode:
+            chunks = decode_stream(self.read_stored(file_schema), file_schema.encoding)
+            if byte_range is not None:
+                chunks = slice_stream(chunks, byte_range.start, byte_range.end)
+        else:
+            chunks = self.read_stored(file_schema, byte_range)
+        async for chunk in observe_download(chunks, file_schema.storage_id):
+            yield chunk
+
+    def read_stored(
+        self: Self, file_schema: FileReadSchema, byte_range: ByteRangeSchema | None = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Читаем объект файла из хранилища.
+
+        Объекты удаленных хранилищ читаются через дисковый кеш, если он включен,
+        а при наличии копий — из самой быстрой доступной.
+        """
+        path = file_schema.path
+        if self.disk_cache_repository.enabled and self.get_local_path(file_schema) is None:
+            key = self.disk_cache_repository.get_key(file_schema.storage_id, path)
+            if byte_range is None:
+                return self.disk_cache_repository.read(
+                    key, file_schema.stored_size, lambda: self.read_storage(file_schema)
+                )
+            return self.disk_cache_repository.read_range(
+                key,
+                byte_range.start,
+                byte_range.end,
+                lambda: self.replica_service.read(file_schema, byte_range, primary=self.get_primary(file_schema)),
+            )
+        return self.replica_service.read(file_schema, byte_range, primary=self.get_primary(file_schema))
+
+    def read_storage(self: Self, file_schema: FileReadSchema) -> AsyncIterator[bytes]:
+        """
+        Читаем файл с отдельной арендой клиента хранилища, чтобы заполнение кеша пережило запрос.
+        """
+        return self.replica_service.read(file_schema)
+
+    def get_local_path(self: Self, file_schema: FileReadSchema) -> Path | None:
+        """
+        Получаем путь к содержимому файла на диске, если хранилище локальное.
+        """
+        file_storage_repository = self.get_primary(file_schema)
+        return file_storage_repository.get_local_path(file_schema.path) if file_storage_repository is not None else None
+
+    async def get_cache_control(self: Self, file_schema: FileReadSchema) -> str | None:
+        """
+        Получаем заголовок Cache-Control хранилища, в котором находится файл.
+
+        Хранилище читается через кеш метаданных, который сбрасывается при изменении хранилища,
+        поэтому новый заголовок применяется сразу, а не после сверки открытого клиента пула.
+        """
+        storage = await self.file_storage_repository_factory.find_storage(file_schema.storage_id)
+        return storage.cache_control if storage is not None else None
+
+    def get_primary(self: Self, file_schema: FileReadSchema) -> FileStorageRepositoryProtocol | None:
+        """
+        Получаем репозиторий хранилища запроса, если файл хранится в нем.
+
+        Файл, перенесенный в другое хранилище, по-прежнему доступен по ссылкам со старым хранилищем,
+        но читается через пул.
+        """
+        if self.file_storage_repository_pool.holds(file_schema.storage_id, self.file_storage_repository):
+            return self.file_storage_repository
+        return None
+
+    @asynccontextmanager
+    async def lease_storage(self: Self, file_schema: FileReadSchema) -> AsyncIterator[FileStorageRepositoryProtocol]:
+        """
+        Берем репозиторий хранилища, в котором находится файл.
+        """
+        file_storage_repository = self.get_primary(file_schema)
+        if file_storage_repository is not None:
+            yield file_storage_repository
+            return
+        async with self.file_storage_repository_pool.lease(file_schema.storage_id) as file_storage_repository:
+            yield file_storage_repository
+
+    async def delete(self: Self, storage_id: uuid.UUID, file_ids: list[uuid.UUID]) -> FileDeleteResponseSchema:
+        """
+        Удаляем файлы хранилища.
+
+        Объект в хранилище удаляется только вместе с последним файлом, который на него ссылается,
+        объекты удаляются пакетами, а ошибки сопоставляются с идентификаторами файлов.
+        """
+        with observe_stage('delete_records', storage_id):
+            files, paths = await self.blob_service.remove_files(file_ids, storage_id=storage_id)
+        await self.metadata_cache_repository.invalidate_files(file.id for file in files)
+        await self.disk_cache_repository.discard(
+            [self.disk_cache_repository.get_key(storage_id, path) for path in paths.get(storage_id, [])]
+        )
+        with observe_stage('delete_objects', storage_id):
+            errors = await self.delete_objects(storage_id, paths.get(storage_id, []))
+        for replica_storage_id, replica_paths in paths.items():
+            if replica_storage_id != storage_id:
+                await self.replica_service.delete_objects(replica_storage_id, replica_paths)
+        deleted_ids = {file.id for file in files}
+        return FileDeleteResponseSchema(
+            deleted=[file.id for file in files],
+            not_found=[file_id for file_id in dict.fromkeys(file_ids) if file_id not in deleted_ids],
+            errors=[
+                FileDeleteErrorSchema(file_id=file.id, message=errors[file.path])
+                for file in files
+                if file.path in errors
+            ],
+        )
+
+    async def delete_objects(self: Self, storage_id: uuid.UUID, paths: list[str]) -> dict[str, str]:
+        """
+        Удаляем объекты пакетами по DELETE_BATCH_SIZE в пределах общего лимита хранилища.
+
+        Пакет с ошибками считается неуспешной операцией и снижает лимит.
+        """
+        limiter = self.file_storage_repository_pool.get_limiter(storage_id)
+
+        async def delete_batch(batch: list[str]) -> dict[str, str]:
+            async with limiter.acquire(len(batch) / DELETE_BATCH_SIZE) as slot:
+                batch_errors = await self.file_storage_repository.delete_many(batch)
+                slot.failed = bool(batch_errors)
+                return batch_errors
+
+        errors: dict[str, str] = {}
+        batches = [paths[i : i + DELETE_BATCH_SIZE] for i in range(0, len(paths), DELETE_BATCH_SIZE)]
+        for batch_errors in await asyncio.gather(*[delete_batch(batch) for batch in batches]):
+            errors.update(batch_errors)
+        return errors
 
     async def upload_file_storage(
-        self: Self, path: str | Path, reader: StreamReadAsyncProtocol, *, semaphore: asyncio.BoundedSemaphore
-    ) -> None:
-        async with semaphore:
-            # Приходится оборачивать в io.BytesIO
-            # потому что метод UploadFile из FastAPI
-            # не содержит метод tell
-            content = io.BytesIO(await reader.read())
-            content.seek(0)
-            await self.file_storage_repository.stream_write(path, content)  # type: ignore[reportArgumentType]
+        self: Self,
+        file: FileReadSchema,
+        reader: StreamReadAsyncProtocol,
+        *,
+        limiter: ConcurrencyLimiter,
+        size: int | None = None,
+        compression: FileEncodingEnum | None = None,
+        replicas: list[tuple[uuid.UUID, FileStorageRepositoryProtocol]] | None = None,
+    ) -> FileReadSchema:
+        """
+        Загружаем содержимое файла в хранилище частями, попутно проверяя его.
+
+        - size заявлен клиентом и используется только для подбора размера части;
+        - по мере чтения вычисляются SHA-256, MD5 и CRC32C содержимого и по первым байтам определяется
+          его тип, файл при этом не перечитывается;
+        - если клиент не сообщил тип содержимого, используется определенный, по нему же решается,
+          сжимать ли файл кодировкой compression, SHA-256 и size относятся к исходному содержимому;
+        - ETag записанного объекта сверяется с MD5 отправленных частей, если хранилище вычисляет ETag по MD5;
+        - файл меньше одной части целиком читается до записи, и если такое содержимое уже есть,
+          запись в хранилище пропускается;
+        - для больших файлов хеш известен только после записи, поэтому дубликат удаляется сразу после нее;
+        - копии в replicas записываются из того же потока и не дедуплицируются;
+        - место в limiter занимают только запросы к хранилищу, а не чтение потока клиента.
+        """
+        replicas = replicas or []
+        part_size = get_part_size(size)
+        inspection = ContentInspection()
+        inspecting_reader = InspectingStreamReader(reader, inspection.inspectors)
+        if await inspecting_reader.prefetch(part_size) < part_size:
+            attached_file = await self.blob_service.attach_existing(file, inspection.sha256.hexdigest())
+            if attached_file is not None:
+                if replicas:
+                    # Копии должны совпадать с уже загруженным содержимым, в том числе по кодировке.
+                    stream = (
+                        EncodingStreamReader(inspecting_reader, attached_file.encoding)
+                        if attached_file.encoding is not None
+                        else inspecting_reader
+                    )
+                    replica_ids = await self.replica_service.write_replicas(
+                        file.path, stream, part_size=part_size, replicas=replicas
+                    )
+                    await self.replica_service.record(file.id, file.path, replica_ids)
+                return self.make_inspected_file(attached_file, inspection, etag=None)
+        content_type = self.get_content_type(file, inspection)
+        encoding = compression if is_compressible(content_type) else None
+        stream = EncodingStreamReader(inspecting_reader, encoding) if encoding is not None else inspecting_reader
+        etag_inspector = ETagInspector(part_size)
+        started = time.perf_counter()
+        written_object, replica_ids = await self.replica_service.write(
+            file.path,
+            InspectingStreamReader(stream, [etag_inspector]),
+            part_size=part_size,
+            primary=self.file_storage_repository,
+            limiter=limiter,
+            replicas=replicas,
+        )
+        written = written_object.size
+        observe_stage_duration('upload_write', file.storage_id, started)
+        observe_transfer(file.storage_id, 'upload', written, time.perf_counter() - started)
+        if (
+            written_object.etag_is_md5
+            and written_object.etag is not None
+            and written_object.etag != etag_inspector.etag
+        ):
+            upload_integrity_failures.inc({'storage_id': str(file.storage_id)})
+            for storage_id in replica_ids:
+                await self.replica_service.delete_objects(storage_id, [file.path])
+            raise FileIntegrityError(file.id, etag_inspector.etag, written_object.etag)
+        with observe_stage('upload_attach', file.storage_id):
+            attached_file = await self.blob_service.attach(
+                file,
+                inspection.sha256.hexdigest(),
+                inspecting_reader.size,
+                encoding=encoding,
+                encoded_size=written if encoding is not None else None,
+            )
+        if attached_file.path != file.path:
+            await self.file_storage_repository.delete(file.path)
+        if attached_file.encoding == encoding:
+            await self.replica_service.record(file.id, file.path, replica_ids)
+        else:
+            # Содержимое уже хранится в другой кодировке, записанные копии ему не соответствуют.
+            for storage_id in replica_ids:
+                await self.replica_service.delete_objects(storage_id, [file.path])
+        return self.make_inspected_file(
+            attached_file, inspection, etag=written_object.etag if attached_file.path == file.path else None
+        )
+
+    @staticmethod
+    def get_content_type(file: FileReadSchema, inspection: ContentInspection) -> str:
+        """
+        Тип содержимого файла: сообщенный клиентом, а если клиент его не знал, определенный по первым байтам.
+
+        Тип клиента не заменяется, даже если отличается от определенного: сигнатуры вроде BM или MZ
+        встречаются в начале текста, а контейнеры вроде docx и m4a определяются только как zip и mp4.
+        Определенный тип сохраняется отдельно в detected_content_type.
+        """
+        if file.content_type is None or file.content_type == DEFAULT_CONTENT_TYPE:
+            return inspection.content_type.content_type
+        return file.content_type
+
+    @classmethod
+    def make_inspected_file(
+        cls, file: FileReadSchema, inspection: ContentInspection, *, etag: str | None
+    ) -> FileReadSchema:
+        return file.model_copy(
+            update={
+                'content_type': cls.get_content_type(file, inspection),
+                'status': FileStatusEnum.READY,
+                **asdict(inspection.get_result(etag=etag)),
+            }
+        )
 
     @classmethod
     def get_path(cls, file_id: uuid.UUID) -> str:
         """
         Формиурем путь для файла.
         """
-        return f'/files/{file_id}'
+        return f'{FILES_PREFIX}{file_id}'
 
     @classmethod
     def get_download_path(cls, file: FileReadSchema) -> str:
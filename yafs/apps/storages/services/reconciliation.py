@@ -0,0 +1,263 @@
+import asyncio
+import datetime as dt
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Self
+
+from .blob import BlobService
+from .file import FILES_PREFIX, FileService
+from ..enums import FileStatusEnum
+from ..metrics import orphan_bytes_deleted, orphan_objects_deleted, orphan_objects_quarantined
+from ..repositories import (
+    FileDbRepository,
+    FileStorageRepositoryPool,
+    FileStorageRepositoryProtocol,
+    OrphanObjectDbRepository,
+    ReconciliationCheckpointDbRepository,
+    StorageDbRepository,
+    UploadSessionDbRepository,
+)
+from ..schemas import OrphanObjectCreateSchema, OrphanObjectReadSchema, UploadSessionReadSchema
+from ..settings import OrphanReconciliationSettingsSchema
+
+PENDING_FILES_BATCH_SIZE = 500
+"""
+Количество зависших файлов, удаляемых за одну итерацию.
+"""
+UPLOAD_SESSIONS_BATCH_SIZE = 100
+"""
+Количество брошенных загрузок частями, прерываемых за одну итерацию.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FileReconciliationService:
+    """
+    Сервис приведения записей о файлах в соответствие с содержимым хранилищ.
+    """
+
+    file_repository: FileDbRepository
+    file_storage_repository_pool: FileStorageRepositoryPool
+    upload_session_repository: UploadSessionDbRepository
+    storage_repository: StorageDbRepository
+    orphan_object_repository: OrphanObjectDbRepository
+    reconciliation_checkpoint_repository: ReconciliationCheckpointDbRepository
+    blob_service: BlobService
+
+    async def cleanup_pending_files(
+        self: Self, ttl: dt.timedelta, *, batch_size: int = PENDING_FILES_BATCH_SIZE
+    ) -> int:
+        """
+        Удаляем файлы, загрузка которых не завершилась за ttl, и возвращаем их количество.
+
+        Удаляются только записи, оставшиеся в статусе PENDING к моменту удаления,
+        объекты удаляются после записей, если на них больше никто не ссылается.
+        """
+        created_before = dt.datetime.now(dt.UTC) - ttl
+        removed = 0
+        while files := await self.file_repository.get_stale_pending(created_before, batch_size):
+            removed_files, paths = await self.blob_service.remove_files(
+                [file.id for file in files], status=FileStatusEnum.PENDING
+            )
+            for storage_id, storage_paths in paths.items():
+                await self.delete_objects(storage_id, storage_paths)
+            removed += len(removed_files)
+        if removed:
+            logger.info('Removed %s stale pending files', removed)
+        return removed
+
+    async def cleanup_upload_sessions(
+        self: Self, ttl: dt.timedelta, *, batch_size: int = UPLOAD_SESSIONS_BATCH_SIZE
+    ) -> int:
+        """
+        Прерываем загрузки частями без активности дольше ttl и возвращаем их количество.
+
+        Записанные части удаляются из хранилища, файлы удаляются, только если загрузка так и не завершилась.
+        """
+        updated_before = dt.datetime.now(dt.UTC) - ttl
+        removed = 0
+        while sessions := await self.upload_session_repository.get_stale(updated_before, batch_size):
+            for session in sessions:
+                await self.abort_upload(session)
+            _, paths = await self.blob_service.remove_files(
+                [session.file_id for session in sessions], status=FileStatusEnum.PENDING
+            )
+            await self.upload_session_repository.delete([session.id for session in sessions])
+            for storage_id, storage_paths in paths.items():
+                await self.delete_objects(storage_id, storage_paths)
+            removed += len(sessions)
+        if removed:
+            logger.info('Aborted %s stale upload sessions', removed)
+        return removed
+
+    async def reconcile_orphans(self: Self, settings: OrphanReconciliationSettingsSchema) -> int:
+        """
+        Сверяем объекты активных хранилищ с файлами и возвращаем количество удаленных потерянных объектов.
+
+        Объекты без файлов сначала помещаются в карантин и удаляются следующими запусками,
+        только если по окончании карантина на них по-прежнему никто не ссылается.
+        Запуск ограничен по времени: сверка продолжается с сохраненной позиции.
+        """
+        deadline = time.monotonic() + settings.max_duration.total_seconds()
+        removed = 0
+        for storage in await self.storage_repository.get_by_active(is_active=True):
+            if time.monotonic() >= deadline:
+                break
+            try:
+                async with self.file_storage_repository_pool.lease(storage.id) as file_storage_repository:
+                    removed += await self.delete_orphans(storage.id, file_storage_repository, settings, deadline)
+                    await self.find_orphans(storage.id, file_storage_repository, settings, deadline)
+            except Exception:
+                logger.warning('Failed to reconcile objects of storage %s', storage.id, exc_info=True)
+        return removed
+
+    async def find_orphans(
+        self: Self,
+        storage_id: uuid.UUID,
+        file_storage_repository: FileStorageRepositoryProtocol,
+        settings: OrphanReconciliationSettingsSchema,
+        deadline: float,
+    ) -> None:
+        """
+        Помещаем в карантин объекты хранилища, на которые не ссылаются файлы.
+
+        Список объектов и пути файлов читаются страницами в одном порядке байт и сравниваются слиянием,
+        позиция сохраняется после каждой страницы. Объекты моложе min_age пропускаются:
+        запись об их загрузке может быть еще не создана.
+        """
+        checkpoint = await self.reconciliation_checkpoint_repository.get_by_storage(storage_id)
+        after = checkpoint.last_path if checkpoint is not None else None
+        modified_before = dt.datetime.now(dt.UTC) - settings.min_age
+        quarantined = missing = 0
+        while time.monotonic() < deadline:
+            objects = await file_storage_repository.list_objects(
+                FILES_PREFIX, start_after=after, limit=settings.batch_size
+            )
+            is_last = len(objects) < settings.batch_size
+            until = objects[-1].path if objects and not is_last else None
+            known_paths = await self.file_repository.get_known_paths(storage_id, after=after, until=until)
+            orphans: list[OrphanObjectCreateSchema] = []
+            index = 0
+            for storage_object in objects:
+                while index < len(known_paths) and known_paths[index] < storage_object.path:
+                    missing += 1
+                    index += 1
+                if index < len(known_paths) and known_paths[index] == storage_object.path:
+                    index += 1
+                elif storage_object.modified_at < modified_before:
+                    orphans.append(
+                        OrphanObjectCreateSchema(
+                            storage_id=storage_id, path=storage_object.path, size=storage_object.size
+                        )
+                    )
+            missing += len(known_paths) - index
+            await self.orphan_object_repository.quarantine(orphans)
+            quarantined += len(orphans)
+            after = None if is_last else objects[-1].path
+            await self.reconciliation_checkpoint_repository.save(storage_id, after)
+            if is_last:
+                break
+        if quarantined:
+            orphan_objects_quarantined.add({'storage_id': str(storage_id)}, quarantined)
+            logger.info('Quarantined %s orphan objects of storage %s', quarantined, storage_id)
+        if missing:
+            # Сюда попадают и файлы, загрузка которых еще не завершена.
+            logger.info('Found %s file paths without objects in storage %s', missing, storage_id)
+
+    async def delete_orphans(
+        self: Self,
+        storage_id: uuid.UUID,
+        file_storage_repository: FileStorageRepositoryProtocol,
+        settings: OrphanReconciliationSettingsSchema,
+        deadline: float,
+    ) -> int:
+        """
+        Удаляем объекты, карантин которых закончился, не быстрее bytes_per_second.
+
+        Объекты, на которые за время карантина появились ссылки, просто выходят из карантина.
+        """
+        created_before = dt.datetime.now(dt.UTC) - settings.quarantine
+        started = time.monotonic()
+        deleted_bytes = removed = 0
+        while time.monotonic() < deadline and (
+            orphans := await self.orphan_object_repository.get_expired(storage_id, created_before, settings.batch_size)
+        ):
+            referenced_paths = await self.file_repository.get_referenced_paths(
+                storage_id, [orphan.path for orphan in orphans]
+            )
+            released = [orphan.id for orphan in orphans if orphan.path in referenced_paths]
+            await self.orphan_object_repository.delete(released)
+            failed = False
+            for group in self.split_by_size(
+                [orphan for orphan in orphans if orphan.path not in referenced_paths], settings.bytes_per_second
+            ):
+                if time.monotonic() >= deadline:
+                    break
+                async with self.file_storage_repository_pool.get_limiter(storage_id).acquire() as slot:
+                    errors = await file_storage_repository.delete_many([orphan.path for orphan in group])
+                    slot.failed = bool(errors)
+                deleted = [orphan for orphan in group if orphan.path not in errors]
+                await self.orphan_object_repository.delete([orphan.id for orphan in deleted])
+                size = sum(orphan.size for orphan in deleted)
+                orphan_objects_deleted.add({'storage_id': str(storage_id)}, len(deleted))
+                orphan_bytes_deleted.add({'storage_id': str(storage_id)}, size)
+                removed += len(deleted)
+                deleted_bytes += size
+                if errors:
+                    logger.warning('Failed to delete %s orphan objects from storage %s', len(errors), storage_id)
+                    failed = True
+                    break
+                delay = deleted_bytes / settings.bytes_per_second - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            if failed:
+                break
+        if removed:
+            logger.info('Deleted %s orphan objects (%s bytes) from storage %s', removed, deleted_bytes, storage_id)
+        return removed
+
+    @staticmethod
+    def split_by_size(orphans: list[OrphanObjectReadSchema], max_size: int) -> list[list[OrphanObjectReadSchema]]:
+        """
+        Разбиваем объекты на группы не больше max_size байт, большой объект образует группу сам по себе.
+        """
+        groups: list[list[OrphanObjectReadSchema]] = []
+        size = max_size
+        for orphan in orphans:
+            if size + orphan.size > max_size:
+                groups.append([])
+                size = 0
+            groups[-1].append(orphan)
+            size += orphan.size
+        return groups
+
+    async def abort_upload(self: Self, session: UploadSessionReadSchema) -> None:
+        """
+        Прерываем загрузку в хранилище, ошибка не должна мешать удалить саму загрузку.
+        """
+        try:
+            async with self.file_storage_repository_pool.lease(session.storage_id) as file_storage_repository:
+                await file_storage_repository.multipart_abort(FileService.get_path(session.file_id), session.upload_id)
+        except Exception:
+            logger.warning('Failed to abort upload session %s', session.id, exc_info=True)
+
+    async def delete_objects(self: Self, storage_id: uuid.UUID, paths: list[str]) -> None:
+        """
+        Удаляем объекты из хранилища.
+
+        Недоступное или отключенное хранилище не должно блокировать очистку остальных.
+        """
+        try:
+            async with self.file_storage_repository_pool.lease(storage_id) as file_storage_repository:
+                async with self.file_storage_repository_pool.get_limiter(storage_id).acquire() as slot:
+                    errors = await file_storage_repository.delete_many(paths)
+                    slot.failed = bool(errors)
+        except Exception:
+            logger.warning('Failed to delete pending objects from storage %s', storage_id, exc_info=True)
+            return
+        if errors:
+            logger.warning('Failed to delete %s pending objects from storage %s', len(errors), storage_id)
@@ -0,0 +1,351 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterator, Sequence
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from typing import Self
+
+from fast_clean.repositories.storage.reader import StreamReadProtocol
+
+from ..exceptions import StorageNotActiveError
+from ..metrics import observe_stage, storage_hedged_reads, storage_replica_failures
+from ..repositories import (
+    ConcurrencyLimiter,
+    FileReplicaDbRepository,
+    FileStorageRepositoryPool,
+    FileStorageRepositoryProtocol,
+    MetadataCacheRepository,
+)
+from ..repositories.reader import TeeBranchReader, TeeStreamReader
+from ..schemas import (
+    ByteRangeSchema,
+    FileReadSchema,
+    FileReplicaCreateSchema,
+    StorageObjectSchema,
+    StorageReadSchema,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplicaService:
+    """
+    Сервис копий файлов в других хранилищах.
+
+    - при загрузке поток читается один раз и одновременно записывается в основное хранилище и во все копии;
+    - ошибка записи копии не прерывает загрузку: файл остается доступным с меньшим количеством копий;
+    - при чтении выбирается самое быстрое доступное хранилище, а если первый байт задерживается,
+      параллельно запрашивается следующая копия и отдается ответ, пришедший первым;
+    - отключенные хранилища пропускаются и при записи, и при чтении.
+    """
+
+    file_replica_repository: FileReplicaDbRepository
+    file_storage_repository_pool: FileStorageRepositoryPool
+    metadata_cache_repository: MetadataCacheRepository
+
+    @asynccontextmanager
+    async def lease_replicas(
+        self: Self, storage: StorageReadSchema
+    ) -> AsyncIterator[list[tuple[uuid.UUID, FileStorageRepositoryProtocol]]]:
+        """
+        Берем репозитории хранилищ копий, отключенные и недоступные хранилища пропускаем.
+        """
+        async with AsyncExitStack() as stack:
+            replicas: list[tuple[uuid.UUID, FileStorageRepositoryProtocol]] = []
+            for replica_id in storage.replica_ids:
+                try:
+                    repository = await stack.enter_async_context(self.file_storage_repository_pool.lease(replica_id))
+                except Exception:
+                    logger.warning('Replica storage %s is unavailable, skipping', replica_id, exc_info=True)
+                    continue
+                replicas.append((replica_id, repository))
+            yield replicas
+
+    async def write(
+        self: Self,
+        path: str,
+        stream: StreamReadProtocol,
+        *,
+        part_size: int,
+        primary: FileStorageRepositoryProtocol,
+        limiter: ConcurrencyLimiter,
+        replicas: Sequence[tuple[uuid.UUID, FileStorageRepositoryProtocol]],
+    ) -> tuple[StorageObjectSchema, list[uuid.UUID]]:
+        """
+        Записываем поток в основное хранилище и копии и возвращаем объект, записанный в основное хранилище,
+        и хранилища, в которые копия записана полностью.
+
+        Запросы к основному хранилищу ограничивает limiter, к копиям — лимиты их хранилищ.
+        Ошибка основного хранилища прерывает запись копий.
+        """
+        if not replicas:
+            return await primary.multipart_write(path, stream, limiter=limiter, part_size=part_size), []
+        tee = TeeStreamReader(stream, len(replicas) + 1, window=part_size)
+        primary_task = asyncio.ensure_future(
+            self.write_branch(primary, path, tee.branches[0], limiter=limiter, part_size=part_size)
+        )
+        replica_ids = await self.write_tee(tee, path, replicas, part_size=part_size, primary_task=primary_task)
+        return primary_task.result(), replica_ids
+
+    async def write_replicas(
+        self: Self,
+        path: str,
+        stream: StreamReadProtocol,
+        *,
+        part_size: int,
+        replicas: Sequence[tuple[uuid.UUID, FileStorageRepositoryProtocol]],
+    ) -> list[uuid.UUID]:
+        """
+        Записываем поток только в копии, например когда содержимое в основном хранилище уже есть,
+        и возвращаем хранилища, в которые копия записана полностью.
+        """
+        if not replicas:
+            return []
+        return await self.write_tee(
+            TeeStreamReader(stream, len(replicas), window=part_size), path, replicas, part_size=part_size
+        )
+
+    async def write_tee(
+        self: Self,
+        tee: TeeStreamReader,
+        path: str,
+        replicas: Sequence[tuple[uuid.UUID, FileStorageRepositoryProtocol]],
+        *,
+        part_size: int,
+        primary_task: asyncio.Future[StorageObjectSchema] | None = None,
+    ) -> list[uuid.UUID]:
+        """
+        Записываем копии из последних ветвей tee, дожидаясь записи в основное хранилище, если она идет.
+        """
+        replica_branches = tee.branches[len(tee.branches) - len(replicas) :]
+        replica_tasks = {
+            storage_id: asyncio.ensure_future(
+                self.write_replica(storage_id, repository, path, branch, part_size=part_size)
+            )
+            for (storage_id, repository), branch in zip(replicas, replica_branches, strict=True)
+        }
+        tasks = [*([primary_task] if primary_task is not None else []), *replica_tasks.values()]
+        try:
+            if primary_task is not None:
+                await primary_task
+            await asyncio.wait(replica_tasks.values())
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            await tee.close()
+        replica_ids: list[uuid.UUID] = []
+        for storage_id, task in replica_tasks.items():
+            if task.exception() is None:
+                replica_ids.append(storage_id)
+            else:
+                logger.warning('Failed to write replica %s to storage %s', path, storage_id, exc_info=task.exception())
+        return replica_ids
+
+    async def write_replica(
+        self: Self,
+        storage_id: uuid.UUID,
+        repository: FileStorageRepositoryProtocol,
+        path: str,
+        branch: TeeBranchReader,
+        *,
+        part_size: int,
+    ) -> StorageObjectSchema:
+        limiter = self.file_storage_repository_pool.get_limiter(storage_id)
+        try:
+            with observe_stage('replica_write', storage_id):
+                return await self.write_branch(repository, path, branch, limiter=limiter, part_size=part_size)
+        except Exception:
+            storage_replica_failures.inc({'storage_id': str(storage_id), 'operation': 'write'})
+            raise
+
+    @staticmethod
+    async def write_branch(
+        repository: FileStorageRepositoryProtocol,
+        path: str,
+        branch: TeeBranchReader,
+        *,
+        limiter: ConcurrencyLimiter,
+        part_size: int,
+    ) -> StorageObjectSchema:
+        try:
+            return await repository.multipart_write(path, branch, limiter=limiter, part_size=part_size)
+        finally:
+            # Прерванная запись не должна задерживать чтение потока остальными хранилищами.
+            branch.close()
+
+    async def record(self: Self, file_id: uuid.UUID, path: str, storage_ids: Sequence[uuid.UUID]) -> None:
+        """
+        Сохраняем записанные копии файла.
+        """
+        if not storage_ids:
+            return
+        await self.file_replica_repository.bulk_create(
+            [FileReplicaCreateSchema(file_id=file_id, storage_id=storage_id, path=path) for storage_id in storage_ids]
+        )
+        await self.metadata_cache_repository.invalidate_replicas([file_id])
+
+    async def delete_objects(self: Self, storage_id: uuid.UUID, paths: list[str]) -> None:
+        """
+        Удаляем копии из хранилища.
+
+        Ошибки только логируем: оставшиеся объекты удалит сверка хранилища с файлами.
+        """
+        if not paths:
+            return
+        try:
+            async with self.file_storage_repository_pool.lease(storage_id) as file_storage_repository:
+                errors = await file_storage_repository.delete_many(paths)
+        except Exception:
+            logger.warning('Failed to delete replicas from storage %s', storage_id, exc_info=True)
+            return
+        if errors:
+            logger.warning('Failed to delete %s replicas from storage %s', len(errors), storage_id)
+
+    async def get_locations(self: Self, file: FileReadSchema) -> list[tuple[uuid.UUID, str]]:
+        """
+        Получаем хранилища и пути, из которых можно прочитать файл, начиная с самого быстрого доступного.
+
+        Копии ищутся, только если у хранилища файла задана репликация, и читаются через кеш метаданных.
+        """
+        storage = await self.file_storage_repository_pool.get_storage(file.storage_id)
+        locations: list[tuple[uuid.UUID, str]] = []
+        if storage is not None and storage.is_active:
+            locations.append((file.storage_id, file.path))
+        if storage is not None and storage.replica_ids:
+            replicas = await self.metadata_cache_repository.get_replicas(
+                file.id, lambda: self.file_replica_repository.get_by_files([file.id])
+            )
+            for replica in replicas:
+                replica_storage = await self.file_storage_repository_pool.get_storage(replica.storage_id)
+                if replica_storage is not None and replica_storage.is_active:
+                    locations.append((replica.storage_id, replica.path))
+        if not locations:
+            raise StorageNotActiveError(file.storage_id)
+        return sorted(
+            locations, key=lambda location: self.file_storage_repository_pool.get_health(location[0]).get_rank()
+        )
+
+    async def read(
+        self: Self,
+        file: FileReadSchema,
+        byte_range: ByteRangeSchema | None = None,
+        *,
+        primary: FileStorageRepositoryProtocol | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Читаем объект файла или диапазон его байт из самой быстрой доступной копии.
+
+        Если файл есть только в основном хранилище, он читается через уже полученный репозиторий primary.
+        """
+        locations = await self.get_locations(file)
+        if primary is not None and locations == [(file.storage_id, file.path)]:
+            chunks = (
+                primary.straming_read(file.path)
+                if byte_range is None
+                else primary.stream_read_range(file.path, byte_range.start, byte_range.end)
+            )
+            async for chunk in chunks:
+                yield chunk
+            return
+        generator, first_chunk = await self.open_fastest(file.storage_id, locations, byte_range)
+        try:
+            if first_chunk is not None:
+                yield first_chunk
+                async for chunk in generator:
+                    yield chunk
+        finally:
+            await generator.aclose()
+
+    async def open_fastest(
+        self: Self,
+        storage_id: uuid.UUID,
+        locations: list[tuple[uuid.UUID, str]],
+        byte_range: ByteRangeSchema | None,
+    ) -> tuple[AsyncGenerator[bytes], bytes | None]:
+        """
+        Начинаем чтение копий по очереди и возвращаем ту, что первой отдала первый байт, вместе с ним.
+
+        Следующая копия запрашивается, если текущая не ответила за свое обычное время или вернула ошибку,
+        остальные чтения отменяются. Ошибка возвращается, только если не ответила ни одна копия.
+        """
+        remaining = deque(locations)
+        attempts: dict[asyncio.Future[bytes | None], AsyncGenerator[bytes]] = {}
+        error: BaseException | None = None
+        delay: float | None = None
+        start_next = True
+        try:
+            while True:
+                if start_next and remaining:
+                    location_storage_id, path = remaining.popleft()
+                    generator = self.read_location(location_storage_id, path, byte_range)
+                    attempts[asyncio.ensure_future(self.read_first(generator))] = generator
+                    delay = self.file_storage_repository_pool.get_health(location_storage_id).hedge_delay
+                if not attempts:
+                    assert error is not None
+                    raise error
+                done, _ = await asyncio.wait(
+                    attempts, timeout=delay if remaining else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    storage_hedged_reads.inc({'storage_id': str(storage_id)})
+                    start_next = True
+                    continue
+                fastest: tuple[AsyncGenerator[bytes], bytes | None] | None = None
+                for task in done:
+                    generator = attempts.pop(task)
+                    if fastest is None and task.exception() is None:
+                        fastest = generator, task.result()
+                        continue
+                    error = task.exception() or error
+                    await generator.aclose()
+                if fastest is not None:
+                    return fastest
+                start_next = True
+        finally:
+            for task in attempts:
+                task.cancel()
+            await asyncio.gather(*attempts, return_exceptions=True)
+            for generator in attempts.values():
+                await generator.aclose()
+
+    @staticmethod
+    async def read_first(generator: AsyncGenerator[bytes]) -> bytes | None:
+        return await anext(generator, None)
+
+    async def read_location(
+        self: Self, storage_id: uuid.UUID, path: str, byte_range: ByteRangeSchema | None
+    ) -> AsyncGenerator[bytes]:
+        """
+        Читаем объект из хранилища, учитывая задержку первого байта и ошибки в его состоянии.
+        """
+        health = self.file_storage_repository_pool.get_health(storage_id)
+        started = time.perf_counter()
+        received = False
+        try:
+            async with self.file_storage_repository_pool.lease(storage_id) as file_storage_repository:
+                chunks = (
+                    file_storage_repository.straming_read(path)
+                    if byte_range is None
+                    else file_storage_repository.stream_read_range(path, byte_range.start, byte_range.end)
+                )
+                async for chunk in chunks:
+                    if not received:
+                        received = True
+                        health.observe(time.perf_counter() - started)
+                    yield chunk
+        except asyncio.CancelledError:
+            if not received:
+                # Отмененное чтение медленнее выбранного, учитываем хотя бы нижнюю границу его задержки.
+                health.observe_latency(time.perf_counter() - started)
+            raise
+        except Exception:
+            health.fail()
+            storage_replica_failures.inc({'storage_id': str(storage_id), 'operation': 'read'})
+            raise
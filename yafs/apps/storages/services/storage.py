@@ -1,3 +1,4 @@
+import uuid
 from dataclasses import dataclass
 from typing import Self
 
@@ -5,24 +6,97 @@ from fast_clean.repositories.storage.schemas import S3StorageParamsSchema
 from fast_clean.services.cryptography import CryptographyServiceProtocol
 
 from ..enums import FileStorageTypeEnum
-from ..exceptions import StorageTypeNotFoundError
-from ..repositories import StorageDbRepository
-from ..schemas import StorageCreateRequestSchema, StorageCreateSchema, StorageReadSchema
+from ..exceptions import InvalidReplicaStorageError, InvalidTierStorageError, StorageTypeNotFoundError
+from ..repositories import FileStorageRepositoryPool, MetadataCacheRepository, StorageDbRepository
+from ..schemas import (
+    LocalFileStorageParamsSchema,
+    StorageCreateRequestSchema,
+    StorageCreateSchema,
+    StorageReadSchema,
+    StorageUpdateRequestSchema,
+    StorageUpdateSchema,
+)
 
 
 @dataclass
 class StorageService:
     storage_repository: StorageDbRepository
     crypto_service: CryptographyServiceProtocol
+    file_storage_repository_pool: FileStorageRepositoryPool
+    metadata_cache_repository: MetadataCacheRepository
 
     async def add_storage(self: Self, storage_create_schema: StorageCreateRequestSchema) -> StorageReadSchema:
-        match storage_create_schema.type:
+        e_params = self.encrypt_params(storage_create_schema.type, storage_create_schema.params)
+        return await self.storage_repository.create(
+            StorageCreateSchema(
+                type=storage_create_schema.type,
+                params=e_params,
+                max_concurrency=storage_create_schema.max_concurrency,
+                compression=storage_create_schema.compression,
+                replica_ids=await self.validate_replica_ids(None, storage_create_schema.replica_ids),
+                tier_storage_id=await self.validate_tier_storage_id(None, storage_create_schema.tier_storage_id),
+                tier_after=storage_create_schema.tier_after,
+                cache_control=storage_create_schema.cache_control,
+            )
+        )
+
+    async def update_storage(
+        self: Self, storage_id: uuid.UUID, storage_update_schema: StorageUpdateRequestSchema
+    ) -> StorageReadSchema:
+        """
+        Изменяем параметры хранилища, сбрасываем его кеш и клиент в пуле.
+        """
+        storage = await self.storage_repository.get(storage_id)
+        update_data = storage_update_schema.model_dump(exclude_unset=True)
+        if storage_update_schema.params is not None:
+            update_data['params'] = self.encrypt_params(storage.type, storage_update_schema.params)
+        if storage_update_schema.replica_ids is not None:
+            update_data['replica_ids'] = await self.validate_replica_ids(storage_id, storage_update_schema.replica_ids)
+        if storage_update_schema.tier_storage_id is not None:
+            update_data['tier_storage_id'] = await self.validate_tier_storage_id(
+                storage_id, storage_update_schema.tier_storage_id
+            )
+        if storage_update_schema.tier_after is None:
+            update_data.pop('tier_after', None)
+        storage = await self.storage_repository.update(StorageUpdateSchema(id=storage_id, **update_data))
+        await self.metadata_cache_repository.invalidate_storage(storage_id)
+        await self.file_storage_repository_pool.invalidate(storage_id)
+        return storage
+
+    async def validate_replica_ids(
+        self: Self, storage_id: uuid.UUID | None, replica_ids: list[uuid.UUID]
+    ) -> list[uuid.UUID]:
+        """
+        Проверяем, что хранилища копий существуют и не совпадают с самим хранилищем.
+        """
+        replica_ids = list(dict.fromkeys(replica_ids))
+        for replica_id in replica_ids:
+            if replica_id == storage_id or await self.storage_repository.get_or_none(replica_id) is None:
+                raise InvalidReplicaStorageError(replica_id)
+        return replica_ids
+
+    async def validate_tier_storage_id(
+        self: Self, storage_id: uuid.UUID | None, tier_storage_id: uuid.UUID | None
+    ) -> uuid.UUID | None:
+        """
+        Проверяем, что хранилище для переноса файлов существует и не совпадает с самим хранилищем.
+        """
+        if tier_storage_id is None:
+            return None
+        if tier_storage_id == storage_id or await self.storage_repository.get_or_none(tier_storage_id) is None:
+            raise InvalidTierStorageError(tier_storage_id)
+        return tier_storage_id
+
+    def encrypt_params(self: Self, storage_type: FileStorageTypeEnum, params: dict[str, str | int | bool]) -> str:
+        """
+        Проверяем параметры подключения для типа хранилища и шифруем их.
+        """
+        validate_params: S3StorageParamsSchema | LocalFileStorageParamsSchema
+        match storage_type:
             case FileStorageTypeEnum.S3:
-                validate_params = S3StorageParamsSchema.model_validate(storage_create_schema.params)
+                validate_params = S3StorageParamsSchema.model_validate(params)
+            case FileStorageTypeEnum.LOCAL:
+                validate_params = LocalFileStorageParamsSchema.model_validate(params)
             case _:
                 raise StorageTypeNotFoundError()
-        params = validate_params.model_dump_json()
-        e_params = self.crypto_service.encrypt(params)
-        return await self.storage_repository.create(
-            StorageCreateSchema(type=storage_create_schema.type, params=e_params)
-        )
+        return self.crypto_service.encrypt(validate_params.model_dump_json())
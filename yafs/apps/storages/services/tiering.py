@@ -0,0 +1,308 @@
+import asyncio
+import datetime as dt
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Self
+
+from fast_clean.services.transaction import TransactionService
+
+from ..inspection import HashInspector, InspectingStreamReader
+from ..metrics import observe_stage, tiered_bytes, tiered_files, tiering_failures
+from ..repositories import (
+    BlobDbRepository,
+    FileDbRepository,
+    FileReplicaDbRepository,
+    FileStorageRepositoryPool,
+    FileStorageRepositoryProtocol,
+    MetadataCacheRepository,
+    OrphanObjectDbRepository,
+    StorageDbRepository,
+)
+from ..repositories.reader import READ_CHUNK_SIZE, IteratorStreamReader, get_part_size
+from ..schemas import (
+    FileAccessSchema,
+    FileReadSchema,
+    OrphanObjectCreateSchema,
+    StorageObjectSchema,
+    StorageReadSchema,
+)
+from ..settings import TieringSettingsSchema
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TieringRun:
+    """
+    Ограничения одного запуска переноса.
+    """
+
+    deadline: float
+    bytes_per_second: int
+    semaphore: asyncio.Semaphore
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    """
+    Сессия базы общая для приложения, поэтому обращения к базе выполняются по одному,
+    а параллельно идет только копирование объектов.
+    """
+    started: float = field(default_factory=time.monotonic)
+    copied: int = 0
+
+    @property
+    def is_expired(self: Self) -> bool:
+        return time.monotonic() >= self.deadline
+
+    async def throttle(self: Self, size: int) -> None:
+        """
+        Учитываем переданные байты и ждем, если перенос опережает ограничение скорости.
+        """
+        self.copied += size
+        delay = self.copied / self.bytes_per_second - (time.monotonic() - self.started)
+        if delay > 0:
+            await asyncio.sleep(min(delay, max(self.deadline - time.monotonic(), 0)))
+
+
+@dataclass
+class FileTieringService:
+    """
+    Сервис переноса давно не читавшихся файлов в более дешевое хранилище.
+
+    - объект копируется потоком и проверяется по SHA-256, перечитанному из нового хранилища;
+    - файлы переводятся на копию одной транзакцией, только если за время копирования их не читали
+      и на объект не сослались новые файлы;
+    - старый объект помещается в карантин и удаляется сверкой хранилища позже,
+      поэтому начатые скачивания и ссылки со старым хранилищем продолжают работать.
+    """
+
+    file_repository: FileDbRepository
+    blob_repository: BlobDbRepository
+    file_replica_repository: FileReplicaDbRepository
+    storage_repository: StorageDbRepository
+    orphan_object_repository: OrphanObjectDbRepository
+    file_storage_repository_pool: FileStorageRepositoryPool
+    metadata_cache_repository: MetadataCacheRepository
+    transaction_service: TransactionService
+
+    async def tier_files(self: Self, settings: TieringSettingsSchema) -> int:
+        """
+        Переносим давно не читавшиеся файлы активных хранилищ и возвращаем их количество.
+
+        Запуск ограничен по времени: оставшиеся файлы переносятся следующим запуском.
+        """
+        run = TieringRun(
+            deadline=time.monotonic() + settings.max_duration.total_seconds(),
+            bytes_per_second=settings.bytes_per_second,
+            semaphore=asyncio.Semaphore(settings.concurrency),
+        )
+        moved = 0
+        for storage in await self.storage_repository.get_tiered():
+            if run.is_expired:
+                break
+            try:
+                moved += await self.tier_storage(storage, run, batch_size=settings.batch_size)
+            except Exception:
+                logger.warning('Failed to tier files of storage %s', storage.id, exc_info=True)
+        return moved
+
+    async def tier_storage(self: Self, storage: StorageReadSchema, run: TieringRun, *, batch_size: int) -> int:
+        """
+        Переносим файлы хранилища, начиная с самых давно читавшихся.
+
+        Объекты страницы переносятся параллельно, но не больше concurrency одновременно.
+        """
+        assert storage.tier_storage_id is not None
+        accessed_before = dt.datetime.now(dt.UTC) - storage.tier_after
+        after: FileAccessSchema | None = None
+        moved = 0
+        async with (
+            self.file_storage_repository_pool.lease(storage.id) as source,
+            self.file_storage_repository_pool.lease(storage.tier_storage_id) as target,
+        ):
+            while not run.is_expired:
+                async with run.lock:
+                    files = await self.file_repository.get_cold(
+                        storage.id, accessed_before, after=after, limit=batch_size
+                    )
+                paths = list(dict.fromkeys(file.path for file in files))
+                for count in await asyncio.gather(
+                    *[self.move_object(storage, path, source, target, accessed_before, run) for path in paths]
+                ):
+                    moved += count
+                if len(files) < batch_size:
+                    break
+                after = files[-1]
+        if moved:
+            logger.info('Moved %s cold files from storage %s to storage %s', moved, storage.id, storage.tier_storage_id)
+        return moved
+
+    async def move_object(
+        self: Self,
+        storage: StorageReadSchema,
+        path: str,
+        source: FileStorageRepositoryProtocol,
+        target: FileStorageRepositoryProtocol,
+        accessed_before: dt.datetime,
+        run: TieringRun,
+    ) -> int:
+        """
+        Переносим объект со всеми файлами, которые на него ссылаются, и возвращаем количество перенесенных файлов.
+
+        Ошибка переноса объекта не прерывает перенос остальных, объект останется на месте до следующего запуска.
+        """
+        async with run.semaphore:
+            if run.is_expired:
+                return 0
+            try:
+                with observe_stage('tier_move', storage.id):
+                    return await self.move(storage, path, source, target, accessed_before, run)
+            except Exception:
+                tiering_failures.inc({'storage_id': str(storage.id)})
+                logger.warning('Failed to move object %s of storage %s', path, storage.id, exc_info=True)
+                return 0
+
+    async def move(
+        self: Self,
+        storage: StorageReadSchema,
+        path: str,
+        source: FileStorageRepositoryProtocol,
+        target: FileStorageRepositoryProtocol,
+        accessed_before: dt.datetime,
+        run: TieringRun,
+    ) -> int:
+        assert storage.tier_storage_id is not None
+        target_id = storage.tier_storage_id
+        async with run.lock:
+            files = await self.file_repository.lock_cold_path(storage.id, path, accessed_before)
+            if files is None:
+                return 0
+            file = files[0]
+            # Объект не копируется, если в хранилище переноса уже записана копия файла или такое же содержимое.
+            replicas = await self.file_replica_repository.get_by_files([file.id for file in files])
+            copied = not any(replica.storage_id == target_id and replica.path == path for replica in replicas) and (
+                file.blob_id is None
+                or file.sha256 is None
+                or await self.blob_repository.find(target_id, sha256=file.sha256) is None
+            )
+        try:
+            if copied:
+                await self.copy(source, target, target_id, file, run)
+            storage_object = await target.head(path)
+            async with run.lock:
+                moved = await self.repoint(storage.id, target_id, path, accessed_before, storage_object=storage_object)
+        except BaseException:
+            if copied:
+                await asyncio.shield(self.delete_copy(target, target_id, path))
+            raise
+        if moved is None:
+            # Файлы прочитали или на объект сослался новый файл, перенос повторится следующим запуском.
+            if copied:
+                await self.delete_copy(target, target_id, path)
+            return 0
+        moved_files, merged = moved
+        if merged and copied:
+            await self.delete_copy(target, target_id, path)
+        async with run.lock:
+            await self.metadata_cache_repository.invalidate_files(file.id for file in moved_files)
+            await self.orphan_object_repository.quarantine(
+                [OrphanObjectCreateSchema(storage_id=storage.id, path=path, size=file.stored_size)]
+            )
+        tiered_files.add({'storage_id': str(storage.id)}, len(moved_files))
+        return len(moved_files)
+
+    async def copy(
+        self: Self,
+        source: FileStorageRepositoryProtocol,
+        target: FileStorageRepositoryProtocol,
+        target_id: uuid.UUID,
+        file: FileReadSchema,
+        run: TieringRun,
+    ) -> None:
+        """
+        Копируем объект файла потоком и проверяем копию, перечитывая ее из нового хранилища.
+
+        Объект исходного хранилища проверяется по SHA-256 файла, если он хранится без сжатия.
+        """
+        size = file.stored_size
+        source_sha256 = HashInspector('sha256')
+        reader = InspectingStreamReader(IteratorStreamReader(source.straming_read(file.path)), [source_sha256])
+        limiter = self.file_storage_repository_pool.get_limiter(target_id)
+        with observe_stage('tier_copy', target_id):
+            written_object = await target.multipart_write(
+                file.path, reader, limiter=limiter, part_size=get_part_size(size)
+            )
+        written = written_object.size
+        await run.throttle(written)
+        sha256 = source_sha256.hexdigest()
+        if written != size or (file.encoding is None and file.sha256 is not None and sha256 != file.sha256):
+            raise ValueError(f'Object {file.path} does not match file {file.id}')
+        with observe_stage('tier_verify', target_id):
+            copy_sha256, copy_size = await self.hash_object(target, file.path)
+        await run.throttle(copy_size)
+        if copy_sha256 != sha256 or copy_size != size:
+            raise ValueError(f'Copy of object {file.path} in storage {target_id} does not match the source')
+        tiered_bytes.add({'storage_id': str(file.storage_id)}, size)
+
+    async def repoint(
+        self: Self,
+        storage_id: uuid.UUID,
+        target_id: uuid.UUID,
+        path: str,
+        accessed_before: dt.datetime,
+        *,
+        storage_object: StorageObjectSchema | None,
+    ) -> tuple[list[FileReadSchema], bool] | None:
+        """
+        Переводим файлы объекта на копию в хранилище переноса одной транзакцией.
+
+        Файлы блокируются раньше содержимого, в том же порядке, что и при удалении. Если за время ожидания
+        блокировки содержимого на объект сослался новый файл, перенос откладывается. Если в хранилище
+        переноса уже есть такое же содержимое, файлы переходят на него, а ссылки объединяются,
+        иначе — на объект storage_object по тому же пути.
+        Возвращаем перенесенные файлы и признак объединения или None, если перенос отложен.
+        """
+        async with self.transaction_service.begin():
+            files = await self.file_repository.lock_cold_path(storage_id, path, accessed_before)
+            if files is None:
+                return None
+            file_ids = [file.id for file in files]
+            blob = await self.blob_repository.find(storage_id, path=path, for_update=True)
+            target_blob = None
+            if blob is not None:
+                locked_files = await self.file_repository.lock_cold_path(storage_id, path, accessed_before)
+                if locked_files is None or [file.id for file in locked_files] != file_ids:
+                    return None
+                target_blob = await self.blob_repository.find(target_id, sha256=blob.sha256, for_update=True)
+            if target_blob is None and storage_object is None:
+                return None
+            if blob is not None and target_blob is not None:
+                await self.file_repository.move(file_ids, target_id, path=target_blob.path, blob=target_blob, etag=None)
+                await self.blob_repository.merge(blob, target_blob)
+            elif storage_object is not None:
+                await self.file_repository.move(file_ids, target_id, path=path, blob=None, etag=storage_object.etag)
+                if blob is not None:
+                    await self.blob_repository.move(blob.id, target_id)
+            # Копия в хранилище переноса стала основным объектом.
+            await self.file_replica_repository.delete_by_storage(file_ids, target_id)
+        return files, target_blob is not None
+
+    async def delete_copy(self: Self, target: FileStorageRepositoryProtocol, target_id: uuid.UUID, path: str) -> None:
+        """
+        Удаляем ненужную копию, ошибку только логируем: объект удалит сверка хранилища с файлами.
+        """
+        try:
+            await target.delete(path)
+        except Exception:
+            logger.warning('Failed to delete copy %s from storage %s', path, target_id, exc_info=True)
+
+    @staticmethod
+    async def hash_object(file_storage_repository: FileStorageRepositoryProtocol, path: str) -> tuple[str, int]:
+        """
+        Читаем объект целиком и возвращаем его SHA-256 и размер.
+        """
+        sha256 = HashInspector('sha256')
+        reader = InspectingStreamReader(IteratorStreamReader(file_storage_repository.straming_read(path)), [sha256])
+        while await reader.read(READ_CHUNK_SIZE):
+            pass
+        return sha256.hexdigest(), reader.size
@@ -0,0 +1,266 @@
+import asyncio
+import datetime as dt
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, replace
+from typing import Self
+
+from fast_clean.services.transaction import TransactionService
+
+from .blob import BlobService
+from .file import FileService
+from ..enums import FileStatusEnum
+from ..exceptions import (
+    FileNotReadyError,
+    InvalidUploadPartError,
+    UploadIncompleteError,
+    UploadSessionNotFoundError,
+    UploadTooLargeError,
+)
+from ..inspection import ContentInspection, InspectingStreamReader
+from ..metrics import observe_stage, observe_transfer
+from ..repositories import (
+    FileDbRepository,
+    FileStorageRepositoryPool,
+    FileStorageRepositoryProtocol,
+    UploadPartDbRepository,
+    UploadSessionDbRepository,
+)
+from ..repositories.concurrency import UPLOAD_COST_UNIT
+from ..repositories.reader import (
+    READ_CHUNK_SIZE,
+    UPLOAD_MAX_PART_SIZE,
+    UPLOAD_MAX_PARTS,
+    UPLOAD_MIN_PART_SIZE,
+    IteratorStreamReader,
+    SizedStreamReader,
+    get_part_size,
+)
+from ..schemas import (
+    FileCreateSchema,
+    FileReadSchema,
+    UploadPartCreateSchema,
+    UploadPartReadSchema,
+    UploadPartResponseSchema,
+    UploadSessionCreateRequestSchema,
+    UploadSessionCreateSchema,
+    UploadSessionReadSchema,
+    UploadSessionResponseSchema,
+)
+
+UPLOAD_SESSION_TTL = dt.timedelta(hours=24)
+"""
+Время без записи частей, после которого загрузка считается брошенной и прерывается.
+"""
+
+
+@dataclass
+class UploadSessionService:
+    """
+    Сервис загрузки файлов частями.
+
+    - части соответствуют частям multipart загрузки хранилища и записываются в любом порядке и параллельно;
+    - состояние загрузки хранится в базе, поэтому ее можно продолжить после перезапуска или на другом экземпляре;
+    - до завершения файл находится в статусе PENDING и недоступен для чтения;
+    - части пишутся в хранилище потоком, а содержимое проверяется один раз при завершении загрузки.
+    """
+
+    file_repository: FileDbRepository
+    upload_session_repository: UploadSessionDbRepository
+    upload_part_repository: UploadPartDbRepository
+    file_storage_repository: FileStorageRepositoryProtocol
+    file_storage_repository_pool: FileStorageRepositoryPool
+    blob_service: BlobService
+    transaction_service: TransactionService
+
+    async def create(
+        self: Self, storage_id: uuid.UUID, upload_request: UploadSessionCreateRequestSchema
+    ) -> UploadSessionResponseSchema:
+        """
+        Создаем файл в статусе PENDING и начинаем multipart загрузку в хранилище.
+        """
+        part_size = self.get_session_part_size(upload_request.size, upload_request.part_size)
+        file_id = uuid.uuid4()
+        path = FileService.get_path(file_id)
+        upload_id = await self.file_storage_repository.multipart_create(path)
+        try:
+            async with self.transaction_service.begin():
+                file = await self.file_repository.create(
+                    FileCreateSchema(
+                        id=file_id,
+                        name=upload_request.name,
+                        size=upload_request.size,
+                        content_type=upload_request.content_type,
+                        storage_id=storage_id,
+                        path=path,
+                        status=FileStatusEnum.PENDING,
+                    )
+                )
+                session = await self.upload_session_repository.create(
+                    UploadSessionCreateSchema(
+                        storage_id=storage_id,
+                        file_id=file_id,
+                        upload_id=upload_id,
+                        size=upload_request.size,
+                        part_size=part_size,
+                    )
+                )
+        except BaseException:
+            await asyncio.shield(self.file_storage_repository.multipart_abort(path, upload_id))
+            raise
+        return self.make_response(session, file, [])
+
+    async def get_state(self: Self, storage_id: uuid.UUID, session_id: uuid.UUID) -> UploadSessionResponseSchema:
+        """
+        Получаем записанные части и смещение, с которого нужно продолжить загрузку.
+        """
+        session = await self.get_session(storage_id, session_id)
+        file = await self.file_repository.get(session.file_id)
+        parts = await self.upload_part_repository.get_by_session(session.id)
+        return self.make_response(session, file, parts)
+
+    async def write_part(
+        self: Self, storage_id: uuid.UUID, session_id: uuid.UUID, part_number: int, chunks: AsyncIterator[bytes]
+    ) -> UploadPartResponseSchema:
+        """
+        Записываем часть в хранилище и сохраняем ее ETag.
+
+        Часть должна иметь ровно ожидаемый размер: part_size, а для последней части остаток файла.
+        """
+        session = await self.get_session(storage_id, session_id)
+        if not 1 <= part_number <= session.parts_count:
+            raise InvalidUploadPartError(part_number, f'номер части должен быть от 1 до {session.parts_count}')
+        size = session.get_part_size(part_number)
+        stream = SizedStreamReader(chunks, size)
+        limiter = self.file_storage_repository_pool.get_limiter(storage_id)
+        started = time.perf_counter()
+        with observe_stage('upload_part', storage_id):
+            try:
+                etag = await self.file_storage_repository.multipart_write_part(
+                    FileService.get_path(session.file_id), session.upload_id, part_number, stream, limiter=limiter
+                )
+            except ValueError as value_error:
+                if not stream.is_invalid:
+                    raise
+                raise InvalidUploadPartError(part_number, f'ожидается {size} байт') from value_error
+        observe_transfer(storage_id, 'upload', size, time.perf_counter() - started)
+        async with self.transaction_service.begin():
+            part = await self.upload_part_repository.save(
+                UploadPartCreateSchema(session_id=session.id, part_number=part_number, size=size, etag=etag)
+            )
+            await self.upload_session_repository.touch(session.id)
+        return UploadPartResponseSchema(part_number=part.part_number, size=part.size, etag=part.etag)
+
+    async def complete(self: Self, storage_id: uuid.UUID, session_id: uuid.UUID) -> FileReadSchema:
+        """
+        Собираем файл из частей в хранилище и переводим его в статус READY.
+
+        Части записываются без проверки содержимого, поэтому собранный файл один раз читается целиком:
+        вычисляются SHA-256 для дедупликации, MD5, CRC32C и тип содержимого, как при обычной загрузке.
+        Сжатие хранилища к таким файлам не применяется: объект собирает хранилище, и сжатие потребовало бы
+        его перезаписи.
+        """
+        session = await self.get_session(storage_id, session_id)
+        file = await self.file_repository.get(session.file_id)
+        if file.status == FileStatusEnum.READY:
+            # Повтор завершения, которое не успело удалить загрузку.
+            await self.upload_session_repository.delete([session.id])
+            return file
+        parts = {part.part_number: part for part in await self.upload_part_repository.get_by_session(session.id)}
+        missing_parts = [
+            part_number
+            for part_number in range(1, session.parts_count + 1)
+            if part_number not in parts or parts[part_number].size != session.get_part_size(part_number)
+        ]
+        if missing_parts:
+            raise UploadIncompleteError(session.id, missing_parts)
+
+        limiter = self.file_storage_repository_pool.get_limiter(storage_id)
+        async with limiter.acquire():
+            with observe_stage('upload_complete', storage_id):
+                await self.file_storage_repository.multipart_complete(
+                    file.path, session.upload_id, [(part.part_number, part.etag) for part in parts.values()]
+                )
+        storage_object = await self.file_storage_repository.head(file.path)
+        if storage_object is None or storage_object.size != session.size:
+            raise FileNotReadyError(file.id)
+        inspection = await self.inspect(storage_id, file.path, session.size)
+        completed_file = await self.blob_service.complete(
+            file,
+            replace(storage_object, sha256=inspection.sha256.hexdigest()),
+            content_type=FileService.get_content_type(file, inspection),
+            inspection=inspection.get_result(),
+        )
+        await self.upload_session_repository.delete([session.id])
+        if completed_file is None:
+            return await self.file_repository.get(file.id)
+        if completed_file.path != file.path:
+            await self.file_storage_repository.delete(file.path)
+        return completed_file
+
+    async def inspect(self: Self, storage_id: uuid.UUID, path: str, size: int) -> ContentInspection:
+        """
+        Читаем собранный файл из хранилища и проверяем его содержимое.
+        """
+        inspection = ContentInspection()
+        limiter = self.file_storage_repository_pool.get_limiter(storage_id)
+        async with limiter.acquire(size / UPLOAD_COST_UNIT):
+            with observe_stage('upload_inspect', storage_id):
+                reader = InspectingStreamReader(
+                    IteratorStreamReader(self.file_storage_repository.straming_read(path)), inspection.inspectors
+                )
+                while await reader.read(READ_CHUNK_SIZE):
+                    pass
+        return inspection
+
+    async def abort(self: Self, storage_id: uuid.UUID, session_id: uuid.UUID) -> None:
+        """
+        Прерываем загрузку, удаляем записанные части и незавершенный файл.
+        """
+        session = await self.get_session(storage_id, session_id)
+        await self.file_storage_repository.multipart_abort(FileService.get_path(session.file_id), session.upload_id)
+        await self.blob_service.remove_files([session.file_id], status=FileStatusEnum.PENDING)
+        await self.upload_session_repository.delete([session.id])
+
+    async def get_session(self: Self, storage_id: uuid.UUID, session_id: uuid.UUID) -> UploadSessionReadSchema:
+        session = await self.upload_session_repository.get_or_none(session_id)
+        if session is None or session.storage_id != storage_id:
+            raise UploadSessionNotFoundError(session_id)
+        return session
+
+    @staticmethod
+    def get_session_part_size(size: int, part_size: int | None) -> int:
+        """
+        Приводим желаемый размер части к ограничениям хранилища и лимиту количества частей.
+        """
+        part_size = max(
+            min(part_size or get_part_size(size), UPLOAD_MAX_PART_SIZE),
+            UPLOAD_MIN_PART_SIZE,
+            -(-size // UPLOAD_MAX_PARTS),
+        )
+        if part_size > UPLOAD_MAX_PART_SIZE:
+            raise UploadTooLargeError(UPLOAD_MAX_PART_SIZE * UPLOAD_MAX_PARTS)
+        return part_size
+
+    @staticmethod
+    def make_response(
+        session: UploadSessionReadSchema, file: FileReadSchema, parts: list[UploadPartReadSchema]
+    ) -> UploadSessionResponseSchema:
+        offset = 0
+        for part_number, part in enumerate(parts, 1):
+            if part.part_number != part_number:
+                break
+            offset += part.size
+        return UploadSessionResponseSchema(
+            id=session.id,
+            file=file,
+            size=session.size,
+            part_size=session.part_size,
+            parts_count=session.parts_count,
+            offset=offset,
+            parts=[
+                UploadPartResponseSchema(part_number=part.part_number, size=part.size, etag=part.etag) for part in parts
+            ],
+            expires_at=session.updated_at + UPLOAD_SESSION_TTL,
+        )
@@ -0,0 +1,61 @@
+import datetime as dt
+from pathlib import Path
+
+from pydantic import BaseModel
+
+
+class DiskCacheSettingsSchema(BaseModel):
+    """
+    Схема настроек локального дискового кеша содержимого файлов.
+    """
+
+    enabled: bool = False
+    path: Path = Path('/var/cache/yafs')
+    max_size: int = 10 * 1024 * 1024 * 1024
+    max_file_size: int = 512 * 1024 * 1024
+
+
+class OrphanReconciliationSettingsSchema(BaseModel):
+    """
+    Схема настроек сверки объектов хранилищ с файлами.
+    """
+
+    enabled: bool = True
+    min_age: dt.timedelta = dt.timedelta(days=1)
+    """
+    Возраст, до которого объект без файла не считается потерянным: его загрузка может быть еще не оформлена.
+    """
+    quarantine: dt.timedelta = dt.timedelta(days=3)
+    """
+    Время между помещением объекта в карантин и его удалением.
+    """
+    bytes_per_second: int = 64 * 1024 * 1024
+    """
+    Ограничение скорости удаления объектов.
+    """
+    max_duration: dt.timedelta = dt.timedelta(hours=1)
+    """
+    Время одного запуска, непросмотренная часть хранилища сверяется следующим запуском.
+    """
+    batch_size: int = 1000
+
+
+class TieringSettingsSchema(BaseModel):
+    """
+    Схема настроек переноса давно не читавшихся файлов в более дешевые хранилища.
+    """
+
+    enabled: bool = True
+    concurrency: int = 4
+    """
+    Количество объектов, которые переносятся одновременно.
+    """
+    bytes_per_second: int = 32 * 1024 * 1024
+    """
+    Ограничение скорости копирования, чтобы перенос не отнимал канал и процессор у запросов.
+    """
+    max_duration: dt.timedelta = dt.timedelta(hours=2)
+    """
+    Время одного запуска, оставшиеся файлы переносятся следующим запуском.
+    """
+    batch_size: int = 100
@@ -1,6 +1,20 @@
+from .abort_upload_session import AbortUploadSessionUseCase as AbortUploadSessionUseCase
 from .add_storage import AddStorageUseCase as AddStorageUseCase
+from .archive_files import ArchiveFilesUseCase as ArchiveFilesUseCase
+from .complete_upload import CompleteUploadUseCase as CompleteUploadUseCase
+from .complete_upload_session import CompleteUploadSessionUseCase as CompleteUploadSessionUseCase
+from .copy_files import CopyFilesUseCase as CopyFilesUseCase
+from .create_upload_session import CreateUploadSessionUseCase as CreateUploadSessionUseCase
 from .delete_files import DeleteFilesUseCase as DeleteFilesUseCase
 from .file_info import FileInfoUseCase as FileInfoUseCase
+from .list_files import ListFilesUseCase as ListFilesUseCase
+from .lookup_files import LookupFilesUseCase as LookupFilesUseCase
+from .move_files import MoveFilesUseCase as MoveFilesUseCase
+from .presigned_download import PresignedDownloadUseCase as PresignedDownloadUseCase
+from .presigned_upload import PresignedUploadUseCase as PresignedUploadUseCase
 from .read_file import ReadFileUseCase as ReadFileUseCase
+from .update_storage import UpdateStorageUseCase as UpdateStorageUseCase
 from .upload_file import UploadFileUseCase as UploadFileUseCase
 from .upload_files import UploadFilesUseCase as UploadFilesUseCase
+from .upload_part import UploadPartUseCase as UploadPartUseCase
+from .upload_session_info import UploadSessionInfoUseCase as UploadSessionInfoUseCase
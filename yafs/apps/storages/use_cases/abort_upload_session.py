@@ -0,0 +1,17 @@
+import uuid
+from dataclasses import dataclass
+from typing import Self
+
+from ..services import UploadSessionService
+
+
+@dataclass
+class AbortUploadSessionUseCase:
+    """
+    Прерываем загрузку файла частями.
+    """
+
+    upload_session_service: UploadSessionService
+
+    async def __call__(self: Self, storage_id: uuid.UUID, session_id: uuid.UUID) -> None:
+        await self.upload_session_service.abort(storage_id, session_id)
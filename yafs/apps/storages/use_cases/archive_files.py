@@ -0,0 +1,28 @@
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Self
+
+from ..archives import iter_archive, make_archive_writer
+from ..schemas import FileArchiveRequestSchema
+from ..services import FileService
+
+
+@dataclass
+class ArchiveFilesUseCase:
+    """
+    Собираем несколько файлов в один архив.
+    """
+
+    file_service: FileService
+
+    async def __call__(
+        self: Self, storage_id: uuid.UUID, archive_request: FileArchiveRequestSchema
+    ) -> AsyncIterator[bytes]:
+        files = await self.file_service.get_archive_files(storage_id, archive_request.file_ids)
+        return iter_archive(
+            make_archive_writer(archive_request.format, archive_request.compress),
+            files,
+            self.file_service.stream_reader,
+            compress=archive_request.compress,
+        )
@@ -0,0 +1,18 @@
+import uuid
+from dataclasses import dataclass
+from typing import Self
+
+from ..schemas import FileReadSchema
+from ..services import FileService
+
+
+@dataclass
+class CompleteUploadUseCase:
+    """
+    Завершаем загрузку файла напрямую в хранилище.
+    """
+
+    file_service: FileService
+
+    async def __call__(self: Self, file_id: uuid.UUID) -> FileReadSchema:
+        return await self.file_service.complete_upload(file_id)
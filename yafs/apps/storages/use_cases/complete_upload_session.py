@@ -0,0 +1,18 @@
+import uuid
+from dataclasses import dataclass
+from typing import Self
+
+from ..schemas import FileReadSchema
+from ..services import UploadSessionService
+
+
+@dataclass
+class CompleteUploadSessionUseCase:
+    """
+    Завершаем загрузку файла частями.
+    """
+
+    upload_session_service: UploadSessionService
+
+    async def __call__(self: Self, storage_id: uuid.UUID, session_id: uuid.UUID) -> FileReadSchema:
+        return await self.upload_session_service.complete(storage_id, session_id)
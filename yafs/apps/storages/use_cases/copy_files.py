@@ -0,0 +1,18 @@
+import uuid
+from dataclasses import dataclass
+from typing import Self
+
+from ..schemas import FileCopySchema, FileReadSchema
+from ..services import FileCopyService
+
+
+@dataclass
+class CopyFilesUseCase:
+    """
+    Копируем файлы, не передавая содержимое через приложение, если хранилища это позволяют.
+    """
+
+    file_copy_service: FileCopyService
+
+    async def __call__(self: Self, storage_id: uuid.UUID, copies: list[FileCopySchema]) -> list[FileReadSchema]:
+        return await self.file_copy_service.copy_files(storage_id, copies)
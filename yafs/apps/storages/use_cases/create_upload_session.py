@@ -0,0 +1,20 @@
+import uuid
+from dataclasses import dataclass
+from typing import Self
+
+from ..schemas import UploadSessionCreateRequestSchema, UploadSessionResponseSchema
+from ..services import UploadSessionService
+
+
+@dataclass
+class CreateUploadSessionUseCase:
+    """
+    Начинаем загрузку файла частями.
+    """
+
+    upload_session_service: UploadSessionService
+
+    async def __call__(
+        self: Self, storage_id: uuid.UUID, upload_request: UploadSessionCreateRequestSchema
+    ) -> UploadSessionResponseSchema:
+        return await self.upload_session_service.create(storage_id, upload_request)
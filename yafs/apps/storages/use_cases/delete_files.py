@@ -2,6 +2,7 @@ import uuid
 from dataclasses import dataclass
 from typing import Self
 
+from ..schemas import FileDeleteResponseSchema
 from ..services import FileService
 
 
@@ -13,5 +14,5 @@ class DeleteFilesUseCase:
 
     file_service: FileService
 
-    async def __call__(self: Self, file_ids: list[uuid.UUID]) -> bool:
-        return await self.file_service.delete(file_ids)
+    async def __call__(self: Self, storage_id: uuid.UUID, file_ids: list[uuid.UUID]) -> FileDeleteResponseSchema:
+        return await self.file_service.delete(storage_id, file_ids)
@@ -0,0 +1,21 @@
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Self
+
+from ..schemas import FileListFilterSchema, FileReadSchema
+from ..services import FileService
+
+
+@dataclass
+class ListFilesUseCase:
+    """
+    Получаем список файлов хранилища.
+    """
+
+    file_service: FileService
+
+    async def __call__(
+        self: Self, storage_id: uuid.UUID, filter_schema: FileListFilterSchema, cursor: str | None, limit: int
+    ) -> AsyncIterator[FileReadSchema]:
+        return self.file_service.list_files(storage_id, filter_schema, cursor, limit)
@@ -0,0 +1,18 @@
+import uuid
+from dataclasses import dataclass
+from typing import Self
+
+from ..schemas import FileLookupItemSchema
+from ..services import FileService
+
+
+@dataclass
+class LookupFilesUseCase:
+    """
+    Получаем метаданные нескольких файлов одним запросом.
+    """
+
+    file_service: FileService
+
+    async def __call__(self: Self, storage_id: uuid.UUID, file_ids: list[uuid.UUID]) -> list[FileLookupItemSchema]:
+        return await self.file_service.lookup(storage_id, file_ids)
@@ -0,0 +1,18 @@
+import uuid
+from dataclasses import dataclass
+from typing import Self
+
+from ..schemas import FileMoveSchema, FileReadSchema
+from ..services import FileCopyService
+
+
+@dataclass
+class MoveFilesUseCase:
+    """
+    Переносим файлы в другие хранилища с сохранением идентификаторов.
+    """
+
+    file_copy_service: FileCopyService
+
+    async def __call__(self: Self, storage_id: uuid.UUID, moves: list[FileMoveSchema]) -> list[FileReadSchema]:
+        return await self.file_copy_service.move_files(storage_id, moves)
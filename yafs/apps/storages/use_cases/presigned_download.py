@@ -0,0 +1,18 @@
+import uuid
+from dataclasses import dataclass
+from typing import Self
+
+from ..schemas import FilePresignedDownloadResponseSchema
+from ..services import FileService
+
+
+@dataclass
+class PresignedDownloadUseCase:
+    """
+    Выдаем ссылку на скачивание файла напрямую из хранилища.
+    """
+
+    file_service: FileService
+
+    async def __call__(self: Self, file_id: uuid.UUID) -> FilePresignedDownloadResponseSchema:
+        return await self.file_service.create_download_url(file_id)
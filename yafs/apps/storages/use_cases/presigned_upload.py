@@ -0,0 +1,20 @@
+import uuid
+from dataclasses import dataclass
+from typing import Self
+
+from ..schemas import FilePresignedUploadRequestSchema, FilePresignedUploadResponseSchema
+from ..services import FileService
+
+
+@dataclass
+class PresignedUploadUseCase:
+    """
+    Выдаем ссылку на загрузку файла напрямую в хранилище.
+    """
+
+    file_service: FileService
+
+    async def __call__(
+        self: Self, storage_id: uuid.UUID, upload_request: FilePresignedUploadRequestSchema
+    ) -> FilePresignedUploadResponseSchema:
+        return await self.file_service.create_upload_url(storage_id, upload_request)
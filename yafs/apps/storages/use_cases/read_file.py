@@ -1,7 +1,10 @@
 import uuid
 from dataclasses import dataclass
-from typing import AsyncIterator, Self
+from typing import Self
 
+from ..encodings import accepts_encoding
+from ..ranges import check_not_modified, get_byte_ranges, get_etag
+from ..schemas import FileStreamSchema
 from ..services import FileService
 
 
@@ -13,6 +16,51 @@ class ReadFileUseCase:
 
     file_service: FileService
 
-    async def __call__(self: Self, file_id: uuid.UUID) -> AsyncIterator[bytes]:
-        file = await self.file_service.get(file_id)
-        return self.file_service.stream_reader(file)
+    async def __call__(
+        self: Self,
+        storage_id: uuid.UUID,
+        file_id: uuid.UUID,
+        *,
+        range_header: str | None = None,
+        if_range: str | None = None,
+        accept_encoding: str | None = None,
+        if_none_match: str | None = None,
+        if_modified_since: str | None = None,
+    ) -> FileStreamSchema:
+        file = await self.file_service.get_ready(file_id)
+        cache_control = await self.file_service.get_cache_control(file)
+        content_encoding = (
+            file.encoding if file.encoding is not None and accepts_encoding(accept_encoding, file.encoding) else None
+        )
+        etag = get_etag(file, content_encoding)
+        if check_not_modified(if_none_match, if_modified_since, etag, file.created_at):
+            # Файлы не изменяются после загрузки, поэтому ответ строится по метаданным без чтения хранилища.
+            return FileStreamSchema(file=file, etag=etag, cache_control=cache_control, not_modified=True)
+        local_path = self.file_service.get_local_path(file)
+        if local_path is not None and file.encoding is None:
+            return FileStreamSchema(file=file, local_path=local_path, etag=etag, cache_control=cache_control)
+        # Диапазоны отдаются из исходного содержимого, поэтому If-Range сравнивается с его ETag.
+        ranges = get_byte_ranges(range_header, if_range, get_etag(file), file.size, file.created_at)
+        if not ranges and content_encoding is not None:
+            # Клиент распакует файл сам, отдаем сжатое содержимое как есть.
+            return FileStreamSchema(
+                file=file,
+                parts=[self.file_service.stream_reader(file, decode=False)],
+                content_encoding=content_encoding,
+                etag=etag,
+                cache_control=cache_control,
+            )
+        if not ranges:
+            return FileStreamSchema(
+                file=file,
+                parts=[self.file_service.stream_reader(file)],
+                etag=get_etag(file),
+                cache_control=cache_control,
+            )
+        return FileStreamSchema(
+            file=file,
+            ranges=ranges,
+            parts=[self.file_service.stream_reader(file, byte_range) for byte_range in ranges],
+            etag=get_etag(file),
+            cache_control=cache_control,
+        )
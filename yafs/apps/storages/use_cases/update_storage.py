@@ -0,0 +1,17 @@
+import uuid
+from dataclasses import dataclass
+from typing import Self
+
+from ..schemas import StorageResponseSchema, StorageUpdateRequestSchema
+from ..services import StorageService
+
+
+@dataclass
+class UpdateStorageUseCase:
+    storage_service: StorageService
+
+    async def __call__(
+        self: Self, storage_id: uuid.UUID, storage_schema: StorageUpdateRequestSchema
+    ) -> StorageResponseSchema:
+        storage = await self.storage_service.update_storage(storage_id, storage_schema)
+        return StorageResponseSchema(id=storage.id)
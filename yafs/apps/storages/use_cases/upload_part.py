@@ -0,0 +1,21 @@
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Self
+
+from ..schemas import UploadPartResponseSchema
+from ..services import UploadSessionService
+
+
+@dataclass
+class UploadPartUseCase:
+    """
+    Записываем часть файла.
+    """
+
+    upload_session_service: UploadSessionService
+
+    async def __call__(
+        self: Self, storage_id: uuid.UUID, session_id: uuid.UUID, part_number: int, chunks: AsyncIterator[bytes]
+    ) -> UploadPartResponseSchema:
+        return await self.upload_session_service.write_part(storage_id, session_id, part_number, chunks)
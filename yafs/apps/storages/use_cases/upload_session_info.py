@@ -0,0 +1,18 @@
+import uuid
+from dataclasses import dataclass
+from typing import Self
+
+from ..schemas import UploadSessionResponseSchema
+from ..services import UploadSessionService
+
+
+@dataclass
+class UploadSessionInfoUseCase:
+    """
+    Получаем состояние загрузки файла частями.
+    """
+
+    upload_session_service: UploadSessionService
+
+    async def __call__(self: Self, storage_id: uuid.UUID, session_id: uuid.UUID) -> UploadSessionResponseSchema:
+        return await self.upload_session_service.get_state(storage_id, session_id)
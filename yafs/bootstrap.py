@@ -10,7 +10,9 @@ from fast_clean.middleware import use_middleware
 from fast_clean.utils.toml import use_toml_info
 from fastapi import FastAPI
 
+from yafs.apps.scheduler.repositories import SchedulerRepository
 from yafs.apps.storages.exceptions import use_exceptions_handlers as use_storage_exception_handlers
+from yafs.apps.storages.jobs import use_jobs as use_storage_jobs
 
 from .settings import SettingsSchema
 
@@ -23,10 +25,18 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     - устанавливаем настройки логгирования
     - устанавливаем настройки кеширования
     - устанавливаем настройки стриминга
+    - запускаем периодические задачи
     """
+    container = ContainerManager.container
+    assert container
+    scheduler_repository = await container.get(SchedulerRepository)
+    use_storage_jobs(scheduler_repository)
+    await scheduler_repository.start()
 
     yield
 
+    await scheduler_repository.shutdown()
+
     await ContainerManager.close()
 
 
@@ -1,7 +1,7 @@
 import typer
 from fast_clean.cli import use_cryptography, use_load_seed
 
-from yafs.apps.storages.commands import add_s3_storage
+from yafs.apps.storages.commands import add_local_storage, add_s3_storage
 
 
 def create_app() -> typer.Typer:
@@ -11,5 +11,6 @@ def create_app() -> typer.Typer:
     use_load_seed(app)
 
     app.command()(add_s3_storage)
+    app.command()(add_local_storage)
 
     return app
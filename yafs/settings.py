@@ -8,6 +8,13 @@ from fast_clean.settings import (
 )
 from pydantic import Field
 
+from yafs.apps.scheduler.settings import SchedulerSettingsSchema
+from yafs.apps.storages.settings import (
+    DiskCacheSettingsSchema,
+    OrphanReconciliationSettingsSchema,
+    TieringSettingsSchema,
+)
+
 
 class SettingsSchema(CoreSettingsSchema):
     """
@@ -19,6 +26,10 @@ class SettingsSchema(CoreSettingsSchema):
     db: CoreDbSettingsSchema
     storage: CoreStorageSettingsSchema
     cache: CoreCacheSettingsSchema
+    disk_cache: Annotated[DiskCacheSettingsSchema, Field(default_factory=DiskCacheSettingsSchema)]
+    orphans: Annotated[OrphanReconciliationSettingsSchema, Field(default_factory=OrphanReconciliationSettingsSchema)]
+    scheduler: Annotated[SchedulerSettingsSchema, Field(default_factory=SchedulerSettingsSchema)]
+    tiering: Annotated[TieringSettingsSchema, Field(default_factory=TieringSettingsSchema)]
 
 
 settings = SettingsSchema()  # type: ignore